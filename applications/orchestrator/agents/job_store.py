@@ -0,0 +1,319 @@
+"""
+Fila durável de jobs de agentes (POST /invoke/{role}/async).
+SQLite em modo WAL sob PROJECT_FILES_ROOT (padrão) ou Postgres quando DATABASE_URL está definida
+(tabela agent_jobs, migration 037). Um restart do container não perde jobs: o worker faz claim
+com lease, estende via heartbeat e, se morrer, o lease vence e outro worker retoma o job.
+
+Estados: queued → running → done | error.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+AGENT_JOB_LEASE_SEC = float(os.environ.get("AGENT_JOB_LEASE_SEC", "120"))
+AGENT_JOB_MAX_ATTEMPTS = int(os.environ.get("AGENT_JOB_MAX_ATTEMPTS", "3"))
+AGENT_JOB_RETENTION_SEC = float(os.environ.get("AGENT_JOB_RETENTION_SEC", str(24 * 3600)))
+
+JOB_STATES = ("queued", "running", "done", "error")
+
+
+def new_job_id(role: str) -> str:
+    return f"{role}-{uuid.uuid4().hex[:12]}"
+
+
+class SQLiteJobStore:
+    """Job store em arquivo SQLite (WAL). Uma conexão por processo, serializada por lock."""
+
+    def __init__(self, path: str | Path, max_attempts: int = AGENT_JOB_MAX_ATTEMPTS) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS agent_jobs (
+              job_id TEXT PRIMARY KEY,
+              role TEXT NOT NULL,
+              status TEXT NOT NULL DEFAULT 'queued',
+              body TEXT NOT NULL,
+              result TEXT,
+              error TEXT,
+              attempts INTEGER NOT NULL DEFAULT 0,
+              worker_id TEXT,
+              lease_expires_at REAL,
+              created_at REAL NOT NULL,
+              updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_agent_jobs_claim ON agent_jobs(status, created_at)")
+
+    def submit(self, role: str, body: dict, job_id: str | None = None) -> str:
+        job_id = job_id or new_job_id(role)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO agent_jobs (job_id, role, status, body, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, role, json.dumps(body, ensure_ascii=False), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM agent_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim(self, worker_id: str, lease_sec: float = AGENT_JOB_LEASE_SEC) -> dict | None:
+        """Pega o job queued mais antigo (ou running com lease vencido) e o atribui ao worker."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE agent_jobs SET status = 'error', error = ?, worker_id = NULL, updated_at = ? "
+                    "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?",
+                    (f"lease expirado após {self.max_attempts} tentativa(s)", now, now, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    "SELECT job_id FROM agent_jobs WHERE status = 'queued' "
+                    "OR (status = 'running' AND lease_expires_at < ?) ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE agent_jobs SET status = 'running', worker_id = ?, attempts = attempts + 1, "
+                    "lease_expires_at = ?, updated_at = ? WHERE job_id = ?",
+                    (worker_id, now + lease_sec, now, row["job_id"]),
+                )
+                claimed = self._conn.execute("SELECT * FROM agent_jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._row_to_job(claimed, with_body=True)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_sec: float = AGENT_JOB_LEASE_SEC) -> bool:
+        """Estende o lease; False se o job não pertence mais a este worker."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE agent_jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (now + lease_sec, now, job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        return self._finish(job_id, worker_id, "done", result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._finish(job_id, worker_id, "error", error=(error or "")[:2000])
+
+    def _finish(self, job_id: str, worker_id: str, status: str, result: str | None = None, error: str | None = None) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE agent_jobs SET status = ?, result = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (status, result, error, time.time(), job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def cleanup(self, retention_sec: float = AGENT_JOB_RETENTION_SEC) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM agent_jobs WHERE status IN ('done', 'error') AND updated_at < ?",
+                (time.time() - retention_sec,),
+            )
+        return cur.rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM agent_jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row, with_body: bool = False) -> dict:
+        job = {
+            "job_id": row["job_id"],
+            "role": row["role"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "worker_id": row["worker_id"],
+            "lease_expires_at": row["lease_expires_at"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if with_body:
+            job["body"] = json.loads(row["body"])
+        return job
+
+
+class PostgresJobStore:
+    """Job store na tabela agent_jobs (migration 037). Claim com FOR UPDATE SKIP LOCKED."""
+
+    _COLUMNS = (
+        "job_id, role, status, result, error, attempts, worker_id, "
+        "EXTRACT(EPOCH FROM lease_expires_at), EXTRACT(EPOCH FROM created_at), EXTRACT(EPOCH FROM updated_at)"
+    )
+
+    def __init__(self, dsn: str, max_attempts: int = AGENT_JOB_MAX_ATTEMPTS) -> None:
+        self.dsn = dsn
+        self.max_attempts = max_attempts
+
+    def _execute(self, sql: str, params: tuple = (), fetch: str = "") -> Any:
+        """sql em uma transação no pool compartilhado do DSN (orchestrator/pg_pool.py)."""
+        from orchestrator.pg_pool import get_pg_pool
+
+        def _work(cur):
+            cur.execute(sql, params)
+            if fetch == "one":
+                return cur.fetchone()
+            if fetch == "all":
+                return cur.fetchall()
+            return cur.rowcount
+
+        return get_pg_pool(self.dsn).run(_work)
+
+    def submit(self, role: str, body: dict, job_id: str | None = None) -> str:
+        job_id = job_id or new_job_id(role)
+        self._execute(
+            "INSERT INTO agent_jobs (job_id, role, status, body) VALUES (%s, %s, 'queued', %s::jsonb)",
+            (job_id, role, json.dumps(body, ensure_ascii=False)),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        row = self._execute(f"SELECT {self._COLUMNS} FROM agent_jobs WHERE job_id = %s", (job_id,), fetch="one")
+        return self._row_to_job(row) if row else None
+
+    def claim(self, worker_id: str, lease_sec: float = AGENT_JOB_LEASE_SEC) -> dict | None:
+        self._execute(
+            "UPDATE agent_jobs SET status = 'error', error = %s, worker_id = NULL, updated_at = NOW() "
+            "WHERE status = 'running' AND lease_expires_at < NOW() AND attempts >= %s",
+            (f"lease expirado após {self.max_attempts} tentativa(s)", self.max_attempts),
+        )
+        row = self._execute(
+            f"""
+            UPDATE agent_jobs SET status = 'running', worker_id = %s, attempts = attempts + 1,
+                   lease_expires_at = NOW() + make_interval(secs => %s), updated_at = NOW()
+             WHERE job_id = (
+                   SELECT job_id FROM agent_jobs
+                    WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < NOW())
+                 ORDER BY created_at
+                      FOR UPDATE SKIP LOCKED
+                    LIMIT 1)
+         RETURNING {self._COLUMNS}, body
+            """,
+            (worker_id, lease_sec),
+            fetch="one",
+        )
+        if not row:
+            return None
+        job = self._row_to_job(row[:-1])
+        body = row[-1]
+        job["body"] = json.loads(body) if isinstance(body, str) else body
+        return job
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_sec: float = AGENT_JOB_LEASE_SEC) -> bool:
+        return self._execute(
+            "UPDATE agent_jobs SET lease_expires_at = NOW() + make_interval(secs => %s), updated_at = NOW() "
+            "WHERE job_id = %s AND worker_id = %s AND status = 'running'",
+            (lease_sec, job_id, worker_id),
+        ) == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        return self._execute(
+            "UPDATE agent_jobs SET status = 'done', result = %s::jsonb, lease_expires_at = NULL, updated_at = NOW() "
+            "WHERE job_id = %s AND worker_id = %s AND status = 'running'",
+            (json.dumps(result, ensure_ascii=False), job_id, worker_id),
+        ) == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._execute(
+            "UPDATE agent_jobs SET status = 'error', error = %s, lease_expires_at = NULL, updated_at = NOW() "
+            "WHERE job_id = %s AND worker_id = %s AND status = 'running'",
+            ((error or "")[:2000], job_id, worker_id),
+        ) == 1
+
+    def cleanup(self, retention_sec: float = AGENT_JOB_RETENTION_SEC) -> int:
+        return self._execute(
+            "DELETE FROM agent_jobs WHERE status IN ('done', 'error') AND updated_at < NOW() - make_interval(secs => %s)",
+            (retention_sec,),
+        )
+
+    def counts(self) -> dict:
+        rows = self._execute("SELECT status, COUNT(*) FROM agent_jobs GROUP BY status", fetch="all") or []
+        return {status: n for status, n in rows}
+
+    @staticmethod
+    def _row_to_job(row: tuple) -> dict:
+        job_id, role, status, result, error, attempts, worker_id, lease, created, updated = row
+        return {
+            "job_id": job_id,
+            "role": role,
+            "status": status,
+            "result": json.loads(result) if isinstance(result, str) else result,
+            "error": error,
+            "attempts": attempts,
+            "worker_id": worker_id,
+            "lease_expires_at": float(lease) if lease is not None else None,
+            "created_at": float(created) if created is not None else None,
+            "updated_at": float(updated) if updated is not None else None,
+        }
+
+
+def _default_sqlite_path() -> Path:
+    explicit = os.environ.get("AGENT_JOB_DB_PATH", "").strip()
+    if explicit:
+        return Path(explicit)
+    try:
+        from orchestrator import project_storage as storage
+        root = storage.get_files_root()
+    except ImportError:
+        root = Path(os.environ.get("PROJECT_FILES_ROOT", "").strip() or Path.home() / "zentriz-files")
+    return Path(root) / ".agent-jobs" / "jobs.sqlite3"
+
+
+_store: SQLiteJobStore | PostgresJobStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> SQLiteJobStore | PostgresJobStore:
+    """Singleton: Postgres quando DATABASE_URL está definida, senão SQLite sob o files root."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            dsn = os.environ.get("DATABASE_URL", "").strip()
+            if dsn:
+                _store = PostgresJobStore(dsn)
+                logger.info("[JobStore] Usando Postgres (agent_jobs)")
+            else:
+                path = _default_sqlite_path()
+                _store = SQLiteJobStore(path)
+                logger.info("[JobStore] Usando SQLite em %s", path)
+        return _store
+
+
+def reset_job_store(store: SQLiteJobStore | PostgresJobStore | None = None) -> None:
+    """Troca o singleton (testes / reconfiguração)."""
+    global _store
+    with _store_lock:
+        _store = store
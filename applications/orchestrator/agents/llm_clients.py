@@ -0,0 +1,241 @@
+"""
+Registry de clientes LLM (Anthropic, AWS Bedrock, OpenAI) compartilhado entre invocações.
+Cada cliente mantém seu pool httpx com keep-alive; reutilizá-lo evita novo handshake TLS e nova
+resolução de credenciais botocore a cada run_agent / call_bedrock_direct.
+
+Chave: (provider, região, fingerprint das credenciais, hash da api key, escopo do tenant).
+Segredos nunca ficam na chave — só um sha256 truncado. Entradas ociosas expiram
+(LLM_CLIENT_IDLE_TTL_SEC) e o registry é limitado (LLM_CLIENT_POOL_MAX, LRU).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+LLM_CLIENT_POOL_MAX = int(os.environ.get("LLM_CLIENT_POOL_MAX", "16"))
+LLM_CLIENT_IDLE_TTL_SEC = float(os.environ.get("LLM_CLIENT_IDLE_TTL_SEC", "900"))
+LLM_HTTP_MAX_CONNECTIONS = int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", "50"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY_SEC = float(os.environ.get("LLM_HTTP_KEEPALIVE_EXPIRY_SEC", "120"))
+
+ClientKey = tuple[str, str, str, str, str]
+
+
+def _fingerprint(*secrets: str | None) -> str:
+    """sha256 truncado de segredos — identifica a credencial sem guardá-la na chave."""
+    material = "\x1f".join(s or "" for s in secrets)
+    if not material.strip("\x1f"):
+        return ""
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMClientRegistry:
+    """
+    Cache LRU thread-safe de clientes LLM com expiração por ociosidade.
+    Clientes despejados não são fechados explicitamente: outra thread pode estar no meio
+    de uma chamada com eles; o pool httpx é liberado quando a última referência cai.
+    """
+
+    def __init__(
+        self,
+        max_size: int = LLM_CLIENT_POOL_MAX,
+        idle_ttl_sec: float = LLM_CLIENT_IDLE_TTL_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max(1, max_size)
+        self._idle_ttl = idle_ttl_sec
+        self._clock = clock
+        self._entries: OrderedDict[ClientKey, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key: ClientKey, factory: Callable[[], Any]) -> Any:
+        now = self._clock()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            # Criação sob o lock: evita dois clientes para a mesma chave em rajadas paralelas
+            # (QA paralelo, auditoria Cyborg). A construção não faz I/O de rede.
+            client = factory()
+            self._entries[key] = (client, now)
+            self.misses += 1
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return client
+
+    def _evict_idle(self, now: float) -> None:
+        if self._idle_ttl <= 0:
+            return
+        stale = [k for k, (_, last) in self._entries.items() if now - last > self._idle_ttl]
+        for k in stale:
+            del self._entries[k]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "providers": sorted({k[0] for k in self._entries}),
+            }
+
+
+_registry = LLMClientRegistry()
+_aws_env_scrubbed = False
+_aws_env_lock = threading.Lock()
+
+
+def get_registry() -> LLMClientRegistry:
+    return _registry
+
+
+def _scrub_aws_profile_env() -> None:
+    """
+    AWS_PROFILE vazio ("") causa ProfileNotFound no botocore. Antes era removido a cada
+    chamada; agora uma vez por processo, na primeira criação de cliente Bedrock.
+    """
+    global _aws_env_scrubbed
+    with _aws_env_lock:
+        if _aws_env_scrubbed:
+            return
+        os.environ.pop("AWS_PROFILE", None)
+        os.environ.pop("AWS_DEFAULT_PROFILE", None)
+        _aws_env_scrubbed = True
+
+
+def _http_client() -> Any | None:
+    """httpx.Client com limites de keep-alive explícitos (None → default do SDK)."""
+    try:
+        import httpx
+        from anthropic import DefaultHttpxClient
+    except ImportError:
+        return None
+    return DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_SEC,
+        ),
+    )
+
+
+def get_anthropic_client(api_key: str, scope: str = "") -> Any:
+    """Cliente Anthropic (API direta) compartilhado por api key."""
+    from anthropic import Anthropic
+
+    def _factory():
+        kwargs: dict = {"api_key": api_key}
+        http_client = _http_client()
+        if http_client is not None:
+            kwargs["http_client"] = http_client
+        logger.info("[LLMClients] Novo cliente Anthropic (scope=%s)", scope or "-")
+        return Anthropic(**kwargs)
+
+    key: ClientKey = ("anthropic", "", "", _fingerprint(api_key), scope)
+    return _registry.get_or_create(key, _factory)
+
+
+def get_bedrock_client(
+    aws_region: str,
+    aws_access_key: str = "",
+    aws_secret_key: str = "",
+    aws_session_token: str = "",
+    scope: str = "",
+) -> Any:
+    """
+    Cliente AnthropicBedrock compartilhado por (região, credenciais, escopo).
+    Sem credenciais explícitas o boto3 usa a credential chain (~/.aws, instance profile, etc.).
+    """
+    from anthropic import AnthropicBedrock
+
+    _scrub_aws_profile_env()
+
+    def _factory():
+        kwargs: dict = {"aws_region": aws_region}
+        if aws_access_key and aws_secret_key:
+            kwargs["aws_access_key"] = aws_access_key
+            kwargs["aws_secret_key"] = aws_secret_key
+            if aws_session_token:
+                kwargs["aws_session_token"] = aws_session_token
+        http_client = _http_client()
+        if http_client is not None:
+            kwargs["http_client"] = http_client
+        logger.info("[LLMClients] Novo cliente Bedrock (region=%s scope=%s)", aws_region, scope or "-")
+        return AnthropicBedrock(**kwargs)
+
+    creds = _fingerprint(aws_access_key, aws_secret_key, aws_session_token) if aws_access_key and aws_secret_key else ""
+    key: ClientKey = ("bedrock", aws_region, creds, "", scope)
+    return _registry.get_or_create(key, _factory)
+
+
+def get_async_bedrock_client(
+    aws_region: str,
+    aws_access_key: str = "",
+    aws_secret_key: str = "",
+    aws_session_token: str = "",
+    scope: str = "",
+) -> Any:
+    """
+    AsyncAnthropicBedrock compartilhado — para chamadas nativamente assíncronas no event loop
+    do serviço de agentes (/invoke/raw). Mesma política de chave do cliente síncrono.
+    """
+    from anthropic import AsyncAnthropicBedrock
+
+    _scrub_aws_profile_env()
+
+    def _factory():
+        kwargs: dict = {"aws_region": aws_region}
+        if aws_access_key and aws_secret_key:
+            kwargs["aws_access_key"] = aws_access_key
+            kwargs["aws_secret_key"] = aws_secret_key
+            if aws_session_token:
+                kwargs["aws_session_token"] = aws_session_token
+        logger.info("[LLMClients] Novo cliente Bedrock async (region=%s scope=%s)", aws_region, scope or "-")
+        return AsyncAnthropicBedrock(**kwargs)
+
+    creds = _fingerprint(aws_access_key, aws_secret_key, aws_session_token) if aws_access_key and aws_secret_key else ""
+    key: ClientKey = ("bedrock_async", aws_region, creds, "", scope)
+    return _registry.get_or_create(key, _factory)
+
+
+def get_openai_client(api_key: str, scope: str = "") -> Any:
+    """Cliente OpenAI compartilhado por api key (timeout por chamada via with_options)."""
+    from openai import OpenAI
+
+    def _factory():
+        logger.info("[LLMClients] Novo cliente OpenAI (scope=%s)", scope or "-")
+        return OpenAI(api_key=api_key)
+
+    key: ClientKey = ("openai", "", "", _fingerprint(api_key), scope)
+    return _registry.get_or_create(key, _factory)
+
+
+def tenant_scope(llm_config: dict | None) -> str:
+    """
+    Escopo de isolamento para overrides de llm_config vindos do runner (FT-13):
+    clientes de tenants diferentes nunca são compartilhados, mesmo com credenciais iguais.
+    """
+    cfg = llm_config or {}
+    return str(cfg.get("tenant_id") or cfg.get("tenantId") or "").strip()
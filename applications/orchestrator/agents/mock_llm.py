@@ -0,0 +1,300 @@
+"""
+Provider LLM offline (GENESIS_LLM_PROVIDER=mock) para benchmark e testes sem Bedrock.
+
+MockLLMClient tem a mesma superfície do cliente Anthropic usada por run_agent (messages.create e
+messages.stream), então parse, gates de modo, repair e persistência rodam exatamente como em produção:
+  - replay: respostas brutas gravadas por _persist_raw_llm_response (docs/<role>/raw_response_<request_id>.txt)
+    nos diretórios de MOCK_LLM_RECORDINGS — mesmo request_id primeiro, senão uma do mesmo role que
+    tenha os paths exigidos pelo modo;
+  - sem gravação: envelope sintético válido para role+modo (paths dos gates, evidence, backlog com tasks).
+Latência simulada: MOCK_LLM_LATENCY_MS até o primeiro token + tokens de saída / MOCK_LLM_TOKENS_PER_SEC.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+MOCK_LLM_LATENCY_MS = float(os.environ.get("MOCK_LLM_LATENCY_MS", "0") or 0)
+MOCK_LLM_TOKENS_PER_SEC = float(os.environ.get("MOCK_LLM_TOKENS_PER_SEC", "0") or 0)
+MOCK_LLM_ARTIFACT_CHARS = int(os.environ.get("MOCK_LLM_ARTIFACT_CHARS", "2000") or 2000)
+MOCK_LLM_BACKLOG_TASKS = int(os.environ.get("MOCK_LLM_BACKLOG_TASKS", "3") or 3)
+
+_CHARS_PER_TOKEN = 4
+_STREAM_CHUNK_CHARS = 256
+
+_recordings_lock = threading.Lock()
+_recordings: dict[str, list[Path]] | None = None  # role_dir → gravações (ordem estável)
+_recordings_by_request: dict[str, Path] = {}
+_replay_cursor: dict[str, int] = {}
+
+
+def _role_dir(role: str) -> str:
+    return (role or "agent").lower().replace("_", "-")
+
+
+def _safe_request_id(request_id) -> str:
+    if not isinstance(request_id, str):
+        return "unknown"
+    return "".join(c for c in request_id if c.isalnum() or c in "._-")[:64] or "unknown"
+
+
+def _load_recordings() -> dict[str, list[Path]]:
+    global _recordings
+    with _recordings_lock:
+        if _recordings is not None:
+            return _recordings
+        index: dict[str, list[Path]] = {}
+        for root in (os.environ.get("MOCK_LLM_RECORDINGS") or "").split(os.pathsep):
+            root = root.strip()
+            if not root or not Path(root).is_dir():
+                continue
+            for path in sorted(Path(root).rglob("raw_response_*.txt")):
+                index.setdefault(path.parent.name.lower(), []).append(path)
+                _recordings_by_request.setdefault(path.stem[len("raw_response_"):], path)
+        if index:
+            logger.info("[MockLLM] %d gravações de %d roles", sum(len(v) for v in index.values()), len(index))
+        _recordings = index
+        return index
+
+
+def reset_recordings() -> None:
+    """Esquece o índice de gravações (testes / troca de MOCK_LLM_RECORDINGS)."""
+    global _recordings
+    with _recordings_lock:
+        _recordings = None
+        _recordings_by_request.clear()
+        _replay_cursor.clear()
+
+
+def _replay(role: str, mode: str, request_id: str, task_id: str | None) -> str | None:
+    recordings = _load_recordings()
+    exact = _recordings_by_request.get(_safe_request_id(request_id))
+    if exact is not None:
+        return exact.read_text(encoding="utf-8", errors="replace")
+    candidates = recordings.get(_role_dir(role)) or []
+    if not candidates:
+        return None
+    try:
+        from orchestrator.envelope import _required_path_prefixes_for_mode
+        required = _required_path_prefixes_for_mode(role, mode, task_id)
+    except ImportError:
+        required = []
+    # dev_implementation_<task> depende da task gravada: basta o prefixo do diretório
+    required = [p.rsplit("/", 1)[0] + "/" if p.endswith("_") else p for p in required]
+    key = f"{_role_dir(role)}:{mode}"
+    with _recordings_lock:
+        start = _replay_cursor.get(key, 0)
+        for step in range(len(candidates)):
+            path = candidates[(start + step) % len(candidates)]
+            text = path.read_text(encoding="utf-8", errors="replace")
+            if all(p in text for p in required):
+                _replay_cursor[key] = start + step + 1
+                return text
+    return None
+
+
+def _filler(title: str, chars: int) -> str:
+    """Conteúdo determinístico com o tamanho pedido (sem marcadores que os gates tratam como truncamento)."""
+    lines = [f"# {title}", ""]
+    n = 0
+    while sum(len(line) + 1 for line in lines) < chars:
+        n += 1
+        lines.append(f"- Item {n}: requisito {title.lower()} detalhado para benchmark offline do pipeline.")
+    return "\n".join(lines) + "\n"
+
+
+def _code(name: str, chars: int) -> str:
+    ident = re.sub(r"\W", "_", name) or "mock"
+    lines = [f"// {name}", f"export const {ident}Items: string[] = ["]
+    n = 0
+    while sum(len(line) + 1 for line in lines) < chars:
+        n += 1
+        lines.append(f'  "{ident}-item-{n}",')
+    lines += ["];", "", f"export function {ident}Count(): number {{", f"  return {ident}Items.length;", "}"]
+    return "\n".join(lines) + "\n"
+
+
+def _backlog(module: str, tasks: int) -> str:
+    lines = [f"# BACKLOG ({module})", ""]
+    for n in range(1, tasks + 1):
+        lines += [
+            f"## TSK-{n:03d} — Implementar funcionalidade {n} do {module}",
+            "",
+            f"- Owner: DEV_{module.upper()}",
+            f"- Critério de aceite: funcionalidade {n} implementada e validada pelo QA.",
+            "",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _synthetic_artifacts(role: str, mode: str, inputs: dict, task_id: str | None) -> list[dict]:
+    r = (role or "").upper()
+    m = (mode or "").strip().lower()
+    size = MOCK_LLM_ARTIFACT_CHARS
+    tid = task_id or "TSK-001"
+    module = str(inputs.get("module") or "web").lower()
+
+    def doc(path: str, title: str) -> dict:
+        return {"path": path, "content": _filler(title, size), "purpose": title}
+
+    if r == "CTO" and m == "spec_intake_and_normalize":
+        return [doc("docs/spec/PRODUCT_SPEC.md", "Product Spec")]
+    if r == "CTO" and m in ("validate_engineer_docs", "validate_backlog"):
+        return [doc(f"docs/cto/cto_{m}.md", "CTO validation")]
+    if r == "CTO":
+        return [doc("docs/cto/PROJECT_CHARTER.md", "Project Charter")]
+    if r == "ENGINEER":
+        return [
+            doc("docs/engineer/engineer_proposal.md", "Engineer Proposal"),
+            doc("docs/engineer/engineer_architecture.md", "Engineer Architecture"),
+            doc("docs/engineer/engineer_dependencies.md", "Engineer Dependencies"),
+        ]
+    if r.startswith("PM"):
+        return [{"path": f"docs/pm/{module}/BACKLOG.md", "content": _backlog(module, MOCK_LLM_BACKLOG_TASKS), "purpose": "Backlog"}]
+    if r.startswith("DEV") and r != "DEVOPS":
+        slug = tid.lower().replace("-", "_")
+        return [
+            {"path": f"apps/src/lib/{slug}.ts", "content": _code(slug, size), "purpose": f"Implementação {tid}"},
+            doc(f"docs/dev/dev_implementation_{tid}.md", f"Dev implementation {tid}"),
+        ]
+    if r == "QA":
+        return [doc(f"docs/qa/qa_report_{tid}.md", f"QA report {tid}")]
+    if r == "MONITOR":
+        return [
+            {"path": "docs/monitor/TASK_STATE.json", "content": json.dumps({"tasks": [], "mock": True}), "purpose": "Task state"},
+            doc("docs/monitor/STATUS.md", "Status"),
+        ]
+    if r == "DEVOPS":
+        return [
+            {"path": "project/Dockerfile", "content": "FROM node:20-alpine\nWORKDIR /app\nCOPY . .\nRUN npm ci && npm run build\nCMD [\"npm\", \"start\"]\n", "purpose": "Dockerfile"},
+            doc("docs/devops/RUNBOOK.md", "Runbook"),
+        ]
+    return [doc(f"docs/{_role_dir(role)}/{m or 'response'}.md", f"{role} {m}")]
+
+
+def synthesize_envelope(role: str, message: dict) -> str:
+    """ResponseEnvelope sintético (texto JSON) que passa nos gates do modo."""
+    inputs = message.get("inputs") or message.get("input") or {}
+    mode = message.get("mode") or inputs.get("mode") or "default"
+    task_id = message.get("task_id") or inputs.get("task_id")
+    status = "QA_PASS" if (role or "").upper() == "QA" else "OK"
+    envelope = {
+        "request_id": message.get("request_id", "unknown"),
+        "status": status,
+        "summary": f"[mock] {role} concluiu {mode}" + (f" para {task_id}" if task_id else "") + ".",
+        "artifacts": _synthetic_artifacts(role, mode, inputs, task_id),
+        "evidence": [{"type": "mock", "ref": f"{_role_dir(role)}:{mode}", "note": "Resposta sintética do provider mock."}],
+        "next_actions": {"owner": "Monitor", "items": [], "questions": []},
+    }
+    return json.dumps(envelope, ensure_ascii=False)
+
+
+def mock_text_reply(prompt: str) -> str:
+    """Resposta para as chamadas LLM avulsas do runner (classificadores T13, Monitor FT-11)."""
+    if "web | backend | mobile | fullstack" in prompt:
+        return os.environ.get("MOCK_LLM_MODULE", "web")
+    if "python | nodejs" in prompt:
+        return "nodejs"
+    if '"outcome"' in prompt:
+        return json.dumps({"outcome": "ESCALATE", "files_changed": [], "summary": "[mock] sem correção automática."})
+    return "OK"
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+class _Messages:
+    def __init__(self, client: "MockLLMClient"):
+        self._client = client
+
+    def create(self, **kwargs):
+        raw = self._client.respond(kwargs)
+        self._client.simulate_latency(raw)
+        return self._client.final_message(raw, kwargs)
+
+    def stream(self, **kwargs):
+        return _MockStream(self._client, kwargs)
+
+
+class _MockStream:
+    """Context manager com os eventos que _stream_anthropic_message consome."""
+
+    def __init__(self, client: "MockLLMClient", kwargs: dict):
+        self._client = client
+        self._kwargs = kwargs
+        self._raw = ""
+
+    def __enter__(self):
+        self._raw = self._client.respond(self._kwargs)
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        if MOCK_LLM_LATENCY_MS > 0:
+            time.sleep(MOCK_LLM_LATENCY_MS / 1000.0)
+        for start in range(0, len(self._raw), _STREAM_CHUNK_CHARS):
+            chunk = self._raw[start:start + _STREAM_CHUNK_CHARS]
+            if MOCK_LLM_TOKENS_PER_SEC > 0:
+                time.sleep(_estimate_tokens(chunk) / MOCK_LLM_TOKENS_PER_SEC)
+            yield SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text=chunk))
+        yield SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason="end_turn"))
+
+    def get_final_message(self):
+        return self._client.final_message(self._raw, self._kwargs)
+
+
+class MockLLMClient:
+    """Cliente "Anthropic" determinístico para um role/mensagem do pipeline."""
+
+    def __init__(self, role: str, message: dict):
+        self.role = role
+        self.message = message or {}
+        self.messages = _Messages(self)
+        self.calls = 0
+
+    def respond(self, create_kw: dict) -> str:
+        self.calls += 1
+        inputs = self.message.get("inputs") or self.message.get("input") or {}
+        mode = self.message.get("mode") or inputs.get("mode") or "default"
+        task_id = self.message.get("task_id") or inputs.get("task_id")
+        # repair (LEI 5) reenvia com feedback: a gravação já falhou nos gates, usar o sintético
+        if self.calls == 1:
+            raw = _replay(self.role, mode, self.message.get("request_id", ""), task_id)
+            if raw is not None:
+                return raw
+        return synthesize_envelope(self.role, self.message)
+
+    @staticmethod
+    def simulate_latency(raw: str) -> None:
+        delay = MOCK_LLM_LATENCY_MS / 1000.0
+        if MOCK_LLM_TOKENS_PER_SEC > 0:
+            delay += _estimate_tokens(raw) / MOCK_LLM_TOKENS_PER_SEC
+        if delay > 0:
+            time.sleep(delay)
+
+    @staticmethod
+    def final_message(raw: str, create_kw: dict):
+        prompt_chars = len(json.dumps(create_kw.get("system") or "", ensure_ascii=False, default=str))
+        prompt_chars += sum(len(str(m.get("content") or "")) for m in create_kw.get("messages") or [])
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=raw)],
+            stop_reason="end_turn",
+            model=create_kw.get("model"),
+            usage=SimpleNamespace(
+                input_tokens=max(1, prompt_chars // _CHARS_PER_TOKEN),
+                output_tokens=_estimate_tokens(raw),
+                cache_read_input_tokens=0,
+                cache_creation_input_tokens=0,
+            ),
+        )
@@ -6,11 +6,14 @@ Blueprint V2 REV2: parse/validação via envelope; seleção de modelo por conte
 from __future__ import annotations
 
 from pathlib import Path
+import ast
 import os
 import json
 import logging
+import re
 import time
 import traceback as _tb
+from typing import Callable
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +22,12 @@ APPLICATIONS_ROOT = _r.parent if _r.name == "applications" else _r
 
 CLAUDE_RETRY_ATTEMPTS = int(os.environ.get("CLAUDE_RETRY_ATTEMPTS", "3"))
 MAX_REPAIRS = int(os.environ.get("MAX_REPAIRS", "2"))
+# Repair direcionado (LEI 5): artifacts já válidos são mantidos e o retry pede só o que falhou
+TARGETED_REPAIR = os.environ.get("TARGETED_REPAIR", "true").strip().lower() in ("1", "true", "yes")
+# Trecho da mensagem original reenviado como contexto no repair direcionado (chars)
+TARGETED_REPAIR_CONTEXT_CHARS = int(os.environ.get("TARGETED_REPAIR_CONTEXT_CHARS", "6000"))
+# Rework do Dev: pedir artifacts patch (diff contra o arquivo em disco) em vez do arquivo inteiro
+DEV_PATCH_ARTIFACTS = os.environ.get("DEV_PATCH_ARTIFACTS", "true").strip().lower() in ("1", "true", "yes")
 CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get("CIRCUIT_BREAKER_THRESHOLD", "3"))
 
 SHOW_TRACEBACK = os.environ.get("SHOW_TRACEBACK", "true").strip().lower() in ("1", "true", "yes")
@@ -38,6 +47,11 @@ AGENT_LABELS = {
 }
 
 
+def _streaming_enabled() -> bool:
+    """CLAUDE_STREAMING=true: usa messages.stream / stream=True e extrai artifacts durante a geração."""
+    return os.environ.get("CLAUDE_STREAMING", "false").strip().lower() in ("1", "true", "yes")
+
+
 def _label(role: str) -> str:
     return AGENT_LABELS.get(role, role.replace("_", " ").title())
 
@@ -204,6 +218,22 @@ def build_user_message(message: dict, role: str = "") -> str:
         if issues:
             parts.append("### Issues\n" + "\n".join(f"- {x}" for x in issues))
 
+    # Rework do Dev: arquivos existentes voltam como patch (só as linhas alteradas), não inteiros
+    try:
+        _rework = int(envelope.get("rework_attempt") or 0)
+    except (TypeError, ValueError):
+        _rework = 0
+    if DEV_PATCH_ARTIFACTS and (role or "").upper() == "DEV" and _rework >= 1 and message.get("existing_artifacts"):
+        parts.append(
+            "## Formato patch (rework)\n"
+            "Para arquivos existentes em apps/ com mudanças pontuais, NÃO reenvie o arquivo inteiro: use "
+            "`{\"path\": \"apps/...\", \"format\": \"patch\", \"patch\": \"...\"}` (sem `content`), com "
+            "unified diff (hunks `@@ -a,b +c,d @@` com 3 linhas de contexto, linhas `-` removidas e `+` "
+            "adicionadas) ou blocos `<<<<<<< SEARCH` / `=======` / `>>>>>>> REPLACE` com trechos exatos do "
+            "arquivo atual. O patch é aplicado sobre o arquivo em disco; arquivos novos ou reescritos por "
+            "inteiro continuam em `content`."
+        )
+
     if envelope.get("constraints"):
         c = envelope["constraints"]
         parts.append("## Restrições\n" + "\n".join(f"- {x}" for x in (c if isinstance(c, list) else [c])))
@@ -250,12 +280,136 @@ Use <thinking> para planejar antes de <response>.
 """
 
 
+# Erros atribuíveis a um artifact (validate_response_envelope / validate_response_quality)
+_ARTIFACT_INDEX_ERROR = re.compile(r"artifacts\[(\d+)\]")
+_ARTIFACT_PATH_ERROR = re.compile(r"""artifact ('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+# Erros de campo do envelope que o repair direcionado sabe corrigir (demais → repair completo)
+_ENVELOPE_FIELD_ERRORS = ("status", "summary", "modo ", "QA em validate_task")
+
+
+def plan_targeted_repair(out: dict, errors: list[str]) -> dict | None:
+    """
+    Separa os erros de validação por artifact. Retorna o plano do repair direcionado —
+    {"keep": artifacts válidos, "failing": [(artifact, erros)], "envelope_errors": [...]} — ou
+    None quando o repair precisa ser completo: JSON não parseado, erro não atribuível ou nenhum
+    artifact aproveitável.
+    """
+    if not errors or out.get("status") == "FAIL":
+        return None
+    artifacts = out.get("artifacts")
+    if not isinstance(artifacts, list):
+        return None
+    by_path = {a.get("path"): i for i, a in enumerate(artifacts) if isinstance(a, dict) and a.get("path")}
+    failing: dict[int, list[str]] = {}
+    envelope_errors: list[str] = []
+    for err in errors:
+        m = _ARTIFACT_INDEX_ERROR.match(err)
+        if m and int(m.group(1)) < len(artifacts):
+            failing.setdefault(int(m.group(1)), []).append(err)
+            continue
+        m = _ARTIFACT_PATH_ERROR.match(err)
+        if m:
+            try:
+                path = ast.literal_eval(m.group(1))
+            except (ValueError, SyntaxError):
+                path = None
+            if path in by_path:
+                failing.setdefault(by_path[path], []).append(err)
+                continue
+        if err.startswith(_ENVELOPE_FIELD_ERRORS):
+            envelope_errors.append(err)
+            continue
+        return None
+    keep = [a for i, a in enumerate(artifacts) if i not in failing and isinstance(a, dict)]
+    if not keep:
+        return None
+    return {
+        "keep": keep,
+        "failing": [(artifacts[i], errs) for i, errs in sorted(failing.items())],
+        "envelope_errors": envelope_errors,
+    }
+
+
+def build_targeted_repair_message(user_content: str, out: dict, plan: dict) -> str:
+    """
+    LEI 5 com repair direcionado: em vez de reenviar o prompt inteiro + feedback (e receber o
+    envelope inteiro de novo), pede só os artifacts/campos com erro. Os artifacts válidos são
+    listados por path e não são reenviados; o contexto original vai truncado.
+    """
+    context = user_content
+    if len(context) > TARGETED_REPAIR_CONTEXT_CHARS:
+        context = context[:TARGETED_REPAIR_CONTEXT_CHARS].rstrip() + (
+            f"\n\n(contexto original truncado em {TARGETED_REPAIR_CONTEXT_CHARS} de {len(user_content)} chars)"
+        )
+    parts = [context, "---\n## ⚠️ CORREÇÃO DIRECIONADA (retry com feedback)"]
+    kept = "\n".join(
+        f"- `{a.get('path')}` ({len(a.get('content') or '')} chars)" for a in plan["keep"]
+    )
+    parts.append(
+        "Sua resposta anterior foi aproveitada em parte. Estes artefatos JÁ FORAM VALIDADOS e serão "
+        f"mantidos como estão — NÃO os reenvie:\n{kept}"
+    )
+    for art, errs in plan["failing"]:
+        if not isinstance(art, dict):
+            parts.append("### Artefato inválido (não é objeto)\nProblemas:\n" + "\n".join(f"- {e}" for e in errs))
+            continue
+        content = art.get("content") if isinstance(art.get("content"), str) else ""
+        label = "Conteúdo enviado"
+        if not content and isinstance(art.get("patch"), str):
+            content, label = art["patch"], "Patch enviado (não aplicou)"
+        parts.append(
+            f"### Artefato `{art.get('path')}`\nProblemas:\n" + "\n".join(f"- {e}" for e in errs)
+            + f"\n\n{label} (reenvie este artefato com o conteúdo COMPLETO corrigido):\n```\n{content}\n```"
+        )
+    if plan["envelope_errors"]:
+        parts.append(
+            "### Envelope\nProblemas:\n" + "\n".join(f"- {e}" for e in plan["envelope_errors"])
+            + f"\n\nstatus atual: {out.get('status')!r}; summary atual: {(out.get('summary') or '')[:300]!r}"
+        )
+    parts.append(
+        "## Instrução\nResponda com um ResponseEnvelope (mesmo formato, dentro de <response>...</response>) "
+        "contendo em `artifacts` SOMENTE os artefatos corrigidos ou faltantes, e `status`, `summary`, "
+        "`evidence` e `next_actions` completos. Artefatos com problema que não forem reenviados serão "
+        "descartados.\nLEMBRETE: Gere artefatos COMPLETOS, sem \"...\", sem \"// TODO\"."
+    )
+    return "\n\n".join(parts)
+
+
+def merge_targeted_repair(out: dict, plan: dict, patch: dict) -> dict:
+    """
+    Aplica a resposta do repair direcionado sobre o envelope anterior: artifacts válidos são
+    mantidos (não podem ser sobrescritos), os corrigidos/novos entram por path e os que falharam
+    sem correção são descartados. Campos do envelope vêm do patch quando preenchidos.
+    """
+    merged = dict(out)
+    artifacts = list(plan["keep"])
+    kept_paths = {a.get("path") for a in artifacts}
+    index: dict[str, int] = {}
+    for art in patch.get("artifacts") or []:
+        if not isinstance(art, dict) or not isinstance(art.get("path"), str) or art["path"] in kept_paths:
+            continue
+        if art["path"] in index:
+            artifacts[index[art["path"]]] = art
+        else:
+            index[art["path"]] = len(artifacts)
+            artifacts.append(art)
+    merged["artifacts"] = artifacts
+    for key in ("status", "summary"):
+        if isinstance(patch.get(key), str) and patch[key].strip():
+            merged[key] = patch[key]
+    if isinstance(patch.get("evidence"), list) and patch["evidence"]:
+        merged["evidence"] = patch["evidence"]
+    if isinstance(patch.get("next_actions"), dict) and patch["next_actions"]:
+        merged["next_actions"] = patch["next_actions"]
+    return merged
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Skill Store — assembly dinâmico de SYSTEM_PROMPT
 # ─────────────────────────────────────────────────────────────────────────────
 
 import hashlib as _hashlib
-import urllib.request as _urllib_req
+import threading as _threading
 import urllib.parse as _urllib_parse
 
 # SKILL_STORE_MODE controla o comportamento do assembly dinâmico:
@@ -269,6 +423,150 @@ _GENESIS_API_URL   = os.environ.get("GENESIS_API_URL", "http://localhost:3333")
 _GENESIS_API_TOKEN = os.environ.get("GENESIS_API_TOKEN", "")
 
 
+# Cache local de bundles do skill store: (role, stack_key, project_id) → (prompt, bundle_hash).
+# O prompt montado quase nunca muda entre chamadas do mesmo projeto: hit é servido na hora e
+# revalidado em background com If-None-Match: "<bundle_hash>" (304 = inalterado). API fora do ar →
+# continua servindo o bundle em cache em vez de cair no SYSTEM_PROMPT estático.
+# SKILL_BUNDLE_CACHE_DIR (opcional) persiste os bundles em disco entre execuções do runner.
+SKILL_BUNDLE_CACHE_DIR = os.environ.get("SKILL_BUNDLE_CACHE_DIR", "").strip()
+_skill_bundle_cache: dict[tuple, tuple[str, str]] = {}
+# chave → task_ids que pegaram o bundle em cache enquanto a revalidação estava em voo. Cada task
+# ainda precisa do seu GET condicional: é nele que a API grava a linha skill_bundle (telemetria).
+_skill_bundle_revalidating: dict[tuple, list[str | None]] = {}
+_skill_bundle_lock = _threading.Lock()
+
+
+def _skill_bundle_file(key: tuple) -> Path | None:
+    if not SKILL_BUNDLE_CACHE_DIR:
+        return None
+    name = _hashlib.sha256("|".join(k or "" for k in key).encode()).hexdigest()[:32]
+    return Path(SKILL_BUNDLE_CACHE_DIR) / f"{name}.json"
+
+
+def _skill_bundle_get(key: tuple) -> tuple[str, str] | None:
+    """Bundle em cache (memória, depois disco) ou None."""
+    with _skill_bundle_lock:
+        cached = _skill_bundle_cache.get(key)
+    if cached is not None:
+        return cached
+    path = _skill_bundle_file(key)
+    if path is None or not path.is_file():
+        return None
+    try:
+        d = json.loads(path.read_text(encoding="utf-8"))
+        cached = (d["assembled_prompt"], d.get("bundle_hash", ""))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.debug("[SkillStore] cache em disco ilegível %s: %s", path, e)
+        return None
+    if not cached[0]:
+        return None
+    with _skill_bundle_lock:
+        _skill_bundle_cache.setdefault(key, cached)
+    return cached
+
+
+def _skill_bundle_put(key: tuple, bundle: tuple[str, str] | None) -> None:
+    """Grava (ou remove, se bundle=None) o bundle em memória e no disco."""
+    with _skill_bundle_lock:
+        if bundle is None:
+            _skill_bundle_cache.pop(key, None)
+        else:
+            _skill_bundle_cache[key] = bundle
+    path = _skill_bundle_file(key)
+    if path is None:
+        return
+    try:
+        if bundle is None:
+            path.unlink(missing_ok=True)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "role": key[0], "stack_key": key[1], "project_id": key[2],
+            "bundle_hash": bundle[1], "assembled_prompt": bundle[0],
+        }, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug("[SkillStore] falha ao gravar cache em disco %s: %s", path, e)
+
+
+def _skill_store_fetch(
+    role: str,
+    stack_key: str,
+    project_id: str | None,
+    task_id: str | None,
+    bundle_hash: str | None = None,
+) -> tuple[tuple[str, str] | None, int]:
+    """
+    GET /api/skills/assemble (condicional quando bundle_hash é dado).
+    Retorna ((assembled_prompt, bundle_hash) | None, status); status 0 = falha de rede.
+    """
+    params = {"role": role, "stack_key": stack_key}
+    if project_id:
+        params["project_id"] = project_id
+    if task_id:
+        params["task_id"] = task_id
+    qs = _urllib_parse.urlencode(params)
+    headers = {"If-None-Match": f'"{bundle_hash}"'} if bundle_hash else None
+    from orchestrator.api_client import get_api_client
+    data, status = get_api_client(_GENESIS_API_URL, _GENESIS_API_TOKEN).request(
+        "GET", f"/api/skills/assemble?{qs}", timeout=5, headers=headers,
+    )
+    if status != 200 or not isinstance(data, dict):
+        return None, status
+    d = data.get("data", {})
+    prompt = d.get("assembled_prompt", "")
+    if not prompt:
+        return None, status
+    return (prompt, d.get("bundle_hash", "")), status
+
+
+def _skill_bundle_check(key: tuple, task_id: str | None, bundle_hash: str | None) -> tuple[str | None, bool]:
+    """
+    GET condicional de uma task sobre o bundle em cache; erros mantêm o bundle antigo.
+    Retorna (bundle_hash atual | None, API respondeu).
+    """
+    try:
+        result, status = _skill_store_fetch(key[0], key[1], key[2], task_id, bundle_hash)
+    except Exception as _e:
+        logger.debug("[SkillStore] revalidação falhou (%s) — mantendo bundle %s", _e, bundle_hash)
+        return bundle_hash, False
+    if status == 304:
+        return bundle_hash, True
+    if status == 200:
+        if result is None:
+            logger.info("[SkillStore] role=%s stack=%s sem cobertura — bundle removido do cache", key[0], key[1])
+        elif result[1] != bundle_hash:
+            logger.info("[SkillStore] role=%s stack=%s bundle %s → %s", key[0], key[1], bundle_hash, result[1])
+        _skill_bundle_put(key, result)
+        return (result[1] if result else None), True
+    if status in (400, 404):
+        _skill_bundle_put(key, None)
+        return None, True
+    logger.debug("[SkillStore] revalidação HTTP %s — mantendo bundle %s", status, bundle_hash)
+    return bundle_hash, status != 0
+
+
+def _skill_bundle_revalidate(key: tuple, task_id: str | None, bundle_hash: str) -> None:
+    """
+    Revalida um bundle em cache (thread de background, uma por chave). Depois da primeira task,
+    drena as que chegaram com a revalidação em voo, um GET condicional por task, para que cada
+    uma tenha sua linha skill_bundle. Falha de rede descarta as pendentes (API fora do ar).
+    """
+    current: str | None = bundle_hash
+    while True:
+        current, reachable = _skill_bundle_check(key, task_id, current)
+        with _skill_bundle_lock:
+            pending = _skill_bundle_revalidating.get(key) or []
+            if not reachable and pending:
+                logger.debug("[SkillStore] API indisponível — %d task(s) sem registro de bundle", len(pending))
+                pending.clear()
+            if not pending:
+                _skill_bundle_revalidating.pop(key, None)
+                return
+            task_id = pending.pop(0)
+
+
 def _skill_store_assemble(
     role: str,
     stack_key: str,
@@ -276,47 +574,51 @@ def _skill_store_assemble(
     task_id: str | None = None,
 ) -> tuple[str, str] | None:
     """
-    Chama GET /api/skills/assemble e retorna (assembled_prompt, bundle_hash).
-    Retorna None em caso de falha (timeout, API indisponível, sem cobertura).
+    Retorna (assembled_prompt, bundle_hash) de GET /api/skills/assemble, via cache local.
+    Hit: devolve na hora e agenda revalidação condicional em background (uma por chave; tasks que
+    chegam com ela em voo entram na fila da mesma thread, cada uma com seu GET condicional).
+    Miss: chamada síncrona. Retorna None em caso de falha sem bundle em cache
+    (timeout, API indisponível, sem cobertura).
     """
     if not _GENESIS_API_TOKEN:
         return None
+    key = (role, stack_key, project_id or "")
+    cached = _skill_bundle_get(key)
+    if cached is not None:
+        with _skill_bundle_lock:
+            pending = _skill_bundle_revalidating.get(key)
+            start = pending is None
+            if start:
+                _skill_bundle_revalidating[key] = []
+            elif project_id and task_id not in pending:
+                pending.append(task_id)
+        if start:
+            _threading.Thread(
+                target=_skill_bundle_revalidate, args=(key, task_id, cached[1]),
+                name="skill-bundle-revalidate", daemon=True,
+            ).start()
+        return cached
     try:
-        params = {"role": role, "stack_key": stack_key}
-        if project_id:
-            params["project_id"] = project_id
-        if task_id:
-            params["task_id"] = task_id
-        qs = _urllib_parse.urlencode(params)
-        url = f"{_GENESIS_API_URL}/api/skills/assemble?{qs}"
-        req = _urllib_req.Request(
-            url,
-            headers={"Authorization": f"Bearer {_GENESIS_API_TOKEN}"},
-        )
-        with _urllib_req.urlopen(req, timeout=5) as resp:
-            data = json.loads(resp.read())
-        d = data.get("data", {})
-        prompt = d.get("assembled_prompt", "")
-        bundle_hash = d.get("bundle_hash", "")
-        if not prompt:
+        result, status = _skill_store_fetch(role, stack_key, project_id, task_id)
+        if result is None:
+            logger.debug("[SkillStore] assemble HTTP %s — usando SYSTEM_PROMPT estático", status)
             return None
-        return prompt, bundle_hash
+        _skill_bundle_put(key, result)
+        return result
     except Exception as _e:
         logger.debug("[SkillStore] assemble falhou (%s) — usando SYSTEM_PROMPT estático", _e)
         return None
 
 
-def _maybe_apply_cag_prefix(
-    base_prompt: str, role: str, stack_key: str, project_id: str | None
-) -> str:
+def _cag_context_prefix(role: str, stack_key: str, project_id: str | None) -> str:
     """
-    Aplica CAG (Context-Aware Generation) prefix se CAG_ENABLED=live.
-    Em "off" ou "shadow", retorna o prompt inalterado. Falhas viram no-op silencioso
+    Renderiza o ContextPackage (CAG) se CAG_ENABLED=live.
+    Em "off" ou "shadow", retorna "". Falhas viram no-op silencioso
     (LEGACY_PROMPT_FALLBACK garante que o pipeline nunca quebra por causa do CAG).
     """
     cag_mode = os.environ.get("CAG_ENABLED", "off").strip().lower()
     if cag_mode not in ("shadow", "live"):
-        return base_prompt
+        return ""
     try:
         # Import local: evita custo de import em "off" e quebra circular.
         import sys as _sys
@@ -337,20 +639,26 @@ def _maybe_apply_cag_prefix(
                 "[CAG/shadow] role=%s stack=%s tokens=%d cache_hit=%s took=%dms",
                 role, stack_key, pkg.payload_tokens, pkg.cache_hit, pkg.duration_ms,
             )
-            return base_prompt
+            return ""
 
         prefix = pkg.to_prompt_prefix()
-        if not prefix:
-            return base_prompt
-
-        logger.debug(
-            "[CAG/live] role=%s stack=%s — prefixando %d chars (tokens~=%d)",
-            role, stack_key, len(prefix), pkg.payload_tokens,
-        )
-        return prefix + "\n" + base_prompt
+        if prefix:
+            logger.debug(
+                "[CAG/live] role=%s stack=%s — injetando %d chars (tokens~=%d)",
+                role, stack_key, len(prefix), pkg.payload_tokens,
+            )
+        return prefix
     except Exception as exc:
         logger.debug("[CAG] no-op por exceção (%s) — prompt original mantido", exc)
-        return base_prompt
+        return ""
+
+
+def _maybe_apply_cag_prefix(
+    base_prompt: str, role: str, stack_key: str, project_id: str | None
+) -> str:
+    """Aplica o contexto CAG a um prompt já montado (sem segmentação para prompt caching)."""
+    prefix = _cag_context_prefix(role, stack_key, project_id)
+    return prefix + "\n" + base_prompt if prefix else base_prompt
 
 
 def load_system_prompt_with_skills(
@@ -373,12 +681,16 @@ def load_system_prompt_with_skills(
       "shadow" → loga métricas do ContextLoader, mas não injeta no prompt
       "live"   → prefixa o prompt final com o ContextPackage renderizado
 
+    O texto devolvido é um SystemPrompt (str) segmentado para prompt caching: run_agent
+    envia os segmentos como blocos com cache_control (ver compose_system_prompt).
+
     Retorna: (system_prompt_text, bundle_hash_or_None)
     """
     static_prompt = load_system_prompt(system_prompt_path)
 
     if SKILL_STORE_MODE == "off":
-        return _maybe_apply_cag_prefix(static_prompt, role, stack_key, project_id), None
+        context = _cag_context_prefix(role, stack_key, project_id)
+        return compose_system_prompt(static_prompt, context=context), None
 
     result = _skill_store_assemble(role, stack_key, project_id, task_id)
 
@@ -396,24 +708,22 @@ def load_system_prompt_with_skills(
             else:
                 logger.debug("[SkillStore/shadow] role=%s stack=%s — hashes idênticos ✓", role, stack_key)
         # shadow sempre usa o prompt estático em runtime
-        return _maybe_apply_cag_prefix(static_prompt, role, stack_key, project_id), None
+        context = _cag_context_prefix(role, stack_key, project_id)
+        return compose_system_prompt(static_prompt, context=context), None
 
     # SKILL_STORE_MODE == "active"
     if result is not None:
         dynamic_prompt, bundle_hash = result
         logger.debug("[SkillStore/active] role=%s stack=%s bundle=%s", role, stack_key, bundle_hash)
         # O prompt dinâmico SUBSTITUI o body do static, mas mantém LEI 2 e protocolo shared
-        # Para garantir LEI 2, aplicamos as regras críticas ao prompt dinâmico
-        critical = _load_critical_rules_lei2()
-        if critical:
-            opening = "## INÍCIO — Regras críticas (LEI 2)\n\n" + critical + "\n\n---\n\n"
-            closing = "\n\n---\n\n## LEMBRETES FINAIS (LEI 2 — leia com atenção)\n\n" + critical + "\n"
-            dynamic_prompt = opening + dynamic_prompt.rstrip() + closing
-        return _maybe_apply_cag_prefix(dynamic_prompt, role, stack_key, project_id), bundle_hash
+        # (compose_system_prompt aplica as regras críticas no início e no fim)
+        context = _cag_context_prefix(role, stack_key, project_id)
+        return compose_system_prompt(dynamic_prompt, context=context, body_key=bundle_hash or ""), bundle_hash
 
     # Fallback: skill store indisponível → usar estático
     logger.warning("[SkillStore/active] role=%s stack=%s — sem cobertura, fallback estático", role, stack_key)
-    return _maybe_apply_cag_prefix(static_prompt, role, stack_key, project_id), None
+    context = _cag_context_prefix(role, stack_key, project_id)
+    return compose_system_prompt(static_prompt, context=context), None
 
 
 def _load_product_spec_template() -> str:
@@ -467,6 +777,74 @@ def calculate_token_budget(system_msg: str, user_msg: str, model: str) -> dict:
     return budget
 
 
+# Prompt caching (Anthropic/Bedrock): blocos estáveis do system prompt vão com cache_control.
+# Dev/QA são chamados dezenas de vezes por projeto com o mesmo prefixo; reworks e repairs
+# reaproveitam o cache em vez de pagar o prompt inteiro a cada chamada.
+CLAUDE_PROMPT_CACHE = os.environ.get("CLAUDE_PROMPT_CACHE", "true").strip().lower() in ("1", "true", "yes")
+CLAUDE_PROMPT_CACHE_TTL = os.environ.get("CLAUDE_PROMPT_CACHE_TTL", "").strip().lower()  # "" (5m) | "1h"
+
+
+class SystemPrompt(str):
+    """
+    System prompt final (str) com a segmentação usada para prompt caching.
+    segments: tuplas (nome, texto, cacheável, chave) na ordem do prompt — do mais estável
+    (regras LEI 2 + protocolo/role ou skill bundle) ao mais volátil (contexto CAG/Connect).
+    Consumidores que tratam o prompt como texto (budget, OpenAI) continuam funcionando.
+    """
+
+    segments: tuple = ()
+
+    def __new__(cls, segments: list[tuple[str, str, bool, str]]):
+        obj = super().__new__(cls, "".join(seg[1] for seg in segments))
+        obj.segments = tuple(seg for seg in segments if seg[1])
+        return obj
+
+
+def compose_system_prompt(body: str, context: str = "", body_key: str = "") -> SystemPrompt:
+    """
+    Monta o system prompt em segmentos ordenados por estabilidade:
+      1. abertura LEI 2 (global)           — prefixo comum a todos os roles
+      2. corpo (protocolo + role/skills.md, ou skill bundle identificado por body_key=bundle_hash)
+      3. contexto CAG (Contratos Connect, checklists, lições) — estável por projeto/stack
+      4. lembretes finais LEI 2            — fecham o prompt (lost in the middle)
+    Os breakpoints de cache ficam no fim de 2 e 3; o cache é por prefixo, então 1 vem junto.
+    """
+    critical = _load_critical_rules_lei2()
+    segments: list[tuple[str, str, bool, str]] = []
+    if critical:
+        segments.append(("lei2_opening", "## INÍCIO — Regras críticas (LEI 2)\n\n" + critical + "\n\n---\n\n", False, ""))
+    has_tail = bool(critical or context)
+    segments.append(("skill_bundle" if body_key else "role", body.rstrip() if has_tail else body, True, body_key))
+    if context:
+        segments.append(("context", "\n\n---\n\n" + context.strip(), True, ""))
+    if critical:
+        segments.append(("lei2_closing", "\n\n---\n\n## LEMBRETES FINAIS (LEI 2 — leia com atenção)\n\n" + critical + "\n", False, ""))
+    return SystemPrompt(segments)
+
+
+def system_blocks_for_api(system_content: str) -> str | list[dict]:
+    """
+    Converte o system prompt para o parâmetro `system` da Messages API.
+    SystemPrompt segmentado + CLAUDE_PROMPT_CACHE → lista de blocos text com cache_control
+    nos segmentos cacheáveis (máx. 4 breakpoints por request). Texto simples → inalterado.
+    """
+    segments = getattr(system_content, "segments", ())
+    if not CLAUDE_PROMPT_CACHE or not segments:
+        return str(system_content)
+    cache_control: dict = {"type": "ephemeral"}
+    if CLAUDE_PROMPT_CACHE_TTL == "1h":
+        cache_control["ttl"] = "1h"
+    blocks: list[dict] = []
+    breakpoints = 0
+    for _name, text, cacheable, _key in segments:
+        block: dict = {"type": "text", "text": text}
+        if cacheable and breakpoints < 4:
+            block["cache_control"] = dict(cache_control)
+            breakpoints += 1
+        blocks.append(block)
+    return blocks
+
+
 def build_system_prompt(system_prompt_path: Path, role: str, mode: str) -> str:
     """
     Carrega system prompt base e injeta templates referenciados (AGENT_LLM_COMMUNICATION_ANALYSIS).
@@ -492,12 +870,7 @@ def build_system_prompt(system_prompt_path: Path, role: str, mode: str) -> str:
                 break
 
     # LEI 2: posicionar regras críticas no início e no fim do system prompt
-    critical = _load_critical_rules_lei2()
-    if critical:
-        opening = "## INÍCIO — Regras críticas (LEI 2)\n\n" + critical + "\n\n---\n\n"
-        closing = "\n\n---\n\n## LEMBRETES FINAIS (LEI 2 — leia com atenção)\n\n" + critical + "\n"
-        base = opening + base.rstrip() + closing
-    return base
+    return compose_system_prompt(base)
 
 
 def load_system_prompt(system_prompt_path: Path) -> str:
@@ -547,10 +920,12 @@ def log_agent_call(
     response: dict,
     duration_ms: float,
     request_id: str = "unknown",
+    repair: dict | None = None,
 ) -> None:
     """
     LEI 10 (AGENT_LLM_COMMUNICATION_ANALYSIS): log estruturado de cada chamada ao Claude.
     Permite reconstruir o que aconteceu (tokens, duração, status, artefatos).
+    repair: métricas dos retries (LEI 5) quando houve repair — direcionado e completo separados.
     """
     inp = budget if isinstance(budget, dict) else {}
     artifacts = response.get("artifacts") or []
@@ -566,6 +941,8 @@ def log_agent_call(
             "user_tokens": inp.get("user_tokens"),
             "total_input_tokens": inp.get("input_total"),
             "utilization_pct": inp.get("utilization_pct"),
+            "cache_read_tokens": response.get("_cache_read_tokens", 0),
+            "cache_write_tokens": response.get("_cache_write_tokens", 0),
         },
         "output": {
             "status": response.get("status"),
@@ -581,6 +958,8 @@ def log_agent_call(
             "questions": (response.get("next_actions") or {}).get("questions", []),
         },
     }
+    if repair:
+        log_entry["repair"] = repair
     logger.info(json.dumps(log_entry, ensure_ascii=False))
 
 
@@ -651,6 +1030,150 @@ _OPENAI_MODEL_LIMITS: dict[str, dict[str, int]] = {
 _OPENAI_DEFAULT_LIMITS = {"context": 128_000, "max_output": 16_384}
 
 
+def _emit_streamed_artifacts(
+    agent_name: str,
+    artifacts: list[dict],
+    on_artifact: Callable[[dict], None] | None,
+) -> None:
+    """Entrega artifacts completos ao callback do chamador; falhas no callback nunca abortam o stream."""
+    for art in artifacts:
+        logger.info("[%s] Streaming: artifact completo %s (%d chars)", agent_name, art.get("path"), len(art.get("content") or ""))
+        if on_artifact is None:
+            continue
+        try:
+            on_artifact(art)
+        except Exception as e:
+            logger.warning("[%s] Streaming: callback de artifact falhou (%s): %s", agent_name, art.get("path"), e)
+
+
+class _StreamedArtifactStage:
+    """
+    on_artifact em duas fases para o streaming: cada artifact que fecha no stream é gravado num
+    diretório temporário (stage) e só chega ao callback do chamador (commit) depois que o envelope
+    da tentativa passa parse, gates e qualidade. Tentativa rejeitada — repair LEI 5 ou BLOCKED —
+    descarta o stage, então nada dela chega ao disco do projeto.
+    """
+
+    def __init__(self, agent_name: str, on_artifact: Callable[[dict], None]):
+        self._agent_name = agent_name
+        self._on_artifact = on_artifact
+        self._dir: Path | None = None
+        self._staged: list[Path] = []
+
+    def __call__(self, art: dict) -> None:
+        if self._dir is None:
+            import shutil
+            import tempfile
+            import weakref
+
+            self._dir = Path(tempfile.mkdtemp(prefix="genesis-stream-"))
+            weakref.finalize(self, shutil.rmtree, str(self._dir), True)
+        path = self._dir / f"{len(self._staged):04d}.json"
+        path.write_text(json.dumps(art, ensure_ascii=False), encoding="utf-8")
+        self._staged.append(path)
+
+    def commit(self, out: dict) -> None:
+        """Entrega os artifacts em stage que chegaram iguais ao envelope validado; depois descarta."""
+        validated = {
+            a.get("path"): a for a in out.get("artifacts") or [] if isinstance(a, dict) and a.get("path")
+        }
+        committed = []
+        for path in self._staged:
+            try:
+                art = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning("[%s] Streaming: stage ilegível (%s): %s", self._agent_name, path.name, e)
+                continue
+            final = validated.get(art.get("path"))
+            # patch resolvido, repair direcionado ou parse final diferente: vale o envelope validado
+            if final is None or final.get("content") != art.get("content"):
+                continue
+            committed.append(art)
+        self.discard()
+        _emit_streamed_artifacts(self._agent_name, committed, self._on_artifact)
+
+    def discard(self) -> None:
+        """Descarta o stage da tentativa (rejeitada, repetida ou abortada)."""
+        if self._staged:
+            logger.info("[%s] Streaming: %d artifact(s) em stage descartados.", self._agent_name, len(self._staged))
+        for path in self._staged:
+            path.unlink(missing_ok=True)
+        self._staged = []
+
+
+def _stream_anthropic_message(
+    client,
+    create_kw: dict,
+    agent_name: str,
+    on_artifact: Callable[[dict], None] | None = None,
+):
+    """
+    Equivalente streaming de client.messages.create (Anthropic e Bedrock).
+    Alimenta o StreamingEnvelopeExtractor a cada text_delta e detecta stop_reason=max_tokens
+    assim que o message_delta chega. Retorna a Message final (mesma forma do create).
+    """
+    from orchestrator.envelope import StreamingEnvelopeExtractor
+
+    extractor = StreamingEnvelopeExtractor()
+    with client.messages.stream(**create_kw) as stream:
+        for event in stream:
+            etype = getattr(event, "type", None)
+            if etype == "content_block_delta":
+                text = getattr(getattr(event, "delta", None), "text", None)
+                if text:
+                    _emit_streamed_artifacts(agent_name, extractor.feed(text), on_artifact)
+            elif etype == "message_delta":
+                stop_reason = getattr(getattr(event, "delta", None), "stop_reason", None)
+                if stop_reason:
+                    extractor.stop_reason = stop_reason
+                    if extractor.truncated:
+                        logger.warning(
+                            "[%s] Streaming: truncamento detectado (stop_reason=%s) após %d chars; %d artifact(s) completos.",
+                            agent_name, stop_reason, len(extractor.text), len(extractor.artifacts),
+                        )
+        return stream.get_final_message()
+
+
+def _stream_openai_completion(
+    client,
+    model: str,
+    max_tokens: int,
+    messages: list[dict],
+    agent_name: str,
+    on_artifact: Callable[[dict], None] | None = None,
+) -> tuple[str, int, int]:
+    """chat.completions com stream=True; retorna (raw_text, tokens_in, tokens_out)."""
+    from orchestrator.envelope import StreamingEnvelopeExtractor
+
+    extractor = StreamingEnvelopeExtractor()
+    tokens_in = tokens_out = 0
+    stream = client.chat.completions.create(
+        model=model,
+        max_tokens=max_tokens,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        usage = getattr(chunk, "usage", None)
+        if usage:
+            tokens_in = getattr(usage, "prompt_tokens", 0) or 0
+            tokens_out = getattr(usage, "completion_tokens", 0) or 0
+        for choice in getattr(chunk, "choices", None) or []:
+            text = getattr(getattr(choice, "delta", None), "content", None)
+            if text:
+                _emit_streamed_artifacts(agent_name, extractor.feed(text), on_artifact)
+            finish = getattr(choice, "finish_reason", None)
+            if finish:
+                extractor.stop_reason = finish
+                if extractor.truncated:
+                    logger.warning(
+                        "[%s][OpenAI] Streaming: truncamento detectado (finish_reason=%s) após %d chars.",
+                        agent_name, finish, len(extractor.text),
+                    )
+    return extractor.text, tokens_in, tokens_out
+
+
 def _run_agent_openai(
     system_prompt_path: str | Path,
     message: dict,
@@ -659,11 +1182,12 @@ def _run_agent_openai(
     model: str,
     timeout: int,
     system_prompt_override: str | None = None,
+    on_artifact: Callable[[dict], None] | None = None,
 ) -> dict:
     """Executa agente via OpenAI SDK — interface compatível com run_agent (Anthropic/Bedrock)."""
-    from openai import OpenAI as _OpenAI  # type: ignore
+    from .llm_clients import get_openai_client, tenant_scope
 
-    client    = _OpenAI(api_key=api_key, timeout=timeout)
+    client    = get_openai_client(api_key, scope=tenant_scope(message.get("llm_config"))).with_options(timeout=timeout)
     oai_lim   = _OPENAI_MODEL_LIMITS.get(model, _OPENAI_DEFAULT_LIMITS)
     env_max   = int(os.environ.get("CLAUDE_MAX_TOKENS", "16384"))
     max_tokens = min(env_max, oai_lim["max_output"])
@@ -677,42 +1201,115 @@ def _run_agent_openai(
 
     logger.info("[%s][OpenAI] modelo=%s max_tokens=%d timeout=%ds", agent_name, model, max_tokens, timeout)
 
-    raw_text = ""
-    for attempt in range(CLAUDE_RETRY_ATTEMPTS):
-        try:
-            resp = client.chat.completions.create(
-                model=model,
-                max_tokens=max_tokens,
-                messages=[
+    usage = {"input": 0, "output": 0}
+    stage = _StreamedArtifactStage(agent_name, on_artifact) if on_artifact is not None else None
+
+    def _complete(content: str) -> str:
+        raw = ""
+        for attempt in range(CLAUDE_RETRY_ATTEMPTS):
+            try:
+                oai_messages = [
                     {"role": "system", "content": system_content},
-                    {"role": "user",   "content": user_content},
-                ],
-            )
-            raw_text = resp.choices[0].message.content or ""
-            _in  = resp.usage.prompt_tokens     if resp.usage else 0
-            _out = resp.usage.completion_tokens if resp.usage else 0
-            logger.info("[%s][OpenAI] Resposta recebida tokens_in=%d tokens_out=%d", agent_name, _in, _out)
-            break
-        except Exception as e:
-            err_lower = str(e).lower()
-            is_retryable = (
-                getattr(e, "status_code", None) in (429, 500, 502, 503)
-                or "timeout" in err_lower
-                or "connection" in err_lower
-            )
-            if is_retryable and attempt < CLAUDE_RETRY_ATTEMPTS - 1:
-                time.sleep(2 + attempt * 2)
-                continue
-            raise RuntimeError(
-                json.dumps({"agent": role, "model": model, "error": str(e), "human_message": str(e)}, ensure_ascii=False)
-            ) from e
+                    {"role": "user",   "content": content},
+                ]
+                if _streaming_enabled():
+                    if stage is not None:
+                        stage.discard()  # tentativa anterior (retry ou repair) não vale mais
+                    raw, _in, _out = _stream_openai_completion(
+                        client, model, max_tokens, oai_messages, agent_name, stage,
+                    )
+                else:
+                    resp = client.chat.completions.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        messages=oai_messages,
+                    )
+                    raw = resp.choices[0].message.content or ""
+                    _in  = resp.usage.prompt_tokens     if resp.usage else 0
+                    _out = resp.usage.completion_tokens if resp.usage else 0
+                logger.info("[%s][OpenAI] Resposta recebida tokens_in=%d tokens_out=%d", agent_name, _in, _out)
+                usage["input"] += _in or 0
+                usage["output"] += _out or 0
+                break
+            except Exception as e:
+                err_lower = str(e).lower()
+                is_retryable = (
+                    getattr(e, "status_code", None) in (429, 500, 502, 503)
+                    or "timeout" in err_lower
+                    or "connection" in err_lower
+                )
+                if is_retryable and attempt < CLAUDE_RETRY_ATTEMPTS - 1:
+                    time.sleep(2 + attempt * 2)
+                    continue
+                raise RuntimeError(
+                    json.dumps({"agent": role, "model": model, "error": str(e), "human_message": str(e)}, ensure_ascii=False)
+                ) from e
+        return raw
 
+    raw_text = _complete(user_content)
     _persist_raw_llm_response(role, message, raw_text)
+    out = _parse_openai_envelope(raw_text, request_id)
+
+    # Rework do Dev: patch que não aplica volta ao repair (direcionado → arquivo inteiro), como no
+    # caminho Anthropic/Bedrock; fora do try do parse para não cair no fallback de extração de JSON
+    patch_errors = _resolve_patch_artifacts(out, message) if (role or "").upper() == "DEV" else []
+    repair_log: dict = {"attempts": 0, "targeted": 0, "full": 0, "kept_artifacts": 0,
+                        "repaired_paths": [], "input_tokens": 0, "output_tokens": 0}
+    while patch_errors and repair_log["attempts"] < MAX_REPAIRS:
+        repair_log["attempts"] += 1
+        plan = plan_targeted_repair(out, patch_errors) if TARGETED_REPAIR else None
+        logger.warning("[%s][OpenAI] Repair %d/%d (patch não aplicado): %s",
+                       agent_name, repair_log["attempts"], MAX_REPAIRS, patch_errors[:2])
+        before = dict(usage)
+        if plan is not None:
+            repair_log["targeted"] += 1
+            repair_log["kept_artifacts"] = len(plan["keep"])
+            raw_text = _complete(build_targeted_repair_message(user_content, out, plan))
+            _persist_raw_llm_response(
+                role, dict(message, request_id=f"{request_id}-repair{repair_log['attempts']}"), raw_text,
+            )
+            patch = _parse_openai_envelope(raw_text, request_id)
+            if patch.get("status") != "FAIL":
+                out = merge_targeted_repair(out, plan, patch)
+                repair_log["repaired_paths"] = sorted(
+                    set(repair_log["repaired_paths"]) | {a["path"] for a in out["artifacts"][len(plan["keep"]):]}
+                )
+        else:
+            repair_log["full"] += 1
+            user_content = user_content + build_repair_feedback_block(out, patch_errors)
+            raw_text = _complete(user_content)
+            _persist_raw_llm_response(role, message, raw_text)
+            out = _parse_openai_envelope(raw_text, request_id)
+        repair_log["input_tokens"] += usage["input"] - before["input"]
+        repair_log["output_tokens"] += usage["output"] - before["output"]
+        patch_errors = _resolve_patch_artifacts(out, message)
+
+    if patch_errors:
+        out["status"] = "BLOCKED"
+        out["summary"] = (out.get("summary") or "") + "; Enforcer: " + "; ".join(patch_errors[:5])
+        out["validator_pass"] = False
+        out["validation_errors"] = patch_errors
+        if stage is not None:
+            stage.discard()
+    else:
+        out["validator_pass"] = True
+        if stage is not None:
+            stage.commit(out)
+    out["_input_tokens"] = usage["input"]
+    out["_output_tokens"] = usage["output"]
+    out["_model"] = model
+    out["_duration_ms"] = int((time.perf_counter() - t0) * 1000)
+    log_agent_call(agent_name, mode, {}, out, out["_duration_ms"], request_id=request_id,
+                   repair=repair_log if repair_log["attempts"] else None)
+    return _normalize_response_envelope(out, request_id, raw_text)
 
-    # Reutilizar o mesmo parser de envelope que Anthropic usa
+
+def _parse_openai_envelope(raw_text: str, request_id: str) -> dict:
+    """Parse da resposta OpenAI com o mesmo parser de envelope do Anthropic; fallback por bloco de código."""
     try:
         from orchestrator.envelope import parse_response_envelope
         out, _ = parse_response_envelope(raw_text, request_id, require_artifacts=False, require_evidence_when_ok=True)
+        return out
     except Exception:
         # Fallback: extrair JSON do bloco de código
         text = raw_text
@@ -724,12 +1321,7 @@ def _run_agent_openai(
             out = json.loads(text) if text else {}
         except json.JSONDecodeError:
             out = {"request_id": request_id, "status": "FAIL", "summary": raw_text[:500], "artifacts": [], "evidence": [], "next_actions": {}}
-
-    out["validator_pass"] = True
-    out["_model"] = model
-    out["_duration_ms"] = int((time.perf_counter() - t0) * 1000)
-    log_agent_call(agent_name, mode, {}, out, out["_duration_ms"], request_id=request_id)
-    return _normalize_response_envelope(out, request_id, raw_text)
+        return out if isinstance(out, dict) else {}
 
 
 def run_agent(
@@ -737,12 +1329,16 @@ def run_agent(
     message: dict,
     role: str = "PM",
     system_prompt_override: str | None = None,
+    on_artifact: Callable[[dict], None] | None = None,
 ) -> dict:
     """
     Executa o agente: system prompt + message -> LLM -> response_envelope.
-    Suporta Anthropic, AWS Bedrock e OpenAI.
+    Suporta Anthropic, AWS Bedrock, OpenAI e mock (GENESIS_LLM_PROVIDER=mock, offline).
     Lê llm_config do envelope (FT-13) como override do env do container.
     system_prompt_override: quando fornecido (skill store ativo), substitui a leitura do arquivo .md.
+    on_artifact: com CLAUDE_STREAMING=true, os artifacts que fecham no stream ficam em stage
+    (_StreamedArtifactStage) e o callback só os recebe depois que a tentativa passa na validação;
+    tentativas rejeitadas (repair ou BLOCKED) são descartadas sem chegar ao callback.
     """
     # FT-13: llm_config no envelope — lê sem mutar os.environ (evita contaminação global)
     _llm_cfg = message.get("llm_config") or {}
@@ -799,13 +1395,20 @@ def run_agent(
             model=model,
             timeout=timeout,
             system_prompt_override=system_prompt_override,
+            on_artifact=on_artifact,
         )
 
-    try:
-        from anthropic import Anthropic
-        from anthropic import AnthropicBedrock
-    except ImportError:
-        raise ImportError("Instale anthropic: pip install anthropic")
+    if provider == "mock":
+        # Benchmark/testes offline: replay de respostas gravadas ou envelope sintético (mock_llm.py)
+        from .mock_llm import MockLLMClient
+        client = MockLLMClient(role, message)
+        api_key = None
+    else:
+        try:
+            import anthropic  # noqa: F401
+        except ImportError:
+            raise ImportError("Instale anthropic: pip install anthropic")
+        from .llm_clients import get_anthropic_client, get_bedrock_client, tenant_scope
 
     if provider == "bedrock":
         # Construir cliente Bedrock com credenciais explícitas.
@@ -824,21 +1427,14 @@ def run_agent(
             or "us-east-1"
         )
 
-        os.environ.pop("AWS_PROFILE", None)
-        os.environ.pop("AWS_DEFAULT_PROFILE", None)
-
-        kwargs: dict = {"aws_region": aws_region}
-        if _ak and _sk:
-            # Credenciais explícitas (env vars ou tenant config)
-            kwargs["aws_access_key"] = _ak
-            kwargs["aws_secret_key"] = _sk
-            if _token:
-                kwargs["aws_session_token"] = _token
+        # Cliente compartilhado (llm_clients): AWS_PROFILE é removido uma vez por processo.
         # Sem creds explícitas → boto3 usa credential chain (~/.aws, instance profile, etc.)
-
-        client = AnthropicBedrock(**kwargs)
+        client = get_bedrock_client(
+            aws_region, _ak, _sk, _token if (_ak and _sk) else "",
+            scope=tenant_scope(_llm_cfg),
+        )
         api_key = None
-    else:
+    elif provider != "mock":
         api_key = os.environ.get("CLAUDE_API_KEY")
         if not api_key:
             raise ValueError("CLAUDE_API_KEY não definida. Para Bedrock, use GENESIS_LLM_PROVIDER=bedrock")
@@ -882,8 +1478,8 @@ def run_agent(
 
     user_content = build_user_message(message, role=role)
 
-    if provider != "bedrock":
-        client = Anthropic(api_key=api_key)
+    if provider not in ("bedrock", "mock"):
+        client = get_anthropic_client(api_key, scope=tenant_scope(_llm_cfg))
     request_id = message.get("request_id", "unknown")
     # Bug fix: CLAUDE_MAX_TOKENS é o teto padrão mas roles específicos (Engineer, PM, Dev)
     # precisam de mais tokens. env_max é elevado por role abaixo — não limitar aqui.
@@ -906,10 +1502,18 @@ def run_agent(
         logger.info("[REWORK-ESCALATE] %s rework %d → tokens aumentados para %d", role, _rework_attempt, env_max)
 
     last_thinking: str = ""
+    stream_mode = _streaming_enabled()
+    stage = _StreamedArtifactStage(agent_name, on_artifact) if stream_mode and on_artifact is not None else None
+    # Repair: request_content é o que vai à API; user_content segue sendo a base do repair completo
+    request_content = user_content
+    targeted: dict | None = None  # plano do repair direcionado em andamento (+ envelope base)
+    tokens = {"input": 0, "output": 0, "cache_read": 0, "cache_write": 0}
+    repair_log: dict = {"attempts": 0, "targeted": 0, "full": 0, "kept_artifacts": 0,
+                        "repaired_paths": [], "input_tokens": 0, "output_tokens": 0}
 
     for repair_attempt in range(MAX_REPAIRS + 1):
         # LEI 3: token budget antes de cada chamada (incluindo após repair)
-        budget = calculate_token_budget(system_content, user_content, model)
+        budget = calculate_token_budget(system_content, request_content, model)
         max_tokens = min(env_max, budget["safe_max_tokens"])
         # spec_intake re-emite a PRODUCT_SPEC inteira em artifacts[].content (JSON).
         # Specs grandes (ex.: OrienteMe v2.2 ~39KB) + thinking do Opus estouram caps
@@ -946,8 +1550,8 @@ def run_agent(
                 create_kw: dict = {
                     "model": model,
                     "max_tokens": max_tokens,
-                    "system": system_content,
-                    "messages": [{"role": "user", "content": user_content}],
+                    "system": system_blocks_for_api(system_content),
+                    "messages": [{"role": "user", "content": request_content}],
                     "timeout": timeout,
                 }
                 # LEI 1 (AGENT_LLM_COMMUNICATION_ANALYSIS §12.2): temperature quando definida
@@ -957,7 +1561,12 @@ def run_agent(
                         create_kw["temperature"] = t
                 except (ValueError, TypeError):
                     pass
-                response = client.messages.create(**create_kw)
+                if stream_mode:
+                    if stage is not None:
+                        stage.discard()  # tentativa anterior (retry ou repair) não vale mais
+                    response = _stream_anthropic_message(client, create_kw, agent_name, stage)
+                else:
+                    response = client.messages.create(**create_kw)
                 break
             except Exception as e:
                 last_error = e
@@ -988,7 +1597,10 @@ def run_agent(
         stop_reason = getattr(response, "stop_reason", None) if response else None
         if stop_reason == "max_tokens":
             logger.warning("[%s] Resposta truncada pela API (stop_reason=max_tokens). Raw gravado com %d chars.", agent_name, len(raw_text))
-        _persist_raw_llm_response(role, message, raw_text)
+        # Resposta do repair direcionado é parcial: gravada à parte para não sobrescrever a original
+        _persist_raw_llm_response(
+            role, dict(message, request_id=f"{request_id}-repair{repair_attempt}") if targeted else message, raw_text,
+        )
         try:
             from orchestrator.envelope import extract_thinking
             last_thinking = extract_thinking(raw_text) or ""
@@ -1000,10 +1612,21 @@ def run_agent(
         _usage = getattr(response, "usage", None)
         _input_tokens = getattr(_usage, "input_tokens", 0) if _usage else 0
         _output_tokens = getattr(_usage, "output_tokens", 0) if _usage else 0
+        # Prompt caching: input_tokens exclui o que foi lido/gravado no cache
+        _cache_read_tokens = (getattr(_usage, "cache_read_input_tokens", 0) or 0) if _usage else 0
+        _cache_write_tokens = (getattr(_usage, "cache_creation_input_tokens", 0) or 0) if _usage else 0
         logger.info(
-            "[%s] Resposta recebida (audit: role=%s model=%s request_id=%s tokens_in=%d tokens_out=%d).",
-            agent_name, role, model, request_id, _input_tokens, _output_tokens,
+            "[%s] Resposta recebida (audit: role=%s model=%s request_id=%s tokens_in=%d tokens_out=%d cache_read=%d cache_write=%d).",
+            agent_name, role, model, request_id, _input_tokens, _output_tokens, _cache_read_tokens, _cache_write_tokens,
         )
+        # Tokens somados entre tentativas (o custo do repair entra nas métricas do agente)
+        tokens["input"] += _input_tokens
+        tokens["output"] += _output_tokens
+        tokens["cache_read"] += _cache_read_tokens
+        tokens["cache_write"] += _cache_write_tokens
+        if repair_attempt:
+            repair_log["input_tokens"] += _input_tokens + _cache_read_tokens + _cache_write_tokens
+            repair_log["output_tokens"] += _output_tokens
 
         try:
             from orchestrator.envelope import (
@@ -1021,7 +1644,12 @@ def run_agent(
             validate_response_quality = None
 
         req_artifacts, req_evidence = (get_requirements_for_mode(role, mode) if get_requirements_for_mode else (False, True))
-        if parse_response_envelope:
+        if targeted is not None and parse_response_envelope:
+            out, parse_errors = _apply_targeted_repair(
+                raw_text, request_id, targeted, req_artifacts, req_evidence, repair_log,
+            )
+            targeted = None
+        elif parse_response_envelope:
             out, parse_errors = parse_response_envelope(
                 raw_text, request_id,
                 require_artifacts=req_artifacts,
@@ -1041,6 +1669,11 @@ def run_agent(
             if "next_actions" in out and isinstance(out["next_actions"], list):
                 out["next_actions"] = {}
 
+        # Rework do Dev: artifacts patch viram o arquivo inteiro antes dos gates; patch que não
+        # aplica vira erro do artifact e o repair pede o arquivo completo (fallback arquivo inteiro)
+        if (role or "").upper() == "DEV":
+            parse_errors = parse_errors + _resolve_patch_artifacts(out, message)
+
         gate_errors = []
         if validate_response_envelope_for_mode and out.get("status") != "FAIL":
             ok, gate_errors = validate_response_envelope_for_mode(out, role, mode, task_id)
@@ -1059,17 +1692,38 @@ def run_agent(
             out["validation_errors"] = []
             out["_thinking"] = bool(last_thinking)
             duration_ms = (time.perf_counter() - t0_run) * 1000
-            out["_input_tokens"] = _input_tokens
-            out["_output_tokens"] = _output_tokens
+            out["_input_tokens"] = tokens["input"]
+            out["_output_tokens"] = tokens["output"]
+            out["_cache_read_tokens"] = tokens["cache_read"]
+            out["_cache_write_tokens"] = tokens["cache_write"]
             out["_duration_ms"] = int(duration_ms)
             out["_model"] = model
-            log_agent_call(agent_name, mode, budget, out, duration_ms, request_id=request_id)
+            log_agent_call(agent_name, mode, budget, out, duration_ms, request_id=request_id,
+                           repair=repair_log if repair_log["attempts"] else None)
+            if stage is not None:
+                stage.commit(out)
             return _normalize_response_envelope(out, request_id, raw_text)
 
+        if stage is not None:
+            stage.discard()
         if repair_attempt < MAX_REPAIRS:
             # LEI 5: retry SEMPRE com feedback explícito; nunca reenviar prompt idêntico
+            repair_log["attempts"] += 1
+            plan = plan_targeted_repair(out, all_errors) if TARGETED_REPAIR else None
+            if plan is not None:
+                targeted = dict(plan, base=out, errors=all_errors)
+                request_content = build_targeted_repair_message(user_content, out, plan)
+                repair_log["targeted"] += 1
+                repair_log["kept_artifacts"] = len(plan["keep"])
+                logger.warning(
+                    "[%s] Repair direcionado %d/%d (LEI 5): mantidos %d artifact(s), corrigindo %d: %s",
+                    agent_name, repair_attempt + 1, MAX_REPAIRS, len(plan["keep"]), len(plan["failing"]), all_errors[:2],
+                )
+                continue
             repair_block = build_repair_feedback_block(out, all_errors)
             user_content = user_content + repair_block
+            request_content = user_content
+            repair_log["full"] += 1
             logger.warning(
                 "[%s] Repair %d/%d (LEI 5: retry com feedback): %s",
                 agent_name, repair_attempt + 1, MAX_REPAIRS, all_errors[:2],
@@ -1082,29 +1736,116 @@ def run_agent(
         out["validator_pass"] = False
         out["validation_errors"] = all_errors
         out["_thinking"] = bool(last_thinking)
-        out["_input_tokens"] = _input_tokens
-        out["_output_tokens"] = _output_tokens
+        out["_input_tokens"] = tokens["input"]
+        out["_output_tokens"] = tokens["output"]
+        out["_cache_read_tokens"] = tokens["cache_read"]
+        out["_cache_write_tokens"] = tokens["cache_write"]
         out["_duration_ms"] = int((time.perf_counter() - t0_run) * 1000)
         out["_model"] = model
         duration_ms = (time.perf_counter() - t0_run) * 1000
-        log_agent_call(agent_name, mode, budget, out, duration_ms, request_id=request_id)
+        log_agent_call(agent_name, mode, budget, out, duration_ms, request_id=request_id,
+                       repair=repair_log if repair_log["attempts"] else None)
         return _normalize_response_envelope(out, request_id, raw_text)
 
 
+def _resolve_patch_artifacts(out: dict, message: dict) -> list[str]:
+    """
+    Aplica os artifacts patch (artifact_patch.py) sobre o arquivo atual — em disco (apps/ do
+    projeto) ou, sem storage, o content da tentativa anterior em existing_artifacts — e troca
+    cada um pelo arquivo completo. Retorna os erros dos patches que não aplicaram.
+    """
+    artifacts = out.get("artifacts")
+    if not isinstance(artifacts, list) or not artifacts:
+        return []
+    from orchestrator.artifact_patch import is_patch_artifact, resolve_patch_artifacts
+
+    if not any(is_patch_artifact(a) for a in artifacts):
+        return []
+    inp = message.get("inputs") or message.get("input") or {}
+    project_id = message.get("project_id") or inp.get("project_id")
+    previous = {
+        a.get("path"): a["content"]
+        for a in message.get("existing_artifacts") or []
+        if isinstance(a, dict) and isinstance(a.get("content"), str)
+    }
+
+    def _read_current(path: str) -> str | None:
+        if project_id:
+            try:
+                from orchestrator import project_storage as storage
+                if storage.is_enabled():
+                    current = storage.read_apps_artifact(project_id, path.strip()[5:].lstrip("/"))
+                    if current is not None:
+                        return current
+            except ImportError:
+                pass
+        return previous.get(path)
+
+    out["artifacts"], errors = resolve_patch_artifacts(artifacts, _read_current)
+    return errors
+
+
+def _apply_targeted_repair(
+    raw_text: str,
+    request_id: str,
+    targeted: dict,
+    require_artifacts: bool,
+    require_evidence_when_ok: bool,
+    repair_log: dict,
+) -> tuple[dict, list[str]]:
+    """
+    Parseia a resposta do repair direcionado e mescla no envelope anterior. Patch ilegível mantém
+    o envelope anterior com os erros dele + os do parse (o próximo retry cai no repair completo).
+    """
+    from orchestrator.envelope import resilient_json_parse, validate_response_envelope
+
+    patch, patch_errors = resilient_json_parse(raw_text, request_id)
+    if patch_errors or patch.get("status") == "FAIL":
+        out = dict(targeted["base"])
+        return out, (patch_errors or ["repair direcionado: resposta sem envelope válido"]) + targeted["errors"]
+    out = merge_targeted_repair(targeted["base"], targeted, patch)
+    repaired = [a["path"] for a in out["artifacts"][len(targeted["keep"]):]]
+    repair_log["repaired_paths"] = sorted(set(repair_log["repaired_paths"]) | set(repaired))
+    _ok, errors = validate_response_envelope(
+        out, require_artifacts=require_artifacts, require_evidence_when_ok=require_evidence_when_ok,
+    )
+    return out, errors
+
+
 # FT-18 (Cyborg V2): chamada Bedrock direta sem toda a pipeline de agentes.
 # Usada pelo Cyborg V2 para as 5 análises paralelas e consolidação.
 def call_bedrock_direct(system: str, user: str, model_id: str,
-                        max_tokens: int = 8000, temperature: float = 0.2) -> str:
+                        max_tokens: int = 8000, temperature: float = 0.2, scope: str = "") -> str:
     """Chama Bedrock com system + user; retorna string bruta da resposta.
 
-    Reusa o mesmo cliente AnthropicBedrock configurado para o resto do pipeline.
+    Reusa o mesmo cliente AnthropicBedrock (registry llm_clients) do resto do pipeline.
     Não faz repair, não valida schema, não persiste artefatos — pura chamada.
     """
     try:
-        from anthropic import AnthropicBedrock
+        import anthropic  # noqa: F401
     except ImportError:
         raise ImportError("anthropic sdk não instalado")
+    from .llm_clients import get_bedrock_client
 
+    client = get_bedrock_client(*_bedrock_env_credentials(), scope=scope)
+    resp = client.messages.create(
+        model=model_id,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system,
+        messages=[{"role": "user", "content": user}],
+    )
+    # AnthropicBedrock retorna Message com .content = [TextBlock, ...]
+    parts: list[str] = []
+    for block in getattr(resp, "content", []) or []:
+        t = getattr(block, "text", None)
+        if t:
+            parts.append(t)
+    return "".join(parts)
+
+
+def _bedrock_env_credentials() -> tuple[str, str, str, str]:
+    """(region, access_key, secret_key, session_token) do env do container."""
     _ak = os.environ.get("AWS_ACCESS_KEY_ID", "").strip()
     _sk = os.environ.get("AWS_SECRET_ACCESS_KEY", "").strip()
     _token = os.environ.get("AWS_SESSION_TOKEN", "").strip()
@@ -1112,29 +1853,27 @@ def call_bedrock_direct(system: str, user: str, model_id: str,
                   or os.environ.get("AWS_REGION")
                   or os.environ.get("AWS_DEFAULT_REGION")
                   or "us-east-1")
+    return aws_region, _ak, _sk, (_token if (_ak and _sk) else "")
 
-    os.environ.pop("AWS_PROFILE", None)
-    os.environ.pop("AWS_DEFAULT_PROFILE", None)
 
-    kwargs: dict = {"aws_region": aws_region}
-    if _ak and _sk:
-        kwargs["aws_access_key"] = _ak
-        kwargs["aws_secret_key"] = _sk
-        if _token:
-            kwargs["aws_session_token"] = _token
+async def call_bedrock_direct_async(system: str, user: str, model_id: str,
+                                    max_tokens: int = 8000, temperature: float = 0.2, scope: str = "") -> str:
+    """Versão asyncio de call_bedrock_direct (AsyncAnthropicBedrock) — não ocupa thread durante a chamada.
 
-    client = AnthropicBedrock(**kwargs)
-    resp = client.messages.create(
+    scope: tenant do chamador (tenant_scope); isola o cliente no registry llm_clients.
+    """
+    try:
+        import anthropic  # noqa: F401
+    except ImportError:
+        raise ImportError("anthropic sdk não instalado")
+    from .llm_clients import get_async_bedrock_client
+
+    client = get_async_bedrock_client(*_bedrock_env_credentials(), scope=scope)
+    resp = await client.messages.create(
         model=model_id,
         max_tokens=max_tokens,
         temperature=temperature,
         system=system,
         messages=[{"role": "user", "content": user}],
     )
-    # AnthropicBedrock retorna Message com .content = [TextBlock, ...]
-    parts: list[str] = []
-    for block in getattr(resp, "content", []) or []:
-        t = getattr(block, "text", None)
-        if t:
-            parts.append(t)
-    return "".join(parts)
+    return "".join(t for t in (getattr(b, "text", None) for b in getattr(resp, "content", []) or []) if t)
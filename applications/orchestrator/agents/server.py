@@ -2,13 +2,15 @@
 Serviço HTTP para agentes (PM, Dev, QA, Monitor, DevOps, Engineer, CTO).
 POST /invoke/{role} com body message_envelope; skill_path opcional em input.context.skill_path.
 """
+import asyncio
+import functools
 import json
 import os
 import logging
-import threading
 import time
 import uuid
 import traceback as _tb
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
@@ -22,7 +24,9 @@ if _dotenv.exists():
     from dotenv import load_dotenv
     load_dotenv(_dotenv)
 
-from .runtime import run_agent, SHOW_TRACEBACK
+from .runtime import run_agent, SHOW_TRACEBACK, _streaming_enabled, _get_model_for_role
+from .llm_clients import get_registry as _llm_client_registry
+from .job_store import get_job_store, AGENT_JOB_LEASE_SEC, AGENT_JOB_RETENTION_SEC
 from . import pm, dev, qa, monitor, devops
 from .cto import CTO_SYSTEM_PROMPT_PATH
 from .engineer import ENGINEER_SYSTEM_PROMPT_PATH
@@ -38,6 +42,8 @@ AGENT_ENDPOINTS = [
     "POST /invoke/qa",
     "POST /invoke/monitor",
     "POST /invoke/devops",
+    "POST /invoke/{role}/async",
+    "GET /invoke/{role}/status/{job_id}",
 ]
 
 AGENT_LABELS = {
@@ -85,8 +91,12 @@ def _error_response(role: str, exc: Exception) -> dict:
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     _env_diagnostic()
+    _limiters.clear()  # semáforos asyncio pertencem ao loop corrente
+    await _start_job_workers()
     logger.info("Agents service started. Endpoints: %s", ", ".join(AGENT_ENDPOINTS))
     yield
+    await _stop_job_workers()
+    _shutdown_executor()
     logger.info("Agents service shutdown")
 
 
@@ -98,7 +108,11 @@ app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], all
 def health():
     model = os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-6")
     key_ok = bool(os.environ.get("CLAUDE_API_KEY", "").strip())
-    return {"status": "ok", "claude_model": model, "claude_configured": key_ok, "show_traceback": SHOW_TRACEBACK}
+    return {
+        "status": "ok", "claude_model": model, "claude_configured": key_ok, "show_traceback": SHOW_TRACEBACK,
+        "llm_clients": _llm_client_registry().stats(),
+        "concurrency": _concurrency_stats(),
+    }
 
 
 def _project_id_from_message(body: dict) -> str | None:
@@ -329,45 +343,76 @@ def _persist_artifacts_for_role(message: dict, response: dict, role_dir: str) ->
         artifacts = filter_artifacts_by_path_policy(artifacts, project_id)
     except ImportError:
         pass
-    for i, art in enumerate(artifacts):
-        if not isinstance(art, dict) or not art.get("content"):
-            continue
-        content = art.get("content", "")
-        if isinstance(content, bytes):
-            content = content.decode("utf-8", errors="replace")
-        else:
-            content = str(content)
-        # Decodificar escapes JSON se o conteúdo veio com \n literal (ex.: fallback Engineer)
-        if "\\n" in content or "\\t" in content:
+    # Um append no manifest para todos os artifacts da resposta
+    with storage.manifest_batch(project_id):
+        for i, art in enumerate(artifacts):
+            if not isinstance(art, dict):
+                continue
+            if not art.get("content"):
+                # Artifact patch (rework do Dev) não resolvido no runtime: aplicar sobre o arquivo em disco
+                path_val = (art.get("path") or "").strip()
+                if isinstance(art.get("patch"), str) and path_val.startswith("apps/") and getattr(storage, "patch_apps_artifact", None):
+                    if storage.patch_apps_artifact(project_id, path_val[5:].lstrip("/"), art["patch"]) is None:
+                        logger.warning("[%s] Patch de %s não aplicado; arquivo mantido.", role_dir.title(), path_val)
+                continue
+            content = art.get("content", "")
+            if isinstance(content, bytes):
+                content = content.decode("utf-8", errors="replace")
+            else:
+                content = str(content)
+            # Decodificar escapes JSON se o conteúdo veio com \n literal (ex.: fallback Engineer)
+            if "\\n" in content or "\\t" in content:
+                try:
+                    from orchestrator.envelope import _unescape_json_string
+                    content = _unescape_json_string(content)
+                except ImportError:
+                    pass
+            stripped = content.strip()
+            if not stripped or stripped in ("...", "[...]", ".") or len(stripped) < 20:
+                logger.info("[%s] Artefato %s ignorado (conteúdo trivial: %d chars).", role_dir.title(), art.get("path", i), len(stripped))
+                continue
+            path_val = (art.get("path") or "").strip()
+            title = art.get("purpose") or f"Artifact {i}"
             try:
-                from orchestrator.envelope import _unescape_json_string
-                content = _unescape_json_string(content)
-            except ImportError:
-                pass
-        stripped = content.strip()
-        if not stripped or stripped in ("...", "[...]", ".") or len(stripped) < 20:
-            logger.info("[%s] Artefato %s ignorado (conteúdo trivial: %d chars).", role_dir.title(), art.get("path", i), len(stripped))
-            continue
-        path_val = (art.get("path") or "").strip()
-        title = art.get("purpose") or f"Artifact {i}"
-        try:
-            if path_val.startswith("project/"):
-                storage.write_project_artifact(project_id, path_val[8:].lstrip("/"), content)
-            elif path_val.startswith("docs/"):
-                storage.write_doc_by_path(
-                    project_id, role_dir, path_val[5:].lstrip("/"), content, title=title
-                )
-            elif path_val.startswith("apps/"):
-                if getattr(storage, "write_apps_artifact", None):
-                    storage.write_apps_artifact(project_id, path_val[5:].lstrip("/"), content)
-                else:
+                if path_val.startswith("project/"):
+                    storage.write_project_artifact(project_id, path_val[8:].lstrip("/"), content)
+                elif path_val.startswith("docs/"):
                     storage.write_doc_by_path(
                         project_id, role_dir, path_val[5:].lstrip("/"), content, title=title
                     )
-            else:
-                storage.write_doc(project_id, role_dir, f"artifact_{i}", content, title=title)
-        except Exception as e:
-            logger.warning("[%s] Falha ao gravar artifact em disco: %s", role_dir.title(), e)
+                elif path_val.startswith("apps/"):
+                    if getattr(storage, "write_apps_artifact", None):
+                        storage.write_apps_artifact(project_id, path_val[5:].lstrip("/"), content)
+                    else:
+                        storage.write_doc_by_path(
+                            project_id, role_dir, path_val[5:].lstrip("/"), content, title=title
+                        )
+                else:
+                    storage.write_doc(project_id, role_dir, f"artifact_{i}", content, title=title)
+            except Exception as e:
+                logger.warning("[%s] Falha ao gravar artifact em disco: %s", role_dir.title(), e)
+
+
+# Roles cujos artifacts já são gravados em disco após a resposta; com streaming, o runtime entrega
+# os artifacts do stream a este callback só depois que a tentativa passa na validação (o runner
+# regrava o mesmo conteúdo depois).
+_STREAM_PERSIST_ROLE_DIRS = {"CTO": "cto", "ENGINEER": "engineer", "PM": "pm", "DEV": "dev"}
+
+
+def _stream_persist_callback(message: dict, role: str):
+    """Callback on_artifact para run_agent quando CLAUDE_STREAMING=true; None caso contrário."""
+    role_dir = _STREAM_PERSIST_ROLE_DIRS.get(role)
+    if not role_dir or not _streaming_enabled() or not _project_id_from_message(message):
+        return None
+
+    def _persist(art: dict) -> None:
+        # Patch é aplicado pelo runtime sobre o arquivo em disco ao fim da resposta: gravá-lo
+        # durante o stream alteraria a base e o patch seria aplicado duas vezes
+        if "content" not in art and art.get("patch"):
+            return
+        _persist_artifacts_for_role(message, {"artifacts": [art]}, role_dir)
+
+    return _persist
 
 
 def _resolve_llm_api_key(message: dict) -> dict:
@@ -407,7 +452,10 @@ def _invoke_agent(body: dict, system_prompt, role: str) -> dict:
         message = body if "input" in body else {"request_id": body.get("request_id", "http"), "input": body}
         message = _resolve_llm_api_key(message)  # FT-13: resolve api_key para providers não-bedrock
         logger.info("[%s] Recebeu solicitação. Processando...", agent_name)
-        response = run_agent(system_prompt_path=system_prompt, message=message, role=role)
+        response = run_agent(
+            system_prompt_path=system_prompt, message=message, role=role,
+            on_artifact=_stream_persist_callback(message, role),
+        )
         logger.info("[%s] Solicitação processada com sucesso.", agent_name)
         if role == "CTO":
             _persist_cto_response_json(message, response)
@@ -443,7 +491,10 @@ def _invoke_parametrized(body: dict, get_path_fn, role: str) -> dict:
         skill_path = ctx.get("skill_path")
         prompt_path = get_path_fn(skill_path)
         logger.info("[%s] Recebeu solicitação (skill_path=%s). Processando...", agent_name, skill_path or "default")
-        response = run_agent(system_prompt_path=prompt_path, message=message, role=role)
+        response = run_agent(
+            system_prompt_path=prompt_path, message=message, role=role,
+            on_artifact=_stream_persist_callback(message, role),
+        )
         logger.info("[%s] Solicitação processada com sucesso.", agent_name)
         if role == "PM":
             _persist_pm_response_json(message, response)
@@ -462,100 +513,262 @@ def _invoke_parametrized(body: dict, get_path_fn, role: str) -> dict:
         raise HTTPException(status_code=500, detail=detail)
 
 
-# ── Async job store for spec-preview (eliminates long HTTP connections) ─────────
-_async_jobs: Dict[str, Dict[str, Any]] = {}
-_jobs_lock = threading.Lock()
+# ── Execução assíncrona: limitador por provider/modelo + executor dedicado ─────────
+# Adaptação em thread pool, não I/O assíncrono de ponta a ponta: os endpoints são async e uma
+# chamada aguardando vaga no limitador não ocupa thread, mas o run_agent (síncrono: repair loop,
+# gates e persistência compartilhados com o runner in-process) segura uma thread do executor
+# durante toda a chamada LLM. Só /invoke/raw usa o cliente Async nativo. Por isso o executor tem
+# default conservador: o teto real de chamadas simultâneas é min(AGENT_EXECUTOR_WORKERS,
+# soma dos AGENT_MAX_CONCURRENCY_PER_MODEL ativos); cada thread custa ~8 MB de stack virtual.
+AGENT_EXECUTOR_WORKERS = int(os.environ.get("AGENT_EXECUTOR_WORKERS", "32"))
+AGENT_MAX_CONCURRENCY_PER_MODEL = int(os.environ.get("AGENT_MAX_CONCURRENCY_PER_MODEL", "16"))
+
+_executor: ThreadPoolExecutor | None = None
+_limiters: Dict[tuple, asyncio.Semaphore] = {}
+_in_flight: Dict[tuple, int] = {}
+
+
+def _limiter_key(body: dict, role: str) -> tuple:
+    """(provider, modelo) efetivos da chamada — llm_config do envelope > env do container."""
+    llm_cfg = body.get("llm_config") or {}
+    provider = (llm_cfg.get("provider") or os.environ.get("GENESIS_LLM_PROVIDER", "anthropic")).strip().lower()
+    model = (llm_cfg.get("model") or _get_model_for_role(role)).strip()
+    return provider, model
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AGENT_EXECUTOR_WORKERS, thread_name_prefix="agent-call")
+    return _executor
+
+
+def _shutdown_executor() -> None:
+    global _executor, _store_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _store_executor is not None:
+        _store_executor.shutdown(wait=False, cancel_futures=True)
+        _store_executor = None
+
+
+def _limiter_for(key: tuple) -> asyncio.Semaphore:
+    sem = _limiters.get(key)
+    if sem is None:
+        sem = asyncio.Semaphore(max(1, AGENT_MAX_CONCURRENCY_PER_MODEL))
+        _limiters[key] = sem
+    return sem
+
+
+async def _run_limited(key: tuple, fn, *args):
+    """Aguarda vaga no limitador de key e executa fn(*args) no executor de agentes."""
+    async with _limiter_for(key):
+        _in_flight[key] = _in_flight.get(key, 0) + 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args))
+        finally:
+            _in_flight[key] -= 1
+
+
+def _concurrency_stats() -> dict:
+    return {
+        "executor_workers": AGENT_EXECUTOR_WORKERS,
+        "max_per_model": AGENT_MAX_CONCURRENCY_PER_MODEL,
+        "in_flight": {f"{p}/{m}": n for (p, m), n in _in_flight.items() if n},
+    }
+
+
+# role (path) → (handler, system_prompt_or_path_fn, ROLE)
+ROLE_HANDLERS = {
+    "engineer": (_invoke_agent, ENGINEER_SYSTEM_PROMPT_PATH, "ENGINEER"),
+    "cto": (_invoke_agent, CTO_SYSTEM_PROMPT_PATH, "CTO"),
+    "pm": (_invoke_parametrized, pm.get_system_prompt_path, "PM"),
+    "dev": (_invoke_parametrized, dev.get_system_prompt_path, "DEV"),
+    "qa": (_invoke_parametrized, qa.get_system_prompt_path, "QA"),
+    "monitor": (_invoke_parametrized, monitor.get_system_prompt_path, "MONITOR"),
+    "devops": (_invoke_parametrized, devops.get_system_prompt_path, "DEVOPS"),
+}
+
+
+async def _invoke_role(role_key: str, body: dict) -> dict:
+    handler, prompt, role = ROLE_HANDLERS[role_key]
+    return await _run_limited(_limiter_key(body, role), handler, body, prompt, role)
+
+
+# ── Async job store (elimina conexões HTTP longas; qualquer role) ─────────────
+# Fila durável (agents/job_store.py): SQLite WAL sob PROJECT_FILES_ROOT ou Postgres (DATABASE_URL).
+# Workers fazem claim com lease + heartbeat; restart do container retoma jobs com lease vencido.
+AGENT_JOB_WORKERS = int(os.environ.get("AGENT_JOB_WORKERS", "8"))
+AGENT_JOB_POLL_SEC = float(os.environ.get("AGENT_JOB_POLL_SEC", "2"))
+
+# I/O do job store num executor pequeno e próprio: claim/heartbeat/status não disputam thread
+# com as chamadas LLM (que ocupam o executor de agentes por minutos).
+AGENT_JOB_STORE_WORKERS = int(os.environ.get("AGENT_JOB_STORE_WORKERS", "4"))
+
+_job_workers: list = []
+_job_wakeup: asyncio.Event | None = None
+_worker_prefix = f"agents-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+_store_executor: ThreadPoolExecutor | None = None
+
+
+def _get_store_executor() -> ThreadPoolExecutor:
+    global _store_executor
+    if _store_executor is None:
+        _store_executor = ThreadPoolExecutor(max_workers=max(1, AGENT_JOB_STORE_WORKERS), thread_name_prefix="agent-jobs")
+    return _store_executor
+
+
+async def _store_call(fn, *args):
+    """I/O do job store (SQLite/Postgres) fora do event loop, no executor do job store."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_store_executor(), functools.partial(fn, *args))
+
+
+async def _job_heartbeat(store, job_id: str, worker_id: str) -> None:
+    interval = max(1.0, AGENT_JOB_LEASE_SEC / 3)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await _store_call(store.heartbeat, job_id, worker_id, AGENT_JOB_LEASE_SEC):
+                logger.warning("[JobStore] Lease de %s perdido por %s", job_id, worker_id)
+                return
+        except Exception as e:
+            logger.warning("[JobStore] Heartbeat falhou para %s: %s", job_id, e)
+
+
+async def _run_job(store, job: dict, worker_id: str) -> None:
+    """Executa um job reivindicado e grava result/error no store."""
+    job_id = job["job_id"]
+    heartbeat = asyncio.create_task(_job_heartbeat(store, job_id, worker_id))
+    try:
+        result = await _invoke_role(job["role"], job.get("body") or {})
+        await _store_call(store.complete, job_id, worker_id, result)
+    except Exception as e:
+        err = e.detail if isinstance(e, HTTPException) else str(e)
+        await _store_call(store.fail, job_id, worker_id, err if isinstance(err, str) else json.dumps(err, ensure_ascii=False))
+    finally:
+        heartbeat.cancel()
+
+
+async def _job_worker(index: int) -> None:
+    store = get_job_store()
+    worker_id = f"{_worker_prefix}-w{index}"
+    while True:
+        try:
+            job = await _store_call(store.claim, worker_id, AGENT_JOB_LEASE_SEC)
+        except Exception as e:
+            logger.warning("[JobStore] Claim falhou (%s): %s", worker_id, e)
+            job = None
+        if job is None:
+            _job_wakeup.clear()
+            try:
+                await asyncio.wait_for(_job_wakeup.wait(), timeout=AGENT_JOB_POLL_SEC)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        if job.get("attempts", 1) > 1:
+            logger.info("[JobStore] Retomando %s (tentativa %s)", job["job_id"], job["attempts"])
+        await _run_job(store, job, worker_id)
 
-def _cleanup_old_jobs() -> None:
-    """Remove jobs older than 45 minutes."""
-    cutoff = time.time() - 45 * 60
-    with _jobs_lock:
-        stale = [k for k, v in _async_jobs.items() if v.get("created_at", 0) < cutoff]
-        for k in stale:
-            del _async_jobs[k]
 
-def _run_cto_async(job_id: str, body: dict) -> None:
-    """Run CTO in a background thread and store the result in _async_jobs."""
+async def _start_job_workers() -> None:
+    global _job_wakeup
+    _job_wakeup = asyncio.Event()
     try:
-        result = _invoke_agent(body, CTO_SYSTEM_PROMPT_PATH, "CTO")
-        with _jobs_lock:
-            if job_id in _async_jobs:
-                _async_jobs[job_id]["status"] = "done"
-                _async_jobs[job_id]["result"] = result
+        removed = await _store_call(get_job_store().cleanup, AGENT_JOB_RETENTION_SEC)
+        if removed:
+            logger.info("[JobStore] %s job(s) antigos removidos", removed)
     except Exception as e:
-        with _jobs_lock:
-            if job_id in _async_jobs:
-                _async_jobs[job_id]["status"] = "error"
-                _async_jobs[job_id]["error"] = str(e)[:500]
-
-@app.post("/invoke/cto/async")
-def invoke_cto_async(body: dict):
-    """Start CTO processing in a background thread. Returns jobId immediately.
-    Poll GET /invoke/cto/status/{job_id} for the result.
-    Eliminates the long HTTP connection that causes socket timeouts."""
-    _cleanup_old_jobs()
-    job_id = f"cto-{uuid.uuid4().hex[:12]}"
-    with _jobs_lock:
-        _async_jobs[job_id] = {"status": "running", "created_at": time.time()}
-    thread = threading.Thread(target=_run_cto_async, args=(job_id, body), daemon=True)
-    thread.start()
-    return {"jobId": job_id, "status": "running"}
-
-@app.get("/invoke/cto/status/{job_id}")
-def get_cto_job_status(job_id: str):
-    """Poll for async CTO job result. Returns {status, result} or {status, error}."""
-    with _jobs_lock:
-        job = _async_jobs.get(job_id)
-    if job is None:
+        logger.warning("[JobStore] Cleanup falhou: %s", e)
+    for i in range(max(1, AGENT_JOB_WORKERS)):
+        _job_workers.append(asyncio.create_task(_job_worker(i)))
+
+
+async def _stop_job_workers() -> None:
+    for task in _job_workers:
+        task.cancel()
+    await asyncio.gather(*_job_workers, return_exceptions=True)
+    _job_workers.clear()
+
+
+def _require_role(role: str) -> str:
+    role_key = (role or "").strip().lower()
+    if role_key not in ROLE_HANDLERS:
+        raise HTTPException(status_code=404, detail=f"Agente desconhecido: {role}")
+    return role_key
+
+
+@app.post("/invoke/{role}/async")
+async def invoke_role_async(role: str, body: dict):
+    """Enfileira o agente na fila durável e devolve jobId imediatamente.
+    Poll GET /invoke/{role}/status/{job_id} para o resultado.
+    Elimina a conexão HTTP longa que causa socket timeouts."""
+    role_key = _require_role(role)
+    job_id = await _store_call(get_job_store().submit, role_key, body)
+    if _job_wakeup is not None:
+        _job_wakeup.set()
+    return {"jobId": job_id, "status": "running", "state": "queued"}
+
+
+@app.get("/invoke/{role}/status/{job_id}")
+async def get_role_job_status(role: str, job_id: str):
+    """Poll for async job result. Returns {status, result} or {status, error}.
+    status mantém o contrato do runner (running|done|error); state traz o estado real (queued|running|...)."""
+    role_key = _require_role(role)
+    job = await _store_call(get_job_store().get, job_id)
+    if job is None or job.get("role") != role_key:
         raise HTTPException(status_code=404, detail="Job not found or expired")
-    elapsed = int(time.time() - job.get("created_at", time.time()))
+    elapsed = int(time.time() - (job.get("created_at") or time.time()))
+    base = {"jobId": job_id, "state": job["status"], "attempts": job.get("attempts", 0), "elapsed": elapsed}
     if job["status"] == "done":
-        return {"jobId": job_id, "status": "done", "result": job.get("result"), "elapsed": elapsed}
+        return {**base, "status": "done", "result": job.get("result")}
     if job["status"] == "error":
-        return {"jobId": job_id, "status": "error", "error": job.get("error"), "elapsed": elapsed}
-    return {"jobId": job_id, "status": "running", "elapsed": elapsed}
+        return {**base, "status": "error", "error": (job.get("error") or "")[:500]}
+    return {**base, "status": "running"}
 
 
 @app.post("/invoke/engineer")
-def invoke_engineer(body: dict):
-    return _invoke_agent(body, ENGINEER_SYSTEM_PROMPT_PATH, "ENGINEER")
+async def invoke_engineer(body: dict):
+    return await _invoke_role("engineer", body)
 
 
 @app.post("/invoke/cto")
-def invoke_cto(body: dict):
-    return _invoke_agent(body, CTO_SYSTEM_PROMPT_PATH, "CTO")
+async def invoke_cto(body: dict):
+    return await _invoke_role("cto", body)
 
 
 @app.post("/invoke/pm")
-def invoke_pm(body: dict):
-    return _invoke_parametrized(body, pm.get_system_prompt_path, "PM")
+async def invoke_pm(body: dict):
+    return await _invoke_role("pm", body)
 
 
 @app.post("/invoke/dev")
-def invoke_dev(body: dict):
-    return _invoke_parametrized(body, dev.get_system_prompt_path, "DEV")
+async def invoke_dev(body: dict):
+    return await _invoke_role("dev", body)
 
 
 @app.post("/invoke/qa")
-def invoke_qa(body: dict):
-    return _invoke_parametrized(body, qa.get_system_prompt_path, "QA")
+async def invoke_qa(body: dict):
+    return await _invoke_role("qa", body)
 
 
 @app.post("/invoke/monitor")
-def invoke_monitor(body: dict):
-    return _invoke_parametrized(body, monitor.get_system_prompt_path, "MONITOR")
+async def invoke_monitor(body: dict):
+    return await _invoke_role("monitor", body)
 
 
 @app.post("/invoke/devops")
-def invoke_devops(body: dict):
-    return _invoke_parametrized(body, devops.get_system_prompt_path, "DEVOPS")
+async def invoke_devops(body: dict):
+    return await _invoke_role("devops", body)
 
 
 # FT-18: /invoke/raw — endpoint usado pelo Cyborg V2 para chamar Bedrock com prompt/user custom.
-# Aceita: {prompt_override, user_message, model_id, model_id_fallback, max_tokens}
+# Aceita: {prompt_override, user_message, model_id, model_id_fallback, max_tokens, tenant_id}
 # Retorna: {response: <texto bruto do LLM>}
 @app.post("/invoke/raw")
-def invoke_raw(body: dict):
+async def invoke_raw(body: dict):
     """Chamada Bedrock direta com prompt + user_message customizados (para Cyborg V2).
 
     NOTA sobre temperature: modelos extended-thinking (Opus 4.7, 4.8, Sonnet 4.5+) exigem
@@ -563,15 +776,17 @@ def invoke_raw(body: dict):
     Estratégia: se o modelo é opus-4-7/4-8/sonnet-4-x, força temperature=1. Senão respeita input.
     """
     try:
-        from orchestrator.agents.runtime import call_bedrock_direct
+        from orchestrator.agents.llm_clients import tenant_scope
+        from orchestrator.agents.runtime import call_bedrock_direct_async
     except ImportError:
-        raise HTTPException(status_code=500, detail="call_bedrock_direct não disponível neste container")
+        raise HTTPException(status_code=500, detail="call_bedrock_direct_async não disponível neste container")
 
     system_prompt = body.get("prompt_override", "")
     user_message  = body.get("user_message", "")
     model_id      = body.get("model_id") or os.environ.get("CLAUDE_MODEL", "us.anthropic.claude-opus-4-8")
     fallback_id   = body.get("model_id_fallback")
     max_tokens    = int(body.get("max_tokens", 8000))
+    scope         = tenant_scope(body)
     # temperature: modelos extended-thinking exigem 1.0 (deprecated aceitar outros).
     # Detecta e força 1.0 pra evitar erro Bedrock 400.
     def _temp_for(model: str) -> float:
@@ -584,16 +799,19 @@ def invoke_raw(body: dict):
         raise HTTPException(status_code=400, detail="prompt_override + user_message obrigatórios")
 
     try:
-        resp = call_bedrock_direct(system=system_prompt, user=user_message,
-                                    model_id=model_id, max_tokens=max_tokens, temperature=_temp_for(model_id))
+        async with _limiter_for(("bedrock", model_id)):
+            resp = await call_bedrock_direct_async(system=system_prompt, user=user_message,
+                                                   model_id=model_id, max_tokens=max_tokens,
+                                                   temperature=_temp_for(model_id), scope=scope)
         return {"response": resp, "model_used": model_id}
     except Exception as e:
         logger.warning(f"[/invoke/raw] Principal falhou ({model_id}): {e}")
         if fallback_id:
             try:
-                resp = call_bedrock_direct(system=system_prompt, user=user_message,
-                                            model_id=fallback_id, max_tokens=max_tokens,
-                                            temperature=_temp_for(fallback_id))
+                async with _limiter_for(("bedrock", fallback_id)):
+                    resp = await call_bedrock_direct_async(system=system_prompt, user=user_message,
+                                                           model_id=fallback_id, max_tokens=max_tokens,
+                                                           temperature=_temp_for(fallback_id), scope=scope)
                 return {"response": resp, "model_used": fallback_id, "fallback": True}
             except Exception as e2:
                 raise HTTPException(status_code=500,
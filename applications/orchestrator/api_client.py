@@ -0,0 +1,265 @@
+"""
+api_client.py — Cliente HTTP compartilhado runner → api-node.
+
+Antes cada chamada (_api_request, métricas, diálogo, skill store...) abria uma conexão nova
+com urllib.urlopen; uma iteração do Monitor Loop faz dezenas delas. Aqui:
+
+  - pool de conexões keep-alive (http.client) por base URL, compartilhado entre threads;
+  - retries com backoff exponencial + jitter para métodos idempotentes (erros de rede e
+    HTTP 429/502/503/504); conexão ociosa que o servidor já fechou é descartada antes do envio
+    (nenhum byte sai por ela). Se a conexão cai depois do envio, a requisição só é reenviada
+    em métodos idempotentes: um POST pode ter sido processado e é reportado como falha;
+  - batch: várias operações em um único POST /api/batch (contrato em
+    services/api-node/src/routes/batch.ts). API antiga sem a rota (404/405) → as operações
+    são enviadas uma a uma, com o mesmo resultado.
+
+Interface:
+    client = get_api_client(base_url, token)
+    data, status = client.request("GET", "/api/projects/p1/tasks")
+    results = client.batch([{"method": "PATCH", "path": "...", "body": {...}}, ...])
+
+Como no urllib anterior: status 0 = falha de rede; 304 → (None, 304).
+"""
+import http.client
+import json
+import logging
+import os
+import random
+import select
+import threading
+import time
+import urllib.parse
+from collections import deque
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Conexões ociosas mantidas por base URL (além disso, são fechadas ao devolver)
+API_CLIENT_POOL_SIZE = int(os.environ.get("API_CLIENT_POOL_SIZE", "8") or 8)
+# Novas tentativas após a primeira (métodos idempotentes; 0 = sem retry)
+API_CLIENT_RETRIES = int(os.environ.get("API_CLIENT_RETRIES", "2") or 0)
+# Base do backoff exponencial (s); espera real = uniforme(0, base * 2^tentativa)
+API_CLIENT_BACKOFF_SEC = float(os.environ.get("API_CLIENT_BACKOFF_SEC", "0.25") or 0)
+# Máximo de operações por POST /api/batch (mesmo limite default da API)
+API_BATCH_MAX_OPS = int(os.environ.get("API_BATCH_MAX_OPS", "50") or 50)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "PATCH", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Erros de conexão keep-alive fechada pelo servidor antes de qualquer resposta
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class ApiClient:
+    """Cliente keep-alive thread-safe para uma base URL da API."""
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str | None = None,
+        pool_size: int = API_CLIENT_POOL_SIZE,
+        retries: int = API_CLIENT_RETRIES,
+        backoff_sec: float = API_CLIENT_BACKOFF_SEC,
+    ):
+        parts = urllib.parse.urlsplit(base_url.rstrip("/"))
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+        self.token = token or None
+        self.pool_size = max(0, pool_size)
+        self.retries = max(0, retries)
+        self.backoff_sec = max(0.0, backoff_sec)
+        self._idle: deque[http.client.HTTPConnection] = deque()
+        self._lock = threading.Lock()
+        self._batch_supported = True
+
+    # ── pool ────────────────────────────────────────────────────────────────────
+
+    def _acquire(self, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None or not _closed_by_peer(conn):
+                break
+            conn.close()
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        return cls(self._host, self._port, timeout=timeout), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            conn.close()
+
+    # ── requisições ─────────────────────────────────────────────────────────────
+
+    def _backoff(self, attempt: int) -> None:
+        if self.backoff_sec > 0:
+            time.sleep(random.uniform(0, self.backoff_sec * (2 ** attempt)))
+
+    def _send_once(
+        self,
+        method: str,
+        url: str,
+        payload: bytes | None,
+        headers: dict,
+        timeout: float,
+        idempotent: bool = True,
+    ) -> tuple[int, bytes, dict]:
+        """
+        Uma requisição. Se a conexão reaproveitada cai depois do envio (fechada pelo servidor
+        entre o teste em _acquire e o request), reabre e reenvia uma vez — só quando idempotent:
+        o servidor pode ter recebido e processado o corpo.
+        """
+        for _ in range(2):
+            conn, reused = self._acquire(timeout)
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused and idempotent:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return resp.status, raw, {k.lower(): v for k, v in resp.getheaders()}
+        raise ConnectionError("conexão keep-alive encerrada pelo servidor")
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        timeout: float = 15,
+        headers: dict | None = None,
+        response_headers: dict | None = None,
+        idempotent: bool | None = None,
+    ) -> tuple[Any, int]:
+        """(json, status) — status 0 = falha de rede após os retries."""
+        method = method.upper()
+        retry_ok = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        hdrs = {"Accept": "application/json", **(headers or {})}
+        if self.token:
+            hdrs.setdefault("Authorization", f"Bearer {self.token}")
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            hdrs.setdefault("Content-Type", "application/json")
+        url = f"{self._prefix}{path}"
+        attempts = 1 + (self.retries if retry_ok else 0)
+        for attempt in range(attempts):
+            try:
+                status, raw, resp_headers = self._send_once(method, url, payload, hdrs, timeout, retry_ok)
+            except TimeoutError as e:
+                # timeout não é repetido: o long-poll / chamada lenta já consumiu o prazo do chamador
+                logger.warning("Falha na requisição API %s %s: %s", method, path, e)
+                return None, 0
+            except (OSError, http.client.HTTPException) as e:
+                if attempt + 1 < attempts:
+                    logger.debug("[ApiClient] %s %s falhou (%s) — tentativa %d/%d", method, path, e, attempt + 1, attempts)
+                    self._backoff(attempt)
+                    continue
+                logger.warning("Falha na requisição API %s %s: %s", method, path, e)
+                return None, 0
+            if status in RETRY_STATUSES and attempt + 1 < attempts:
+                logger.debug("[ApiClient] %s %s → HTTP %s — tentativa %d/%d", method, path, status, attempt + 1, attempts)
+                self._backoff(attempt)
+                continue
+            if response_headers is not None:
+                response_headers.update(resp_headers)
+            if status == 304 or not raw:
+                return None, status
+            try:
+                return json.loads(raw.decode("utf-8")), status
+            except ValueError:
+                return None, status
+        return None, 0
+
+    def batch(self, ops: list[dict], timeout: float = 30) -> list[tuple[Any, int]]:
+        """
+        Executa ops ([{method, path, body?}]) em POST /api/batch (em blocos de API_BATCH_MAX_OPS).
+        Devolve [(json, status)] na mesma ordem. Sem a rota na API → uma requisição por op.
+        """
+        results: list[tuple[Any, int]] = []
+        for start in range(0, len(ops), max(1, API_BATCH_MAX_OPS)):
+            chunk = ops[start:start + max(1, API_BATCH_MAX_OPS)]
+            results.extend(self._batch_chunk(chunk, timeout))
+        return results
+
+    def _batch_chunk(self, ops: list[dict], timeout: float) -> list[tuple[Any, int]]:
+        if self._batch_supported and len(ops) > 1:
+            idempotent = all(str(op.get("method", "")).upper() in IDEMPOTENT_METHODS for op in ops)
+            body = {"requests": [
+                {"method": str(op.get("method", "")).upper(), "path": op.get("path"),
+                 **({"body": op["body"]} if op.get("body") is not None else {})}
+                for op in ops
+            ]}
+            data, status = self.request("POST", "/api/batch", body, timeout=timeout, idempotent=idempotent)
+            responses = data.get("responses") if isinstance(data, dict) else None
+            if status == 200 and isinstance(responses, list) and len(responses) == len(ops):
+                return [
+                    (r.get("body"), int(r.get("status") or 0)) if isinstance(r, dict) else (None, 0)
+                    for r in responses
+                ]
+            if status not in (404, 405):
+                return [(data, status)] * len(ops)
+            logger.info("[ApiClient] API sem /api/batch (HTTP %s) — operações enviadas individualmente.", status)
+            self._batch_supported = False
+        return [
+            self.request(str(op.get("method", "GET")), op.get("path", ""), op.get("body"), timeout=timeout)
+            for op in ops
+        ]
+
+
+def _closed_by_peer(conn: http.client.HTTPConnection) -> bool:
+    """Conexão ociosa legível = EOF/RST do servidor (ou lixo inesperado): não serve para reenvio."""
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+_clients: dict[tuple[str, str], ApiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_api_client(base_url: str, token: str | None = None) -> ApiClient:
+    """Cliente compartilhado (um pool por base URL + token)."""
+    key = (base_url.rstrip("/"), token or "")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ApiClient(key[0], token)
+        return client
+
+
+def reset_api_clients() -> None:
+    """Fecha todas as conexões ociosas e descarta os clientes (testes / shutdown)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
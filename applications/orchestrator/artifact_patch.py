@@ -0,0 +1,195 @@
+"""
+Artifacts em formato patch (rework do Dev): em vez de reemitir o arquivo inteiro em content, o
+modelo envia só as mudanças contra o arquivo atual — unified diff (hunks @@) ou blocos
+SEARCH/REPLACE. O patch é aplicado sobre o arquivo em disco (ou sobre o content da tentativa
+anterior) e o artifact segue o pipeline com o content completo resultante.
+
+Contrato do artifact (só para apps/):
+    {"path": "apps/src/x.ts", "format": "patch", "patch": "@@ -10,3 +10,4 @@\\n ..."}
+    {"path": "apps/src/x.ts", "format": "patch", "patch": "<<<<<<< SEARCH\\n...\\n=======\\n...\\n>>>>>>> REPLACE"}
+
+Aplicação tolerante: hunk procurado primeiro na linha indicada e depois no ponto mais próximo do
+arquivo (números de linha do modelo costumam vir deslocados), ignorando espaços no fim de linha
+quando o match exato falha. Hunk que não casa → PatchError; quem chama volta ao modo arquivo
+inteiro (content).
+"""
+from __future__ import annotations
+
+import logging
+import re
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_SEARCH, _DIVIDER, _REPLACE = "<<<<<<< SEARCH", "=======", ">>>>>>> REPLACE"
+
+
+class PatchError(ValueError):
+    """Patch que não pode ser aplicado ao arquivo atual."""
+
+
+def is_patch_artifact(art) -> bool:
+    """Artifact com patch e sem content (content presente = arquivo inteiro, tem precedência)."""
+    return (
+        isinstance(art, dict)
+        and isinstance(art.get("patch"), str)
+        and bool(art["patch"].strip())
+        and not (isinstance(art.get("content"), str) and art["content"].strip())
+    )
+
+
+def _split(text: str) -> tuple[list[str], bool]:
+    return text.splitlines(), text.endswith("\n")
+
+
+def _join(lines: list[str], trailing_newline: bool) -> str:
+    return "\n".join(lines) + ("\n" if trailing_newline and lines else "")
+
+
+def _find_block(lines: list[str], block: list[str], expected: int, start: int) -> int:
+    """Posição de block em lines (>= start) mais próxima de expected; -1 se não encontrado."""
+    last = len(lines) - len(block)
+    if last < start:
+        return -1
+    for normalize in (lambda s: s, lambda s: s.rstrip()):
+        wanted = [normalize(x) for x in block]
+        candidates = sorted(range(start, last + 1), key=lambda i: abs(i - expected))
+        for i in candidates:
+            if all(normalize(lines[i + k]) == wanted[k] for k in range(len(block))):
+                return i
+    return -1
+
+
+def _parse_unified(patch: str) -> list[tuple[int | None, list[tuple[str, str]]]]:
+    """Hunks (linha inicial 1-based ou None, [(tag " "|"-"|"+", texto)]) do unified diff."""
+    hunks: list[tuple[int | None, list[tuple[str, str]]]] = []
+    current: tuple[int | None, list[tuple[str, str]]] | None = None
+    for line in patch.splitlines():
+        if line.startswith("@@"):
+            m = _HUNK_HEADER.match(line)
+            current = (int(m.group(1)) if m else None, [])
+            hunks.append(current)
+            continue
+        if current is None or line.startswith(("--- ", "+++ ", "diff --git", "index ")):
+            continue
+        if line.startswith("\\"):  # "\ No newline at end of file"
+            continue
+        tag, text = (line[0], line[1:]) if line else (" ", "")
+        if tag not in " -+":
+            raise PatchError(f"linha de hunk inválida: {line[:60]!r}")
+        current[1].append((tag, text))
+    if not hunks:
+        raise PatchError("nenhum hunk @@ no patch")
+    return hunks
+
+
+def _apply_unified(original: str, patch: str) -> str:
+    lines, trailing = _split(original)
+    offset = 0
+    cursor = 0
+    for n, (start, ops) in enumerate(_parse_unified(patch), 1):
+        old = [text for tag, text in ops if tag != "+"]
+        expected = max(0, start - 1 + offset) if start else cursor
+        if not old:
+            # hunk só de inserção: "-N,0" insere depois da linha N
+            pos = min(start + offset, len(lines)) if start is not None else len(lines)
+        else:
+            pos = _find_block(lines, old, expected, cursor)
+            if pos < 0:
+                raise PatchError(f"hunk {n} não encontrado no arquivo ({len(old)} linha(s) de contexto/remoção)")
+        # linhas de contexto mantêm o texto do arquivo (o match pode ter ignorado espaços finais)
+        source = iter(lines[pos:pos + len(old)])
+        new = []
+        for tag, text in ops:
+            if tag == "+":
+                new.append(text)
+            elif tag == " ":
+                new.append(next(source))
+            else:
+                next(source)
+        lines[pos:pos + len(old)] = new
+        cursor = pos + len(new)
+        offset += len(new) - len(old)
+    return _join(lines, trailing or not original)
+
+
+def _parse_search_replace(patch: str) -> list[tuple[list[str], list[str]]]:
+    blocks: list[tuple[list[str], list[str]]] = []
+    state, search, replace = None, [], []
+    for line in patch.splitlines():
+        marker = line.strip()
+        if marker == _SEARCH and state is None:
+            state, search, replace = "search", [], []
+        elif marker == _DIVIDER and state == "search":
+            state = "replace"
+        elif marker == _REPLACE and state == "replace":
+            blocks.append((search, replace))
+            state = None
+        elif state == "search":
+            search.append(line)
+        elif state == "replace":
+            replace.append(line)
+    if state is not None:
+        raise PatchError("bloco SEARCH/REPLACE incompleto")
+    if not blocks:
+        raise PatchError("nenhum bloco SEARCH/REPLACE no patch")
+    return blocks
+
+
+def _apply_search_replace(original: str, patch: str) -> str:
+    lines, trailing = _split(original)
+    for n, (search, replace) in enumerate(_parse_search_replace(patch), 1):
+        if not search:
+            if lines:
+                raise PatchError(f"bloco {n} com SEARCH vazio em arquivo existente")
+            lines = list(replace)
+            continue
+        pos = _find_block(lines, search, 0, 0)
+        if pos < 0:
+            raise PatchError(f"bloco {n}: trecho SEARCH não encontrado no arquivo")
+        lines[pos:pos + len(search)] = replace
+    return _join(lines, trailing or not original)
+
+
+def apply_patch(original: str, patch: str) -> str:
+    """Aplica unified diff ou blocos SEARCH/REPLACE a original; PatchError se algum trecho não casar."""
+    if any(line.strip() == _SEARCH for line in patch.splitlines()):
+        return _apply_search_replace(original, patch)
+    if re.search(r"^@@", patch, re.M):
+        return _apply_unified(original, patch)
+    raise PatchError("formato de patch não reconhecido (esperado hunks @@ ou blocos SEARCH/REPLACE)")
+
+
+def resolve_patch_artifacts(
+    artifacts: list,
+    read_current: Callable[[str], str | None],
+) -> tuple[list, list[str]]:
+    """
+    Substitui artifacts patch pelo arquivo completo (content) aplicando o patch sobre
+    read_current(path) (None = arquivo novo). Retorna (artifacts, erros); artifact cujo patch não
+    aplica fica como veio e gera erro pedindo o arquivo inteiro (atribuível ao path no repair).
+    """
+    resolved: list = []
+    errors: list[str] = []
+    for art in artifacts:
+        if not is_patch_artifact(art):
+            resolved.append(art)
+            continue
+        path = art.get("path")
+        if not isinstance(path, str) or not path.strip().startswith("apps/"):
+            resolved.append(art)
+            errors.append(f"artifact {path!r}: formato patch só é aceito para arquivos em apps/")
+            continue
+        try:
+            content = apply_patch(read_current(path) or "", art["patch"])
+        except PatchError as e:
+            resolved.append(art)
+            errors.append(f"artifact {path!r}: patch não aplicado ({e}) — reenvie o arquivo COMPLETO em content")
+            continue
+        full = {k: v for k, v in art.items() if k not in ("patch", "format")}
+        full["content"] = content
+        full["patched"] = True
+        resolved.append(full)
+        logger.info("[ArtifactPatch] %s: patch de %d chars aplicado (%d chars no arquivo)", path, len(art["patch"]), len(content))
+    return resolved, errors
@@ -0,0 +1,332 @@
+"""
+Blob store endereçado por conteúdo para os checkpoints do PipelineContext (LEI 11).
+
+Cada conteúdo é gravado uma única vez em <root>/<sha[:2]>/<sha>.z (zlib), chaveado pelo sha256
+dos bytes UTF-8 — a mesma chave do ProjectFileIndex.sha256, então um artifact e o arquivo que ele
+gerou em apps/ têm o mesmo digest. O checkpoint guarda só {path: sha}; salvar escreve apenas os
+blobs novos e carregar não lê conteúdo nenhum até o artifact ser acessado (BlobBackedMap).
+
+BlobBackedMap também limita a memória do runner: um LRU de conteúdos quentes (PIPELINE_ARTIFACT_CACHE_MB)
+e o resto lido de disco sob demanda, independente do tamanho do projeto.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+BLOB_SUFFIX = ".z"
+# Teto de conteúdo de artifacts residente em memória por mapa (chars ≈ bytes em código ASCII)
+ARTIFACT_CACHE_CHARS = int(float(os.environ.get("PIPELINE_ARTIFACT_CACHE_MB", "64") or 64) * 1024 * 1024)
+
+_UNLOADED = object()
+
+
+def content_digest(content: str | bytes) -> str:
+    """sha256 hex do conteúdo (str em UTF-8)."""
+    if isinstance(content, str):
+        content = content.encode("utf-8", errors="surrogatepass")
+    return hashlib.sha256(content).hexdigest()
+
+
+class BlobStore:
+    """Diretório de blobs sha256 → conteúdo comprimido; escrita atômica e idempotente."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.written = 0  # blobs efetivamente gravados por esta instância
+
+    def path(self, sha: str) -> Path:
+        return self.root / sha[:2] / (sha + BLOB_SUFFIX)
+
+    def has(self, sha: str) -> bool:
+        return self.path(sha).exists()
+
+    def put(self, content: str, sha: str | None = None) -> str:
+        """Grava o conteúdo se o blob ainda não existe; retorna o sha."""
+        sha = sha or content_digest(content)
+        target = self.path(sha)
+        if target.exists():
+            return sha
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(zlib.compress(content.encode("utf-8", errors="surrogatepass")))
+        os.replace(tmp, target)
+        self.written += 1
+        return sha
+
+    def get(self, sha: str) -> str:
+        return zlib.decompress(self.path(sha).read_bytes()).decode("utf-8", errors="surrogatepass")
+
+    def prune(self, keep: set[str]) -> int:
+        """Remove blobs não referenciados em keep; retorna quantos removeu."""
+        removed = 0
+        if not self.root.is_dir():
+            return 0
+        for bucket in self.root.iterdir():
+            if not bucket.is_dir():
+                continue
+            for blob in bucket.iterdir():
+                if blob.name.endswith(BLOB_SUFFIX) and blob.name[: -len(BLOB_SUFFIX)] not in keep:
+                    try:
+                        blob.unlink()
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
+
+
+def _mmap_read(path: Path) -> bytes:
+    """Lê o arquivo inteiro via mmap (sem buffer intermediário de read())."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:]
+
+
+class BlobBackedMap(MutableMapping):
+    """
+    dict path → conteúdo com residência limitada: só os valores mais usados (LRU, até max_resident
+    chars) ficam em memória; os demais são lidos sob demanda de onde estão em disco — o arquivo do
+    projeto com o mesmo conteúdo (files_root/<path>, lido via mmap) ou o BlobStore.
+
+    Mantém o sha de cada valor já persistido: escrever um path invalida só o sha dele, então
+    digests() custa proporcional ao que mudou desde o último checkpoint. Tamanhos (chars) de todos
+    os paths ficam disponíveis sem carregar conteúdo (size/total_size).
+    """
+
+    def __init__(
+        self,
+        initial: dict | None = None,
+        store: BlobStore | None = None,
+        refs: dict | None = None,
+        sizes: dict | None = None,
+        max_resident: int | None = None,
+        files_root: Callable[[], Path | None] | Path | None = None,
+    ):
+        self._store = store
+        self._data: dict = {}
+        self._digests: dict[str, str] = {}
+        self._sizes: dict[str, int] = {}
+        self._persisted: set[str] = set()  # paths cujo blob existe em self._store
+        self._files: dict[str, tuple[Path, int, int]] = {}  # path → (arquivo, size, mtime_ns) do spill
+        self._lru: OrderedDict[str, None] = OrderedDict()
+        self._resident = 0
+        self._max_resident = ARTIFACT_CACHE_CHARS if max_resident is None else max_resident
+        self._files_root = files_root
+        self._lock = threading.RLock()
+        self._spill_dir: str | None = None
+        self.spilled = 0  # valores tirados da memória
+        for path, sha in (refs or {}).items():
+            self._data[path] = _UNLOADED
+            self._digests[path] = sha
+            self._persisted.add(path)
+            self._sizes[path] = int((sizes or {}).get(path, 0))
+        if initial:
+            self.update(initial)
+
+    # ── Mapping ──────────────────────────────────────────────────────────────
+
+    def __getitem__(self, path: str) -> str:
+        with self._lock:
+            value = self._data[path]
+            if value is _UNLOADED:
+                value = self._read(path)
+                self._data[path] = value
+                self._resident += len(value)
+                self._lru[path] = None
+                self._evict(keep=path)
+            else:
+                self._lru.move_to_end(path)
+            return value
+
+    def __setitem__(self, path: str, content: str) -> None:
+        with self._lock:
+            self._drop(path)
+            self._data[path] = content
+            self._sizes[path] = len(content)
+            self._resident += len(content)
+            self._lru[path] = None
+            self._evict(keep=path)
+
+    def __delitem__(self, path: str) -> None:
+        with self._lock:
+            if path not in self._data:
+                raise KeyError(path)
+            self._drop(path)
+            del self._data[path]
+            self._sizes.pop(path, None)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"BlobBackedMap({len(self._data)} paths, {self.loaded} carregados)"
+
+    # ── Estado / tamanhos ────────────────────────────────────────────────────
+
+    @property
+    def loaded(self) -> int:
+        """Quantos valores estão em memória."""
+        return len(self._lru)
+
+    @property
+    def resident_size(self) -> int:
+        """Chars em memória."""
+        return self._resident
+
+    @property
+    def total_size(self) -> int:
+        """Chars de todos os paths (em memória ou em disco)."""
+        return sum(self._sizes.values())
+
+    def size(self, path: str) -> int:
+        """Tamanho (chars) do valor sem carregá-lo; 0 se desconhecido (checkpoint antigo)."""
+        return self._sizes.get(path, 0)
+
+    def sizes(self) -> dict[str, int]:
+        return dict(self._sizes)
+
+    def stats(self) -> dict:
+        return {
+            "paths": len(self._data),
+            "resident": self.loaded,
+            "resident_chars": self._resident,
+            "total_chars": self.total_size,
+            "spilled_to_files": len(self._files),
+            "spilled": self.spilled,
+        }
+
+    def digest(self, path: str) -> str | None:
+        """sha do valor se já persistido (sem carregar o conteúdo)."""
+        return self._digests.get(path)
+
+    # ── Persistência ─────────────────────────────────────────────────────────
+
+    def digests(self, store: BlobStore) -> dict[str, str]:
+        """Persiste em store os valores novos/alterados e retorna {path: sha} de todos."""
+        with self._lock:
+            if self._store is None or self._store.root != store.root:
+                # troca de store (1º checkpoint após spill temporário): tudo precisa existir no novo
+                self._persisted = {p for p in self._persisted if p in self._digests and store.has(self._digests[p])}
+            for path in self._data:
+                if path in self._persisted:
+                    continue
+                value = self._data[path]
+                if value is _UNLOADED:
+                    value = self._read(path)  # sem promover ao LRU
+                self._digests[path] = store.put(value, self._digests.get(path))
+                self._persisted.add(path)
+            old_spill, self._store = self._spill_dir, store
+            if old_spill:
+                self._spill_dir = None
+                shutil.rmtree(old_spill, ignore_errors=True)
+            return {path: self._digests[path] for path in self._data}
+
+    # ── Internos ─────────────────────────────────────────────────────────────
+
+    def _drop(self, path: str) -> None:
+        """Esquece o valor atual de path (memória, sha e spill)."""
+        if path in self._lru:
+            del self._lru[path]
+            value = self._data.get(path)
+            if isinstance(value, str):
+                self._resident -= len(value)
+        self._digests.pop(path, None)
+        self._persisted.discard(path)
+        self._files.pop(path, None)
+
+    def _project_file(self, path: str) -> Path | None:
+        root = self._files_root() if callable(self._files_root) else self._files_root
+        if not root:
+            return None
+        root = Path(root).resolve()
+        candidate = (root / path).resolve()
+        if root not in candidate.parents:
+            return None
+        return candidate
+
+    def _read(self, path: str) -> str:
+        """Conteúdo de um path fora da memória: arquivo do projeto (mmap) ou blob."""
+        spilled = self._files.get(path)
+        if spilled is not None:
+            fp, size, mtime_ns = spilled
+            try:
+                st = fp.stat()
+                content = _mmap_read(fp).decode("utf-8", errors="replace")
+                if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                    # arquivo reescrito depois do spill (ex.: Cyborg): vale a versão atual do projeto
+                    logger.debug("[BlobStore] %s mudou em disco desde o spill; usando versão atual", path)
+                    self._files[path] = (fp, st.st_size, st.st_mtime_ns)
+                    self._digests.pop(path, None)
+                    self._persisted.discard(path)
+                    self._sizes[path] = len(content)
+                return content
+            except OSError:
+                self._files.pop(path, None)
+                if path not in self._persisted:
+                    logger.warning("[BlobStore] Arquivo de %s sumiu do projeto e não há blob", path)
+                    raise KeyError(path)
+        try:
+            return self._store.get(self._digests[path])
+        except (AttributeError, KeyError, OSError, zlib.error) as e:
+            logger.warning("[BlobStore] Blob de %s ilegível (%s): %s", path, self._digests.get(path), e)
+            raise KeyError(path) from e
+
+    def _spill(self, path: str, value: str) -> None:
+        """Garante que value é recuperável de disco antes de tirá-lo da memória."""
+        if path in self._persisted or path in self._files:
+            return
+        fp = self._project_file(path)
+        if fp is not None:
+            try:
+                st = fp.stat()
+                encoded = value.encode("utf-8", errors="surrogatepass")
+                if st.st_size == len(encoded) and _mmap_read(fp) == encoded:
+                    self._files[path] = (fp, st.st_size, st.st_mtime_ns)
+                    return
+            except OSError:
+                pass
+        if self._store is None:
+            # antes do 1º checkpoint: store temporário, migrado/removido em digests()
+            self._spill_dir = tempfile.mkdtemp(prefix="genesis-artifacts-")
+            self._store = BlobStore(self._spill_dir)
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        self._digests[path] = self._store.put(value, self._digests.get(path))
+        self._persisted.add(path)
+
+    def _evict(self, keep: str) -> None:
+        while self._resident > self._max_resident and len(self._lru) > 1:
+            path = next(iter(self._lru))
+            if path == keep:
+                self._lru.move_to_end(path)
+                continue
+            value = self._data[path]
+            try:
+                self._spill(path, value)
+            except OSError as e:
+                logger.warning("[BlobStore] Spill de %s falhou (mantido em memória): %s", path, e)
+                return
+            del self._lru[path]
+            self._data[path] = _UNLOADED
+            self._resident -= len(value)
+            self.spilled += 1
@@ -0,0 +1,89 @@
+"""
+change_feed.py — Canal de mudanças de projeto para o Monitor Loop.
+
+Em vez de dormir MONITOR_LOOP_INTERVAL a cada ciclo, o loop bloqueia em
+ProjectChangeFeed.wait(), que retorna assim que algo muda:
+
+  - remoto: long-poll GET /api/projects/:id/changes?since=<version>&timeout=<s> na API
+    (a API responde quando status/tasks do projeto mudam — inclusive por outro runner ou
+    pelo portal);
+  - local: notify() — workers do próprio runner (agendador DAG) acordam o loop ao terminar.
+    Sem API (testes, modo offline) o canal local funciona sozinho como fila de eventos.
+
+API antiga sem /changes (404) ou indisponível → espera simples pelo canal local até o
+timeout, o mesmo comportamento do sleep fixo anterior.
+"""
+import logging
+import os
+import threading
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# MONITOR_LONG_POLL=false desliga o long-poll (volta ao intervalo fixo + canal local)
+MONITOR_LONG_POLL = os.environ.get("MONITOR_LONG_POLL", "true").strip().lower() in ("1", "true", "yes")
+
+# request(path, timeout_sec) → (json, http_status); status 0 = falha de rede
+RequestFn = Callable[[str, float], "tuple[Any, int]"]
+
+
+class ProjectChangeFeed:
+    """Espera por mudanças de um projeto (long-poll na API + eventos locais)."""
+
+    def __init__(self, project_id: str, request: RequestFn | None = None, long_poll: bool = MONITOR_LONG_POLL):
+        self.project_id = project_id
+        self._request = request
+        self._remote = bool(request and project_id and long_poll)
+        self._local = threading.Event()
+        self._version: str | None = None
+
+    @property
+    def version(self) -> str | None:
+        return self._version
+
+    def notify(self) -> None:
+        """Sinaliza mudança local (ex.: worker do agendador terminou uma task)."""
+        self._local.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Bloqueia até uma mudança ou timeout (s). True se houve mudança."""
+        if self._consume_local():
+            return True
+        if self._remote:
+            changed = self._long_poll(timeout)
+            if changed is not None:
+                return self._consume_local() or changed
+        fired = self._local.wait(max(0.0, timeout))
+        self._local.clear()
+        return fired
+
+    def _consume_local(self) -> bool:
+        if self._local.is_set():
+            self._local.clear()
+            return True
+        return False
+
+    def _long_poll(self, timeout: float) -> bool | None:
+        """True/False = resposta do long-poll; None = canal remoto indisponível (usar fallback)."""
+        if self._version is None:
+            data, status = self._request(f"/api/projects/{self.project_id}/changes", 15)
+            if not self._accept(data, status):
+                return None
+        wait_sec = max(1, int(timeout))
+        path = f"/api/projects/{self.project_id}/changes?since={self._version}&timeout={wait_sec}"
+        data, status = self._request(path, wait_sec + 15)
+        if not self._accept(data, status):
+            return None
+        return bool(data.get("changed"))
+
+    def _accept(self, data: Any, status: int) -> bool:
+        if status == 200 and isinstance(data, dict) and data.get("version"):
+            self._version = str(data["version"])
+            return True
+        if status in (404, 405):
+            # API sem o endpoint /changes: não insistir a cada ciclo
+            logger.info("[ChangeFeed] Long-poll indisponível na API (HTTP %s) — usando intervalo fixo.", status)
+            self._remote = False
+        else:
+            logger.debug("[ChangeFeed] Long-poll falhou (HTTP %s) — fallback para intervalo fixo neste ciclo.", status)
+        return False
@@ -158,7 +158,7 @@ ALL_CHECKLISTS: list[dict[str, Any]] = (
 # Seed
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _open_pg():
+def _database_url() -> str:
     db_url = os.environ.get("DATABASE_URL", "").strip()
     if not db_url:
         # fallback: montar DSN a partir de PG* env vars (padrão do runner Docker)
@@ -168,18 +168,7 @@ def _open_pg():
         password = os.environ.get("PGPASSWORD", "genesis_dev")
         dbname = os.environ.get("PGDATABASE", "zentriz_genesis")
         db_url = f"postgresql://{user}:{password}@{host}:{port}/{dbname}"
-    try:
-        import psycopg2  # type: ignore
-        return psycopg2.connect(db_url)
-    except ImportError:
-        pass
-    try:
-        import psycopg  # type: ignore
-        return psycopg.connect(db_url)
-    except ImportError:
-        pass
-    # último recurso: urllib-based via requests para API Node (sem driver nativo)
-    raise RuntimeError("psycopg2 ou psycopg não encontrado — instale um deles.")
+    return db_url
 
 
 def _build_payload(items: list[dict[str, Any]], stack: str) -> dict[str, Any]:
@@ -205,55 +194,55 @@ def seed_all(ttl_days: int = 365) -> dict[str, int]:
 
     expires_at = datetime.now(timezone.utc) + timedelta(days=ttl_days)
 
-    inserted = 0
-    updated = 0
-    conn = _open_pg()
-    try:
-        with conn:
-            with conn.cursor() as cur:
-                for stack, items in by_stack.items():
-                    payload = _build_payload(items, stack)
-                    cache_key = f"cag:dev:{stack}:checklist-bugs"
-                    tokens = _estimate_tokens(payload)
-                    cur.execute(
-                        """
-                        INSERT INTO context_cache
-                            (cache_key, role, connect_version, project_id,
-                             stack_key, category, payload, payload_tokens, expires_at)
-                        VALUES (%s, 'dev', %s, NULL, %s, 'checklist',
-                                %s::jsonb, %s, %s)
-                        ON CONFLICT (cache_key) DO UPDATE
-                           SET payload         = EXCLUDED.payload,
-                               payload_tokens  = EXCLUDED.payload_tokens,
-                               connect_version = EXCLUDED.connect_version,
-                               expires_at      = EXCLUDED.expires_at
-                         RETURNING (xmax = 0) AS inserted
-                        """,
-                        (
-                            cache_key,
-                            os.environ.get("CONNECT_VERSION_PIN", "1.1.0"),
-                            stack,
-                            json.dumps(payload, ensure_ascii=False),
-                            tokens,
-                            expires_at,
-                        ),
-                    )
-                    was_inserted = cur.fetchone()[0]
-                    if was_inserted:
-                        inserted += 1
-                    else:
-                        updated += 1
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+    def _work(cur) -> tuple[int, int]:
+        inserted = 0
+        updated = 0
+        for stack, items in by_stack.items():
+            payload = _build_payload(items, stack)
+            cache_key = f"cag:dev:{stack}:checklist-bugs"
+            tokens = _estimate_tokens(payload)
+            cur.execute(
+                """
+                INSERT INTO context_cache
+                    (cache_key, role, connect_version, project_id,
+                     stack_key, category, payload, payload_tokens, expires_at)
+                VALUES (%s, 'dev', %s, NULL, %s, 'checklist',
+                        %s::jsonb, %s, %s)
+                ON CONFLICT (cache_key) DO UPDATE
+                   SET payload         = EXCLUDED.payload,
+                       payload_tokens  = EXCLUDED.payload_tokens,
+                       connect_version = EXCLUDED.connect_version,
+                       expires_at      = EXCLUDED.expires_at
+                 RETURNING (xmax = 0) AS inserted
+                """,
+                (
+                    cache_key,
+                    os.environ.get("CONNECT_VERSION_PIN", "1.1.0"),
+                    stack,
+                    json.dumps(payload, ensure_ascii=False),
+                    tokens,
+                    expires_at,
+                ),
+            )
+            was_inserted = cur.fetchone()[0]
+            if was_inserted:
+                inserted += 1
+            else:
+                updated += 1
+        return inserted, updated
+
+    # Sem driver / PG fora do ar → PgUnavailable (RuntimeError)
+    from orchestrator.pg_pool import get_pg_pool
+    inserted, updated = get_pg_pool(_database_url()).run(_work)
+    from orchestrator.context_loader import invalidate_context_cache
+    invalidate_context_cache(role="dev")
 
     return {"inserted": inserted, "updated": updated, "total": len(by_stack)}
 
 
 def main() -> int:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     try:
         result = seed_all()
         logger.info(
@@ -34,80 +34,34 @@ class ConnectArtifact:
         return f"project/{CONNECT_PROJECT_DIR}/{self.filename}"
 
 
-def _schema_for(contract: str) -> dict[str, Any]:
-    mapping = {
-        "SystemPassport": "manifests/system-passport.schema.json",
-        "ServiceManifest": "manifests/service-manifest.schema.json",
-        "OwnershipManifest": "manifests/ownership-manifest.schema.json",
-        "ObservabilityBaselineManifest": "manifests/observability-baseline-manifest.schema.json",
-        "RuntimePassport": "manifests/runtime-passport.schema.json",
-        "KnownSafeActionsPack": "manifests/known-safe-actions-pack.schema.json",
-    }
-    relative = mapping.get(contract)
+_CONTRACT_SCHEMAS = {
+    "SystemPassport": "manifests/system-passport.schema.json",
+    "ServiceManifest": "manifests/service-manifest.schema.json",
+    "OwnershipManifest": "manifests/ownership-manifest.schema.json",
+    "ObservabilityBaselineManifest": "manifests/observability-baseline-manifest.schema.json",
+    "RuntimePassport": "manifests/runtime-passport.schema.json",
+    "KnownSafeActionsPack": "manifests/known-safe-actions-pack.schema.json",
+}
+
+
+def _schema_path(contract: str) -> Path | None:
+    relative = _CONTRACT_SCHEMAS.get(contract)
     if not relative:
-        return {}
-    schema_path = CONNECT_SCHEMA_ROOT / relative
-    try:
-        if not schema_path.exists():
-            # zentriz-connect não disponível neste ambiente — emitir sem validação de schema
-            return {}
-        return json.loads(schema_path.read_text(encoding="utf-8"))
-    except Exception:
-        # Falha silenciosa — nunca bloquear o pipeline por ausência de schema
-        return {}
-
-
-def _validate_type(value: Any, schema_type: str) -> bool:
-    return {
-        "object": isinstance(value, dict),
-        "array": isinstance(value, list),
-        "string": isinstance(value, str),
-        "boolean": isinstance(value, bool),
-        "number": isinstance(value, (int, float)) and not isinstance(value, bool),
-        "integer": isinstance(value, int) and not isinstance(value, bool),
-    }.get(schema_type, True)
-
-
-def _validate_payload_against_schema(payload: Any, schema: dict[str, Any], prefix: str = "$") -> list[str]:
-    errors: list[str] = []
-    schema_type = schema.get("type")
-    if schema_type and not _validate_type(payload, schema_type):
-        errors.append(f"{prefix}: esperado {schema_type}, recebido {type(payload).__name__}")
-        return errors
-
-    if "enum" in schema and payload not in schema["enum"]:
-        errors.append(f"{prefix}: valor {payload!r} fora do enum {schema['enum']}")
-
-    if schema_type == "object":
-        required = schema.get("required", [])
-        properties = schema.get("properties", {})
-        if schema.get("additionalProperties") is False and isinstance(payload, dict):
-            unexpected = sorted(set(payload.keys()) - set(properties.keys()))
-            for key in unexpected:
-                errors.append(f"{prefix}.{key}: propriedade não permitida")
-        for key in required:
-            if not isinstance(payload, dict) or key not in payload:
-                errors.append(f"{prefix}.{key}: campo obrigatório ausente")
-        if isinstance(payload, dict):
-            for key, value in payload.items():
-                if key in properties:
-                    errors.extend(_validate_payload_against_schema(value, properties[key], f"{prefix}.{key}"))
-
-    if schema_type == "array" and isinstance(payload, list):
-        min_items = schema.get("minItems")
-        if isinstance(min_items, int) and len(payload) < min_items:
-            errors.append(f"{prefix}: esperado pelo menos {min_items} item(ns)")
-        item_schema = schema.get("items")
-        if isinstance(item_schema, dict):
-            for idx, item in enumerate(payload):
-                errors.extend(_validate_payload_against_schema(item, item_schema, f"{prefix}[{idx}]"))
-
-    return errors
+        return None
+    return CONNECT_SCHEMA_ROOT / relative
+
+
+def _schema_for(contract: str) -> dict[str, Any]:
+    # Parse memoizado por mtime (schema_registry); zentriz-connect ausente neste ambiente → {}
+    # (emitir sem validação de schema — nunca bloquear o pipeline por ausência de schema)
+    from orchestrator.schema_registry import get_schema_registry
+    return get_schema_registry().load(_schema_path(contract)) or {}
 
 
 def validate_connect_artifact(contract: str, payload: dict[str, Any]) -> list[str]:
-    schema = _schema_for(contract)
-    return _validate_payload_against_schema(payload, schema)
+    # Validador compilado do schema (gerado uma vez por versão do arquivo)
+    from orchestrator.schema_registry import get_schema_registry
+    return get_schema_registry().validator(_schema_path(contract))(payload)
 
 
 def _first_heading(text: str, fallback: str) -> str:
@@ -94,14 +94,11 @@ def _candidate_connect_roots() -> list[Path]:
 
 
 def _read_schema_from_disk(relative: str) -> Optional[dict[str, Any]]:
-    for root in _candidate_connect_roots():
-        candidate = root / "contract-kit" / "schemas" / relative
-        if candidate.exists():
-            try:
-                return json.loads(candidate.read_text(encoding="utf-8"))
-            except Exception as exc:
-                logger.debug("[ConnectLoader] erro lendo %s: %s", candidate, exc)
-    return None
+    # Raiz resolvida e schema parseado ficam memoizados (schema_registry): a cada load só um stat
+    from orchestrator.schema_registry import get_schema_registry
+    registry = get_schema_registry()
+    roots = [root / "contract-kit" / "schemas" for root in _candidate_connect_roots()]
+    return registry.load(registry.resolve(relative, roots))
 
 
 def _load_from_pg_cache() -> list[dict[str, Any]]:
@@ -109,46 +106,36 @@ def _load_from_pg_cache() -> list[dict[str, Any]]:
     db_url = os.environ.get("DATABASE_URL", "").strip()
     if not db_url:
         return []
-    try:
-        try:
-            import psycopg2  # type: ignore
-            conn = psycopg2.connect(db_url, connect_timeout=2)
-        except ImportError:
-            import psycopg  # type: ignore
-            conn = psycopg.connect(db_url, connect_timeout=2)
-    except Exception:
-        return []
+    from orchestrator.pg_pool import execute_prepared, pg_run
+
+    def _work(cur):
+        execute_prepared(
+            cur,
+            "connect_contract_cache",
+            """
+            SELECT cache_key, payload
+              FROM context_cache
+             WHERE category = 'contract'
+               AND expires_at > NOW()
+            """,
+        )
+        return cur.fetchall()
 
     out: list[dict[str, Any]] = []
     try:
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT cache_key, payload
-                      FROM context_cache
-                     WHERE category = 'contract'
-                       AND expires_at > NOW()
-                    """,
-                )
-                for cache_key, payload in cur.fetchall():
-                    if isinstance(payload, str):
-                        try:
-                            payload = json.loads(payload)
-                        except Exception:
-                            payload = {}
-                    if not isinstance(payload, dict):
-                        continue
-                    contracts = payload.get("connectContracts") or []
-                    if isinstance(contracts, list):
-                        out.extend(contracts)
+        for cache_key, payload in pg_run(_work, default=[], dsn=db_url):
+            if isinstance(payload, str):
+                try:
+                    payload = json.loads(payload)
+                except Exception:
+                    payload = {}
+            if not isinstance(payload, dict):
+                continue
+            contracts = payload.get("connectContracts") or []
+            if isinstance(contracts, list):
+                out.extend(contracts)
     except Exception as exc:
         logger.debug("[ConnectLoader] context_cache (contract) indisponível: %s", exc)
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
     return out
 
 
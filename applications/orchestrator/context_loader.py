@@ -17,11 +17,14 @@ REGRA DE OURO: qualquer falha → retornar ContextPackage vazio. Nunca lançar.
 
 from __future__ import annotations
 
+import atexit
 import json
 import logging
 import os
+import threading
 import time
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any, Optional
 
@@ -47,6 +50,13 @@ if CAG_ENABLED not in VALID_MODES:
 # DB connection — a CLI usa o mesmo DATABASE_URL do api-node
 DATABASE_URL = os.environ.get("DATABASE_URL", "").strip()
 
+# Cache em processo dos pacotes montados (contratos + context_cache + lições mudam pouco
+# durante um run). TTL 0 desliga o cache.
+CAG_CACHE_TTL_SEC = float(os.environ.get("CAG_CACHE_TTL_SEC", "300") or 0)
+CAG_CACHE_MAX_ENTRIES = int(os.environ.get("CAG_CACHE_MAX_ENTRIES", "256") or 256)
+# Intervalo (s) do write-behind dos contadores de hits; 0 = gravação imediata a cada load
+CAG_HITS_FLUSH_SEC = float(os.environ.get("CAG_HITS_FLUSH_SEC", "30") or 0)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Tipos
@@ -133,52 +143,42 @@ class ContextPackage:
 # DB helpers (psycopg2 opcional; fallback gracioso)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _open_pg_connection():
-    """Tenta abrir conexão PostgreSQL. Retorna None se indisponível."""
+def _pg_run(work, default):
+    """Executa work(cursor) no pool compartilhado (pg_pool.py); `default` se o PG estiver indisponível."""
     if not DATABASE_URL:
-        return None
-    try:
-        import psycopg2  # type: ignore
-    except ImportError:
-        try:
-            import psycopg  # type: ignore  # psycopg3
-            return psycopg.connect(DATABASE_URL, connect_timeout=3)
-        except Exception:
-            return None
-    try:
-        return psycopg2.connect(DATABASE_URL, connect_timeout=3)
-    except Exception as exc:
-        logger.debug("[ContextLoader] Falha ao conectar no Postgres: %s", exc)
-        return None
+        return default
+    from orchestrator.pg_pool import pg_run
+    return pg_run(work, default=default, dsn=DATABASE_URL)
 
 
 def _query_context_cache(
     role: str, stack_key: str, project_id: Optional[str]
 ) -> list[dict[str, Any]]:
     """Lê context_cache filtrando por role + stack + project_id (NULL = global)."""
-    conn = _open_pg_connection()
-    if conn is None:
-        return []
+    from orchestrator.pg_pool import execute_prepared
+
+    def _work(cur):
+        execute_prepared(
+            cur,
+            "cag_context_cache",
+            """
+            SELECT cache_key, category, payload, payload_tokens
+              FROM context_cache
+             WHERE role = %s
+               AND (stack_key = %s OR stack_key = 'generic')
+               AND (project_id = %s::uuid OR project_id IS NULL)
+               AND expires_at > NOW()
+          ORDER BY (CASE WHEN project_id IS NOT NULL THEN 0 ELSE 1 END),
+                   (CASE WHEN stack_key = %s THEN 0 ELSE 1 END),
+                   created_at DESC
+             LIMIT 50
+            """,
+            (role, stack_key, project_id, stack_key),
+        )
+        return cur.fetchall()
 
     try:
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT cache_key, category, payload, payload_tokens
-                      FROM context_cache
-                     WHERE role = %s
-                       AND (stack_key = %s OR stack_key = 'generic')
-                       AND (project_id = %s::uuid OR project_id IS NULL)
-                       AND expires_at > NOW()
-                  ORDER BY (CASE WHEN project_id IS NOT NULL THEN 0 ELSE 1 END),
-                           (CASE WHEN stack_key = %s THEN 0 ELSE 1 END),
-                           created_at DESC
-                     LIMIT 50
-                    """,
-                    (role, stack_key, project_id, stack_key),
-                )
-                rows = cur.fetchall()
+        rows = _pg_run(_work, default=[])
         out: list[dict[str, Any]] = []
         for cache_key, category, payload, payload_tokens in rows:
             if isinstance(payload, str):
@@ -198,38 +198,109 @@ def _query_context_cache(
     except Exception as exc:
         logger.debug("[ContextLoader] Erro lendo context_cache: %s", exc)
         return []
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
-def _bump_hits(cache_keys: list[str]) -> None:
-    """Incrementa contador de hits de forma best-effort (não bloqueia em caso de erro)."""
-    if not cache_keys:
-        return
-    conn = _open_pg_connection()
-    if conn is None:
-        return
-    try:
-        with conn:
-            with conn.cursor() as cur:
+class _HitCounter:
+    """
+    Write-behind dos contadores de uso: acumula deltas em memória por cache_key (context_cache)
+    e slug (lessons_corpus) e grava a cada CAG_HITS_FLUSH_SEC (e na saída do processo) com um
+    único UPDATE ... FROM (VALUES ...) por tabela. Fora do caminho de montagem do prompt.
+    """
+
+    def __init__(self, flush_sec: float) -> None:
+        self.flush_sec = flush_sec
+        self._lock = threading.Lock()
+        self._cache_hits: dict[str, int] = {}
+        self._lesson_hits: dict[str, int] = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def record(self, cache_keys: list[str], lesson_slugs: list[str]) -> None:
+        if not cache_keys and not lesson_slugs:
+            return
+        with self._lock:
+            for k in cache_keys:
+                self._cache_hits[k] = self._cache_hits.get(k, 0) + 1
+            for slug in lesson_slugs:
+                self._lesson_hits[slug] = self._lesson_hits.get(slug, 0) + 1
+            if self.flush_sec > 0 and self._timer is None:
+                self._timer = threading.Timer(self.flush_sec, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.flush_sec <= 0:
+            self.flush()
+
+    def pending(self) -> tuple[dict[str, int], dict[str, int]]:
+        with self._lock:
+            return dict(self._cache_hits), dict(self._lesson_hits)
+
+    def _flush_from_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self) -> bool:
+        """Grava os deltas acumulados. Em falha, devolve-os ao acumulador (próximo flush tenta de novo)."""
+        with self._lock:
+            cache_hits, self._cache_hits = self._cache_hits, {}
+            lesson_hits, self._lesson_hits = self._lesson_hits, {}
+        if not cache_hits and not lesson_hits:
+            return True
+
+        def _work(cur):
+            if cache_hits:
                 cur.execute(
                     """
-                    UPDATE context_cache
-                       SET hits = hits + 1, last_hit_at = NOW()
-                     WHERE cache_key = ANY(%s)
+                    UPDATE context_cache AS c
+                       SET hits = c.hits + v.delta, last_hit_at = NOW()
+                      FROM (VALUES """ + ", ".join(["(%s, %s::int)"] * len(cache_hits)) + """) AS v(cache_key, delta)
+                     WHERE c.cache_key = v.cache_key
                     """,
-                    (cache_keys,),
+                    [x for item in sorted(cache_hits.items()) for x in item],
                 )
+            if lesson_hits:
+                cur.execute("SELECT to_regclass('public.lessons_corpus') IS NOT NULL")
+                if cur.fetchone()[0]:
+                    cur.execute(
+                        """
+                        UPDATE lessons_corpus AS l
+                           SET hit_count = l.hit_count + v.delta, last_hit_at = NOW()
+                          FROM (VALUES """ + ", ".join(["(%s, %s::int)"] * len(lesson_hits)) + """) AS v(slug, delta)
+                         WHERE l.slug = v.slug
+                        """,
+                        [x for item in sorted(lesson_hits.items()) for x in item],
+                    )
+            return True
+
+        try:
+            if _pg_run(_work, default=False):
+                return True
+        except Exception as exc:
+            logger.debug("[ContextLoader] Falha ao gravar hits: %s", exc)
+        if not DATABASE_URL:
+            return False  # sem banco: descarta (nada a persistir)
+        with self._lock:
+            for k, n in cache_hits.items():
+                self._cache_hits[k] = self._cache_hits.get(k, 0) + n
+            for k, n in lesson_hits.items():
+                self._lesson_hits[k] = self._lesson_hits.get(k, 0) + n
+        return False
+
+
+_hit_counter = _HitCounter(CAG_HITS_FLUSH_SEC)
+atexit.register(_hit_counter.flush)
+
+
+def _bump_hits(cache_keys: list[str], lesson_slugs: Optional[list[str]] = None) -> None:
+    """Registra uso de linhas do context_cache / lições (write-behind; nunca bloqueia em rede)."""
+    try:
+        _hit_counter.record(list(cache_keys or []), list(lesson_slugs or []))
     except Exception:
         pass
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+
+
+def flush_hits() -> bool:
+    """Força a gravação dos hits acumulados (testes / shutdown explícito)."""
+    return _hit_counter.flush()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -243,29 +314,28 @@ def _query_lessons_top_hits(
     Top-N lições por (hit_count * confidence). Lê de lessons_corpus se a tabela
     existir (criada na migration 026). Caso contrário, retorna lista vazia.
     """
-    conn = _open_pg_connection()
-    if conn is None:
-        return []
+    from orchestrator.pg_pool import execute_prepared
+
+    def _work(cur):
+        execute_prepared(cur, "cag_has_lessons_corpus", "SELECT to_regclass('public.lessons_corpus') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return []
+        execute_prepared(
+            cur,
+            "cag_lessons_top_hits",
+            """
+            SELECT slug, title, category, scope, confidence, hit_count, body_md
+              FROM lessons_corpus
+             WHERE (project_id = %s::uuid OR project_id IS NULL)
+          ORDER BY (hit_count * confidence) DESC, last_hit_at DESC NULLS LAST
+             LIMIT %s
+            """,
+            (project_id, limit),
+        )
+        return cur.fetchall()
+
     try:
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT to_regclass('public.lessons_corpus') IS NOT NULL"
-                )
-                has_corpus = cur.fetchone()[0]
-                if not has_corpus:
-                    return []
-                cur.execute(
-                    """
-                    SELECT slug, title, category, scope, confidence, hit_count, body_md
-                      FROM lessons_corpus
-                     WHERE (project_id = %s::uuid OR project_id IS NULL)
-                  ORDER BY (hit_count * confidence) DESC, last_hit_at DESC NULLS LAST
-                     LIMIT %s
-                    """,
-                    (project_id, limit),
-                )
-                rows = cur.fetchall()
+        rows = _pg_run(_work, default=[])
         return [
             {
                 "slug": r[0],
@@ -281,11 +351,103 @@ def _query_lessons_top_hits(
     except Exception as exc:
         logger.debug("[ContextLoader] lessons_corpus indisponível: %s", exc)
         return []
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cache de pacotes (TTL + LRU)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@dataclass(slots=True)
+class _CachedPackage:
+    package: ContextPackage
+    observed: ContextPackage  # shadow: contagens observadas (o pacote devolvido vem enxuto)
+    cache_keys: list[str]
+    cache_rows: int
+    expires_at: float
+
+
+class _PackageCache:
+    """LRU limitado com TTL, chaveado por (mode, role, stack, project, Connect pin, modo RAG)."""
+
+    def __init__(self, ttl_sec: float, max_entries: int) -> None:
+        self.ttl_sec = ttl_sec
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple, _CachedPackage] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[_CachedPackage]:
+        if self.ttl_sec <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, package: ContextPackage, observed: ContextPackage,
+            cache_keys: list[str], cache_rows: int) -> None:
+        if self.ttl_sec <= 0:
+            return
+        with self._lock:
+            self._entries[key] = _CachedPackage(
+                package, observed, cache_keys, cache_rows, time.monotonic() + self.ttl_sec,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, role: Optional[str] = None, stack_key: Optional[str] = None,
+                   project_id: Optional[str] = None) -> int:
+        """Remove entradas que casam com os filtros (None = qualquer). Retorna quantas saíram."""
+        with self._lock:
+            doomed = [
+                k for k in self._entries
+                if (role is None or k[1] == role)
+                # todo pacote inclui as linhas 'generic' da stack
+                and (stack_key is None or stack_key == "generic" or k[2] == stack_key)
+                and (project_id is None or k[3] == project_id)
+            ]
+            for k in doomed:
+                del self._entries[k]
+            return len(doomed)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_package_cache = _PackageCache(CAG_CACHE_TTL_SEC, CAG_CACHE_MAX_ENTRIES)
+
+
+def _lesson_slugs(pkg: ContextPackage) -> list[str]:
+    return [ln.get("slug") for ln in pkg.lessons_hot if ln.get("slug")]
+
+
+def invalidate_context_cache(
+    role: Optional[str] = None,
+    stack_key: Optional[str] = None,
+    project_id: Optional[str] = None,
+) -> int:
+    """
+    Hook de invalidação: quem grava em context_cache / lessons_corpus (checklist_seed,
+    lesson_extractor) chama após escrever. Sem filtros, limpa tudo. Só afeta este processo —
+    outros runners enxergam a mudança ao expirar o TTL (CAG_CACHE_TTL_SEC).
+    """
+    removed = _package_cache.invalidate(role, stack_key, project_id)
+    if removed:
+        logger.debug("[ContextLoader] cache invalidado: %d pacote(s)", removed)
+    return removed
+
+
+def context_cache_stats() -> dict[str, int]:
+    return _package_cache.stats()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -326,7 +488,11 @@ class ContextLoader:
             )
 
         try:
-            return self._load_safe(role, stack_key, project_id, t0)
+            cache_key = (self.mode, role, stack_key, project_id, CONNECT_VERSION_PIN, RAG_ENABLED)
+            cached = _package_cache.get(cache_key)
+            if cached is not None:
+                return self._from_cache(cached, t0)
+            return self._load_safe(role, stack_key, project_id, t0, cache_key)
         except Exception as exc:
             logger.warning(
                 "[ContextLoader] Falha em load(role=%s, stack=%s, project=%s): %s",
@@ -340,12 +506,32 @@ class ContextLoader:
                 duration_ms=int((time.perf_counter() - t0) * 1000),
             )
 
+    def _from_cache(self, cached: _CachedPackage, t0: float) -> ContextPackage:
+        # Hits contados também quando o pacote vem da memória (write-behind, sem I/O aqui)
+        _bump_hits(cached.cache_keys, _lesson_slugs(cached.package))
+        duration_ms = int((time.perf_counter() - t0) * 1000)
+        if self.mode == "shadow":
+            self._log_shadow(replace(cached.observed, duration_ms=duration_ms), cached.cache_rows, "hit")
+        return replace(cached.package, duration_ms=duration_ms)
+
+    def _log_shadow(self, pkg: ContextPackage, cache_rows: int, source: str) -> None:
+        stats = _package_cache.stats()
+        logger.info(
+            "[ContextLoader/shadow] role=%s stack=%s project=%s "
+            "cache_rows=%d contracts=%d lessons=%d tokens=%d took=%dms "
+            "pkg_cache=%s hits=%d misses=%d",
+            pkg.role, pkg.stack_key, pkg.project_id, cache_rows,
+            len(pkg.connect_contracts), len(pkg.lessons_hot), pkg.payload_tokens, pkg.duration_ms,
+            source, stats["hits"], stats["misses"],
+        )
+
     def _load_safe(
         self,
         role: str,
         stack_key: str,
         project_id: Optional[str],
         t0: float,
+        cache_key: Optional[tuple] = None,
     ) -> ContextPackage:
         # Import resiliente: tenta absoluto via pacote orchestrator, depois flat.
         try:
@@ -380,27 +566,25 @@ class ContextLoader:
         if RAG_ENABLED in {"shadow", "live"}:
             lessons_hot = _query_lessons_top_hits(role, stack_key, project_id)
 
-        # Best-effort: bump dos hits no cache
-        _bump_hits(cache_keys_hit)
+        # Hits: linhas do context_cache lidas; lições só quando injetadas (modo live)
+        _bump_hits(cache_keys_hit, [ln.get("slug") for ln in lessons_hot if ln.get("slug")] if self.mode == "live" else [])
 
         # Em modo shadow, observa-se mas não se injeta — devolver pacote enxuto
         if self.mode == "shadow":
-            duration_ms = int((time.perf_counter() - t0) * 1000)
-            logger.info(
-                "[ContextLoader/shadow] role=%s stack=%s project=%s "
-                "cache_rows=%d contracts=%d lessons=%d tokens=%d took=%dms",
-                role, stack_key, project_id, len(cache_rows),
-                len(contracts), len(lessons_hot), total_tokens, duration_ms,
-            )
-            return ContextPackage(
+            pkg = ContextPackage(
                 role=role,
                 stack_key=stack_key,
                 project_id=project_id,
                 connect_version=CONNECT_VERSION_PIN,
                 mode="shadow",
                 cache_hit=bool(cache_rows),
-                duration_ms=duration_ms,
+                duration_ms=int((time.perf_counter() - t0) * 1000),
             )
+            observed = replace(pkg, connect_contracts=contracts, lessons_hot=lessons_hot, payload_tokens=total_tokens)
+            if cache_key is not None:
+                _package_cache.put(cache_key, pkg, observed, cache_keys_hit, len(cache_rows))
+            self._log_shadow(observed, len(cache_rows), "miss")
+            return pkg
 
         # mode == "live"
         pkg = ContextPackage(
@@ -418,6 +602,9 @@ class ContextLoader:
             duration_ms=int((time.perf_counter() - t0) * 1000),
         )
 
+        if cache_key is not None:
+            _package_cache.put(cache_key, pkg, pkg, cache_keys_hit, len(cache_rows))
+
         logger.debug(
             "[ContextLoader/live] role=%s stack=%s contracts=%d checklists=%d "
             "lessons=%d tokens=%d took=%dms",
@@ -46,6 +46,10 @@ logger = logging.getLogger(__name__)
 
 PROJECT_FILES     = os.environ.get("PROJECT_FILES_ROOT", "/project-files")
 FTS_URL           = os.environ.get("FULL_TEST_SERVER_URL", "http://host.docker.internal:7878")
+# Prioridade na fila do full-test-server (X-Job-Priority; PRIORITIES em scripts/job_scheduler.py):
+# o build de contexto é curto e segura a auditoria; a sessão longa de correção entra como normal.
+FTS_BUILD_PRIORITY   = "high"
+FTS_SESSION_PRIORITY = "normal"
 API_BASE_URL      = os.environ.get("API_BASE_URL", "http://api:3000").rstrip("/")
 API_TOKEN         = os.environ.get("GENESIS_API_TOKEN", "")
 MAX_ITERATIONS    = int(os.environ.get("CYBORG_MAX_ITERATIONS", "3"))   # cirúrgico: 3 rodadas suficientes para lapidação
@@ -116,16 +120,15 @@ class CyborgRun:
 
 # ── Helpers HTTP ──────────────────────────────────────────────────────────────
 
-def _http(method: str, url: str, body: dict | None = None, timeout: int = 60) -> tuple[int, str]:
+def _http(method: str, url: str, body: dict | None = None, timeout: int = 60,
+          extra_headers: dict | None = None) -> tuple[int, str]:
     """HTTP simples com urllib (evita deps externas)."""
     import urllib.request
     import urllib.error
     data = json.dumps(body).encode() if body else None
-    req = urllib.request.Request(
-        url, data=data, method=method,
-        headers={"Content-Type": "application/json", "Authorization": f"Bearer {API_TOKEN}"} if API_TOKEN
-        else {"Content-Type": "application/json"},
-    )
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {API_TOKEN}"} if API_TOKEN \
+        else {"Content-Type": "application/json"}
+    req = urllib.request.Request(url, data=data, method=method, headers={**headers, **(extra_headers or {})})
     try:
         with urllib.request.urlopen(req, timeout=timeout) as resp:
             return resp.status, resp.read().decode("utf-8", errors="replace")
@@ -255,15 +258,25 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
     # FT-18 F3: contexto ampliado — antes só 4 arquivos, agora todas as pages, types, mocks, layout components
     src_root = proj_dir / "apps" / "src"
 
+    # Índice do projeto: rglobs e leituras repetidas entre iterações do Cyborg saem do cache
+    from orchestrator.file_index import get_file_index
+    idx = get_file_index(proj_dir) if src_root.exists() else None
+
+    def _read_indexed(rel: str, max_chars: int) -> str:
+        try:
+            return idx.read_text(rel)[:max_chars]
+        except Exception:
+            return ""
+
     def _read_glob(pattern: str, max_files: int = 15, max_chars: int = 30000) -> str:
-        if not src_root.exists():
+        if idx is None:
             return ""
-        files = sorted(src_root.rglob(pattern))[:max_files]
+        files = idx.glob(f"apps/src/**/{pattern}")[:max_files]
         parts = []
         total = 0
-        for f in files:
-            content = _read(f, 2500)
-            entry = f"### {f.relative_to(proj_dir)}\n```\n{content}\n```"
+        for rel in files:
+            content = _read_indexed(rel, 2500)
+            entry = f"### {rel}\n```\n{content}\n```"
             if total + len(entry) > max_chars:
                 break
             parts.append(entry)
@@ -277,10 +290,7 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
         "engineer_architecture":   _read(proj_dir / "docs" / "engineer_engineer_architecture.md"),
         "pm_backlog":              _read(proj_dir / "docs" / "pm" / "web" / "BACKLOG.md")
                                     or _read(proj_dir / "docs" / "pm_backlog.md"),
-        "apps_tree":               "\n".join(sorted(
-            str(p.relative_to(proj_dir))
-            for p in src_root.rglob("*.tsx")
-        ))[:8000] if src_root.exists() else "",
+        "apps_tree":               "\n".join(idx.glob("apps/src/**/*.tsx"))[:8000] if idx is not None else "",
         # Fase estruturais (o essencial)
         "root_page":               _read(proj_dir / "apps" / "src" / "app" / "page.tsx"),
         "layout":                  _read(proj_dir / "apps" / "src" / "app" / "layout.tsx"),
@@ -302,7 +312,8 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
     # Se o build passa/falha, A3 tem contexto real. Se demora demais (timeout), degrada mas não bloqueia.
     try:
         build_payload = {"project_id": project_id, "prod_id": prod_id, "timeout": 300}
-        status, text = _http("POST", f"{FTS_URL}/cyborg-build", build_payload, timeout=360)
+        status, text = _http("POST", f"{FTS_URL}/cyborg-build", build_payload, timeout=360,
+                             extra_headers={"X-Job-Priority": FTS_BUILD_PRIORITY})
         if status == 200:
             bd = json.loads(text)
             ctx["build_output"] = bd.get("build_output", "")[-5000:]
@@ -321,13 +332,15 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
     return ctx
 
 
-def _call_bedrock(prompt: str, ctx: dict, model_id: str, fallback_id: str) -> str:
+def _call_bedrock(prompt: str, ctx: dict, model_id: str, fallback_id: str,
+                  tenant_id: str | None = None) -> str:
     """Chama Bedrock via agents container (HTTP). Fallback é gerenciado lá.
     Usa /invoke/raw que aceita prompt/user customizados."""
-    return _call_bedrock_via_agents(prompt, ctx, model_id, fallback_id)
+    return _call_bedrock_via_agents(prompt, ctx, model_id, fallback_id, tenant_id)
 
 
-def _call_bedrock_via_agents(prompt: str, ctx: dict, model_id: str, fallback_id: str) -> str:
+def _call_bedrock_via_agents(prompt: str, ctx: dict, model_id: str, fallback_id: str,
+                             tenant_id: str | None = None) -> str:
     """Fallback: chama o agents container (que já tem Bedrock configurado)."""
     body = {
         "prompt_override": prompt,
@@ -335,6 +348,7 @@ def _call_bedrock_via_agents(prompt: str, ctx: dict, model_id: str, fallback_id:
         "model_id": model_id,
         "model_id_fallback": fallback_id,
         "max_tokens": 8000,
+        "tenant_id": tenant_id or "",
     }
     status, text = _http(
         "POST", f"http://agents:8000/invoke/raw",
@@ -401,7 +415,7 @@ def run_analyses(project_id: str, tenant_id: str | None, prod_id: str | None) ->
         t0 = time.time()
         try:
             prompt = _load_prompt(name)
-            raw = _call_bedrock(prompt, ctx, model_id, fallback_id)
+            raw = _call_bedrock(prompt, ctx, model_id, fallback_id, tenant_id)
             ar = _parse_analysis(name, raw)
         except Exception as e:
             ar = AnalysisResult(name=name, ok=False, score=0, error=str(e))
@@ -451,7 +465,7 @@ def consolidate(project_id: str, tenant_id: str | None, analyses: dict[str, Anal
     model_id, fallback_id = _resolve_cyborg_model(tenant_id)
     prompt = _load_prompt("consolidator")
     payload = {name: asdict(ar) for name, ar in analyses.items()}
-    raw = _call_bedrock(prompt, {"analyses": payload}, model_id, fallback_id)
+    raw = _call_bedrock(prompt, {"analyses": payload}, model_id, fallback_id, tenant_id)
 
     try:
         start = raw.index("{")
@@ -542,7 +556,8 @@ def _spawn_claude_code(project_id: str, prod_id: str | None, action: Action, mod
         "timeout": FIX_TIMEOUT,
         "verify_command": action.verify_command,
     }
-    status, text = _http("POST", f"{FTS_URL}/cyborg-claude-code", payload, timeout=FIX_TIMEOUT + 60)
+    status, text = _http("POST", f"{FTS_URL}/cyborg-claude-code", payload, timeout=FIX_TIMEOUT + 60,
+                         extra_headers={"X-Job-Priority": FTS_SESSION_PRIORITY})
     if status != 200:
         return {"status": "FAILED", "error": f"FTS returned {status}: {text[:500]}"}
     try:
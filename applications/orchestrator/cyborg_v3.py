@@ -42,6 +42,10 @@ logger = logging.getLogger(__name__)
 
 PROJECT_FILES     = os.environ.get("PROJECT_FILES_ROOT", "/project-files")
 FTS_URL           = os.environ.get("FULL_TEST_SERVER_URL", "http://host.docker.internal:7878")
+# Prioridade na fila do full-test-server (X-Job-Priority; PRIORITIES em scripts/job_scheduler.py):
+# o build de contexto é curto e segura a auditoria; a sessão longa de correção entra como normal.
+FTS_BUILD_PRIORITY   = "high"
+FTS_SESSION_PRIORITY = "normal"
 API_BASE_URL      = os.environ.get("API_BASE_URL", "http://api:3000").rstrip("/")
 API_TOKEN         = os.environ.get("GENESIS_API_TOKEN", "")
 V3_TIMEOUT        = int(os.environ.get("CYBORG_V3_TIMEOUT_SEC", "3600"))
@@ -86,13 +90,15 @@ class CyborgV3Run:
 
 # ── HTTP helpers ──────────────────────────────────────────────────────────────
 
-def _http(method: str, url: str, body: dict | None = None, timeout: int = 60) -> tuple[int, str]:
+def _http(method: str, url: str, body: dict | None = None, timeout: int = 60,
+          extra_headers: dict | None = None) -> tuple[int, str]:
     import urllib.request
     import urllib.error
     data = json.dumps(body).encode() if body else None
     headers = {"Content-Type": "application/json"}
     if API_TOKEN:
         headers["Authorization"] = f"Bearer {API_TOKEN}"
+    headers.update(extra_headers or {})
     req = urllib.request.Request(url, data=data, method=method, headers=headers)
     try:
         with urllib.request.urlopen(req, timeout=timeout) as resp:
@@ -185,14 +191,24 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
         except Exception:
             return ""
 
+    # Índice do projeto: rglobs e leituras repetidas entre iterações do Cyborg saem do cache
+    from orchestrator.file_index import get_file_index
+    idx = get_file_index(proj_dir) if src_root.exists() else None
+
+    def _read_indexed(rel: str, max_chars: int) -> str:
+        try:
+            return idx.read_text(rel)[:max_chars]
+        except Exception:
+            return ""
+
     def _read_glob(pattern: str, max_files: int = 10, max_chars: int = 20000) -> str:
-        if not src_root.exists():
+        if idx is None:
             return ""
-        files = sorted(src_root.rglob(pattern))[:max_files]
+        files = idx.glob(f"apps/src/**/{pattern}")[:max_files]
         parts = []
         total = 0
-        for f in files:
-            entry = f"### {f.relative_to(proj_dir)}\n```\n{_read(f, 1500)}\n```"
+        for rel in files:
+            entry = f"### {rel}\n```\n{_read_indexed(rel, 1500)}\n```"
             if total + len(entry) > max_chars:
                 break
             parts.append(entry)
@@ -206,9 +222,7 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
         "engineer_architecture": _read(proj_dir / "docs" / "engineer_engineer_architecture.md"),
         "pm_backlog":            _read(proj_dir / "docs" / "pm" / "web" / "BACKLOG.md")
                                   or _read(proj_dir / "docs" / "pm_backlog.md"),
-        "apps_tree":             "\n".join(sorted(
-            str(p.relative_to(proj_dir)) for p in src_root.rglob("*.tsx")
-        ))[:6000] if src_root.exists() else "",
+        "apps_tree":             "\n".join(idx.glob("apps/src/**/*.tsx"))[:6000] if idx is not None else "",
         "root_page":  _read(proj_dir / "apps" / "src" / "app" / "page.tsx"),
         "layout":     _read(proj_dir / "apps" / "src" / "app" / "layout.tsx"),
         "app_shell":  _read(proj_dir / "apps" / "src" / "components" / "layout" / "AppShell.tsx"),
@@ -221,7 +235,8 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
     try:
         status, text = _http("POST", f"{FTS_URL}/cyborg-build",
                              {"project_id": project_id, "prod_id": prod_id or "", "timeout": 300},
-                             timeout=360)
+                             timeout=360,
+                             extra_headers={"X-Job-Priority": FTS_BUILD_PRIORITY})
         if status == 200:
             bd = json.loads(text)
             ctx["build_output"] = bd.get("build_output", "")[-4000:]
@@ -243,13 +258,14 @@ def _collect_context(project_id: str, prod_id: str | None) -> dict:
     return ctx
 
 
-def _call_bedrock(prompt: str, ctx: dict, model_id: str) -> str:
+def _call_bedrock(prompt: str, ctx: dict, model_id: str, tenant_id: str | None = None) -> str:
     body = {
         "prompt_override": prompt,
         "user_message": json.dumps({"context": ctx}, ensure_ascii=False)[:60000],
         "model_id": model_id,
         "model_id_fallback": "us.anthropic.claude-sonnet-4-6",
         "max_tokens": 6000,
+        "tenant_id": tenant_id or "",
     }
     status, text = _http("POST", f"http://agents:8000/invoke/raw", body, timeout=ANALYSIS_TIMEOUT)
     if status != 200:
@@ -276,7 +292,8 @@ def _parse_analysis(name: str, raw: str) -> AnalysisResult:
     )
 
 
-def run_prior_audit(project_id: str, prod_id: str | None, model_id: str) -> dict[str, AnalysisResult]:
+def run_prior_audit(project_id: str, prod_id: str | None, model_id: str,
+                    tenant_id: str | None = None) -> dict[str, AnalysisResult]:
     """Executa 5 análises Bedrock em paralelo (~30s). Gera briefing para o Cyborg V3."""
     from concurrent.futures import ThreadPoolExecutor, as_completed
     ctx = _collect_context(project_id, prod_id)
@@ -292,7 +309,7 @@ def run_prior_audit(project_id: str, prod_id: str | None, model_id: str) -> dict
         t0 = time.time()
         try:
             prompt = _load_prompt(name)
-            raw = _call_bedrock(prompt, ctx, model_id)
+            raw = _call_bedrock(prompt, ctx, model_id, tenant_id)
             ar = _parse_analysis(name, raw)
         except Exception as e:
             ar = AnalysisResult(name=name, ok=False, score=0, error=str(e))
@@ -437,7 +454,8 @@ Comece analisando o audit (via `zentriz-audit {project_id}`) e o estado atual do
         "cwd_hint": "apps",  # trabalhar dentro de apps/
     }
 
-    status, text = _http("POST", f"{FTS_URL}/cyborg-engineer", payload, timeout=V3_TIMEOUT + 60)
+    status, text = _http("POST", f"{FTS_URL}/cyborg-engineer", payload, timeout=V3_TIMEOUT + 60,
+                         extra_headers={"X-Job-Priority": FTS_SESSION_PRIORITY})
     if status != 200:
         return {"ok": False, "error": f"FTS retornou {status}: {text[:500]}"}
     try:
@@ -482,7 +500,7 @@ def run_cyborg_v3(project_id: str, tenant_id: str | None, prod_id: str | None) -
         f"Se algo estruturalmente impossível, paro e informo o motivo real.")
 
     # Fase 1: Auditoria prévia
-    audit = run_prior_audit(project_id, prod_id, model_id)
+    audit = run_prior_audit(project_id, prod_id, model_id, tenant_id)
     run.audit = audit
     total_blk = sum(sum(1 for f in ar.findings if f.severity == "BLOCKER") for ar in audit.values())
     _post_dialogue(project_id, f"📋 Briefing pronto — {total_blk} BLOCKER(s) detectado(s). Passando para o engenheiro (Claude Code CLI).")
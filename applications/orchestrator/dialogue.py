@@ -134,6 +134,23 @@ def get_summary_human(
     return build_summary_human(event_type, from_agent, to_agent, payload_snippet)
 
 
+def dialogue_payload(
+    from_agent: str,
+    to_agent: str,
+    summary_human: str,
+    event_type: str | None = None,
+    request_id: str | None = None,
+) -> dict:
+    """Corpo de POST /api/projects/:id/dialogue (envio síncrono ou via telemetry sink)."""
+    return {
+        "from_agent": from_agent,
+        "to_agent": to_agent,
+        "summary_human": summary_human,
+        "event_type": event_type,
+        "request_id": request_id,
+    }
+
+
 def post_dialogue(
     project_id: str,
     from_agent: str,
@@ -150,29 +167,16 @@ def post_dialogue(
     token = os.environ.get("GENESIS_API_TOKEN")
     if not base or not project_id or not token:
         return False
-    url = f"{base.rstrip('/')}/api/projects/{project_id}/dialogue"
-    body = {
-        "from_agent": from_agent,
-        "to_agent": to_agent,
-        "summary_human": summary_human,
-        "event_type": event_type,
-        "request_id": request_id,
-    }
-    data = json.dumps(body).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        method="POST",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-    )
+    body = dialogue_payload(from_agent, to_agent, summary_human, event_type, request_id)
     try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            if 200 <= resp.status < 300:
-                logger.info("[Diálogo] %s → %s (%s): %s", from_agent, to_agent, event_type or "-", summary_human[:100])
-                return True
+        from orchestrator.api_client import get_api_client
+        data, status = get_api_client(base, token).request(
+            "POST", f"/api/projects/{project_id}/dialogue", body, timeout=10,
+        )
+        if 200 <= status < 300:
+            logger.info("[Diálogo] %s → %s (%s): %s", from_agent, to_agent, event_type or "-", summary_human[:100])
+            return True
+        logger.warning("[Diálogo] Falha ao persistir na API: HTTP %s %s", status, data)
     except Exception as e:
         logger.warning("[Diálogo] Falha ao persistir na API: %s", e)
     return False
@@ -0,0 +1,376 @@
+"""
+Parser tolerante de ResponseEnvelope em passada única (LEI 4).
+
+Substitui a cascata de resilient_json_parse (json.loads → regex de backticks → placeholders de
+"content" + reparse → extração por role), em que cada tentativa que falhava varria o texto inteiro
+de novo. Aqui:
+
+  1. o início do JSON é localizado uma vez (<response>, ```json, texto começando com {, ```);
+  2. JSON válido (inclusive com quebras de linha cruas em strings) sai do decoder C
+     (raw_decode com strict=False), sem fatiar nem copiar o texto;
+  3. senão, um scanner recursivo percorre o texto uma vez, tolerando o que a LLM costuma quebrar:
+     aspas não escapadas dentro de strings (uma aspa só fecha a string se o que vem depois for
+     estrutura válida no contexto — ',' + próxima chave, '}' ou ']'), valores entre backticks,
+     vírgulas sobrando e saída truncada (max_tokens: containers são fechados e o artifact parcial
+     com path e content é mantido).
+
+Dentro de um item de artifacts a aspa só fecha a string se a próxima chave for do contrato do
+artifact (ARTIFACT_KEYS): JSON cru em content (package.json, tsconfig.json) tem ', "name":' a cada
+linha e não pode virar chaves do artifact.
+
+Quando a heurística de aspas erra (ex.: código com `{ a: "x" },` dentro de content), o erro de
+sintaxe adiante — ou uma chave estranha ao artifact logo depois do fecho — aponta a última aspa
+ambígua: ela passa a ser conteúdo e o scanner recomeça (no máximo MAX_QUOTE_RETRIES vezes; só
+acontece em respostas com aspas cruas).
+
+on_artifact(art) recebe cada artifact de "artifacts" assim que o objeto fecha — na ordem e uma
+vez só; artifacts posteriores a uma aspa ambígua só são emitidos ao final do parse.
+
+Benchmark contra a cascata anterior: python tests/e2e/bench_envelope_parser.py
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable
+
+MAX_QUOTE_RETRIES = 16
+
+_DECODER = json.JSONDecoder(strict=False)
+_WS = re.compile(r"[ \t\n\r]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+# Depois de uma aspa candidata a fecho em valor de objeto: ", "proxima_chave":" (ou fim do texto no meio disso)
+_NEXT_KEY = re.compile(r',[ \t\n\r]*(?:"([A-Za-z_$][\w$.-]{0,63})(?:"[ \t\n\r]*(?::|$)|$)|$)')
+# Chaves de um item de artifacts (contrato do ResponseEnvelope). Dentro de um artifact, aspa crua
+# seguida de ', "name":' é conteúdo (package.json, tsconfig.json...), não fecho de content.
+ARTIFACT_KEYS = frozenset({"path", "content", "format", "purpose", "patch"})
+_ESCAPE = re.compile(
+    r'\\(?:u([dD][89abAB][0-9a-fA-F]{2})\\u([dD][c-fC-F][0-9a-fA-F]{2})|u([0-9a-fA-F]{4})|(["\\/bfnrt]))'
+)
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_LITERALS = (("true", True), ("false", False), ("null", None))
+_EOF = object()
+
+
+@dataclass(slots=True)
+class EnvelopeParse:
+    data: dict | None
+    truncated: bool = False
+    tolerant: bool = False  # JSON inválido recuperado pelo scanner tolerante
+    error: str | None = None
+    start: int = -1  # posição do "{" inicial no texto (-1 = sem JSON)
+
+
+class _ParseError(Exception):
+    def __init__(self, pos: int, message: str):
+        super().__init__(f"{message} (pos {pos})")
+        self.pos = pos
+
+
+def _unescape(m: re.Match) -> str:
+    if m.group(1):
+        hi, lo = int(m.group(1), 16), int(m.group(2), 16)
+        return chr(0x10000 + ((hi - 0xD800) << 10) + (lo - 0xDC00))
+    if m.group(3):
+        return chr(int(m.group(3), 16))
+    return _SIMPLE_ESCAPES[m.group(4)]
+
+
+def _decode(raw: str) -> str:
+    """Escapes JSON válidos são decodificados; escapes inválidos (ex.: \\d de regex) ficam como estão."""
+    if "\\" not in raw:
+        return raw
+    return _ESCAPE.sub(_unescape, raw)
+
+
+def find_json_start(text: str) -> int:
+    """Posição do "{" do envelope, com a prioridade de extract_json_from_text; -1 se não há JSON."""
+    pos = text.find("<response>")
+    if pos >= 0:
+        brace = text.find("{", pos + len("<response>"))
+        if brace >= 0:
+            return brace
+    pos = text.find("```json")
+    if pos >= 0:
+        brace = text.find("{", pos + len("```json"))
+        if brace >= 0:
+            return brace
+    lead = _WS.match(text).end()
+    if text.startswith("{", lead):
+        return lead
+    pos = text.find("```")
+    if pos >= 0:
+        brace = text.find("{", pos + 3)
+        if brace >= 0:
+            return brace
+    return text.find("{")
+
+
+class _Scanner:
+    """Uma passada de parse tolerante a partir de start; forced = aspas já provadas conteúdo."""
+
+    def __init__(self, text: str, start: int, forced: set[int], emit: Callable[[dict], None] | None, emitted: list[int]):
+        self.s = text
+        self.n = len(text)
+        self.i = start
+        self.forced = forced
+        self.decisions: list[int] = []  # aspas aceitas como fecho em strings que tinham aspas cruas
+        self.truncated = False
+        self._emit = emit
+        self._emitted = emitted  # [quantos artifacts já foram emitidos] — sobrevive aos recomeços
+        self._artifacts: list | None = None
+        self._artifacts_complete = 0
+
+    # ── Estrutura ────────────────────────────────────────────────────────────
+
+    def parse(self) -> dict:
+        data, _ = self._object(top=True)
+        return data
+
+    def _ws(self) -> int:
+        self.i = _WS.match(self.s, self.i).end()
+        return self.i
+
+    def _object(self, top: bool = False, artifact: bool = False) -> tuple[dict, bool]:
+        s = self.s
+        opened = self.i
+        self.i += 1
+        out: dict = {}
+        ctx = "artifact" if artifact else "object"
+        while True:
+            if self._ws() >= self.n:
+                self.truncated = True
+                return out, False
+            c = s[self.i]
+            if c == "}":
+                self.i += 1
+                return out, True
+            if c == ",":  # vírgula sobrando
+                self.i += 1
+                continue
+            if c != '"':
+                raise _ParseError(self.i, "chave esperada")
+            key_pos = self.i
+            key, closed = self._string("key")
+            if closed and artifact and (key not in ARTIFACT_KEYS or key in out) and any(q > opened for q in self.decisions):
+                # chave estranha ao artifact logo após um fecho ambíguo: o fecho estava errado
+                raise _ParseError(key_pos, f"chave {key!r} inesperada em artifact")
+            if not closed or self._ws() >= self.n:
+                self.truncated = True
+                return out, False
+            if s[self.i] != ":":
+                raise _ParseError(self.i, "':' esperado")
+            self.i += 1
+            if self._ws() >= self.n:
+                self.truncated = True
+                return out, False
+            value, complete = self._value(ctx, artifacts=top and key == "artifacts")
+            if value is _EOF:
+                return out, False
+            if not complete:
+                # truncado no meio do valor: content parcial vale; outras strings parciais (path...) não
+                if not isinstance(value, str) or key == "content":
+                    out[key] = value
+                return out, False
+            out[key] = value
+            if self._ws() >= self.n:
+                self.truncated = True
+                return out, False
+            c = s[self.i]
+            if c == ",":
+                self.i += 1
+            elif c == "}":
+                self.i += 1
+                return out, True
+            else:
+                raise _ParseError(self.i, "',' ou '}' esperado")
+
+    def _array(self, artifacts: bool) -> tuple[list, bool]:
+        s = self.s
+        self.i += 1
+        out: list = []
+        if artifacts and self._artifacts is None:
+            self._artifacts = out
+        while True:
+            if self._ws() >= self.n:
+                self.truncated = True
+                return out, False
+            c = s[self.i]
+            if c == "]":
+                self.i += 1
+                return out, True
+            if c == ",":
+                self.i += 1
+                continue
+            value, complete = self._value("array", artifact=out is self._artifacts)
+            if value is _EOF:
+                return out, False
+            if not complete:
+                if not isinstance(value, str):
+                    out.append(value)
+                return out, False
+            out.append(value)
+            if out is self._artifacts:
+                self._artifact_closed()
+            if self._ws() >= self.n:
+                self.truncated = True
+                return out, False
+            c = s[self.i]
+            if c == ",":
+                self.i += 1
+            elif c == "]":
+                self.i += 1
+                return out, True
+            else:
+                raise _ParseError(self.i, "',' ou ']' esperado")
+
+    def _value(self, ctx: str, artifacts: bool = False, artifact: bool = False) -> tuple[Any, bool]:
+        s = self.s
+        c = s[self.i]
+        if c == "{":
+            return self._object(artifact=artifact)
+        if c == "[":
+            return self._array(artifacts)
+        if c == '"':
+            return self._string(ctx)
+        if c == "`":
+            return self._string(ctx, quote="`")
+        if c == "-" or c.isdigit():
+            m = _NUMBER.match(s, self.i)
+            if not m:
+                raise _ParseError(self.i, "número inválido")
+            if m.end() >= self.n:
+                self.truncated = True
+                return _EOF, False
+            self.i = m.end()
+            text = m.group()
+            return (float(text) if any(ch in text for ch in ".eE") else int(text)), True
+        for word, value in _LITERALS:
+            if s.startswith(word, self.i):
+                self.i += len(word)
+                return value, True
+            if self.n - self.i < len(word) and word.startswith(s[self.i:]):
+                self.truncated = True
+                return _EOF, False
+        raise _ParseError(self.i, f"valor inesperado {c!r}")
+
+    # ── Strings ──────────────────────────────────────────────────────────────
+
+    def _string(self, ctx: str, quote: str = '"') -> tuple[str, bool]:
+        """String a partir da aspa de abertura em self.i; (valor, fechou?)."""
+        s = self.s
+        start = self.i + 1
+        j = start
+        ambiguous = False
+        while True:
+            q = s.find(quote, j)
+            if q < 0:
+                raw = s[start:]
+                backslashes = len(raw) - len(raw.rstrip("\\"))
+                if backslashes % 2:
+                    raw = raw[:-1]  # escape cortado no meio
+                self.i = self.n
+                self.truncated = True
+                return _decode(raw), False
+            k = q - 1
+            while k >= start and s[k] == "\\":
+                k -= 1
+            if (q - 1 - k) % 2:
+                j = q + 1  # aspa escapada
+                continue
+            if q not in self.forced and self._closes(q + 1, ctx):
+                if ambiguous:
+                    self.decisions.append(q)
+                self.i = q + 1
+                return _decode(s[start:q]), True
+            ambiguous = True  # aspa crua: faz parte do conteúdo
+            j = q + 1
+
+    def _closes(self, p: int, ctx: str) -> bool:
+        """O que vem depois da aspa em p é estrutura válida para fechar uma string em ctx?"""
+        s = self.s
+        p = _WS.match(s, p).end()
+        if p >= self.n:
+            return True
+        c = s[p]
+        if ctx == "key":
+            return c == ":"
+        closer = "]" if ctx == "array" else "}"
+        if c == ",":
+            after = _WS.match(s, p + 1).end()
+            if after < self.n and s[after] == closer:  # vírgula sobrando antes do fecho
+                c, p = closer, after
+            elif ctx == "artifact":
+                m = _NEXT_KEY.match(s, p)
+                if m is None or m.group(1) is None:
+                    return m is not None
+                name = m.group(1)
+                return name in ARTIFACT_KEYS or (m.end() >= self.n and any(k.startswith(name) for k in ARTIFACT_KEYS))
+            elif ctx == "object":
+                return _NEXT_KEY.match(s, p) is not None
+            else:
+                return after >= self.n or s[after] in '"{[-0123456789'
+        if c == closer:
+            p = _WS.match(s, p + 1).end()
+            return p >= self.n or s[p] in ",}]<`"
+        return False
+
+    # ── Emissão de artifacts ─────────────────────────────────────────────────
+
+    def _artifact_closed(self) -> None:
+        self._artifacts_complete = len(self._artifacts)
+        if not self.decisions:
+            self._emit_pending()
+
+    def _emit_pending(self) -> None:
+        if self._emit is None or self._artifacts is None:
+            return
+        while self._emitted[0] < self._artifacts_complete:
+            art = self._artifacts[self._emitted[0]]
+            self._emitted[0] += 1
+            if isinstance(art, dict) and isinstance(art.get("path"), str) and isinstance(art.get("content"), str):
+                self._emit(art)
+
+    def finish(self) -> None:
+        self._emit_pending()
+
+
+def parse_envelope_text(raw_text: str, on_artifact: Callable[[dict], None] | None = None) -> EnvelopeParse:
+    """
+    Parseia a resposta bruta da LLM em um dict (ResponseEnvelope ainda não validado).
+    data=None quando não há JSON ou a estrutura é irrecuperável (error explica).
+    """
+    if not raw_text or not isinstance(raw_text, str):
+        return EnvelopeParse(None, error="Resposta vazia")
+    start = find_json_start(raw_text)
+    if start < 0:
+        return EnvelopeParse(None, error="Resposta não contém JSON")
+    try:
+        data, _ = _DECODER.raw_decode(raw_text, start)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        if on_artifact is not None:
+            for art in data.get("artifacts") or []:
+                if isinstance(art, dict) and isinstance(art.get("path"), str) and isinstance(art.get("content"), str):
+                    on_artifact(art)
+        return EnvelopeParse(data, start=start)
+
+    forced: set[int] = set()
+    emitted = [0]
+    error = ""
+    for _ in range(MAX_QUOTE_RETRIES + 1):
+        scanner = _Scanner(raw_text, start, forced, on_artifact, emitted)
+        try:
+            data = scanner.parse()
+        except _ParseError as e:
+            error = str(e)
+            culprit = next((q for q in reversed(scanner.decisions) if q < e.pos), None)
+            if culprit is None:
+                break
+            forced.add(culprit)
+            continue
+        scanner.finish()
+        return EnvelopeParse(data, truncated=scanner.truncated, tolerant=True, start=start)
+    return EnvelopeParse(None, tolerant=True, error=error or "aspas ambíguas sem solução", start=start)
@@ -0,0 +1,363 @@
+"""
+file_index.py — Índice incremental dos arquivos de um projeto, compartilhado pelos scanners.
+
+type_fingerprint (fingerprint / stub pages / responsive), knowledge_extractor (QA reports),
+Cyborg (_collect_context) e o full-test-server (_snapshot_apps) percorriam e reliam as mesmas
+árvores apps/ e docs/ cada um por conta própria. Aqui:
+
+  - índice persistente path → {size, mtime_ns, sha256, lang} em
+    PROJECT_FILES_ROOT/<project_id>/.file-index.json (ao lado de .tasks-state.json);
+  - refresh incremental: um walk só de stat; entrada com (size, mtime_ns) igual mantém o
+    sha256 já calculado, entrada alterada perde o hash (recalculado sob demanda);
+  - conteúdo em cache em processo por sha256 (LRU limitado a FILE_INDEX_CACHE_MB): passadas
+    repetidas de QA/Cyborg sobre uma árvore inalterada não releem o disco;
+  - snapshots (path → sha256) e changed_since(snapshot) → added / removed / modified.
+
+Uso:
+    idx = get_file_index(project_dir)
+    for rel in idx.glob("apps/src/**/page.tsx"):
+        txt = idx.read_text(rel)
+
+FILE_INDEX_ENABLED=false: índice efêmero (não persiste, sem cache de conteúdo) — mesmo
+comportamento de reler a árvore a cada chamada.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+FILE_INDEX_ENABLED = os.environ.get("FILE_INDEX_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+FILE_INDEX_CACHE_MB = int(os.environ.get("FILE_INDEX_CACHE_MB", "64") or 0)
+# >0: chamadas seguidas dentro desta janela (s) reaproveitam o último walk de stat (0 = sempre refaz)
+FILE_INDEX_REFRESH_SEC = float(os.environ.get("FILE_INDEX_REFRESH_SEC", "0") or 0)
+
+INDEX_FILENAME = ".file-index.json"
+_SCHEMA_VERSION = "1.0"
+_MAX_SNAPSHOTS = 8
+_MAX_CACHED_FILE_BYTES = 1_000_000  # arquivo maior é lido do disco, mas não entra no cache
+
+# Diretórios que nenhum scanner lê (dependências, builds, VCS)
+SKIP_DIRS = frozenset({"node_modules", ".next", "dist", ".git", "__pycache__", ".venv", "venv", "coverage", "build"})
+# Estado do próprio pipeline na raiz do projeto — não é código entregue
+_SKIP_FILES = frozenset({".tasks-state.json"})
+
+_LANGS = {
+    ".ts": "typescript", ".tsx": "typescript", ".mts": "typescript", ".cts": "typescript",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".py": "python", ".json": "json", ".md": "markdown", ".yaml": "yaml", ".yml": "yaml",
+    ".toml": "toml", ".sh": "shell", ".sql": "sql", ".html": "html", ".css": "css",
+    ".scss": "css", ".prisma": "prisma", ".env": "dotenv",
+}
+
+
+def detect_language(rel: str) -> str | None:
+    name = rel.rsplit("/", 1)[-1].lower()
+    if name == "dockerfile" or name.startswith("dockerfile."):
+        return "dockerfile"
+    if name.startswith(".env"):
+        return "dotenv"
+    dot = name.rfind(".")
+    return _LANGS.get(name[dot:]) if dot > 0 else None
+
+
+# ── cache de conteúdo (compartilhado entre projetos: arquivos idênticos = mesmo hash) ──
+
+class _ContentCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, max_bytes)
+        self._items: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha: str | None) -> str | None:
+        if not sha:
+            return None
+        with self._lock:
+            text = self._items.get(sha)
+            if text is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(sha)
+            self.hits += 1
+            return text
+
+    def put(self, sha: str, text: str) -> None:
+        if not self.max_bytes or len(text) > self.max_bytes:
+            return
+        with self._lock:
+            if sha in self._items:
+                self._items.move_to_end(sha)
+                return
+            self._items[sha] = text
+            self._size += len(text)
+            while self._size > self.max_bytes:
+                _old, dropped = self._items.popitem(last=False)
+                self._size -= len(dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+_content_cache = _ContentCache(FILE_INDEX_CACHE_MB * 1024 * 1024)
+
+
+def _glob_regex(pattern: str) -> re.Pattern:
+    """Glob relativo à raiz do índice: '*' e '?' não cruzam '/', '**/' casa zero ou mais diretórios."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+class ProjectFileIndex:
+    """Índice de uma raiz de projeto. Paths relativos sempre em formato posix ('apps/src/x.ts')."""
+
+    def __init__(self, root: Path | str, index_path: Path | str | None = None, persist: bool = True):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else self.root / INDEX_FILENAME
+        self.persist = persist
+        self._files: dict[str, dict[str, Any]] = {}
+        self._snapshots: dict[str, dict[str, str]] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self.hashed = 0  # arquivos lidos para hash (diagnóstico / testes)
+
+    # ── persistência ────────────────────────────────────────────────────────────
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.persist or not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning("[FileIndex] Índice ilegível (%s) — reconstruindo: %s", self.index_path, e)
+            return
+        if data.get("schema_version") != _SCHEMA_VERSION:
+            return
+        self._files = data.get("files") or {}
+        self._snapshots = data.get("snapshots") or {}
+
+    def save(self) -> None:
+        """Grava o índice (atômico: .tmp + replace) se houver mudanças."""
+        if not self.persist:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "schema_version": _SCHEMA_VERSION,
+                "saved_at": datetime.now(timezone.utc).isoformat(),
+                "files": self._files,
+                "snapshots": self._snapshots,
+            }
+            tmp = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            try:
+                tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+                os.replace(tmp, self.index_path)
+                self._dirty = False
+            except OSError as e:
+                logger.debug("[FileIndex] Falha ao gravar %s: %s", self.index_path, e)
+
+    # ── refresh ─────────────────────────────────────────────────────────────────
+
+    def _walk(self) -> Iterable[tuple[str, os.stat_result]]:
+        stack = [(self.root, "")]
+        while stack:
+            d, prefix = stack.pop()
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            if e.name not in SKIP_DIRS:
+                                stack.append((e.path, prefix + e.name + "/"))
+                        elif e.is_file() and not (not prefix and (e.name in _SKIP_FILES or e.name.startswith(INDEX_FILENAME))):
+                            yield prefix + e.name, e.stat()
+                    except OSError:
+                        continue
+
+    def refresh(self, max_age: float = 0.0) -> int:
+        """
+        Stat-diff da árvore contra o índice. Devolve o número de entradas novas/alteradas/removidas.
+        max_age > 0: não refaz o walk se o último refresh foi há menos de max_age segundos.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if max_age and time.monotonic() - self._refreshed_at < max_age:
+                return 0
+            seen: set[str] = set()
+            changed = 0
+            for rel, st in self._walk():
+                seen.add(rel)
+                entry = self._files.get(rel)
+                if entry is not None and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                    continue
+                self._files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": None,
+                                    "lang": detect_language(rel)}
+                changed += 1
+            for rel in [r for r in self._files if r not in seen]:
+                del self._files[rel]
+                changed += 1
+            self._refreshed_at = time.monotonic()
+            if changed:
+                self._dirty = True
+            self.save()  # também grava hashes calculados desde o último refresh
+            return changed
+
+    # ── consulta ────────────────────────────────────────────────────────────────
+
+    def path(self, rel: str) -> Path:
+        return self.root / rel
+
+    def entry(self, rel: str) -> dict[str, Any] | None:
+        with self._lock:
+            return self._files.get(rel)
+
+    def files(self, prefix: str = "") -> list[str]:
+        """Paths relativos (ordenados) sob prefix ('apps/', 'docs/' ...)."""
+        with self._lock:
+            return sorted(r for r in self._files if r.startswith(prefix))
+
+    def glob(self, pattern: str) -> list[str]:
+        """Paths relativos (ordenados) que casam com o glob (ver _glob_regex)."""
+        rx = _glob_regex(pattern)
+        with self._lock:
+            return sorted(r for r in self._files if rx.match(r))
+
+    def _read_bytes(self, rel: str) -> tuple[bytes, str]:
+        raw = self.path(rel).read_bytes()
+        sha = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            entry = self._files.get(rel)
+            # o conteúdo lido pode ser mais novo que o stat do índice: o próximo refresh vê o mtime novo
+            if entry is not None and entry.get("sha256") != sha and entry["size"] == len(raw):
+                entry["sha256"] = sha
+                self._dirty = True
+        self.hashed += 1
+        return raw, sha
+
+    def sha256(self, rel: str) -> str | None:
+        """Hash do conteúdo (calculado e guardado no índice na primeira consulta)."""
+        entry = self.entry(rel)
+        if entry is None:
+            return None
+        if entry.get("sha256") is None:
+            try:
+                self._read_bytes(rel)
+            except OSError:
+                return None
+        return entry.get("sha256")
+
+    def read_text(self, rel: str) -> str:
+        """Conteúdo (utf-8, errors=replace) — do cache quando o hash do índice já é conhecido. OSError se sumiu."""
+        entry = self.entry(rel)
+        cache = _content_cache if self.persist else None
+        if cache is not None and entry is not None:
+            cached = cache.get(entry.get("sha256"))
+            if cached is not None:
+                return cached
+        raw, sha = self._read_bytes(rel)
+        text = raw.decode("utf-8", errors="replace")
+        if cache is not None and len(raw) <= _MAX_CACHED_FILE_BYTES:
+            cache.put(sha, text)
+        return text
+
+    # ── snapshots ───────────────────────────────────────────────────────────────
+
+    def snapshot(self, prefix: str = "") -> dict[str, str]:
+        """path (relativo a prefix) → sha256 de todos os arquivos sob prefix."""
+        snap: dict[str, str] = {}
+        for rel in self.files(prefix):
+            sha = self.sha256(rel)
+            if sha is not None:
+                snap[rel[len(prefix):]] = sha
+        self.save()
+        return snap
+
+    def save_snapshot(self, name: str, prefix: str = "") -> dict[str, str]:
+        """snapshot() guardado no índice com um nome (mantém os _MAX_SNAPSHOTS mais recentes)."""
+        snap = self.snapshot(prefix)
+        with self._lock:
+            self._snapshots.pop(name, None)
+            self._snapshots[name] = snap
+            while len(self._snapshots) > _MAX_SNAPSHOTS:
+                self._snapshots.pop(next(iter(self._snapshots)))
+            self._dirty = True
+        self.save()
+        return snap
+
+    def changed_since(self, snapshot: str | dict[str, str], prefix: str = "") -> dict[str, list[str]]:
+        """Diferença entre um snapshot (dict ou nome salvo) e o estado atual sob prefix."""
+        if isinstance(snapshot, str):
+            with self._lock:
+                before = dict(self._snapshots.get(snapshot) or {})
+        else:
+            before = snapshot
+        after = self.snapshot(prefix)
+        return {
+            "added": sorted(k for k in after if k not in before),
+            "removed": sorted(k for k in before if k not in after),
+            "modified": sorted(k for k in after if k in before and after[k] != before[k]),
+        }
+
+
+_indexes: dict[str, ProjectFileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(root: Path | str, max_age: float = FILE_INDEX_REFRESH_SEC) -> ProjectFileIndex:
+    """Índice (compartilhado no processo) da raiz do projeto, já atualizado."""
+    root = Path(root)
+    if not FILE_INDEX_ENABLED:
+        idx = ProjectFileIndex(root, persist=False)
+        idx.refresh()
+        return idx
+    key = str(root.resolve())
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            idx = _indexes[key] = ProjectFileIndex(root)
+    idx.refresh(max_age=max_age)
+    return idx
+
+
+def reset_file_indexes() -> None:
+    """Descarta os índices em memória e o cache de conteúdo (testes)."""
+    with _indexes_lock:
+        _indexes.clear()
+    _content_cache.clear()
@@ -94,13 +94,18 @@ KNOWN_PATTERNS: list[dict[str, str]] = [
 
 
 def _read_qa_reports(project_id: str) -> list[str]:
-    """Lê todos os QA reports do projeto do disco."""
+    """Lê todos os QA reports do projeto (via índice do projeto: conteúdo inalterado vem do cache)."""
+    from orchestrator.file_index import get_file_index
+
     root = os.environ.get("PROJECT_FILES_ROOT", "/project-files")
-    docs_dir = Path(root) / project_id / "docs"
+    proj_dir = Path(root) / project_id
+    if not (proj_dir / "docs").is_dir():
+        return []
+    idx = get_file_index(proj_dir)
     reports = []
-    for f in docs_dir.glob("qa_report*.md"):
+    for rel in idx.glob("docs/qa_report*.md"):
         try:
-            reports.append(f.read_text(encoding="utf-8"))
+            reports.append(idx.read_text(rel))
         except Exception:
             pass
     return reports
@@ -26,47 +26,37 @@ def _load_dialogue(project_id: str) -> Optional[str]:
     db_url = os.environ.get("DATABASE_URL", "").strip()
     if not db_url:
         return None
+    from orchestrator.pg_pool import get_pg_pool, PgUnavailable
+
+    def _work(cur):
+        # project_dialogue pode ter schema variado; tentar campos comuns.
+        cur.execute(
+            "SELECT to_regclass('public.project_dialogue') IS NOT NULL"
+        )
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute(
+            """
+            SELECT COALESCE(
+               string_agg(message, E'\\n' ORDER BY created_at),
+               ''
+            )
+              FROM project_dialogue
+             WHERE project_id = %s::uuid
+            """,
+            (project_id,),
+        )
+        row = cur.fetchone()
+        return (row[0] if row else "") or ""
+
     try:
-        try:
-            import psycopg2  # type: ignore
-            conn = psycopg2.connect(db_url)
-        except ImportError:
-            import psycopg  # type: ignore
-            conn = psycopg.connect(db_url)
-    except Exception as exc:
+        return get_pg_pool(db_url).run(_work)
+    except PgUnavailable as exc:
         logging.warning("[lesson_extract_cli] sem DB: %s", exc)
         return None
-
-    try:
-        with conn:
-            with conn.cursor() as cur:
-                # project_dialogue pode ter schema variado; tentar campos comuns.
-                cur.execute(
-                    "SELECT to_regclass('public.project_dialogue') IS NOT NULL"
-                )
-                if not cur.fetchone()[0]:
-                    return None
-                cur.execute(
-                    """
-                    SELECT COALESCE(
-                       string_agg(message, E'\\n' ORDER BY created_at),
-                       ''
-                    )
-                      FROM project_dialogue
-                     WHERE project_id = %s::uuid
-                    """,
-                    (project_id,),
-                )
-                row = cur.fetchone()
-                return (row[0] if row else "") or ""
     except Exception as exc:
         logging.warning("[lesson_extract_cli] erro lendo diálogo: %s", exc)
         return None
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -160,114 +160,107 @@ def _redact(text: str) -> str:
 # DB helpers
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _open_pg():
-    db_url = os.environ.get("DATABASE_URL", "").strip()
-    if not db_url:
-        return None
+def _pg_run(work, default):
+    """work(cursor) no pool compartilhado (pg_pool.py); `default` sem DATABASE_URL / PG fora do ar."""
+    from orchestrator.pg_pool import get_pg_pool, PgUnavailable
+    pool = get_pg_pool()
+    if pool is None:
+        return default
     try:
-        try:
-            import psycopg2  # type: ignore
-            return psycopg2.connect(db_url, connect_timeout=3)
-        except ImportError:
-            import psycopg  # type: ignore
-            return psycopg.connect(db_url, connect_timeout=3)
-    except Exception as exc:
+        return pool.run(work)
+    except PgUnavailable as exc:
         logger.debug("[LessonExtractor] sem PG: %s", exc)
-        return None
+        return default
 
 
 def _persist_lessons(lessons: list[Lesson]) -> int:
     if not lessons:
         return 0
-    conn = _open_pg()
-    if conn is None:
+    from orchestrator.pg_pool import get_pg_pool
+    if get_pg_pool() is None:
         logger.warning("[LessonExtractor] DATABASE_URL ausente — não persistido")
         return 0
 
-    inserted = 0
+    def _work(cur) -> int:
+        # Confirmar que a tabela existe (migration 026)
+        cur.execute("SELECT to_regclass('public.lessons_corpus') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            logger.warning(
+                "[LessonExtractor] tabela lessons_corpus não existe (migration 026?)"
+            )
+            return 0
+        inserted = 0
+        for ln in lessons:
+            cur.execute(
+                """
+                INSERT INTO lessons_corpus
+                    (id, project_id, slug, category, scope, stack_key,
+                     role, title, body_md, confidence, pii_redacted, tags, updated_at)
+                VALUES (%s, %s::uuid, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (slug) DO UPDATE
+                   SET title       = EXCLUDED.title,
+                       body_md     = EXCLUDED.body_md,
+                       category    = EXCLUDED.category,
+                       scope       = EXCLUDED.scope,
+                       stack_key   = EXCLUDED.stack_key,
+                       role        = EXCLUDED.role,
+                       confidence  = GREATEST(lessons_corpus.confidence, EXCLUDED.confidence),
+                       tags        = EXCLUDED.tags,
+                       updated_at  = NOW()
+                """,
+                (
+                    str(uuid.uuid4()),
+                    ln.project_id,
+                    ln.slug,
+                    ln.category,
+                    ln.scope,
+                    ln.stack_key,
+                    ln.role,
+                    ln.title,
+                    ln.body_md,
+                    ln.confidence,
+                    ln.pii_redacted,
+                    ln.tags,
+                ),
+            )
+            inserted += 1
+        return inserted
+
     try:
-        with conn:
-            with conn.cursor() as cur:
-                # Confirmar que a tabela existe (migration 026)
-                cur.execute("SELECT to_regclass('public.lessons_corpus') IS NOT NULL")
-                if not cur.fetchone()[0]:
-                    logger.warning(
-                        "[LessonExtractor] tabela lessons_corpus não existe (migration 026?)"
-                    )
-                    return 0
-                for ln in lessons:
-                    cur.execute(
-                        """
-                        INSERT INTO lessons_corpus
-                            (id, project_id, slug, category, scope, stack_key,
-                             role, title, body_md, confidence, pii_redacted, tags, updated_at)
-                        VALUES (%s, %s::uuid, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                        ON CONFLICT (slug) DO UPDATE
-                           SET title       = EXCLUDED.title,
-                               body_md     = EXCLUDED.body_md,
-                               category    = EXCLUDED.category,
-                               scope       = EXCLUDED.scope,
-                               stack_key   = EXCLUDED.stack_key,
-                               role        = EXCLUDED.role,
-                               confidence  = GREATEST(lessons_corpus.confidence, EXCLUDED.confidence),
-                               tags        = EXCLUDED.tags,
-                               updated_at  = NOW()
-                        """,
-                        (
-                            str(uuid.uuid4()),
-                            ln.project_id,
-                            ln.slug,
-                            ln.category,
-                            ln.scope,
-                            ln.stack_key,
-                            ln.role,
-                            ln.title,
-                            ln.body_md,
-                            ln.confidence,
-                            ln.pii_redacted,
-                            ln.tags,
-                        ),
-                    )
-                    inserted += 1
+        inserted = _pg_run(_work, default=0)
     except Exception as exc:
         logger.warning("[LessonExtractor] falha ao persistir: %s", exc)
         return 0
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+    if inserted:
+        # Lições novas mudam o ranking de _query_lessons_top_hits: descartar pacotes CAG em memória
+        from orchestrator.context_loader import invalidate_context_cache
+        project_ids = {ln.project_id for ln in lessons}
+        scoped = next(iter(project_ids)) if len(project_ids) == 1 else None
+        invalidate_context_cache(project_id=scoped)
     return inserted
 
 
 def _enqueue_outbox(project_id: str, event: str = "project_accepted") -> bool:
-    conn = _open_pg()
-    if conn is None:
-        return False
-    try:
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT to_regclass('public.lessons_index_outbox') IS NOT NULL"
-                )
-                if not cur.fetchone()[0]:
-                    return False
-                cur.execute(
-                    """
-                    INSERT INTO lessons_index_outbox (project_id, event, payload)
-                    VALUES (%s::uuid, %s, %s::jsonb)
-                    """,
-                    (project_id, event, json.dumps({"queued_at": datetime.now(timezone.utc).isoformat()})),
-                )
+    def _work(cur) -> bool:
+        cur.execute(
+            "SELECT to_regclass('public.lessons_index_outbox') IS NOT NULL"
+        )
+        if not cur.fetchone()[0]:
+            return False
+        cur.execute(
+            """
+            INSERT INTO lessons_index_outbox (project_id, event, payload)
+            VALUES (%s::uuid, %s, %s::jsonb)
+            """,
+            (project_id, event, json.dumps({"queued_at": datetime.now(timezone.utc).isoformat()})),
+        )
         return True
+
+    try:
+        return _pg_run(_work, default=False)
     except Exception as exc:
         logger.debug("[LessonExtractor] outbox indisponível: %s", exc)
         return False
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 # ─────────────────────────────────────────────────────────────────────────────
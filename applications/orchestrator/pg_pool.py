@@ -0,0 +1,267 @@
+"""
+pg_pool.py — Pool de conexões PostgreSQL compartilhado do orchestrator.
+
+ContextLoader (CAG, a cada montagem de prompt em modo live), ConnectLoader, LessonExtractor
+e checklist_seed abriam uma conexão nova (TCP + auth) por consulta. Aqui:
+
+  - pool por DSN (psycopg2 ou psycopg3, o que estiver instalado), thread-safe: até
+    PG_POOL_MAX conexões ociosas reaproveitadas; checkouts além disso abrem uma conexão
+    extra, fechada ao devolver (nunca bloqueia o caminho quente);
+  - health check: conexão fechada é descartada; conexão ociosa há mais de
+    PG_POOL_HEALTHCHECK_SEC é testada com SELECT 1 antes do uso;
+  - retry unificado: erro de conexão (OperationalError / InterfaceError — ex.: Postgres
+    reiniciou e derrubou conexões do pool) descarta a conexão e repete a transação inteira
+    em uma conexão nova, até PG_RETRIES vezes. Erros de SQL não são repetidos;
+  - statements preparados por conexão (execute_prepared) para as consultas do caminho quente.
+
+Uso:
+    rows = pg_run(lambda cur: (cur.execute(sql, params), cur.fetchall())[1], default=[])
+
+pg_run executa work(cursor) em uma transação (commit no sucesso, rollback no erro) e devolve
+`default` quando o banco não está configurado/acessível. Exceções de SQL propagam.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PG_POOL_MAX = int(os.environ.get("PG_POOL_MAX", "5") or 5)
+PG_POOL_HEALTHCHECK_SEC = float(os.environ.get("PG_POOL_HEALTHCHECK_SEC", "30") or 0)
+PG_CONNECT_TIMEOUT = int(os.environ.get("PG_CONNECT_TIMEOUT", "3") or 3)
+PG_RETRIES = int(os.environ.get("PG_RETRIES", "1") or 0)
+# false com PgBouncer em modo transaction (statements preparados não sobrevivem entre transações)
+PG_PREPARED_STATEMENTS = os.environ.get("PG_PREPARED_STATEMENTS", "true").strip().lower() in ("1", "true", "yes")
+
+
+class PgUnavailable(RuntimeError):
+    """Banco não configurado, driver ausente ou conexão recusada."""
+
+
+def _load_driver():
+    try:
+        import psycopg2  # type: ignore
+        return psycopg2
+    except ImportError:
+        pass
+    try:
+        import psycopg  # type: ignore  # psycopg3
+        return psycopg
+    except ImportError:
+        return None
+
+
+def database_url() -> str:
+    return os.environ.get("DATABASE_URL", "").strip()
+
+
+class _PooledConn:
+    __slots__ = ("conn", "last_used", "prepared", "native_prepare")
+
+    def __init__(self, conn, native_prepare: bool):
+        self.conn = conn
+        self.last_used = time.monotonic()
+        self.prepared: set[str] = set()
+        self.native_prepare = native_prepare
+
+
+# Conexão do pool em uso pela thread dentro de PgPool.run (cursores C do psycopg2 não aceitam atributos)
+_current = threading.local()
+
+
+class PgPool:
+    """Pool thread-safe de conexões para um DSN."""
+
+    def __init__(
+        self,
+        dsn: str,
+        driver=None,
+        max_idle: int = PG_POOL_MAX,
+        connect_timeout: int | None = PG_CONNECT_TIMEOUT,
+        healthcheck_sec: float = PG_POOL_HEALTHCHECK_SEC,
+    ):
+        self.dsn = dsn
+        self.driver = driver if driver is not None else _load_driver()
+        self.max_idle = max(0, max_idle)
+        self.connect_timeout = connect_timeout
+        self.healthcheck_sec = healthcheck_sec
+        self._idle: deque[_PooledConn] = deque()
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    # ── conexões ────────────────────────────────────────────────────────────────
+
+    @property
+    def is_psycopg2(self) -> bool:
+        return getattr(self.driver, "__name__", "").startswith("psycopg2")
+
+    def _connection_errors(self) -> tuple[type[BaseException], ...]:
+        errs = tuple(
+            e for e in (getattr(self.driver, "OperationalError", None), getattr(self.driver, "InterfaceError", None))
+            if isinstance(e, type)
+        )
+        return errs or (ConnectionError,)
+
+    def _open(self) -> _PooledConn:
+        if self.driver is None:
+            raise PgUnavailable("psycopg2 ou psycopg não encontrado — instale um deles.")
+        kwargs = {"connect_timeout": self.connect_timeout} if self.connect_timeout else {}
+        try:
+            conn = self.driver.connect(self.dsn, **kwargs)
+        except Exception as exc:
+            raise PgUnavailable(f"Falha ao conectar no Postgres: {exc}") from exc
+        self.opened += 1
+        return _PooledConn(conn, native_prepare=not self.is_psycopg2)
+
+    def _healthy(self, pc: _PooledConn) -> bool:
+        if getattr(pc.conn, "closed", False):
+            return False
+        if self.healthcheck_sec and time.monotonic() - pc.last_used > self.healthcheck_sec:
+            try:
+                with pc.conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                pc.conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, pc: _PooledConn) -> None:
+        try:
+            pc.conn.close()
+        except Exception:
+            pass
+
+    def _checkout(self) -> _PooledConn:
+        while True:
+            with self._lock:
+                pc = self._idle.pop() if self._idle else None
+            if pc is None:
+                return self._open()
+            if self._healthy(pc):
+                return pc
+            logger.debug("[PgPool] Conexão ociosa inválida descartada.")
+            self._discard(pc)
+
+    def _checkin(self, pc: _PooledConn) -> None:
+        if getattr(pc.conn, "closed", False):
+            return
+        pc.last_used = time.monotonic()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(pc)
+                return
+        self._discard(pc)
+
+    @contextmanager
+    def connection(self) -> Iterator[_PooledConn]:
+        """Conexão do pool em uma transação: commit ao sair, rollback (e descarte se quebrada) no erro."""
+        pc = self._checkout()
+        try:
+            yield pc
+            pc.conn.commit()
+        except BaseException as exc:
+            try:
+                pc.conn.rollback()
+            except Exception:
+                self._discard(pc)
+                raise
+            if isinstance(exc, self._connection_errors()):
+                self._discard(pc)
+                raise
+            self._checkin(pc)
+            raise
+        self._checkin(pc)
+
+    def run(self, work: Callable[[Any], T], retries: int = PG_RETRIES) -> T:
+        """Executa work(cursor) em uma transação; repete em conexão nova após erro de conexão."""
+        conn_errors = self._connection_errors()
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as pc:
+                    with pc.conn.cursor() as cur:
+                        _current.pc = pc
+                        try:
+                            return work(cur)
+                        finally:
+                            _current.pc = None
+            except conn_errors as exc:
+                if attempt >= retries:
+                    raise PgUnavailable(str(exc)) from exc
+                logger.debug("[PgPool] Erro de conexão (%s) — repetindo em conexão nova.", exc)
+        raise PgUnavailable("sem tentativas")  # pragma: no cover
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for pc in idle:
+            self._discard(pc)
+
+
+_PARAM_RE = re.compile(r"%s")
+
+
+def execute_prepared(cur, name: str, sql: str, params: tuple | list = ()) -> None:
+    """
+    Executa sql como statement preparado na conexão do cursor (uma vez por conexão do pool).
+    psycopg3: prepare=True nativo; psycopg2: PREPARE/EXECUTE com os %s convertidos em $n.
+    Sem pool / PG_PREPARED_STATEMENTS=false → execute normal.
+    """
+    pc: _PooledConn | None = getattr(_current, "pc", None)
+    if not PG_PREPARED_STATEMENTS or pc is None or pc.conn is not getattr(cur, "connection", pc.conn):
+        cur.execute(sql, params)
+        return
+    if pc.native_prepare:
+        cur.execute(sql, params, prepare=True)
+        return
+    if name not in pc.prepared:
+        counter = iter(range(1, len(params) + 1))
+        cur.execute(f"PREPARE {name} AS " + _PARAM_RE.sub(lambda _m: f"${next(counter)}", sql))
+        pc.prepared.add(name)
+    if params:
+        cur.execute(f"EXECUTE {name} (" + ", ".join(["%s"] * len(params)) + ")", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+
+_pools: dict[str, PgPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pg_pool(dsn: str | None = None) -> PgPool | None:
+    """Pool compartilhado do DSN (default DATABASE_URL); None se não houver DSN."""
+    dsn = (dsn or database_url()).strip()
+    if not dsn:
+        return None
+    with _pools_lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            pool = _pools[dsn] = PgPool(dsn)
+        return pool
+
+
+def pg_run(work: Callable[[Any], T], default: Any = None, dsn: str | None = None, retries: int = PG_RETRIES) -> T | Any:
+    """work(cursor) no pool do DSN; `default` se o banco não estiver configurado/acessível."""
+    pool = get_pg_pool(dsn)
+    if pool is None:
+        return default
+    try:
+        return pool.run(work, retries=retries)
+    except PgUnavailable as exc:
+        logger.debug("[PgPool] Postgres indisponível: %s", exc)
+        return default
+
+
+def reset_pg_pools() -> None:
+    """Fecha as conexões ociosas e descarta os pools (testes / fork)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
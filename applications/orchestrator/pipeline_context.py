@@ -2,7 +2,9 @@
 Acumulador de contexto ao longo do pipeline (AGENT_LLM_COMMUNICATION_ANALYSIS).
 Garante que cada agente receba os inputs corretos: spec_raw, product_spec,
 engineer_proposal, charter, backlog, artefatos já produzidos.
-LEI 11: save_checkpoint / load_checkpoint para pipeline resumível.
+LEI 11: save_checkpoint / load_checkpoint para pipeline resumível — checkpoint.json guarda só
+metadados + shas; conteúdos ficam no blob store do projeto (blob_store.py) e cada save grava
+apenas o que mudou desde o anterior.
 """
 from __future__ import annotations   # T-02: permite `str | None` mesmo em Python 3.9 (testes locais)
 
@@ -16,6 +18,14 @@ from typing import Any, Optional
 
 logger = logging.getLogger(__name__)
 
+CHECKPOINT_FILENAME = "checkpoint.json"
+CHECKPOINT_BLOBS_DIR = "blobs"
+CHECKPOINT_FORMAT = 2
+# Campos de texto do contexto gravados como blob (spec, charter, backlog...)
+_CHECKPOINT_TEXT_FIELDS = (
+    "spec_raw", "product_spec", "product_spec_template", "engineer_proposal", "charter", "backlog",
+)
+
 
 # ── Type Policy (T-02) ────────────────────────────────────────────────────────
 # Fonte: applications/agents/policies/project_types.yaml
@@ -158,8 +168,10 @@ class PipelineContext:
         # None força T10 a chamar infer_pm_module que lê o YAML determinístico.
         self.current_module: "str | None" = None
         self.current_task: dict[str, Any] = {}
-        self.artifacts: dict[str, str] = {}  # path -> content
-        self.connect_artifacts: dict[str, str] = {}  # project/connect/... -> content
+        # path -> content; só os artifacts quentes ficam em memória (PIPELINE_ARTIFACT_CACHE_MB),
+        # o resto é relido dos arquivos do projeto / blob store sob demanda
+        self.artifacts: BlobBackedMap = self._artifact_map()
+        self.connect_artifacts: BlobBackedMap = self._artifact_map()  # project/connect/... -> content
         self.completed_tasks: list[str] = []
         self.current_step: int = 0  # LEI 11: etapa atual para retomada (0 = início)
         self.project_type: str = ""  # e.g. "backend_api", "frontend_webapp", "landing_page"
@@ -175,6 +187,22 @@ class PipelineContext:
         # Detected backend stack — cached to avoid repeated LLM calls per task
         # {"language": "python"|"nodejs"|..., "source": "pm_backlog_disk"|..., "confidence": "high"|"medium"|"low"}
         self.backend_stack: dict | None = None
+        # LEI 11: campo de texto → (valor já persistido, sha) para o próximo checkpoint pular o blob
+        self._checkpoint_digests: dict[str, tuple[str, str]] = {}
+
+    def _artifact_files_root(self) -> Path | None:
+        """Raiz do projeto em disco, onde os artifacts apps/ docs/ project/ já foram gravados."""
+        try:
+            from orchestrator import project_storage as storage
+        except ImportError:
+            return None
+        if not storage.is_enabled():
+            return None
+        return storage.get_project_root(self.project_id, self.product_id or None)
+
+    def _artifact_map(self, initial: dict | None = None, **kwargs) -> "BlobBackedMap":
+        from orchestrator.blob_store import BlobBackedMap
+        return BlobBackedMap(initial, files_root=self._artifact_files_root, **kwargs)
 
     def set_spec_raw(self, value: str) -> None:
         self.spec_raw = (value or "")[:30000]
@@ -381,61 +409,105 @@ class PipelineContext:
             self.connect_artifacts[path] = content
             self.add_artifact(path, content)
 
+    def _checkpoint_text_ref(self, store: "BlobStore", field: str) -> str | None:
+        value = getattr(self, field) or ""
+        if not value:
+            return None
+        cached = self._checkpoint_digests.get(field)
+        if cached and cached[0] is value:
+            return cached[1]
+        sha = store.put(value)
+        self._checkpoint_digests[field] = (value, sha)
+        return sha
+
     def save_checkpoint(self, storage_path: str | Path) -> None:
         """
         LEI 11: Persiste o estado atual do contexto para retomada após falha.
-        Grava em storage_path / project_id / checkpoint.json.
+        Grava em storage_path / project_id / checkpoint.json (metadados + shas) e os conteúdos
+        novos/alterados em storage_path / project_id / blobs/.
         """
-        path = Path(storage_path) / self.project_id / "checkpoint.json"
-        path.parent.mkdir(parents=True, exist_ok=True)
+        from orchestrator.blob_store import BlobBackedMap, BlobStore
+        base = Path(storage_path) / self.project_id
+        base.mkdir(parents=True, exist_ok=True)
+        store = BlobStore(base / CHECKPOINT_BLOBS_DIR)
+        # alguém pode ter atribuído um dict comum
+        if not isinstance(self.artifacts, BlobBackedMap):
+            self.artifacts = self._artifact_map(self.artifacts)
+        if not isinstance(self.connect_artifacts, BlobBackedMap):
+            self.connect_artifacts = self._artifact_map(self.connect_artifacts)
         checkpoint = {
+            "format": CHECKPOINT_FORMAT,
             "project_id": self.project_id,
             "connect_version": self.connect_version,
-            "spec_raw": self.spec_raw,
-            "product_spec": self.product_spec,
-            "product_spec_template": self.product_spec_template,
-            "engineer_proposal": self.engineer_proposal,
-            "charter": self.charter,
-            "backlog": self.backlog,
+            "text_refs": {
+                field: sha for field in _CHECKPOINT_TEXT_FIELDS
+                if (sha := self._checkpoint_text_ref(store, field))
+            },
             "current_module": self.current_module,
             "current_task": self.current_task,
-            "artifacts": self.artifacts,
-            "connect_artifacts": self.connect_artifacts,
+            "artifact_refs": self.artifacts.digests(store),
+            "connect_artifact_refs": self.connect_artifacts.digests(store),
+            "artifact_sizes": self.artifacts.sizes(),
             "completed_tasks": self.completed_tasks,
             "current_step": self.current_step,
             "project_type": self.project_type,
             "saved_at": datetime.now(timezone.utc).isoformat(),
         }
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(checkpoint, f, ensure_ascii=False, indent=2)
-        logger.info("Checkpoint salvo (LEI 11): step=%s, tasks=%s", self.current_step, len(self.completed_tasks))
+        path = base / CHECKPOINT_FILENAME
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(checkpoint, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+        logger.info(
+            "Checkpoint salvo (LEI 11): step=%s, tasks=%s, blobs novos=%s, artifacts em memória=%s/%s (%s chars)",
+            self.current_step, len(self.completed_tasks), store.written,
+            self.artifacts.loaded, len(self.artifacts), self.artifacts.resident_size,
+        )
 
     @classmethod
     def load_checkpoint(cls, storage_path: str | Path, project_id: str) -> "PipelineContext | None":
         """
         LEI 11: Restaura contexto de um checkpoint salvo.
-        Retorna None se o arquivo não existir.
+        Retorna None se o arquivo não existir. Artifacts são lidos do blob store sob demanda;
+        blobs que nenhum campo referencia mais (versões antigas) são removidos.
+        Checkpoints no formato antigo (conteúdo inline) continuam sendo lidos.
         """
-        path = Path(storage_path) / project_id / "checkpoint.json"
+        from orchestrator.blob_store import BlobStore
+        base = Path(storage_path) / project_id
+        path = base / CHECKPOINT_FILENAME
         if not path.exists():
             return None
         with path.open("r", encoding="utf-8") as f:
             data = json.load(f)
         ctx = cls(project_id)
         ctx.connect_version = data.get("connect_version", "1.0.0")
-        ctx.spec_raw = data.get("spec_raw", "")
-        ctx.product_spec = data.get("product_spec", "")
-        ctx.product_spec_template = data.get("product_spec_template", "")
-        ctx.engineer_proposal = data.get("engineer_proposal", "")
-        ctx.charter = data.get("charter", "")
-        ctx.backlog = data.get("backlog", "")
+        if "artifact_refs" in data:
+            store = BlobStore(base / CHECKPOINT_BLOBS_DIR)
+            text_refs = data.get("text_refs") or {}
+            for field in _CHECKPOINT_TEXT_FIELDS:
+                sha = text_refs.get(field)
+                if sha:
+                    value = store.get(sha)
+                    setattr(ctx, field, value)
+                    ctx._checkpoint_digests[field] = (value, sha)
+            artifact_refs = data.get("artifact_refs") or {}
+            connect_refs = data.get("connect_artifact_refs") or {}
+            sizes = data.get("artifact_sizes") or {}
+            ctx.artifacts = ctx._artifact_map(store=store, refs=artifact_refs, sizes=sizes)
+            ctx.connect_artifacts = ctx._artifact_map(store=store, refs=connect_refs, sizes=sizes)
+            keep = set(text_refs.values()) | set(artifact_refs.values()) | set(connect_refs.values())
+            pruned = store.prune(keep)
+            if pruned:
+                logger.debug("[LEI 11] %s blobs órfãos removidos de %s", pruned, store.root)
+        else:
+            for field in _CHECKPOINT_TEXT_FIELDS:
+                setattr(ctx, field, data.get(field, ""))
+            ctx.artifacts = ctx._artifact_map(data.get("artifacts") or {})
+            ctx.connect_artifacts = ctx._artifact_map(data.get("connect_artifacts") or {})
         # T10-fix: preservar None quando checkpoint não tem current_module
         # (checkpoints antigos com "backend" hardcoded serão sobrescritos após 1ª inferência real).
         _cm = data.get("current_module")
         ctx.current_module = _cm if _cm in ("web", "backend", "mobile", "fullstack") else None
         ctx.current_task = data.get("current_task") or {}
-        ctx.artifacts = data.get("artifacts") or {}
-        ctx.connect_artifacts = data.get("connect_artifacts") or {}
         ctx.completed_tasks = data.get("completed_tasks") or []
         ctx.current_step = data.get("current_step", 0)
         ctx.project_type = data.get("project_type", "")
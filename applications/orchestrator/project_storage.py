@@ -1,13 +1,25 @@
 """
 Armazenamento por projeto em disco: PROJECT_FILES_ROOT / <project_id> / docs | project | apps.
 Blueprint V2 REV2: project_id obrigatório; escrita atômica (temp + rename); lock por projeto.
+
+Manifest de docs/: log append-only (manifest.log.jsonl, uma entrada por linha + fsync) compactado
+periodicamente no snapshot manifest.json (array JSON, formato lido pela api-node). Leitores juntam
+os dois (read_manifest). manifest_batch() agrupa as entradas de várias escritas — ex.: todos os
+artifacts de uma resposta de agente — em um único append.
 """
 import json
 import logging
 import os
 import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timezone
+from typing import Iterator
+
+try:
+    import fcntl  # lock entre processos (runner + agents) no append/compactação do manifest
+except ImportError:  # pragma: no cover — Windows
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +42,13 @@ CREATORS = frozenset({
 })
 
 MANIFEST_FILENAME = "manifest.json"
+MANIFEST_LOG_FILENAME = "manifest.log.jsonl"
+# Compacta o log no snapshot quando passa deste tamanho (~400 entradas)
+MANIFEST_COMPACT_BYTES = int(os.environ.get("MANIFEST_COMPACT_BYTES", str(64 * 1024)) or 0)
+MANIFEST_FSYNC = os.environ.get("MANIFEST_FSYNC", "true").strip().lower() in ("1", "true", "yes")
+
+# Buffers de manifest_batch por thread: project_id → [profundidade, entradas]
+_manifest_batches = threading.local()
 
 
 def _root() -> Path | None:
@@ -201,7 +220,7 @@ def _safe_filename(name: str) -> str:
     return "".join(c for c in name if c.isalnum() or c in "._- ").strip() or "doc"
 
 
-def _read_manifest(docs_dir: Path) -> list:
+def _read_manifest_snapshot(docs_dir: Path) -> list:
     manifest_path = docs_dir / MANIFEST_FILENAME
     if not manifest_path.exists():
         return []
@@ -212,24 +231,132 @@ def _read_manifest(docs_dir: Path) -> list:
         return []
 
 
+def _read_manifest_log(docs_dir: Path) -> list:
+    log_path = docs_dir / MANIFEST_LOG_FILENAME
+    try:
+        raw = log_path.read_text(encoding="utf-8")
+    except OSError:
+        return []
+    entries = []
+    for line in raw.splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue  # linha truncada (processo morto no meio do append)
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries
+
+
+def _manifest_entry_key(entry: dict) -> tuple:
+    """Identidade de uma entrada appendada — mesma chave da rota /api/projects/:id/artifacts do api-node."""
+    return (entry.get("filename"), entry.get("creator"), entry.get("title") or "", entry.get("created_at") or "")
+
+
+def _read_manifest(docs_dir: Path) -> list:
+    """
+    Snapshot + log, na ordem do append: toda entrada appendada aparece, inclusive o mesmo
+    documento regravado pelo mesmo papel. O log é lido ANTES do snapshot: se uma compactação
+    acontecer no meio, as entradas aparecem no snapshot novo ou no log antigo — nunca somem.
+    Só a mesma entrada repetida (compactação interrompida antes de truncar o log) é ignorada.
+    """
+    log_entries = _read_manifest_log(docs_dir)
+    entries: list = []
+    seen: set[tuple] = set()
+    for e in _read_manifest_snapshot(docs_dir) + log_entries:
+        if not isinstance(e, dict):
+            continue
+        key = _manifest_entry_key(e)
+        if key not in seen:
+            seen.add(key)
+            entries.append(e)
+    return entries
+
+
+def read_manifest(project_id: str) -> list:
+    """Entradas do manifest de docs/ do projeto (snapshot compactado + log)."""
+    docs_dir = get_docs_dir(project_id)
+    if not docs_dir or not _require_project_id(project_id):
+        return []
+    return _read_manifest(docs_dir)
+
+
 def _write_manifest(docs_dir: Path, entries: list) -> None:
     manifest_path = docs_dir / MANIFEST_FILENAME
     _atomic_write(manifest_path, json.dumps(entries, ensure_ascii=False, indent=2))
 
 
-def append_manifest(project_id: str, filename: str, creator: str, title: str = "") -> None:
-    """Adiciona uma entrada ao manifest.json em docs/ do projeto."""
-    docs_dir = _ensure_docs_dir(project_id)
-    if not docs_dir:
-        return
-    entries = _read_manifest(docs_dir)
-    entries.append({
+def _manifest_entry(filename: str, creator: str, title: str = "") -> dict:
+    return {
         "filename": filename,
         "creator": creator,
         "title": title or filename,
         "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-    })
-    _write_manifest(docs_dir, entries)
+    }
+
+
+def _append_manifest_log(docs_dir: Path, entries: list) -> None:
+    """Um append (um write + fsync) para todas as entradas; compacta se o log passou do limite."""
+    payload = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+    with open(docs_dir / MANIFEST_LOG_FILENAME, "a+", encoding="utf-8") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write(payload)
+            f.flush()
+            if MANIFEST_FSYNC:
+                os.fsync(f.fileno())
+            if MANIFEST_COMPACT_BYTES and f.tell() >= MANIFEST_COMPACT_BYTES:
+                # snapshot novo primeiro, depois trunca o log (ver _read_manifest)
+                _write_manifest(docs_dir, _read_manifest(docs_dir))
+                f.truncate(0)
+                if MANIFEST_FSYNC:
+                    os.fsync(f.fileno())
+                logger.debug("[ProjectStorage] Manifest compactado: %s", docs_dir)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def append_manifest_entries(project_id: str, entries: list) -> None:
+    """Grava várias entradas de manifest de uma vez (um append no log)."""
+    if not entries:
+        return
+    docs_dir = _ensure_docs_dir(project_id)
+    if not docs_dir:
+        return
+    _append_manifest_log(docs_dir, entries)
+
+
+def append_manifest(project_id: str, filename: str, creator: str, title: str = "") -> None:
+    """Adiciona uma entrada ao manifest em docs/ do projeto (acumulada se houver manifest_batch ativo)."""
+    entry = _manifest_entry(filename, creator, title)
+    batch = getattr(_manifest_batches, "buffers", {}).get(project_id)
+    if batch is not None:
+        batch[1].append(entry)
+        return
+    append_manifest_entries(project_id, [entry])
+
+
+@contextmanager
+def manifest_batch(project_id: str) -> Iterator[None]:
+    """
+    Agrupa as entradas de manifest das escritas feitas dentro do bloco (mesma thread) em um único
+    append + fsync na saída. Reentrante: só o bloco mais externo grava.
+    """
+    buffers = getattr(_manifest_batches, "buffers", None)
+    if buffers is None:
+        buffers = _manifest_batches.buffers = {}
+    batch = buffers.setdefault(project_id, [0, []])
+    batch[0] += 1
+    try:
+        yield
+    finally:
+        batch[0] -= 1
+        if batch[0] == 0:
+            del buffers[project_id]
+            # arquivos já estão em disco mesmo se o bloco falhou: registra o que foi escrito
+            append_manifest_entries(project_id, batch[1])
 
 
 def write_doc(
@@ -363,6 +490,49 @@ def write_apps_artifact(project_id: str, relative_path: str, content: str | byte
     return path
 
 
+def read_apps_artifact(project_id: str, relative_path: str) -> str | None:
+    """Conteúdo atual de project_id/apps/<relative_path>; None se ausente ou path bloqueado."""
+    root = get_apps_dir(project_id)
+    if not _require_project_id(project_id) or not root:
+        return None
+    if ".." in relative_path or relative_path.startswith("/"):
+        return None
+    path = root / relative_path
+    try:
+        return path.read_text(encoding="utf-8") if path.is_file() else None
+    except OSError as e:
+        logger.warning("[ProjectStorage] Falha ao ler %s: %s", path, e)
+        return None
+
+
+def patch_apps_artifact(project_id: str, relative_path: str, patch: str) -> Path | None:
+    """
+    Aplica um artifact patch (unified diff ou SEARCH/REPLACE, ver artifact_patch.py) ao arquivo
+    em project_id/apps/ e grava o resultado (escrita atômica, sob o lock do projeto).
+    Patch que não aplica não altera o arquivo e retorna None — o chamador volta ao arquivo inteiro.
+    """
+    from orchestrator.artifact_patch import PatchError, apply_patch
+
+    root = get_apps_dir(project_id)
+    if not _require_project_id(project_id) or not root:
+        return None
+    if ".." in relative_path or relative_path.startswith("/"):
+        logger.warning("[ProjectStorage] Path bloqueado (traversal): %s", relative_path)
+        return None
+    with _project_lock(project_id):
+        path = root / relative_path
+        try:
+            current = path.read_text(encoding="utf-8") if path.is_file() else ""
+            content = apply_patch(current, patch)
+        except (OSError, PatchError) as e:
+            logger.warning("[ProjectStorage] Patch não aplicado em %s: %s", path, e)
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, content)
+    logger.info("[ProjectStorage] Artefato apps (patch): %s", path)
+    return path
+
+
 def is_enabled() -> bool:
     """Retorna True se PROJECT_FILES_ROOT está definido e o storage está ativo."""
     return _root() is not None
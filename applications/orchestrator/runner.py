@@ -7,6 +7,7 @@ Persiste estado em orchestrator/state/ e emite eventos conforme schemas.
 Uso: python -m orchestrator.runner --spec spec/PRODUCT_SPEC.md
 """
 import argparse
+import copy
 import json
 import logging
 import os
@@ -16,9 +17,7 @@ import sys
 import threading
 import time
 import traceback as _tb
-import urllib.error
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -43,6 +42,9 @@ def _sigterm_handler(_signum, _frame):
     _shutdown_requested = True
     logger = logging.getLogger(__name__)
     logger.info("[Pipeline] SIGTERM recebido; encerrando Monitor Loop.")
+    # Flush-on-shutdown: envia (ou grava no spill) a telemetria ainda na fila
+    from orchestrator.telemetry import shutdown_telemetry
+    shutdown_telemetry()
 
 def _bedrock_client(region: str | None = None):
     """Cria boto3 bedrock-runtime client com credenciais explícitas quando disponíveis.
@@ -210,35 +212,31 @@ def _record_agent_metrics(
     task_id: str | None = None,
     round_num: int = 1,
 ) -> None:
-    """Fire-and-forget: POST token metrics to the API after each agent call."""
-    if not project_id:
-        return
-    base = os.environ.get("API_BASE_URL", "").strip()
-    token = os.environ.get("GENESIS_API_TOKEN", "").strip()
-    if not base or not token:
+    """Fire-and-forget: POST token metrics to the API after each agent call (via telemetry sink)."""
+    if not project_id or _api_client() is None:
         return
     input_tokens = response.get("_input_tokens") or 0
     output_tokens = response.get("_output_tokens") or 0
-    if not input_tokens and not output_tokens:
+    if not input_tokens and not output_tokens and not response.get("_cache_read_tokens"):
         return  # no usage data — skip (e.g. running in no-API mode)
     try:
-        payload = json.dumps({
+        payload = {
             "agent": agent,
             "taskId": task_id,
             "round": round_num,
             "inputTokens": input_tokens,
             "outputTokens": output_tokens,
+            "cacheReadTokens": response.get("_cache_read_tokens") or 0,
+            "cacheWriteTokens": response.get("_cache_write_tokens") or 0,
             "model": response.get("_model"),
             "durationMs": response.get("_duration_ms"),
             "status": response.get("status"),
-        }).encode()
-        req = urllib.request.Request(
-            f"{base.rstrip('/')}/api/projects/{project_id}/agent-metrics",
-            data=payload,
-            headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"},
-            method="POST",
-        )
-        urllib.request.urlopen(req, timeout=5)
+        }
+        from orchestrator.telemetry import TELEMETRY_ASYNC, get_telemetry_sink
+        if TELEMETRY_ASYNC:
+            get_telemetry_sink().emit("POST", f"/api/projects/{project_id}/agent-metrics", payload)
+        else:
+            _api_request("POST", f"/api/projects/{project_id}/agent-metrics", payload, timeout=5)
     except Exception as e:
         logger.debug("[Metrics] Falha ao registrar métricas do agente %s: %s", agent, e)
 
@@ -801,6 +799,9 @@ def _ask_llm_for_backend_language(text: str) -> str:
                 "messages": [{"role": "user", "content": prompt}]}
         resp = client.invoke_model(modelId=model, body=_j.dumps(body))
         answer = _j.loads(resp["body"].read())["content"][0]["text"].strip().lower()
+    elif provider == "mock":
+        from orchestrator.agents.mock_llm import mock_text_reply
+        answer = mock_text_reply(prompt).strip().lower()
     else:
         from anthropic import Anthropic
         client = Anthropic(api_key=_os.environ.get("CLAUDE_API_KEY", ""))
@@ -1018,6 +1019,9 @@ Texto:
         resp = client.invoke_model(modelId=model, body=_json.dumps(body))
         result = _json.loads(resp["body"].read())
         answer = result["content"][0]["text"].strip().lower()
+    elif provider == "mock":
+        from orchestrator.agents.mock_llm import mock_text_reply
+        answer = mock_text_reply(prompt).strip().lower()
     else:
         from anthropic import Anthropic
         api_key = _os.environ.get("CLAUDE_API_KEY", "")
@@ -1215,6 +1219,28 @@ def _infer_web_skill_path(context_text: str, project_id: str | None = None) -> s
     return "dev/web/react-next-materialui"
 
 
+def _dev_stream_artifact_writer(project_id: str | None):
+    """
+    Com CLAUDE_STREAMING=true, grava os apps/ artifacts do Dev que vieram no stream assim que a
+    tentativa passa na validação (o runtime os mantém em stage até lá; tentativa rejeitada não grava).
+    O Monitor Loop regrava o envelope completo ao final (mesmo conteúdo).
+    """
+    from orchestrator.agents.runtime import _streaming_enabled
+
+    if not project_id or not _streaming_enabled():
+        return None
+    storage = _project_storage()
+    if not storage or not storage.is_enabled():
+        return None
+
+    def _write(art: dict) -> None:
+        path_val = (art.get("path") or "").strip()
+        if path_val.startswith("apps/") and art.get("content"):
+            storage.write_apps_artifact(project_id, path_val[5:].lstrip("/"), art["content"])
+
+    return _write
+
+
 def call_dev(
     spec_ref: str,
     charter_summary: str,
@@ -1333,7 +1359,8 @@ def call_dev(
         inputs.setdefault("context", {})["bundle_hash"] = _bundle_hash
         inputs["context"]["origin_actor"] = "runner"
     return run_agent(system_prompt_path=dev_prompt, message=message, role="DEV",
-                     system_prompt_override=_dev_system_prompt)
+                     system_prompt_override=_dev_system_prompt,
+                     on_artifact=_dev_stream_artifact_writer(_pid))
 
 
 def call_qa(
@@ -1520,6 +1547,9 @@ def _call_autonomous_monitor(project_id: str, task: dict, request_id: str) -> di
                 _resp = _bedrock.invoke_model(modelId=_model, body=_body)
                 _parsed = _json.loads(_resp["body"].read())
                 _text = _parsed.get("content", [{}])[0].get("text", "")
+            elif _provider == "mock":
+                from orchestrator.agents.mock_llm import mock_text_reply
+                _text = mock_text_reply(_monitor_prompt)
             else:
                 # Anthropic API direta
                 _client = _anthropic.Anthropic(api_key=os.environ.get("CLAUDE_API_KEY", ""))
@@ -1766,6 +1796,9 @@ def _build_message_envelope(
         _api_key = os.environ.get("CLAUDE_API_KEY", "").strip()
         if _api_key:
             _llm_config["api_key"] = _api_key
+    # Escopo do registry de clientes LLM no agents (tenant_scope): tenant do projeto, ou o próprio
+    # projeto quando o runner_server não resolveu o tenant.
+    _llm_config["tenant_id"] = os.environ.get("GENESIS_TENANT_ID", "").strip() or project_id
 
     return {
         "request_id": request_id,
@@ -1787,6 +1820,22 @@ def _post_dialogue(from_agent: str, to_agent: str, event_type: str, summary_huma
     pid = _project_id()
     if not pid:
         return
+    from orchestrator.telemetry import TELEMETRY_ASYNC, get_telemetry_sink
+    if TELEMETRY_ASYNC and _api_client() is not None:
+        from orchestrator.dialogue import dialogue_payload
+        # "Agente trabalhando" repetido do mesmo agente e passos idênticos ainda na fila: só o último vai
+        if event_type == "agent_working":
+            coalesce_key = (pid, "agent_working", from_agent)
+        elif event_type == "step":
+            coalesce_key = (pid, "step", summary_human)
+        else:
+            coalesce_key = None
+        get_telemetry_sink().emit(
+            "POST", f"/api/projects/{pid}/dialogue",
+            dialogue_payload(from_agent, to_agent, summary_human, event_type, request_id),
+            coalesce_key=coalesce_key,
+        )
+        return
     from orchestrator.dialogue import post_dialogue
     post_dialogue(pid, from_agent, to_agent, summary_human, event_type=event_type, request_id=request_id)
 
@@ -2141,6 +2190,7 @@ def _run_local_deploy(project_id: str, devops_response: dict, request_id: str, p
         """Poll the URL until it responds, then open the browser."""
         import urllib.request as _ur
         deadline = time.time() + timeout
+        delay = 0.25  # app costuma subir em poucos segundos: poll curto no início, até 2s
         while time.time() < deadline:
             try:
                 with _ur.urlopen(url, timeout=3) as r:
@@ -2148,7 +2198,8 @@ def _run_local_deploy(project_id: str, devops_response: dict, request_id: str, p
                         break
             except Exception:
                 pass
-            time.sleep(2)
+            time.sleep(delay)
+            delay = min(2.0, delay * 2)
         try:
             import subprocess as _sp
             _sp.Popen(["open", url])
@@ -2211,27 +2262,15 @@ def _run_local_deploy(project_id: str, devops_response: dict, request_id: str, p
 
 
 def _patch_project(body: dict) -> bool:
-    base = os.environ.get("API_BASE_URL")
     project_id = os.environ.get("PROJECT_ID")
-    token = os.environ.get("GENESIS_API_TOKEN")
-    if not base or not project_id or not token:
+    if not project_id or _api_client() is None:
         return False
-    url = f"{base.rstrip('/')}/api/projects/{project_id}"
-    data = json.dumps(body).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        method="PATCH",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-    )
     try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            if 200 <= resp.status < 300:
-                logger.info("Projeto atualizado na API: %s", body)
-                return True
+        data, status = _api_request("PATCH", f"/api/projects/{project_id}", body, timeout=10)
+        if 200 <= status < 300:
+            logger.info("Projeto atualizado na API: %s", body)
+            return True
+        logger.warning("Falha ao atualizar projeto na API: HTTP %s %s", status, data)
     except Exception as e:
         logger.warning("Falha ao atualizar projeto na API: %s", e)
     return False
@@ -2274,35 +2313,65 @@ def _check_cost_gate(project_id: str) -> tuple[bool, float]:
         return True, 0.0
 
 
-def _api_request(method: str, path: str, body: dict | None = None) -> tuple[dict | list | None, int]:
-    base = os.environ.get("API_BASE_URL", "").rstrip("/")
-    token = os.environ.get("GENESIS_API_TOKEN")
-    if not base or not token:
-        return None, 0
-    url = f"{base}{path}"
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    data = json.dumps(body).encode("utf-8") if body else None
-    req = urllib.request.Request(url, data=data, method=method, headers=headers)
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            raw = resp.read().decode("utf-8")
-            out = json.loads(raw) if raw else None
-            return out, resp.status
-    except urllib.error.HTTPError as e:
-        try:
-            out = json.loads(e.read().decode("utf-8"))
-        except Exception:
-            out = None
-        return out, e.code
-    except Exception as e:
-        logger.warning("Falha na requisição API %s %s: %s", method, path, e)
+def _api_request(
+    method: str,
+    path: str,
+    body: dict | None = None,
+    timeout: float = 15,
+    extra_headers: dict | None = None,
+    response_headers: dict | None = None,
+) -> tuple[dict | list | None, int]:
+    client = _api_client()
+    if client is None:
         return None, 0
+    return client.request(
+        method, path, body or None, timeout=timeout,
+        headers=extra_headers, response_headers=response_headers,
+    )
+
+
+def _api_client():
+    """Cliente HTTP keep-alive compartilhado com a API (api_client.py); None sem API configurada."""
+    base = os.environ.get("API_BASE_URL", "").strip()
+    token = os.environ.get("GENESIS_API_TOKEN", "").strip()
+    if not base or not token:
+        return None
+    from orchestrator.api_client import get_api_client
+    return get_api_client(base, token)
+
+
+def _api_batch(ops: list[dict]) -> list[tuple[dict | list | None, int]]:
+    """Várias chamadas em um POST /api/batch (ou uma a uma, se a API não tiver a rota)."""
+    client = _api_client()
+    if client is None:
+        return [(None, 0)] * len(ops)
+    return client.batch(ops)
 
 
 def _api_get(path: str) -> tuple[dict | list | None, int]:
     return _api_request("GET", path)
 
 
+# GET condicional (If-None-Match): path → (etag, corpo). O Monitor Loop relê status e tasks a
+# cada ciclo; com o projeto parado a API responde 304 sem corpo e o cache local é reutilizado.
+_etag_cache: dict[str, tuple[str, dict | list]] = {}
+_etag_lock = threading.Lock()
+
+
+def _api_get_conditional(path: str) -> tuple[dict | list | None, int]:
+    with _etag_lock:
+        cached = _etag_cache.get(path)
+    extra = {"If-None-Match": cached[0]} if cached else None
+    resp_headers: dict = {}
+    data, status = _api_request("GET", path, extra_headers=extra, response_headers=resp_headers)
+    if status == 304 and cached:
+        return copy.deepcopy(cached[1]), 200  # cópia: o loop pode mutar os dicts das tasks
+    if status == 200 and data is not None and resp_headers.get("etag"):
+        with _etag_lock:
+            _etag_cache[path] = (resp_headers["etag"], copy.deepcopy(data))
+    return data, status
+
+
 def _api_post(path: str, body: dict) -> tuple[dict | list | None, int]:
     return _api_request("POST", path, body)
 
@@ -2466,14 +2535,14 @@ def _seed_tasks(project_id: str, pm_module: str = "web") -> bool:
 
 
 def _get_project_status(project_id: str) -> str | None:
-    data, status = _api_get(f"/api/projects/{project_id}")
+    data, status = _api_get_conditional(f"/api/projects/{project_id}")
     if status != 200 or not isinstance(data, dict):
         return None
     return data.get("status")
 
 
 def _get_tasks(project_id: str) -> list:
-    data, status = _api_get(f"/api/projects/{project_id}/tasks")
+    data, status = _api_get_conditional(f"/api/projects/{project_id}/tasks")
     if status != 200 or not isinstance(data, list):
         return []
     return data
@@ -2485,6 +2554,15 @@ def _update_task(project_id: str, task_id: str, **kwargs) -> bool:
     return 200 <= status < 300
 
 
+def _update_tasks(project_id: str, updates: list[tuple[str, dict]]) -> list[bool]:
+    """Vários PATCH de tasks em uma requisição (POST /api/batch), na ordem dada."""
+    ops = [
+        {"method": "PATCH", "path": f"/api/projects/{project_id}/tasks/{task_id}", "body": fields}
+        for task_id, fields in updates
+    ]
+    return [200 <= status < 300 for _data, status in _api_batch(ops)]
+
+
 def _update_task_status(project_id: str, task_id: str, current_status: str, new_status: str) -> bool:
     """Validate state transition (LEI 9) before patching, then delegate to _update_task."""
     from orchestrator.task_state_machine import VALID_TRANSITIONS
@@ -2513,9 +2591,7 @@ def _run_monitor_loop(
     global _shutdown_requested
     signal.signal(signal.SIGTERM, _sigterm_handler)
     storage = _project_storage()
-    dev_summary = ""
     qa_summary = ""
-    last_dev_artifacts: list = []
     devops_done = False
     # Tarefas marcadas DONE por terem atingido o máximo de reworks do QA (não aprovação)
     tasks_done_after_qa_fail: set[str] = set()
@@ -2547,16 +2623,20 @@ def _run_monitor_loop(
             #    Só afeta IN_PROGRESS/WAITING_REVIEW/BLOCKED — não toca NEW/ASSIGNED
             #    (TSK-FULL-TEST pode estar ASSIGNED aguardando execução legítima).
             if devops_done:
+                _boot_fixes: list[tuple[str, str]] = []
                 for _bt in _all_tasks_boot:
                     _bt_id = _bt.get("taskId") or _bt.get("task_id") or ""
                     if _bt_id in ("TSK-DEVOPS-001", "TSK-FULL-TEST"):
                         _bt_status = _bt.get("status", "")
                         if _bt_status in ("IN_PROGRESS", "WAITING_REVIEW", "BLOCKED"):
-                            _update_task(project_id, _bt_id, status="DONE")
-                            logger.info(
-                                "[Monitor Loop] %s corrigido %s → DONE (devops já concluído — boot fix, estado travado).",
-                                _bt_id, _bt_status,
-                            )
+                            _boot_fixes.append((_bt_id, _bt_status))
+                if _boot_fixes:
+                    _update_tasks(project_id, [(_bt_id, {"status": "DONE"}) for _bt_id, _ in _boot_fixes])
+                    for _bt_id, _bt_status in _boot_fixes:
+                        logger.info(
+                            "[Monitor Loop] %s corrigido %s → DONE (devops já concluído — boot fix, estado travado).",
+                            _bt_id, _bt_status,
+                        )
         except Exception as _dbe:
             logger.debug("[Monitor Loop] Não foi possível restaurar/corrigir estado no boot: %s", _dbe)
     consecutive_dev_blocked: dict[str, int] = {}
@@ -2567,23 +2647,20 @@ def _run_monitor_loop(
     # Conta chamadas QA com status=QA_FAIL por task_id — representa reworks acumulados.
     qa_fail_count: dict[str, int] = {}
     try:
-        _qfc_base = os.environ.get("API_BASE_URL", "").strip()
-        _qfc_token = os.environ.get("GENESIS_API_TOKEN", "").strip()
-        if _qfc_base and _qfc_token and project_id:
-            import urllib.request as _ur
-            _qfc_req = _ur.Request(
-                f"{_qfc_base.rstrip('/')}/api/projects/{project_id}/agent-metrics/qa-fail-counts",
-                headers={"Authorization": f"Bearer {_qfc_token}"},
+        if project_id and _api_client() is not None:
+            _qfc_data, _qfc_status = _api_request(
+                "GET", f"/api/projects/{project_id}/agent-metrics/qa-fail-counts", timeout=5,
             )
-            with _ur.urlopen(_qfc_req, timeout=5) as _qfc_resp:
-                _qfc_data = json.loads(_qfc_resp.read())
-                qa_fail_count = {k: int(v) for k, v in (_qfc_data or {}).items()}
+            if _qfc_status == 200 and isinstance(_qfc_data, dict):
+                qa_fail_count = {k: int(v) for k, v in _qfc_data.items()}
                 if qa_fail_count:
                     logger.info("[Monitor Loop] qa_fail_count restaurado do BD: %s", qa_fail_count)
     except Exception as _qfc_e:
         logger.debug("[Monitor Loop] Não foi possível restaurar qa_fail_count: %s", _qfc_e)
     dev_rework_for_qa: dict[str, int] = {}  # rework_attempt do Dev nesta rodada → QA usa o mesmo
     task_artifacts_for_qa: dict[str, list] = {}  # task_id → artifacts entregues pelo Dev (capturados antes do QA)
+    # task_id → summary do Dev da task (QA recebe o summary da própria task, também com MONITOR_DEV_WIDTH > 1)
+    task_dev_summary: dict[str, str] = {}
     # Piso de modelo inter-agente: se Dev usou fallback (rework>=1 → Opus), QA não pode regredir.
     # Mapeamento task_id → rework_attempt máximo observado pelo Dev.
     # QA: _qa_rework_effective = max(_qa_rework, dev_peak_rework[tid])
@@ -2591,7 +2668,21 @@ def _run_monitor_loop(
     # MONITOR_PARALLEL=true enables concurrent processing of multiple tasks of the
     # same type within a single loop iteration. Default false to preserve behavior.
     monitor_parallel = os.environ.get("MONITOR_PARALLEL", "false").strip().lower() in ("1", "true", "yes")
-    _state_lock = threading.Lock() if monitor_parallel else None
+    # MONITOR_DEV_WIDTH > 1 ativa o agendador DAG da fase Dev (task_scheduler.py): tasks prontas
+    # pelo grafo de depends_on_files rodam em paralelo, cada uma com Dev → QA encadeados.
+    from orchestrator.task_scheduler import DevScheduler, build_task_graph, critical_path_length, task_id_of
+    dev_width = int(os.environ.get("MONITOR_DEV_WIDTH", "1"))
+    _dev_scheduler = DevScheduler(dev_width) if dev_width > 1 else None
+    _dev_pool = ThreadPoolExecutor(max_workers=dev_width, thread_name_prefix="monitor-dev") if _dev_scheduler else None
+    _dev_inflight: dict[str, Future] = {}
+    # Canal de mudanças (change_feed.py): o loop bloqueia em long-poll na API em vez de dormir
+    # MONITOR_LOOP_INTERVAL; workers do agendador acordam o loop localmente ao terminar.
+    from orchestrator.change_feed import ProjectChangeFeed
+    _change_feed = ProjectChangeFeed(
+        project_id,
+        request=lambda path, timeout: _api_request("GET", path, timeout=timeout),
+    )
+    _state_lock = threading.Lock() if (monitor_parallel or _dev_scheduler) else None
     _api_unreachable_count = 0
     MAX_API_UNREACHABLE = 5  # encerrar após 5 falhas consecutivas de API quando devops_done
 
@@ -2680,235 +2771,212 @@ def _run_monitor_loop(
                 request_id,
             )
 
-        if need_qa and waiting_review:
-            # In parallel mode process all waiting_review tasks concurrently; in
-            # sequential mode (default) only the first task is processed per iteration.
-            qa_tasks_batch = waiting_review if monitor_parallel else waiting_review[:1]
+        # QA de uma task (fluxo sequencial, pool MONITOR_PARALLEL e agendador DAG)
+        def _run_qa_task(task: dict, _captured_dev_artifacts: list | None = None) -> None:
+            tid = task.get("taskId") or task.get("task_id")
+            task_desc = task.get("title") or task.get("description") or task.get("name") or ""
+            # task_delivered_files: somente o que o Dev entregou para ESTA task.
+            # Capturado no momento do dispatch (não via closure para evitar race condition).
+            _task_files = [
+                a for a in (_captured_dev_artifacts or [])
+                if isinstance(a, dict) and a.get("path") and a.get("content")
+            ] or None
+            # QA recebe SOMENTE os arquivos entregues pelo Dev desta task.
+            # Ler do disco os mesmos paths para garantir conteúdo não truncado.
+            _qa_artifacts: list = []
+            if _task_files:
+                _proj_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files")) / (project_id or "")
+                for _tf in _task_files:
+                    _disk_path = _proj_root / _tf["path"]
+                    if _disk_path.exists() and _disk_path.stat().st_size < 200_000:
+                        _qa_artifacts.append({
+                            "path": _tf["path"],
+                            "content": _disk_path.read_text(encoding="utf-8", errors="replace"),
+                        })
+                    else:
+                        _qa_artifacts.append(_tf)
+            if not _qa_artifacts:
+                # fallback: apenas os arquivos entregues pelo Dev (sem ler todo o disco)
+                _qa_artifacts = _task_files or (_captured_dev_artifacts or [])
+            code_refs = [a.get("path") for a in _qa_artifacts if isinstance(a, dict) and a.get("path")]
+            _post_step(f"O Monitor acionou o QA para revisar a tarefa {tid}.", request_id)
+            _post_agent_working("qa", "O QA está revisando os artefatos e executando testes.", request_id)
+            try:
+                # Simetria + piso inter-agente: QA usa o maior entre:
+                #   1. rework_attempt do Dev nesta rodada (simetria)
+                #   2. pico histórico do Dev nesta task (piso — nunca regredir de modelo)
+                #   3. qa_fail_count acumulado da task
+                # Regra: Dev rodou com Opus (rework>=1) → QA obrigatoriamente usa Opus ou melhor.
+                _norm_qa_tid = str(tid).strip() if tid else ""
+                _qa_rework = max(
+                    dev_rework_for_qa.get(_norm_qa_tid) or dev_rework_for_qa.get(tid) or 0,
+                    dev_peak_rework.get(_norm_qa_tid) or dev_peak_rework.get(tid) or 0,
+                    qa_fail_count.get(tid, 0),
+                )
+                if _qa_rework >= 1:
+                    logger.info("[MODEL-FLOOR] QA task=%s usando piso rework=%d (Dev escalou ou QA falhou antes)",
+                                tid, _qa_rework)
+                qa_response = call_qa(
+                    spec_ref, charter_summary, backlog_summary, task_dev_summary.get(_norm_qa_tid, ""), request_id,
+                    task_id=tid, task=task_desc, code_refs=code_refs, existing_artifacts=_qa_artifacts,
+                    rework_attempt=_qa_rework,
+                    task_delivered_files=_task_files,
+                )
+                _audit_log("qa", request_id, qa_response, task_id=tid, round_num=_qa_rework + 1)
+                _qa_summary = qa_response.get("summary", "")
+                qa_status = qa_response.get("status", "?")
 
-            def _run_qa_task(task: dict, _captured_dev_artifacts: list | None = None) -> None:
-                tid = task.get("taskId") or task.get("task_id")
-                task_desc = task.get("title") or task.get("description") or task.get("name") or ""
-                # task_delivered_files: somente o que o Dev entregou para ESTA task.
-                # Capturado no momento do dispatch (não via closure para evitar race condition).
-                _task_files = [
-                    a for a in (_captured_dev_artifacts or [])
-                    if isinstance(a, dict) and a.get("path") and a.get("content")
-                ] or None
-                # QA recebe SOMENTE os arquivos entregues pelo Dev desta task.
-                # Ler do disco os mesmos paths para garantir conteúdo não truncado.
-                _qa_artifacts: list = []
-                if _task_files:
-                    _proj_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files")) / (project_id or "")
-                    for _tf in _task_files:
-                        _disk_path = _proj_root / _tf["path"]
-                        if _disk_path.exists() and _disk_path.stat().st_size < 200_000:
-                            _qa_artifacts.append({
-                                "path": _tf["path"],
-                                "content": _disk_path.read_text(encoding="utf-8", errors="replace"),
-                            })
-                        else:
-                            _qa_artifacts.append(_tf)
-                if not _qa_artifacts:
-                    # fallback: apenas os arquivos entregues pelo Dev (sem ler todo o disco)
-                    _qa_artifacts = _task_files or (_captured_dev_artifacts or [])
-                code_refs = [a.get("path") for a in _qa_artifacts if isinstance(a, dict) and a.get("path")]
-                _post_step(f"O Monitor acionou o QA para revisar a tarefa {tid}.", request_id)
-                _post_agent_working("qa", "O QA está revisando os artefatos e executando testes.", request_id)
+                # T-08: fingerprint check contra type_policy (ADITIVO ao QA).
+                # Só roda se pipeline_ctx tem type_policy resolvido (Wave 1+).
                 try:
-                    # Simetria + piso inter-agente: QA usa o maior entre:
-                    #   1. rework_attempt do Dev nesta rodada (simetria)
-                    #   2. pico histórico do Dev nesta task (piso — nunca regredir de modelo)
-                    #   3. qa_fail_count acumulado da task
-                    # Regra: Dev rodou com Opus (rework>=1) → QA obrigatoriamente usa Opus ou melhor.
-                    _norm_qa_tid = str(tid).strip() if tid else ""
-                    _qa_rework = max(
-                        dev_rework_for_qa.get(_norm_qa_tid) or dev_rework_for_qa.get(tid) or 0,
-                        dev_peak_rework.get(_norm_qa_tid) or dev_peak_rework.get(tid) or 0,
-                        qa_fail_count.get(tid, 0),
-                    )
-                    if _qa_rework >= 1:
-                        logger.info("[MODEL-FLOOR] QA task=%s usando piso rework=%d (Dev escalou ou QA falhou antes)",
-                                    tid, _qa_rework)
-                    qa_response = call_qa(
-                        spec_ref, charter_summary, backlog_summary, dev_summary, request_id,
-                        task_id=tid, task=task_desc, code_refs=code_refs, existing_artifacts=_qa_artifacts,
-                        rework_attempt=_qa_rework,
-                        task_delivered_files=_task_files,
-                    )
-                    _audit_log("qa", request_id, qa_response, task_id=tid, round_num=_qa_rework + 1)
-                    _qa_summary = qa_response.get("summary", "")
-                    qa_status = qa_response.get("status", "?")
-
-                    # T-08: fingerprint check contra type_policy (ADITIVO ao QA).
-                    # Só roda se pipeline_ctx tem type_policy resolvido (Wave 1+).
-                    try:
-                        if pipeline_ctx and pipeline_ctx.project_type and project_id:
-                            from orchestrator.pipeline_context import _build_type_policy_input
-                            from orchestrator import type_fingerprint as _tfp
-                            _type_input = _build_type_policy_input(pipeline_ctx.project_type)
-                            _enforcement = _type_input.get("enforcement_mode", "warn")
-                            _canon = _type_input.get("canonical_type", "_default")
-                            _policy = _type_input.get("policy", {}) or {}
-                            _files_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files"))
-                            _proj_root = _files_root / project_id
-                            _fp = _tfp.check_fingerprint(_proj_root, _policy)
-                            _fp_summary = _tfp.summarize_result(_fp, _canon)
-                            logger.info("[T-08 fingerprint] task=%s %s", tid, _fp_summary)
-                            # Se enforcement=blocker E fingerprint falha, força QA_FAIL
-                            if _enforcement == "blocker" and not _fp.get("pass"):
-                                _reasons = []
-                                if _fp.get("missing_strong"):
-                                    _reasons.append(f"missing strong tokens {_fp['missing_strong']}")
-                                if _fp.get("forbidden_found"):
-                                    _reasons.append(f"forbidden tokens found {_fp['forbidden_found']}")
-                                qa_response["status"] = "QA_FAIL"
-                                qa_response["summary"] = (
-                                    f"[type_policy_fingerprint_fail: {_canon}] "
-                                    + "; ".join(_reasons)
+                    if pipeline_ctx and pipeline_ctx.project_type and project_id:
+                        from orchestrator.pipeline_context import _build_type_policy_input
+                        from orchestrator import type_fingerprint as _tfp
+                        _type_input = _build_type_policy_input(pipeline_ctx.project_type)
+                        _enforcement = _type_input.get("enforcement_mode", "warn")
+                        _canon = _type_input.get("canonical_type", "_default")
+                        _policy = _type_input.get("policy", {}) or {}
+                        _files_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files"))
+                        _proj_root = _files_root / project_id
+                        _fp = _tfp.check_fingerprint(_proj_root, _policy)
+                        _fp_summary = _tfp.summarize_result(_fp, _canon)
+                        logger.info("[T-08 fingerprint] task=%s %s", tid, _fp_summary)
+                        # Se enforcement=blocker E fingerprint falha, força QA_FAIL
+                        if _enforcement == "blocker" and not _fp.get("pass"):
+                            _reasons = []
+                            if _fp.get("missing_strong"):
+                                _reasons.append(f"missing strong tokens {_fp['missing_strong']}")
+                            if _fp.get("forbidden_found"):
+                                _reasons.append(f"forbidden tokens found {_fp['forbidden_found']}")
+                            qa_response["status"] = "QA_FAIL"
+                            qa_response["summary"] = (
+                                f"[type_policy_fingerprint_fail: {_canon}] "
+                                + "; ".join(_reasons)
+                                + " | "
+                                + (qa_response.get("summary") or "")
+                            )
+                            qa_status = "QA_FAIL"
+                            _qa_summary = qa_response["summary"]
+                        elif not _fp.get("pass"):
+                            # warn mode — anexa aviso no summary sem bloquear
+                            _warn_parts = []
+                            if _fp.get("missing_strong"):
+                                _warn_parts.append(f"missing strong {_fp['missing_strong']}")
+                            if _fp.get("forbidden_found"):
+                                _warn_parts.append(f"forbidden {_fp['forbidden_found']}")
+                            if _fp.get("missing_soft"):
+                                _warn_parts.append(f"soft {_fp['missing_soft']}")
+                            if _warn_parts:
+                                _qa_summary = (
+                                    f"[type_policy_warn: {_canon}] "
+                                    + "; ".join(_warn_parts)
                                     + " | "
-                                    + (qa_response.get("summary") or "")
+                                    + (_qa_summary or "")
                                 )
-                                qa_status = "QA_FAIL"
-                                _qa_summary = qa_response["summary"]
-                            elif not _fp.get("pass"):
-                                # warn mode — anexa aviso no summary sem bloquear
-                                _warn_parts = []
-                                if _fp.get("missing_strong"):
-                                    _warn_parts.append(f"missing strong {_fp['missing_strong']}")
-                                if _fp.get("forbidden_found"):
-                                    _warn_parts.append(f"forbidden {_fp['forbidden_found']}")
-                                if _fp.get("missing_soft"):
-                                    _warn_parts.append(f"soft {_fp['missing_soft']}")
-                                if _warn_parts:
-                                    _qa_summary = (
-                                        f"[type_policy_warn: {_canon}] "
-                                        + "; ".join(_warn_parts)
-                                        + " | "
-                                        + (_qa_summary or "")
-                                    )
-                                    qa_response["summary"] = _qa_summary
-                    except Exception as _fp_err:
-                        logger.warning("[T-08 fingerprint] falha ao rodar: %s", _fp_err)
+                                qa_response["summary"] = _qa_summary
+                except Exception as _fp_err:
+                    logger.warning("[T-08 fingerprint] falha ao rodar: %s", _fp_err)
 
-                    _post_dialogue(
-                        "dev", "qa", "qa.review",
-                        _get_summary_human("qa.review", "qa", "monitor", _qa_summary[:200]),
-                        request_id,
-                    )
-                    if project_id and storage and storage.is_enabled():
-                        storage.write_doc(project_id, "qa", f"report-{tid}", _content_for_doc(qa_response), title=f"QA report {tid}")
-                    passed = _is_qa_pass(qa_response)
-                    if passed:
-                        _update_task(project_id, tid, status="QA_PASS")
-                        _update_task_status(project_id, tid, "IN_REVIEW", "DONE")
+                _post_dialogue(
+                    "dev", "qa", "qa.review",
+                    _get_summary_human("qa.review", "qa", "monitor", _qa_summary[:200]),
+                    request_id,
+                )
+                if project_id and storage and storage.is_enabled():
+                    storage.write_doc(project_id, "qa", f"report-{tid}", _content_for_doc(qa_response), title=f"QA report {tid}")
+                passed = _is_qa_pass(qa_response)
+                if passed:
+                    _update_task(project_id, tid, status="QA_PASS")
+                    _update_task_status(project_id, tid, "IN_REVIEW", "DONE")
+                    with (_state_lock or _NullLock()):
                         if _task_state:
                             _task_state.mark_done(tid)
                             _task_state.save()
+                        qa_fail_count[tid] = 0
+                    if pipeline_ctx and _captured_dev_artifacts:
+                        for art in _captured_dev_artifacts:
+                            if isinstance(art, dict) and art.get("path") and art.get("content"):
+                                path_val = (art.get("path") or "").strip()
+                                if path_val.startswith("apps/") or path_val.startswith("docs/"):
+                                    pipeline_ctx.register_artifact(path_val, art.get("content", ""), tid)
+                    _post_step(f"QA concluiu. Status: {qa_status}. Task {tid} aprovada (DONE).", request_id)
+                else:
+                    with (_state_lock or _NullLock()):
+                        current_fails = qa_fail_count.get(tid, 0) + 1
+                        qa_fail_count[tid] = current_fails
+                    if current_fails >= max_qa_rework:
+                        # GAP-P2: se QA reportou BLOCKER, marcar como BLOCKED (não DONE)
+                        # BLOCKED é visível no portal e não alimenta tasks dependentes
+                        _has_blocker = _qa_has_blocker(qa_response)
+                        _final_status = "BLOCKED" if _has_blocker else "DONE"
+                        _update_task(project_id, tid, status=_final_status)
                         with (_state_lock or _NullLock()):
-                            qa_fail_count[tid] = 0
-                        if pipeline_ctx and last_dev_artifacts:
-                            for art in last_dev_artifacts:
-                                if isinstance(art, dict) and art.get("path") and art.get("content"):
-                                    path_val = (art.get("path") or "").strip()
-                                    if path_val.startswith("apps/") or path_val.startswith("docs/"):
-                                        pipeline_ctx.register_artifact(path_val, art.get("content", ""), tid)
-                        _post_step(f"QA concluiu. Status: {qa_status}. Task {tid} aprovada (DONE).", request_id)
-                    else:
-                        with (_state_lock or _NullLock()):
-                            current_fails = qa_fail_count.get(tid, 0) + 1
-                            qa_fail_count[tid] = current_fails
-                        if current_fails >= max_qa_rework:
-                            # GAP-P2: se QA reportou BLOCKER, marcar como BLOCKED (não DONE)
-                            # BLOCKED é visível no portal e não alimenta tasks dependentes
-                            _has_blocker = _qa_has_blocker(qa_response)
-                            _final_status = "BLOCKED" if _has_blocker else "DONE"
-                            _update_task(project_id, tid, status=_final_status)
                             if _task_state:
                                 _task_state.mark_qa_fail(tid)
                                 _task_state.save()
-                            with (_state_lock or _NullLock()):
-                                tasks_done_after_qa_fail.add(tid)
-                            _label = "BLOCKED (BLOCKER aberto)" if _has_blocker else "DONE (não aprovada)"
-                            _post_step(
-                                f"QA reportou QA_FAIL (reatempto {current_fails}/{max_qa_rework}). "
-                                f"Task {tid} marcada como {_label}.",
-                                request_id,
-                            )
-                            _post_escalation_event(
-                                project_id, tid,
-                                f"QA atingiu máximo de {current_fails} reworks sem aprovação"
-                                + (" — BLOCKER aberto, revisão humana obrigatória." if _has_blocker else ". Revisão humana necessária."),
-                                request_id,
+                            tasks_done_after_qa_fail.add(tid)
+                        _label = "BLOCKED (BLOCKER aberto)" if _has_blocker else "DONE (não aprovada)"
+                        _post_step(
+                            f"QA reportou QA_FAIL (reatempto {current_fails}/{max_qa_rework}). "
+                            f"Task {tid} marcada como {_label}.",
+                            request_id,
+                        )
+                        _post_escalation_event(
+                            project_id, tid,
+                            f"QA atingiu máximo de {current_fails} reworks sem aprovação"
+                            + (" — BLOCKER aberto, revisão humana obrigatória." if _has_blocker else ". Revisão humana necessária."),
+                            request_id,
+                        )
+                    else:
+                        _update_task_status(project_id, tid, "IN_REVIEW", "QA_FAIL")
+                        _post_step(
+                            f"QA concluiu. Task {tid} em QA_FAIL (reatempto {current_fails}/{max_qa_rework}).",
+                            request_id,
+                        )
+            except Exception as e:
+                logger.exception("[Monitor Loop] QA falhou para task %s", tid)
+                _post_error(str(e), request_id, e)
+
+
+        def _run_dev_task(dev_task: dict) -> bool:
+            """
+            Executa o Dev de uma task. True se a task foi para WAITING_REVIEW (pronta para o QA).
+            Summary e artifacts ficam em task_dev_summary / task_artifacts_for_qa (por task): com
+            MONITOR_DEV_WIDTH > 1 várias tasks rodam ao mesmo tempo neste closure.
+            """
+            task_id = dev_task.get("taskId") or dev_task.get("task_id")
+            task_desc = dev_task.get("requirements") or dev_task.get("title") or dev_task.get("description") or dev_task.get("name") or "Implementar tarefa do backlog."
+            _update_task_status(project_id, task_id, dev_task.get("status", "ASSIGNED"), "IN_PROGRESS")
+            _post_step("O Monitor acionou o Dev para implementar ou rework.", request_id)
+            _post_agent_working("dev", "O Dev está implementando ou corrigindo a tarefa.", request_id)
+            try:
+                dep_code = None
+                if pipeline_ctx:
+                    depends_on = dev_task.get("depends_on_files") or dev_task.get("dependsOnFiles") or []
+                    dep_code = pipeline_ctx.get_dependency_code(depends_on)
+                    # GAP-P4: verificar se os arquivos de dependência realmente existem no disco
+                    if depends_on and project_id:
+                        _proj_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files")) / project_id
+                        _missing = [
+                            f for f in depends_on
+                            if f and not (_proj_root / f).exists() and not (_proj_root / "apps" / f).exists()
+                        ]
+                        if _missing:
+                            logger.warning(
+                                "[GAP-P4] depends_on_files ausentes no disco para task %s: %s",
+                                dev_task.get("taskId", "?"), _missing[:5],
                             )
-                        else:
-                            _update_task_status(project_id, tid, "IN_REVIEW", "QA_FAIL")
                             _post_step(
-                                f"QA concluiu. Task {tid} em QA_FAIL (reatempto {current_fails}/{max_qa_rework}).",
+                                f"Aviso: task {dev_task.get('taskId','?')} depende de arquivo(s) não encontrado(s) "
+                                f"no disco: {_missing[:3]}. Dev receberá contexto parcial.",
                                 request_id,
                             )
-                except Exception as e:
-                    logger.exception("[Monitor Loop] QA falhou para task %s", tid)
-                    _post_error(str(e), request_id, e)
-
-            if monitor_parallel and len(qa_tasks_batch) > 1:
-                with ThreadPoolExecutor(max_workers=min(len(qa_tasks_batch), 3)) as pool:
-                    futures = [
-                        pool.submit(_run_qa_task, t, task_artifacts_for_qa.get(str(t.get("taskId") or t.get("task_id") or "").strip()))
-                        for t in qa_tasks_batch
-                    ]
-                    for f in as_completed(futures):
-                        f.result()  # re-raise if any raised
-            else:
-                _qt = qa_tasks_batch[0]
-                _qt_id = str(_qt.get("taskId") or _qt.get("task_id") or "").strip()
-                _run_qa_task(_qt, task_artifacts_for_qa.get(_qt_id))
-            time.sleep(2)
-            continue
-
-        if need_dev:
-            # GAP-NEW-1: BLOCKED é terminal — não redespachar ao Dev automaticamente.
-            # Dev só recebe ASSIGNED/IN_PROGRESS/QA_FAIL; BLOCKED requer intervenção humana.
-            dev_task = next(
-                (
-                    t
-                    for t in tasks
-                    if t.get("status") in ("ASSIGNED", "IN_PROGRESS", "QA_FAIL")
-                    and (t.get("taskId") or t.get("task_id")) not in dev_gave_up_tasks
-                ),
-                None,
-            )
-            if dev_task:
-                task_id = dev_task.get("taskId") or dev_task.get("task_id")
-                task_desc = dev_task.get("requirements") or dev_task.get("title") or dev_task.get("description") or dev_task.get("name") or "Implementar tarefa do backlog."
-                _update_task_status(project_id, task_id, dev_task.get("status", "ASSIGNED"), "IN_PROGRESS")
-                _post_step("O Monitor acionou o Dev para implementar ou rework.", request_id)
-                _post_agent_working("dev", "O Dev está implementando ou corrigindo a tarefa.", request_id)
-                try:
-                    dep_code = None
-                    if pipeline_ctx:
-                        depends_on = dev_task.get("depends_on_files") or dev_task.get("dependsOnFiles") or []
-                        dep_code = pipeline_ctx.get_dependency_code(depends_on)
-                        # GAP-P4: verificar se os arquivos de dependência realmente existem no disco
-                        if depends_on and project_id:
-                            _proj_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files")) / project_id
-                            _missing = [
-                                f for f in depends_on
-                                if f and not (_proj_root / f).exists() and not (_proj_root / "apps" / f).exists()
-                            ]
-                            if _missing:
-                                logger.warning(
-                                    "[GAP-P4] depends_on_files ausentes no disco para task %s: %s",
-                                    dev_task.get("taskId", "?"), _missing[:5],
-                                )
-                                _post_step(
-                                    f"Aviso: task {dev_task.get('taskId','?')} depende de arquivo(s) não encontrado(s) "
-                                    f"no disco: {_missing[:3]}. Dev receberá contexto parcial.",
-                                    request_id,
-                                )
-                    # Limpar pastas paralelas proibidas antes de despachar Dev (Node.js backend)
-                    # O Dev frequentemente cria src/modules/, src/repositories/, src/database/ por engano.
-                    # Remover antes do despacho garante que o Dev receba existing_artifacts sem lixo.
-                    if project_id:
+                # Limpar pastas paralelas proibidas antes de despachar Dev (Node.js backend)
+                # O Dev frequentemente cria src/modules/, src/repositories/, src/database/ por engano.
+                # Remover antes do despacho garante que o Dev receba existing_artifacts sem lixo.
+                # Sob _state_lock: com MONITOR_DEV_WIDTH > 1 outro worker pode estar varrendo/removendo.
+                if project_id:
+                    with (_state_lock or _NullLock()):
                         _apps_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files")) / project_id / "apps" / "src"
                         _forbidden_dirs = ["modules", "repositories", "database", "controllers", "models", "services", "use-cases", "use_cases"]
                         _valid_dirs = {"db", "domain", "infra", "http", "application", "shared", "routes",
@@ -2937,104 +3005,107 @@ def _run_monitor_loop(
                                             request_id,
                                         )
 
-                    # Derive variant from owner_role (DEV_WEB → web, DEV_MOBILE → mobile, else backend)
-                    _owner = (dev_task.get("ownerRole") or dev_task.get("owner_role") or "DEV_BACKEND").upper()
-                    _dev_variant = "web" if "WEB" in _owner else ("mobile" if "MOBILE" in _owner else "backend")
-                    # Detect backend language — disk-first (cached in pipeline_ctx after first call)
-                    # pm_module is not in scope here; use pipeline_ctx.current_module instead
-                    _current_module = (pipeline_ctx.current_module if pipeline_ctx else None) or "backend"
-                    if _dev_variant == "backend":
-                        try:
-                            _ml_stack = _resolve_backend_stack(
-                                pipeline_ctx, project_id,
-                                engineer_proposal=getattr(pipeline_ctx, "engineer_proposal", "") if pipeline_ctx else "",
-                                charter_summary=charter_summary,
-                                backlog_summary=backlog_summary,
-                                module=_current_module,
-                            )
-                            _ml_lang = _ml_stack["language"]
-                            if _ml_lang != "nodejs":
-                                _dev_variant = f"backend_{_ml_lang}" if _ml_lang != "other" else "backend"
-                                logger.info("[Monitor Loop] Stack detectado: %s (source=%s, confidence=%s) → variant=%s",
-                                            _ml_lang, _ml_stack["source"], _ml_stack["confidence"], _dev_variant)
-                        except RuntimeError as _ml_e:
-                            logger.error("[Monitor Loop] Stack detection FAILED: %s — usando 'backend' (nodejs)", _ml_e)
-                    # Load existing apps/ artifacts from disk so Dev has full context
-                    _disk_artifacts: list = []
+                # Derive variant from owner_role (DEV_WEB → web, DEV_MOBILE → mobile, else backend)
+                _owner = (dev_task.get("ownerRole") or dev_task.get("owner_role") or "DEV_BACKEND").upper()
+                _dev_variant = "web" if "WEB" in _owner else ("mobile" if "MOBILE" in _owner else "backend")
+                # Detect backend language — disk-first (cached in pipeline_ctx after first call)
+                # pm_module is not in scope here; use pipeline_ctx.current_module instead
+                _current_module = (pipeline_ctx.current_module if pipeline_ctx else None) or "backend"
+                if _dev_variant == "backend":
                     try:
-                        _apps_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files")) / project_id / "apps"
-                        if _apps_root.exists():
-                            for _f in sorted(_apps_root.rglob("*")):
-                                if _f.is_file() and _f.stat().st_size < 50_000:
-                                    _rel = str(_f.relative_to(_apps_root.parent.parent))
-                                    _disk_artifacts.append({"path": _rel, "content": _f.read_text(encoding="utf-8", errors="replace")})
-                    except Exception:
-                        pass
-                    # No rework (QA_FAIL), usar artefatos capturados desta task — evita
-                    # poluição com last_dev_artifacts de outras tasks processadas no meio.
-                    _norm_ea_tid = str(task_id).strip() if task_id else ""
-                    _captured_for_rework = task_artifacts_for_qa.get(_norm_ea_tid)
-                    _ea = (_captured_for_rework or last_dev_artifacts) if dev_task.get("status") == "QA_FAIL" else _disk_artifacts
-                    # Simetria de modelo: Dev e QA usam o mesmo rework_attempt.
-                    # Se Dev escalou para Opus, QA também usa Opus nessa rodada.
-                    # Normalizar task_id para garantir match com a chave usada pelo QA loop.
-                    _task_rework_count = qa_fail_count.get(task_id, 0)
-                    # Salvar com task_id normalizado — QA usa o mesmo formato via tid
-                    _norm_tid = str(task_id).strip() if task_id else ""
-                    dev_rework_for_qa[_norm_tid] = _task_rework_count
-                    dev_rework_for_qa[task_id] = _task_rework_count  # fallback duplicado
-                    # Piso inter-agente: registrar o rework mais alto que o Dev já usou nesta task.
-                    # QA vai usar max(qa_rework, dev_peak) para nunca regredir de modelo.
-                    _prev_peak = dev_peak_rework.get(_norm_tid, 0)
-                    dev_peak_rework[_norm_tid] = max(_prev_peak, _task_rework_count)
-                    dev_peak_rework[task_id]   = dev_peak_rework[_norm_tid]
-                    dev_response = call_dev(
-                        spec_ref, charter_summary, backlog_summary, request_id,
-                        task_id=task_id, task=task_desc, code_refs=[],
-                        existing_artifacts=_ea,
-                        task_dict=dev_task, dependency_code=dep_code, pipeline_ctx=pipeline_ctx,
-                        dev_variant=_dev_variant,
-                        rework_attempt=_task_rework_count,
-                    )
-                    _audit_log("dev", request_id, dev_response, task_id=task_id, round_num=_task_rework_count + 1)
-                    dev_summary = dev_response.get("summary", "")
-                    dev_status = dev_response.get("status", "?")
-                    last_dev_artifacts = dev_response.get("artifacts", [])
-                    # Capturar artefatos desta task para o QA — evita race condition com last_dev_artifacts
-                    if task_id:
-                        task_artifacts_for_qa[str(task_id).strip()] = list(last_dev_artifacts)
-                    _post_dialogue(
-                        "pm", "dev", "task.assigned",
-                        _get_summary_human("task.assigned", "pm", "dev", backlog_summary[:200]),
+                        _ml_stack = _resolve_backend_stack(
+                            pipeline_ctx, project_id,
+                            engineer_proposal=getattr(pipeline_ctx, "engineer_proposal", "") if pipeline_ctx else "",
+                            charter_summary=charter_summary,
+                            backlog_summary=backlog_summary,
+                            module=_current_module,
+                        )
+                        _ml_lang = _ml_stack["language"]
+                        if _ml_lang != "nodejs":
+                            _dev_variant = f"backend_{_ml_lang}" if _ml_lang != "other" else "backend"
+                            logger.info("[Monitor Loop] Stack detectado: %s (source=%s, confidence=%s) → variant=%s",
+                                        _ml_lang, _ml_stack["source"], _ml_stack["confidence"], _dev_variant)
+                    except RuntimeError as _ml_e:
+                        logger.error("[Monitor Loop] Stack detection FAILED: %s — usando 'backend' (nodejs)", _ml_e)
+                # Load existing apps/ artifacts from disk so Dev has full context
+                _disk_artifacts: list = []
+                try:
+                    _apps_root = Path(os.environ.get("PROJECT_FILES_ROOT", "/project-files")) / project_id / "apps"
+                    if _apps_root.exists():
+                        for _f in sorted(_apps_root.rglob("*")):
+                            if _f.is_file() and _f.stat().st_size < 50_000:
+                                _rel = str(_f.relative_to(_apps_root.parent.parent))
+                                _disk_artifacts.append({"path": _rel, "content": _f.read_text(encoding="utf-8", errors="replace")})
+                except Exception:
+                    pass
+                # No rework (QA_FAIL), usar artefatos capturados desta task (nunca os de outra task
+                # processada no meio); sem captura nesta sessão, o estado atual do disco.
+                _norm_ea_tid = str(task_id).strip() if task_id else ""
+                _captured_for_rework = task_artifacts_for_qa.get(_norm_ea_tid)
+                _ea = (_captured_for_rework or _disk_artifacts) if dev_task.get("status") == "QA_FAIL" else _disk_artifacts
+                # Simetria de modelo: Dev e QA usam o mesmo rework_attempt.
+                # Se Dev escalou para Opus, QA também usa Opus nessa rodada.
+                # Normalizar task_id para garantir match com a chave usada pelo QA loop.
+                _task_rework_count = qa_fail_count.get(task_id, 0)
+                # Salvar com task_id normalizado — QA usa o mesmo formato via tid
+                _norm_tid = str(task_id).strip() if task_id else ""
+                dev_rework_for_qa[_norm_tid] = _task_rework_count
+                dev_rework_for_qa[task_id] = _task_rework_count  # fallback duplicado
+                # Piso inter-agente: registrar o rework mais alto que o Dev já usou nesta task.
+                # QA vai usar max(qa_rework, dev_peak) para nunca regredir de modelo.
+                _prev_peak = dev_peak_rework.get(_norm_tid, 0)
+                dev_peak_rework[_norm_tid] = max(_prev_peak, _task_rework_count)
+                dev_peak_rework[task_id]   = dev_peak_rework[_norm_tid]
+                dev_response = call_dev(
+                    spec_ref, charter_summary, backlog_summary, request_id,
+                    task_id=task_id, task=task_desc, code_refs=[],
+                    existing_artifacts=_ea,
+                    task_dict=dev_task, dependency_code=dep_code, pipeline_ctx=pipeline_ctx,
+                    dev_variant=_dev_variant,
+                    rework_attempt=_task_rework_count,
+                )
+                _audit_log("dev", request_id, dev_response, task_id=task_id, round_num=_task_rework_count + 1)
+                dev_summary = dev_response.get("summary", "")
+                dev_status = dev_response.get("status", "?")
+                _task_artifacts = dev_response.get("artifacts", [])
+                # Capturar summary e artefatos desta task para o QA (por task, não "último Dev")
+                if task_id:
+                    with (_state_lock or _NullLock()):
+                        task_artifacts_for_qa[_norm_ea_tid] = list(_task_artifacts)
+                        task_dev_summary[_norm_ea_tid] = dev_summary
+                _post_dialogue(
+                    "pm", "dev", "task.assigned",
+                    _get_summary_human("task.assigned", "pm", "dev", backlog_summary[:200]),
+                    request_id,
+                )
+                _post_dialogue(
+                    "dev", "qa", "task.completed",
+                    _get_summary_human("task.completed", "dev", "qa", dev_summary[:200]),
+                    request_id,
+                )
+                circuit_breaker = dev_response.get("circuit_breaker_open") or ("Circuit breaker" in (dev_summary or ""))
+                if circuit_breaker:
+                    _update_task(project_id, task_id, status="DONE")
+                    dev_gave_up_tasks.add(task_id)
+                    _post_step(
+                        "Circuit breaker do Dev aberto. Tarefa marcada como DONE (não aprovada). Intervenção humana necessária.",
                         request_id,
                     )
-                    _post_dialogue(
-                        "dev", "qa", "task.completed",
-                        _get_summary_human("task.completed", "dev", "qa", dev_summary[:200]),
+                    _post_escalation_event(
+                        project_id, task_id,
+                        "Circuit breaker do Dev aberto após falhas consecutivas. Revisão humana necessária.",
                         request_id,
                     )
-                    circuit_breaker = dev_response.get("circuit_breaker_open") or ("Circuit breaker" in (dev_summary or ""))
-                    if circuit_breaker:
-                        _update_task(project_id, task_id, status="DONE")
-                        dev_gave_up_tasks.add(task_id)
-                        _post_step(
-                            "Circuit breaker do Dev aberto. Tarefa marcada como DONE (não aprovada). Intervenção humana necessária.",
-                            request_id,
-                        )
-                        _post_escalation_event(
-                            project_id, task_id,
-                            "Circuit breaker do Dev aberto após falhas consecutivas. Revisão humana necessária.",
-                            request_id,
-                        )
-                        time.sleep(2)
-                        continue
-                    _has_apps_artifact = any(
-                        (a.get("path") or "").strip().startswith("apps/")
-                        for a in (last_dev_artifacts or []) if isinstance(a, dict)
-                    )
-                    if project_id and storage and storage.is_enabled():
+                    return False
+                _has_apps_artifact = any(
+                    (a.get("path") or "").strip().startswith("apps/")
+                    for a in (_task_artifacts or []) if isinstance(a, dict)
+                )
+                if project_id and storage and storage.is_enabled():
+                    # Um append no manifest para a resposta inteira (implementation + artifacts)
+                    with storage.manifest_batch(project_id):
                         storage.write_doc(project_id, "dev", "implementation", _content_for_doc(dev_response), title="Dev implementation")
-                        dev_artifacts = last_dev_artifacts
+                        dev_artifacts = _task_artifacts
                         try:
                             from orchestrator.envelope import filter_artifacts_by_path_policy
                             dev_artifacts = filter_artifacts_by_path_policy(dev_artifacts, project_id)
@@ -3062,36 +3133,127 @@ def _run_monitor_loop(
                                     storage.write_doc(project_id, "dev", path_val.replace("/", "_").replace(".", "_")[:60] or f"artifact_{i}", content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
                             elif path_val:
                                 storage.write_doc(project_id, "dev", f"artifact_{i}", content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
-                    if _has_apps_artifact:
-                        consecutive_dev_blocked[task_id] = 0
-                        _update_task(project_id, task_id, status="WAITING_REVIEW")
-                        _post_step(f"Dev concluiu. Status: {dev_status}. Task em WAITING_REVIEW.", request_id)
+                if _dev_scheduler is not None and task_id:
+                    # Conflito de arquivos: outra task em execução reivindicou/escreveu os mesmos paths
+                    _written = [a.get("path") for a in (_task_artifacts or []) if isinstance(a, dict) and a.get("path")]
+                    for _other_tid, _conflict_files in _dev_scheduler.record_written(task_id, _written).items():
+                        logger.warning("[Scheduler] Conflito de arquivos: %s e %s escreveram %s", task_id, _other_tid, _conflict_files[:5])
+                        _post_step(
+                            f"⚠️ Conflito de arquivos entre {task_id} e {_other_tid} (execução paralela): "
+                            f"{', '.join(_conflict_files[:3])}. O QA de ambas valida o estado final no disco.",
+                            request_id,
+                        )
+                if _has_apps_artifact:
+                    consecutive_dev_blocked[task_id] = 0
+                    _update_task(project_id, task_id, status="WAITING_REVIEW")
+                    _post_step(f"Dev concluiu. Status: {dev_status}. Task em WAITING_REVIEW.", request_id)
+                    return True
+                else:
+                    n = consecutive_dev_blocked.get(task_id, 0) + 1
+                    consecutive_dev_blocked[task_id] = n
+                    if n >= max_consecutive_dev_blocked:
+                        _update_task(project_id, task_id, status="DONE")
+                        dev_gave_up_tasks.add(task_id)
+                        _post_step(
+                            f"Máximo de tentativas do Dev atingido ({n}x sem artefato em apps/). Tarefa marcada como DONE (não aprovada).",
+                            request_id,
+                        )
+                        _post_escalation_event(
+                            project_id, task_id,
+                            f"Dev atingiu máximo de {n} tentativas sem entregar artefato. Revisão humana necessária.",
+                            request_id,
+                        )
                     else:
-                        n = consecutive_dev_blocked.get(task_id, 0) + 1
-                        consecutive_dev_blocked[task_id] = n
-                        if n >= max_consecutive_dev_blocked:
-                            _update_task(project_id, task_id, status="DONE")
-                            dev_gave_up_tasks.add(task_id)
-                            _post_step(
-                                f"Máximo de tentativas do Dev atingido ({n}x sem artefato em apps/). Tarefa marcada como DONE (não aprovada).",
-                                request_id,
-                            )
-                            _post_escalation_event(
-                                project_id, task_id,
-                                f"Dev atingiu máximo de {n} tentativas sem entregar artefato. Revisão humana necessária.",
-                                request_id,
-                            )
-                        else:
-                            _update_task(project_id, task_id, status="BLOCKED")
-                            _post_step(
-                                f"Dev não entregou artefato em apps/. Task mantida para rework (tentativa {n}/{max_consecutive_dev_blocked}).",
-                                request_id,
-                            )
-                except Exception as e:
-                    logger.exception("[Monitor Loop] Dev falhou")
-                    _post_error(str(e), request_id, e)
-                    _update_task_status(project_id, task_id, "IN_PROGRESS", "BLOCKED")
-                time.sleep(2)
+                        _update_task(project_id, task_id, status="BLOCKED")
+                        _post_step(
+                            f"Dev não entregou artefato em apps/. Task mantida para rework (tentativa {n}/{max_consecutive_dev_blocked}).",
+                            request_id,
+                        )
+            except Exception as e:
+                logger.exception("[Monitor Loop] Dev falhou")
+                _post_error(str(e), request_id, e)
+                _update_task_status(project_id, task_id, "IN_PROGRESS", "BLOCKED")
+            return False
+
+        if _dev_scheduler is not None:
+            # MONITOR_DEV_WIDTH > 1: agendador DAG — despacha todas as tasks prontas até a largura,
+            # com Dev → QA encadeados por task no mesmo worker (sem esperar a próxima iteração).
+            for _ft_id, _fut in list(_dev_inflight.items()):
+                if _fut.done():
+                    _dev_inflight.pop(_ft_id, None)
+                    _dev_scheduler.finish(_ft_id)
+                    if _fut.exception() is not None:
+                        logger.error("[Scheduler] Worker da task %s falhou: %s", _ft_id, _fut.exception())
+
+            def _run_dev_then_qa(task: dict) -> None:
+                if _run_dev_task(task):
+                    _run_qa_task(task, task_artifacts_for_qa.get(task_id_of(task)))
+
+            _dispatched = []
+            for _wt in waiting_review:
+                _wt_id = task_id_of(_wt)
+                if _wt_id in _dev_inflight or _dev_scheduler.free_slots() <= 0:
+                    continue
+                _dev_scheduler.start(_wt, files=())
+                _dev_inflight[_wt_id] = _dev_pool.submit(_run_qa_task, _wt, task_artifacts_for_qa.get(_wt_id))
+                _dev_inflight[_wt_id].add_done_callback(lambda _f: _change_feed.notify())
+                _dispatched.append(f"QA:{_wt_id}")
+            for _rt in _dev_scheduler.ready(pipeline_tasks, exclude=set(_dev_inflight) | dev_gave_up_tasks):
+                _rt_id = task_id_of(_rt)
+                _dev_scheduler.start(_rt)
+                _dev_inflight[_rt_id] = _dev_pool.submit(_run_dev_then_qa, _rt)
+                _dev_inflight[_rt_id].add_done_callback(lambda _f: _change_feed.notify())
+                _dispatched.append(_rt_id)
+            if _dispatched:
+                logger.info(
+                    "[Scheduler] Despachadas: %s | em execução: %d/%d | caminho crítico: %d task(s)",
+                    _dispatched, len(_dev_inflight), _dev_scheduler.width,
+                    critical_path_length(build_task_graph(pipeline_tasks)),
+                )
+            if _dev_inflight:
+                # Acorda quando um worker termina ou a API registra mudança (sem sleep fixo)
+                _change_feed.wait(loop_interval)
+                continue
+
+        if need_qa and waiting_review and _dev_scheduler is None:
+            # In parallel mode process all waiting_review tasks concurrently; in
+            # sequential mode (default) only the first task is processed per iteration.
+            qa_tasks_batch = waiting_review if monitor_parallel else waiting_review[:1]
+
+            if monitor_parallel and len(qa_tasks_batch) > 1:
+                with ThreadPoolExecutor(max_workers=min(len(qa_tasks_batch), 3)) as pool:
+                    futures = [
+                        pool.submit(_run_qa_task, t, task_artifacts_for_qa.get(str(t.get("taskId") or t.get("task_id") or "").strip()))
+                        for t in qa_tasks_batch
+                    ]
+                    for f in as_completed(futures):
+                        f.result()  # re-raise if any raised
+            else:
+                _qt = qa_tasks_batch[0]
+                _qt_id = str(_qt.get("taskId") or _qt.get("task_id") or "").strip()
+                _run_qa_task(_qt, task_artifacts_for_qa.get(_qt_id))
+            # QA concluído: o aviso local faz o wait voltar na hora (sem sleep fixo no handoff)
+            _change_feed.notify()
+            _change_feed.wait(loop_interval)
+            continue
+
+        if need_dev and _dev_scheduler is None:
+            # GAP-NEW-1: BLOCKED é terminal — não redespachar ao Dev automaticamente.
+            # Dev só recebe ASSIGNED/IN_PROGRESS/QA_FAIL; BLOCKED requer intervenção humana.
+            dev_task = next(
+                (
+                    t
+                    for t in tasks
+                    if t.get("status") in ("ASSIGNED", "IN_PROGRESS", "QA_FAIL")
+                    and (t.get("taskId") or t.get("task_id")) not in dev_gave_up_tasks
+                ),
+                None,
+            )
+            if dev_task:
+                _run_dev_task(dev_task)
+                # Dev concluído: próxima iteração já despacha o QA (Dev→QA sem espera)
+                _change_feed.notify()
+                _change_feed.wait(loop_interval)
                 continue
 
         if all_done and not devops_done:
@@ -3185,7 +3347,9 @@ def _run_monitor_loop(
                                         _all_dev_artifacts.append({"path": _rel, "content": _f.read_text(encoding="utf-8", errors="replace")})
                         except Exception as _de:
                             logger.warning("[Monitor Loop] Erro ao coletar dev artifacts para DevOps: %s", _de)
-                    _combined_artifacts = _all_dev_artifacts or last_dev_artifacts
+                    _combined_artifacts = _all_dev_artifacts or [
+                        a for _arts in task_artifacts_for_qa.values() for a in _arts
+                    ]
                     # I-5: resolver product_id localmente — evita problema de closure com _product_id do main()
                     _devops_product_id: str | None = None
                     try:
@@ -3211,39 +3375,41 @@ def _run_monitor_loop(
                         request_id,
                     )
                     if project_id and storage and storage.is_enabled():
-                        storage.write_doc(project_id, "devops", "summary", _content_for_doc(devops_response), title="DevOps summary")
-                        devops_artifacts = devops_response.get("artifacts", [])
-                        try:
-                            from orchestrator.envelope import filter_artifacts_by_path_policy
-                            devops_artifacts = filter_artifacts_by_path_policy(devops_artifacts, project_id)
-                        except ImportError:
-                            pass
-                        for i, art in enumerate(devops_artifacts):
-                            if not isinstance(art, dict) or not art.get("content"):
-                                continue
-                            content = art.get("content", "")
-                            path_val = (art.get("path") or "").strip()
-                            if path_val.startswith("project/"):
-                                try:
-                                    storage.write_project_artifact(project_id, path_val[8:].lstrip("/"), content if isinstance(content, str) else str(content))
-                                    if pipeline_ctx:
-                                        pipeline_ctx.register_artifact(path_val, content if isinstance(content, str) else str(content))
-                                except Exception as _e:
-                                    logger.warning("[Monitor Loop] Falha ao gravar project artifact: %s", _e)
-                            elif path_val.startswith("docs/"):
-                                try:
-                                    storage.write_doc_by_path(project_id, "devops", path_val[5:].lstrip("/"), content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
-                                    if pipeline_ctx:
-                                        pipeline_ctx.register_artifact(path_val, content if isinstance(content, str) else str(content))
-                                except Exception as _e:
-                                    logger.warning("[Monitor Loop] write_doc_by_path devops falhou, fallback write_doc: %s", _e)
-                                    storage.write_doc(project_id, "devops", path_val.replace("/", "_").replace(".", "_")[:60] or f"artifact_{i}", content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
+                        # Um append no manifest para a resposta inteira (summary + artifacts)
+                        with storage.manifest_batch(project_id):
+                            storage.write_doc(project_id, "devops", "summary", _content_for_doc(devops_response), title="DevOps summary")
+                            devops_artifacts = devops_response.get("artifacts", [])
+                            try:
+                                from orchestrator.envelope import filter_artifacts_by_path_policy
+                                devops_artifacts = filter_artifacts_by_path_policy(devops_artifacts, project_id)
+                            except ImportError:
+                                pass
+                            for i, art in enumerate(devops_artifacts):
+                                if not isinstance(art, dict) or not art.get("content"):
+                                    continue
+                                content = art.get("content", "")
+                                path_val = (art.get("path") or "").strip()
+                                if path_val.startswith("project/"):
+                                    try:
+                                        storage.write_project_artifact(project_id, path_val[8:].lstrip("/"), content if isinstance(content, str) else str(content))
+                                        if pipeline_ctx:
+                                            pipeline_ctx.register_artifact(path_val, content if isinstance(content, str) else str(content))
+                                    except Exception as _e:
+                                        logger.warning("[Monitor Loop] Falha ao gravar project artifact: %s", _e)
+                                elif path_val.startswith("docs/"):
+                                    try:
+                                        storage.write_doc_by_path(project_id, "devops", path_val[5:].lstrip("/"), content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
+                                        if pipeline_ctx:
+                                            pipeline_ctx.register_artifact(path_val, content if isinstance(content, str) else str(content))
+                                    except Exception as _e:
+                                        logger.warning("[Monitor Loop] write_doc_by_path devops falhou, fallback write_doc: %s", _e)
+                                        storage.write_doc(project_id, "devops", path_val.replace("/", "_").replace(".", "_")[:60] or f"artifact_{i}", content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
+                                        if pipeline_ctx:
+                                            pipeline_ctx.register_artifact(path_val, content if isinstance(content, str) else str(content))
+                                elif path_val:
+                                    storage.write_doc(project_id, "devops", f"artifact_{i}", content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
                                     if pipeline_ctx:
-                                        pipeline_ctx.register_artifact(path_val, content if isinstance(content, str) else str(content))
-                            elif path_val:
-                                storage.write_doc(project_id, "devops", f"artifact_{i}", content if isinstance(content, str) else str(content), title=art.get("purpose", f"Artifact {i}"))
-                                if pipeline_ctx:
-                                    pipeline_ctx.register_artifact(f"docs/devops/artifact_{i}.md", content if isinstance(content, str) else str(content))
+                                        pipeline_ctx.register_artifact(f"docs/devops/artifact_{i}.md", content if isinstance(content, str) else str(content))
                     if pipeline_ctx:
                         emitted = _emit_connect_contracts("devops", pipeline_ctx, project_id, storage, request_id)
                         if emitted:
@@ -3564,10 +3730,15 @@ Execute agora sem pedir confirmação.
                 except Exception as e:
                     logger.exception("[Monitor Loop] DevOps falhou")
                     _post_error(str(e), request_id, e)
-            time.sleep(2)
+            # só chega aqui quando o DevOps falhou: espera curta antes de tentar de novo, mas acorda
+            # se o projeto mudar (ex.: usuário parou o projeto pelo portal)
+            _change_feed.wait(2)
             continue
 
-        time.sleep(loop_interval)
+        _change_feed.wait(loop_interval)
+
+    if _dev_pool is not None:
+        _dev_pool.shutdown(wait=False, cancel_futures=True)
 
 
 # ---------------------------------------------------------------------------
@@ -4733,10 +4904,11 @@ def main() -> int:
                             request_id,
                         )
                         # Cancelar todas as tasks do PM
-                        for _t in _active_pm_tasks:
-                            _tid = _t.get("taskId") or _t.get("task_id")
-                            if _tid:
-                                _update_task(project_id, _tid, status="CANCELLED")
+                        _update_tasks(project_id, [
+                            (_tid, {"status": "CANCELLED"})
+                            for _tid in (_t.get("taskId") or _t.get("task_id") for _t in _active_pm_tasks)
+                            if _tid
+                        ])
                         # Criar 1 task consolidada com todos os requisitos do backlog
                         _owner_role = {"web": "DEV_WEB", "mobile": "DEV_MOBILE"}.get(pm_module, "DEV_BACKEND")
                         _consolidated_reqs = "\n".join(
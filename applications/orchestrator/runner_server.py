@@ -395,6 +395,8 @@ def run(body: RunBody):
 
                 env["GENESIS_LLM_PROVIDER"] = _effective_provider
                 env["CLAUDE_MODEL"]          = _model_id
+                # Escopo dos clientes LLM no agents: tenants diferentes nunca dividem cliente
+                env["GENESIS_TENANT_ID"]     = (_llm_cfg.get("tenantId") or "").strip()
 
                 # Credentials por provider
                 if _effective_provider == "openai" and _api_key:
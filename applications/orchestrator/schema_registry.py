@@ -0,0 +1,240 @@
+"""
+Registry de JSON schemas dos contratos Connect: cada schema é lido e parseado uma vez (invalidado
+por mtime/tamanho do arquivo) e compilado em uma função de validação especializada (geração de
+código no estilo fastjsonschema) em vez de interpretar o dict do schema a cada payload.
+
+Subconjunto suportado (o mesmo que connect_contracts validava): type, enum, properties, required,
+additionalProperties=false, items, minItems. Mensagens de erro idênticas às do validador anterior.
+
+Interface:
+    registry = get_schema_registry()
+    path = registry.resolve("manifests/service-manifest.schema.json", [root1, root2])
+    schema = registry.load(path)             # dict compartilhado (não mutar) ou None
+    errors = registry.validator(path)(payload)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+Validator = Callable[[Any], list]
+
+# Resolução sem resultado (nenhuma raiz tem o schema) é reconsultada após este intervalo (s)
+RESOLVE_NEGATIVE_TTL_SEC = 30.0
+
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+}
+
+
+def _accept_all(payload: Any) -> list:
+    return []
+
+
+class _SchemaCompiler:
+    """Gera o código-fonte de um validador: uma função por nó do schema que valida algo."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lines: list[str] = []
+        self.consts: dict[str, Any] = {}
+        self._count = 0
+
+    def const(self, value: Any) -> str:
+        name = f"_C{len(self.consts)}"
+        self.consts[name] = value
+        return name
+
+    def node(self, schema: Any) -> str | None:
+        """Emite a função do nó; None quando o nó não valida nada (schema vazio/não-dict)."""
+        if not isinstance(schema, dict):
+            return None
+        schema_type = schema.get("type")
+        body: list[str] = []
+        check = _TYPE_CHECKS.get(schema_type) if isinstance(schema_type, str) else None
+        if check:
+            body += [
+                f"if not {check.format(v='d')}:",
+                f"    append(p + {(': esperado ' + schema_type + ', recebido ')!r} + type(d).__name__)",
+                "    return",
+            ]
+        if "enum" in schema:
+            enum = schema["enum"]
+            body += [
+                f"if d not in {self.const(enum)}:",
+                f"    append(p + ': valor ' + repr(d) + {(' fora do enum ' + str(enum))!r})",
+            ]
+        if schema_type == "object":
+            properties = schema.get("properties", {})
+            if schema.get("additionalProperties") is False:
+                keys = self.const(frozenset(properties.keys()))
+                body += [
+                    f"for k in sorted(set(d.keys()) - {keys}):",
+                    "    append(f'{p}.{k}: propriedade não permitida')",
+                ]
+            for key in schema.get("required", []):
+                body += [
+                    f"if {key!r} not in d:",
+                    f"    append(p + {('.' + str(key) + ': campo obrigatório ausente')!r})",
+                ]
+            children = {key: self.node(sub) for key, sub in properties.items()}
+            children = {key: fn for key, fn in children.items() if fn}
+            if children:
+                # tabela key → validador no nível do módulo (as funções filhas já foram emitidas)
+                table = f"_P{self._count}"
+                self._count += 1
+                self.lines += [table + " = {" + ", ".join(f"{key!r}: {fn}" for key, fn in children.items()) + "}"]
+                body += [
+                    "for k, v in d.items():",
+                    f"    f = {table}.get(k)",
+                    "    if f is not None:",
+                    "        f(v, f'{p}.{k}', append)",
+                ]
+        if schema_type == "array":
+            min_items = schema.get("minItems")
+            item_fn = self.node(schema.get("items"))
+            if isinstance(min_items, int) or item_fn:
+                body += ["if isinstance(d, list):"]
+                if isinstance(min_items, int):
+                    body += [
+                        f"    if len(d) < {min_items}:",
+                        f"        append(p + {(': esperado pelo menos ' + str(min_items) + ' item(ns)')!r})",
+                    ]
+                if item_fn:
+                    body += [
+                        "    for i, v in enumerate(d):",
+                        f"        {item_fn}(v, f'{{p}}[{{i}}]', append)",
+                    ]
+        if not body:
+            return None
+        fn = f"_v{self._count}"
+        self._count += 1
+        self.lines += [f"def {fn}(d, p, append):"] + ["    " + line for line in body] + [""]
+        return fn
+
+    def build(self, schema: Any) -> Validator:
+        root = self.node(schema)
+        if root is None:
+            return _accept_all
+        self.lines += [
+            "def validate(payload):",
+            "    errors = []",
+            f"    {root}(payload, '$', errors.append)",
+            "    return errors",
+        ]
+        namespace: dict[str, Any] = dict(self.consts)
+        exec(compile("\n".join(self.lines), f"<schema {self.name}>", "exec"), namespace)  # noqa: S102
+        validate = namespace["validate"]
+        validate.source = "\n".join(self.lines)
+        return validate
+
+
+def compile_schema(schema: Any, name: str = "schema") -> Validator:
+    """Compila um JSON schema (subconjunto acima) em validate(payload) -> list[str] de erros."""
+    return _SchemaCompiler(name).build(schema)
+
+
+class SchemaRegistry:
+    """Cache de schemas parseados + validadores compilados por arquivo (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # path → ((mtime_ns, size), schema | None, validator | None)
+        self._entries: dict[Path, tuple[tuple[int, int], dict | None, Validator | None]] = {}
+        # (relative, raízes) → (path | None, resolvido_em)
+        self._resolved: dict[tuple, tuple[Path | None, float]] = {}
+
+    def resolve(self, relative: str, roots: list[Path]) -> Path | None:
+        """Primeira raiz que contém relative; memoizado (miss é reconsultado após o TTL)."""
+        key = (relative, tuple(str(r) for r in roots))
+        with self._lock:
+            hit = self._resolved.get(key)
+        if hit is not None:
+            path, at = hit
+            if path is not None and path.is_file():
+                return path
+            if path is None and time.monotonic() - at < RESOLVE_NEGATIVE_TTL_SEC:
+                return None
+        found = next((Path(r) / relative for r in roots if (Path(r) / relative).is_file()), None)
+        with self._lock:
+            self._resolved[key] = (found, time.monotonic())
+        return found
+
+    def _entry(self, path: Path) -> tuple[tuple[int, int], dict | None, Validator | None] | None:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry
+        try:
+            schema = json.loads(path.read_text(encoding="utf-8"))
+            if not isinstance(schema, dict):
+                raise ValueError("schema não é um objeto JSON")
+        except (OSError, ValueError) as e:
+            logger.debug("[SchemaRegistry] erro lendo %s: %s", path, e)
+            schema = None
+        entry = (stamp, schema, None)
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def load(self, path: str | Path | None) -> dict | None:
+        """Schema parseado (dict compartilhado — não mutar) ou None se ausente/inválido."""
+        if path is None:
+            return None
+        entry = self._entry(Path(path))
+        return entry[1] if entry else None
+
+    def validator(self, path: str | Path | None) -> Validator:
+        """Validador compilado do schema; sem schema (ausente/inválido) aceita tudo."""
+        if path is None:
+            return _accept_all
+        path = Path(path)
+        entry = self._entry(path)
+        if entry is None or entry[1] is None:
+            return _accept_all
+        if entry[2] is not None:
+            return entry[2]
+        try:
+            validate = compile_schema(entry[1], path.name)
+        except Exception as e:  # construção inesperada no schema: nunca bloquear o pipeline
+            logger.warning("[SchemaRegistry] falha ao compilar %s: %s", path, e)
+            validate = _accept_all
+        with self._lock:
+            current = self._entries.get(path)
+            if current is not None and current[0] == entry[0]:
+                self._entries[path] = (entry[0], entry[1], validate)
+        return validate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._resolved.clear()
+
+
+_registry: SchemaRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Registry compartilhado do processo."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SchemaRegistry()
+        return _registry
@@ -0,0 +1,179 @@
+"""
+task_scheduler.py — Agendador DAG da fase Dev do Monitor Loop.
+
+Monta o grafo de dependências do backlog a partir de depends_on_files (casando com os
+arquivos declarados por tasks anteriores em estimated_files / files_to_create) e da ordem
+do backlog, e libera para execução concorrente todas as tasks prontas (dependências aprovadas
+pelo QA) até a largura configurada (MONITOR_DEV_WIDTH). Detecta conflitos de arquivo entre tasks em execução:
+antes do despacho (arquivos declarados) e depois do Dev (arquivos realmente escritos).
+
+Interface:
+    sched = DevScheduler(width=4)
+    for task in sched.ready(tasks):     # tasks prontas, na ordem do backlog
+        sched.start(task)
+        ...                              # Dev → QA da task em um worker
+        sched.record_written(tid, paths) # → tasks concorrentes que escreveram os mesmos arquivos
+        sched.finish(tid)
+"""
+import logging
+import threading
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Status em que o Dev pode (re)trabalhar a task
+DEV_ELIGIBLE_STATUSES = frozenset({"ASSIGNED", "IN_PROGRESS", "QA_FAIL"})
+# Dependência satisfeita: o QA aprovou a task (ou ela saiu do pipeline). WAITING_REVIEW não basta:
+# um QA_FAIL devolve a task ao Dev e os arquivos mudam depois que o dependente já os leu.
+# BLOCKED/CANCELLED liberam os dependentes — o GAP-P4 avisa se os arquivos não existirem.
+DEPENDENCY_SATISFIED_STATUSES = frozenset({"QA_PASS", "DONE", "CANCELLED", "BLOCKED"})
+
+
+def task_id_of(task: dict) -> str:
+    return str(task.get("taskId") or task.get("task_id") or task.get("id") or "").strip()
+
+
+def _norm_path(path: str) -> str:
+    p = (path or "").strip().replace("\\", "/")
+    while p.startswith("./"):
+        p = p[2:]
+    p = p.lstrip("/")
+    return p[5:] if p.startswith("apps/") else p
+
+
+def _as_list(value) -> list:
+    if isinstance(value, str):
+        return [value] if value else []
+    return list(value or [])
+
+
+def produced_files(task: dict) -> set[str]:
+    """Arquivos que a task declara produzir (LEI 8: estimated_files / files_to_create)."""
+    files = _as_list(task.get("estimated_files") or task.get("files_to_create"))
+    return {_norm_path(f) for f in files if isinstance(f, str) and f.strip()}
+
+
+def required_files(task: dict) -> set[str]:
+    files = _as_list(task.get("depends_on_files") or task.get("dependsOnFiles"))
+    return {_norm_path(f) for f in files if isinstance(f, str) and f.strip()}
+
+
+def build_task_graph(tasks: list[dict]) -> dict[str, set[str]]:
+    """
+    task_id → ids das tasks das quais depende.
+    Cada arquivo de depends_on_files aponta para a primeira task ANTERIOR no backlog que o
+    declara. Arquivo sem produtor declarado → depende da task imediatamente anterior
+    (ordem do backlog, comportamento serial). Só há arestas para trás: o grafo é acíclico.
+    """
+    graph: dict[str, set[str]] = {}
+    producers: dict[str, str] = {}
+    previous = ""
+    for task in tasks:
+        tid = task_id_of(task)
+        if not tid:
+            continue
+        deps: set[str] = set()
+        for f in required_files(task):
+            producer = producers.get(f)
+            if producer:
+                deps.add(producer)
+            elif previous:
+                deps.add(previous)
+        graph[tid] = deps
+        for f in produced_files(task):
+            producers.setdefault(f, tid)
+        previous = tid
+    return graph
+
+
+def critical_path_length(graph: dict[str, set[str]]) -> int:
+    """Número de tasks na maior cadeia de dependências (limite inferior de rodadas Dev)."""
+    depth: dict[str, int] = {}
+
+    def _depth(tid: str) -> int:
+        if tid not in depth:
+            depth[tid] = 1 + max((_depth(d) for d in graph.get(tid, ()) if d in graph), default=0)
+        return depth[tid]
+
+    return max((_depth(t) for t in graph), default=0)
+
+
+class DevScheduler:
+    """Estado das tasks em execução no Monitor Loop (thread-safe)."""
+
+    def __init__(self, width: int):
+        self.width = max(1, width)
+        self._lock = threading.Lock()
+        # task_id → arquivos reivindicados (declarados + escritos)
+        self._running: dict[str, set[str]] = {}
+
+    @property
+    def running(self) -> list[str]:
+        with self._lock:
+            return list(self._running)
+
+    def free_slots(self) -> int:
+        with self._lock:
+            return self.width - len(self._running)
+
+    def ready(self, tasks: list[dict], exclude: Iterable[str] = ()) -> list[dict]:
+        """
+        Tasks elegíveis ao Dev cujas dependências estão satisfeitas e cujos arquivos
+        declarados não colidem com tasks em execução, na ordem do backlog, até as vagas livres.
+        Sem nada em execução e nada pronto (dependência presa em status não elegível),
+        devolve a primeira elegível — nunca trava o pipeline.
+        """
+        excluded = set(exclude)
+        graph = build_task_graph(tasks)
+        status = {task_id_of(t): t.get("status") for t in tasks}
+        with self._lock:
+            slots = self.width - len(self._running)
+            claimed: set[str] = set().union(*self._running.values()) if self._running else set()
+            busy = set(self._running) | excluded
+        if slots <= 0:
+            return []
+        eligible = [
+            t for t in tasks
+            if t.get("status") in DEV_ELIGIBLE_STATUSES and task_id_of(t) and task_id_of(t) not in busy
+        ]
+        selected: list[dict] = []
+        for task in eligible:
+            tid = task_id_of(task)
+            deps = graph.get(tid, set())
+            if any(status.get(d) not in DEPENDENCY_SATISFIED_STATUSES for d in deps):
+                continue
+            files = produced_files(task)
+            if files & claimed:
+                logger.info("[Scheduler] %s adiada: conflito de arquivos com task em execução %s", tid, sorted(files & claimed)[:3])
+                continue
+            selected.append(task)
+            claimed |= files
+            if len(selected) >= slots:
+                break
+        if not selected and not busy and eligible:
+            selected = eligible[:1]
+        return selected
+
+    def start(self, task: dict, files: Iterable[str] | None = None) -> None:
+        with self._lock:
+            self._running[task_id_of(task)] = set(produced_files(task) if files is None else files)
+
+    def finish(self, task_id: str) -> None:
+        with self._lock:
+            self._running.pop(str(task_id).strip(), None)
+
+    def record_written(self, task_id: str, paths: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Registra os arquivos escritos pelo Dev de task_id e devolve {outra_task: arquivos}
+        para cada task em execução que reivindicou ou escreveu os mesmos arquivos.
+        """
+        tid = str(task_id).strip()
+        written = {_norm_path(p) for p in paths if p}
+        conflicts: dict[str, list[str]] = {}
+        with self._lock:
+            for other, files in self._running.items():
+                if other != tid and files & written:
+                    conflicts[other] = sorted(files & written)
+            if tid in self._running:
+                self._running[tid] |= written
+        return conflicts
@@ -0,0 +1,347 @@
+"""
+telemetry.py — Sink assíncrono (fire-and-forget) de telemetria do runner para a API.
+
+Diálogo/passos do portal (_post_step, _post_agent_working, _post_dialogue) e métricas de
+agente (_record_agent_metrics / _audit_log) não podem travar o pipeline quando a api-node
+está lenta. emit() só enfileira; uma thread de fundo envia em lotes (POST /api/batch via
+api_client) a cada TELEMETRY_FLUSH_SEC ou quando o lote enche.
+
+  - fila em memória limitada (TELEMETRY_QUEUE_MAX); excedente vai para o arquivo de spill;
+  - coalescência: eventos com a mesma coalesce_key ainda não enviados são substituídos pelo
+    mais recente (ex.: "Dev trabalhando..." repetido do mesmo agente, passo idêntico);
+  - API fora do ar (status 0 / 5xx): o lote vai para o spill (JSONL) e é reenviado quando a
+    API volta a responder — inclusive por um runner reiniciado. Um spill por projeto
+    (PROJECT_ID) ou, sem projeto, por processo; spill/replay deixado por um runner morto (PID no
+    nome) é adotado pelo próximo sink que abrir o mesmo diretório;
+  - shutdown (SIGTERM / atexit): shutdown_telemetry() drena a fila com timeout e grava o
+    que sobrar no spill.
+
+TELEMETRY_ASYNC=false volta ao envio síncrono anterior.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_ASYNC = os.environ.get("TELEMETRY_ASYNC", "true").strip().lower() in ("1", "true", "yes")
+TELEMETRY_QUEUE_MAX = int(os.environ.get("TELEMETRY_QUEUE_MAX", "1000") or 1000)
+TELEMETRY_BATCH_SIZE = int(os.environ.get("TELEMETRY_BATCH_SIZE", "50") or 50)
+TELEMETRY_FLUSH_SEC = float(os.environ.get("TELEMETRY_FLUSH_SEC", "1") or 1)
+TELEMETRY_SHUTDOWN_FLUSH_SEC = float(os.environ.get("TELEMETRY_SHUTDOWN_FLUSH_SEC", "5") or 5)
+TELEMETRY_SPILL_MAX_BYTES = int(os.environ.get("TELEMETRY_SPILL_MAX_BYTES", str(10 * 1024 * 1024)) or 0)
+
+# sender(ops) → [(json, status)] na ordem de ops (contrato de ApiClient.batch)
+Sender = Callable[[list[dict]], "list[tuple[Any, int]]"]
+
+
+def _default_spill_path() -> Path:
+    explicit = os.environ.get("TELEMETRY_SPILL_PATH", "").strip()
+    if explicit:
+        return Path(explicit)
+    try:
+        from orchestrator import project_storage as storage
+        root = storage.get_files_root()
+    except ImportError:
+        root = Path(os.environ.get("PROJECT_FILES_ROOT", "").strip() or Path.home() / "zentriz-files")
+    project_id = re.sub(r"[^A-Za-z0-9_.-]", "_", os.environ.get("PROJECT_ID", "").strip())
+    name = f"spill.{project_id}.jsonl" if project_id else f"spill.pid{os.getpid()}.jsonl"
+    return Path(root) / ".telemetry" / name
+
+
+# spill sem projeto (spill.pid<N>.jsonl) ou replay em andamento (<spill>.replay.<N>.<hex>) do processo N
+_ORPHAN_NAME = re.compile(r"^spill\.pid(\d+)\.jsonl$|\.replay\.(\d+)\.[0-9a-f]+$")
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # existe, mas é de outro usuário
+    return True
+
+
+def _api_sender(ops: list[dict]) -> list[tuple[Any, int]]:
+    base = os.environ.get("API_BASE_URL", "").strip()
+    token = os.environ.get("GENESIS_API_TOKEN", "").strip()
+    if not base or not token:
+        return [(None, 0)] * len(ops)
+    from orchestrator.api_client import get_api_client
+    return get_api_client(base, token).batch(ops, timeout=15)
+
+
+def _retryable(status: int) -> bool:
+    return status == 0 or status >= 500 or status == 429
+
+
+class TelemetrySink:
+    """Fila limitada + thread de envio em lote + spill em disco."""
+
+    def __init__(
+        self,
+        sender: Sender | None = None,
+        spill_path: Path | str | None = None,
+        max_queue: int = TELEMETRY_QUEUE_MAX,
+        batch_size: int = TELEMETRY_BATCH_SIZE,
+        flush_sec: float = TELEMETRY_FLUSH_SEC,
+    ):
+        self._sender = sender or _api_sender
+        self.spill_path = Path(spill_path) if spill_path else _default_spill_path()
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_sec = max(0.01, flush_sec)
+        # RLock: shutdown() pode rodar no handler de SIGTERM enquanto a thread principal está em emit()
+        self._lock = threading.RLock()
+        self._pending: OrderedDict[Any, dict] = OrderedDict()
+        self._seq = count()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stop = threading.Event()
+        self._adopt_orphans()
+        self._spill_pending = self.spill_path.exists()
+        self._force = False
+        self._failures = 0
+        self._retry_at = 0.0
+        self._thread: threading.Thread | None = None
+        self.sent = 0
+        self.spilled = 0
+
+    # ── produtor ────────────────────────────────────────────────────────────────
+
+    def emit(self, method: str, path: str, body: dict | None = None, coalesce_key: Any = None) -> None:
+        """Enfileira uma chamada à API; nunca bloqueia em rede."""
+        op = {"method": method, "path": path, "body": body}
+        if self._stop.is_set():
+            # depois do shutdown: não há mais thread de envio → direto para o spill
+            self._spill([op])
+            return
+        overflow: list[dict] = []
+        with self._lock:
+            key = ("k", coalesce_key) if coalesce_key is not None else ("n", next(self._seq))
+            self._pending[key] = op  # chave existente: substitui mantendo a posição na fila
+            while len(self._pending) > self.max_queue:
+                overflow.append(self._pending.popitem(last=False)[1])
+            self._idle.clear()
+            full = len(self._pending) >= self.batch_size
+        if overflow:
+            self._spill(overflow)
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    # ── consumidor ──────────────────────────────────────────────────────────────
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telemetry-sink", daemon=True)
+                self._thread.start()
+
+    def _take_batch(self) -> list[dict]:
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popitem(last=False)[1])
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            stopping = self._stop.is_set()
+            force, self._force = self._force or stopping, False
+            self._drain(force)
+            if stopping:
+                return
+
+    def _drain(self, force: bool = False) -> None:
+        # API fora do ar: espera o backoff (eventos seguem acumulando em memória / spill)
+        if not force and time.monotonic() < self._retry_at:
+            return
+        ok = self._replay_spill() if self._spill_pending else True
+        while ok:
+            batch = self._take_batch()
+            if not batch:
+                break
+            failed = self._send(batch)
+            if failed:
+                # mantém a ordem: o que falhou e tudo que estava atrás vai para o spill
+                self._spill(failed + self._take_all())
+                ok = False
+        if ok:
+            self._failures = 0
+            self._retry_at = 0.0
+        else:
+            self._failures += 1
+            self._retry_at = time.monotonic() + min(60.0, self.flush_sec * (2 ** self._failures))
+            logger.debug("[Telemetry] API indisponível — novo envio em %.1fs.", self._retry_at - time.monotonic())
+        with self._lock:
+            if not self._pending:
+                self._idle.set()
+
+    def _take_all(self) -> list[dict]:
+        with self._lock:
+            ops = list(self._pending.values())
+            self._pending.clear()
+            return ops
+
+    def _send(self, batch: list[dict]) -> list[dict]:
+        """Envia um lote; devolve as ops com falha recuperável (API indisponível / 5xx)."""
+        try:
+            results = self._sender(batch)
+        except Exception as e:
+            logger.debug("[Telemetry] Falha ao enviar lote de %d evento(s): %s", len(batch), e)
+            results = [(None, 0)] * len(batch)
+        failed = [op for op, (_data, status) in zip(batch, results) if _retryable(status)]
+        dropped = sum(1 for _data, status in results if not _retryable(status) and not 200 <= status < 300)
+        self.sent += len(batch) - len(failed) - dropped
+        if dropped:
+            logger.debug("[Telemetry] %d evento(s) rejeitado(s) pela API (4xx) — descartado(s).", dropped)
+        return failed
+
+    # ── spill em disco ──────────────────────────────────────────────────────────
+
+    def _spill(self, ops: list[dict]) -> None:
+        if not ops:
+            return
+        try:
+            with self._lock:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                size = self.spill_path.stat().st_size if self.spill_path.exists() else 0
+                if TELEMETRY_SPILL_MAX_BYTES and size >= TELEMETRY_SPILL_MAX_BYTES:
+                    logger.warning("[Telemetry] Spill cheio (%s bytes) — %d evento(s) descartado(s).", size, len(ops))
+                    return
+                with self.spill_path.open("a", encoding="utf-8") as f:
+                    for op in ops:
+                        f.write(json.dumps(op, ensure_ascii=False) + "\n")
+                self._spill_pending = True
+                self.spilled += len(ops)
+        except OSError as e:
+            logger.warning("[Telemetry] Falha ao gravar spill %s: %s — %d evento(s) perdido(s).", self.spill_path, e, len(ops))
+
+    def _replay_name(self) -> str:
+        # único por processo e por replay: nunca sobrescreve o replay de outro runner
+        return f"{self.spill_path.name}.replay.{os.getpid()}.{uuid.uuid4().hex}"
+
+    def _adopt_orphans(self) -> None:
+        """Acrescenta ao spill deste sink os spills/replays de runners mortos no mesmo diretório."""
+        try:
+            entries = sorted(self.spill_path.parent.iterdir(), key=lambda e: e.stat().st_mtime)
+        except OSError:
+            return
+        for entry in entries:
+            m = _ORPHAN_NAME.search(entry.name)
+            if not m or entry == self.spill_path or _pid_alive(int(m.group(1) or m.group(2))):
+                continue
+            claimed = entry.with_name(self._replay_name())
+            try:
+                entry.replace(claimed)  # rename atômico: só um runner adota o arquivo
+                text = claimed.read_text(encoding="utf-8")
+                with self._lock, self.spill_path.open("a", encoding="utf-8") as f:
+                    f.write(text if not text or text.endswith("\n") else text + "\n")
+            except OSError as e:
+                logger.debug("[Telemetry] Falha ao adotar spill órfão %s: %s", entry, e)
+                continue
+            claimed.unlink(missing_ok=True)
+            logger.info("[Telemetry] Spill de runner encerrado adotado: %s", entry.name)
+
+    def _replay_spill(self) -> bool:
+        """Reenvia o spill em ordem. False se a API falhou de novo (restante volta ao spill)."""
+        replay = self.spill_path.with_name(self._replay_name())
+        with self._lock:
+            try:
+                self.spill_path.replace(replay)
+            except OSError:
+                self._spill_pending = False
+                return True
+            self._spill_pending = False
+        ops: list[dict] = []
+        try:
+            for line in replay.read_text(encoding="utf-8").splitlines():
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    continue  # linha truncada (processo morto no meio da escrita)
+        finally:
+            replay.unlink(missing_ok=True)
+        if ops:
+            logger.info("[Telemetry] Reenviando %d evento(s) do spill.", len(ops))
+        for start in range(0, len(ops), self.batch_size):
+            failed = self._send(ops[start:start + self.batch_size])
+            if failed:
+                self._spill(failed + ops[start + self.batch_size:])
+                return False
+        return True
+
+    # ── controle ────────────────────────────────────────────────────────────────
+
+    def flush(self, timeout: float = TELEMETRY_SHUTDOWN_FLUSH_SEC) -> bool:
+        """Acorda o envio e espera a fila esvaziar. True se esvaziou dentro do timeout."""
+        with self._lock:
+            if not self._pending:
+                return True
+        self._force = True
+        self._ensure_thread()
+        self._wake.set()
+        return self._idle.wait(timeout)
+
+    def shutdown(self, timeout: float = TELEMETRY_SHUTDOWN_FLUSH_SEC) -> None:
+        """Drena a fila (até timeout) e encerra a thread; o que sobrar vai para o spill."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        with self._lock:
+            remaining = list(self._pending.values())
+            self._pending.clear()
+            self._idle.set()
+        if remaining:
+            self._spill(remaining)
+
+
+_sink: TelemetrySink | None = None
+_sink_lock = threading.Lock()
+
+
+def get_telemetry_sink() -> TelemetrySink:
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = TelemetrySink()
+        return _sink
+
+
+def reset_telemetry_sink(sink: TelemetrySink | None = None) -> None:
+    """Troca o singleton (testes)."""
+    global _sink
+    with _sink_lock:
+        _sink = sink
+
+
+def shutdown_telemetry(timeout: float = TELEMETRY_SHUTDOWN_FLUSH_SEC) -> None:
+    """Flush-on-shutdown: chamado pelo _sigterm_handler do runner e no atexit."""
+    sink = _sink
+    if sink is not None:
+        sink.shutdown(timeout)
+
+
+atexit.register(shutdown_telemetry)
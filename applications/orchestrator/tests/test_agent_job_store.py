@@ -0,0 +1,113 @@
+"""
+Testes da fila durável de jobs de agentes (SQLite): claim com lease, heartbeat,
+retomada após lease vencido, limite de tentativas e persistência entre reaberturas; o store
+Postgres passa pelo pool compartilhado (pg_pool).
+"""
+import time
+import types
+
+from orchestrator import pg_pool
+from orchestrator.agents.job_store import PostgresJobStore, SQLiteJobStore
+
+
+def test_submit_claim_complete(tmp_path):
+    store = SQLiteJobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.submit("dev", {"request_id": "r1"})
+    assert store.get(job_id)["status"] == "queued"
+
+    job = store.claim("w1", lease_sec=60)
+    assert job["job_id"] == job_id
+    assert job["body"] == {"request_id": "r1"}
+    assert job["attempts"] == 1
+    assert store.claim("w2", lease_sec=60) is None
+
+    assert store.heartbeat(job_id, "w1", lease_sec=60)
+    assert not store.heartbeat(job_id, "w2", lease_sec=60)
+    assert store.complete(job_id, "w1", {"status": "OK"})
+    done = store.get(job_id)
+    assert done["status"] == "done"
+    assert done["result"] == {"status": "OK"}
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    store = SQLiteJobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.submit("qa", {})
+    store.claim("w1", lease_sec=0.01)
+    time.sleep(0.03)
+    job = store.claim("w2", lease_sec=60)
+    assert job["job_id"] == job_id and job["attempts"] == 2
+    # worker antigo não consegue mais finalizar
+    assert not store.complete(job_id, "w1", {"status": "OK"})
+    assert store.fail(job_id, "w2", "boom")
+    assert store.get(job_id)["error"] == "boom"
+
+
+def test_max_attempts_marks_error(tmp_path):
+    store = SQLiteJobStore(tmp_path / "jobs.sqlite3", max_attempts=1)
+    job_id = store.submit("pm", {})
+    store.claim("w1", lease_sec=0.01)
+    time.sleep(0.03)
+    assert store.claim("w2", lease_sec=60) is None
+    job = store.get(job_id)
+    assert job["status"] == "error"
+    assert "lease expirado" in job["error"]
+
+
+def test_jobs_survive_reopen_and_cleanup(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    job_id = SQLiteJobStore(path).submit("cto", {"x": 1})
+    store = SQLiteJobStore(path)
+    job = store.claim("w1")
+    assert job["job_id"] == job_id
+    store.complete(job_id, "w1", {"ok": True})
+    assert store.cleanup(retention_sec=3600) == 0
+    assert store.cleanup(retention_sec=-1) == 1
+    assert store.get(job_id) is None
+
+
+class _PgConn:
+    closed = 0
+
+    def __init__(self, log):
+        self.log = log
+
+    def cursor(self):
+        conn = self
+
+        class _Cur:
+            rowcount = 1
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=()):
+                conn.log.append(" ".join(sql.split())[:30])
+
+        return _Cur()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def test_postgres_store_reuses_pooled_connection(monkeypatch):
+    log, opened = [], []
+
+    def connect(dsn, **kw):
+        opened.append(dsn)
+        return _PgConn(log)
+
+    driver = types.SimpleNamespace(__name__="psycopg2", connect=connect)
+    monkeypatch.setattr(pg_pool, "_pools", {"postgres://jobs": pg_pool.PgPool("postgres://jobs", driver=driver)})
+    store = PostgresJobStore("postgres://jobs")
+    assert store.heartbeat("j1", "w1", 60) and store.complete("j1", "w1", {"ok": True})
+    assert store.cleanup(60) == 1
+    assert opened == ["postgres://jobs"] and len(log) == 3
@@ -0,0 +1,89 @@
+"""
+Testes do caminho assíncrono do serviço de agentes: endpoints async com limitador por
+provider/modelo e API de jobs /invoke/{role}/async para qualquer role.
+"""
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+
+@pytest.fixture()
+def client(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from orchestrator.agents import server, job_store
+
+    calls = []
+
+    def _fake_run_agent(system_prompt_path, message, role, on_artifact=None, **_kw):
+        calls.append(role)
+        return {"status": "OK", "summary": f"{role} ok", "artifacts": [], "evidence": [], "next_actions": {}}
+
+    monkeypatch.setattr(server, "run_agent", _fake_run_agent)
+    monkeypatch.setattr(server, "_resolve_llm_api_key", lambda m: m)
+    monkeypatch.setattr(server, "AGENT_JOB_POLL_SEC", 0.05)
+    job_store.reset_job_store(job_store.SQLiteJobStore(tmp_path / "jobs.sqlite3"))
+    with TestClient(server.app) as c:
+        c.calls = calls
+        yield c
+    job_store.reset_job_store()
+
+
+def test_sync_invoke_runs_through_executor(client):
+    r = client.post("/invoke/qa", json={"request_id": "r1", "input": {}})
+    assert r.status_code == 200
+    assert r.json()["summary"] == "QA ok"
+    assert client.calls == ["QA"]
+
+
+def test_async_job_for_any_role(client):
+    r = client.post("/invoke/dev/async", json={"request_id": "r2", "input": {}})
+    assert r.status_code == 200
+    job_id = r.json()["jobId"]
+    assert job_id.startswith("dev-")
+    for _ in range(100):
+        st = client.get(f"/invoke/dev/status/{job_id}").json()
+        if st["status"] != "running":
+            break
+        time.sleep(0.02)
+    assert st["status"] == "done", st
+    assert st["result"]["summary"] == "DEV ok"
+    # job de outra role não é visível por este path
+    assert client.get(f"/invoke/qa/status/{job_id}").status_code == 404
+
+
+def test_unknown_role_is_404(client):
+    assert client.post("/invoke/ceo/async", json={}).status_code == 404
+
+
+def test_limiter_key_prefers_envelope_llm_config(monkeypatch):
+    from orchestrator.agents import server
+    monkeypatch.setenv("GENESIS_LLM_PROVIDER", "bedrock")
+    assert server._limiter_key({"llm_config": {"provider": "openai", "model": "gpt-4o"}}, "DEV") == ("openai", "gpt-4o")
+    assert server._limiter_key({}, "DEV")[0] == "bedrock"
+
+
+def test_job_store_io_runs_off_the_agent_executor(client):
+    import asyncio
+    import threading
+
+    from orchestrator.agents import server
+    name = asyncio.run(server._store_call(lambda: threading.current_thread().name))
+    assert name.startswith("agent-jobs")
+
+
+def test_invoke_raw_scopes_client_by_tenant(client, monkeypatch):
+    from orchestrator.agents import runtime
+
+    scopes = []
+
+    async def _fake_call(system, user, model_id, max_tokens=8000, temperature=0.2, scope=""):
+        scopes.append(scope)
+        return "ok"
+
+    monkeypatch.setattr(runtime, "call_bedrock_direct_async", _fake_call)
+    body = {"prompt_override": "p", "user_message": "u", "model_id": "m"}
+    assert client.post("/invoke/raw", json={**body, "tenant_id": "tenant-a"}).json()["response"] == "ok"
+    client.post("/invoke/raw", json=body)
+    assert scopes == ["tenant-a", ""]
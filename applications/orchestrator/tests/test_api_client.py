@@ -0,0 +1,171 @@
+"""
+Testes do cliente HTTP compartilhado runner → api-node (api_client.py):
+keep-alive, retries com backoff, batch (com e sem a rota /api/batch na API) e reenvio após
+conexão derrubada só para métodos idempotentes.
+"""
+import http.client
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from orchestrator import api_client
+from orchestrator.api_client import ApiClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, payload=None):
+        raw = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _handle(self):
+        srv = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        with srv.lock:
+            srv.calls.append((self.command, self.path, body, self.headers.get("Authorization")))
+            srv.ports.add(self.client_address[1])
+            failures = srv.fail_next.get(self.path, 0)
+            if failures:
+                srv.fail_next[self.path] = failures - 1
+        if failures:
+            return self._reply(503, {"code": "UNAVAILABLE"})
+        if self.path == "/api/batch":
+            if not srv.batch_route:
+                return self._reply(404, {"code": "NOT_FOUND"})
+            return self._reply(200, {"responses": [
+                {"status": 200, "body": {"path": op["path"], "body": op.get("body")}} for op in body["requests"]
+            ]})
+        return self._reply(200, {"method": self.command, "path": self.path, "body": body})
+
+    do_GET = do_POST = do_PATCH = _handle
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.lock = threading.Lock()
+    srv.calls, srv.ports, srv.fail_next, srv.batch_route = [], set(), {}, True
+    thread = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _client(srv, **kw) -> ApiClient:
+    kw.setdefault("backoff_sec", 0)
+    return ApiClient(f"http://127.0.0.1:{srv.server_address[1]}", "tok", **kw)
+
+
+def test_requests_reuse_keep_alive_connection(server):
+    client = _client(server)
+    for i in range(5):
+        data, status = client.request("GET", f"/api/projects/p{i}")
+        assert status == 200 and data["path"] == f"/api/projects/p{i}"
+    assert len(server.ports) == 1
+    assert all(auth == "Bearer tok" for *_, auth in server.calls)
+    client.close()
+
+
+def test_idempotent_request_retries_on_503(server):
+    client = _client(server, retries=2)
+    server.fail_next["/api/projects/p1/tasks"] = 2
+    data, status = client.request("GET", "/api/projects/p1/tasks")
+    assert status == 200
+    assert len(server.calls) == 3
+
+
+def test_post_is_not_retried_on_503(server):
+    client = _client(server, retries=2)
+    server.fail_next["/api/projects/p1/dialogue"] = 1
+    data, status = client.request("POST", "/api/projects/p1/dialogue", {"summary_human": "x"})
+    assert status == 503
+    assert len(server.calls) == 1
+
+
+def test_network_failure_returns_status_zero():
+    client = ApiClient("http://127.0.0.1:1", "tok", retries=1, backoff_sec=0)
+    assert client.request("GET", "/api/health", timeout=1) == (None, 0)
+
+
+def test_batch_uses_single_request(server):
+    client = _client(server)
+    ops = [{"method": "PATCH", "path": f"/api/projects/p1/tasks/T{i}", "body": {"status": "DONE"}} for i in range(3)]
+    results = client.batch(ops)
+    assert [status for _, status in results] == [200, 200, 200]
+    assert [data["path"] for data, _ in results] == [op["path"] for op in ops]
+    assert [c[:2] for c in server.calls] == [("POST", "/api/batch")]
+
+
+def test_batch_falls_back_to_individual_requests_without_route(server):
+    server.batch_route = False
+    client = _client(server)
+    ops = [{"method": "PATCH", "path": f"/api/projects/p1/tasks/T{i}", "body": {"status": "DONE"}} for i in range(2)]
+    results = client.batch(ops)
+    assert [data["method"] for data, _ in results] == ["PATCH", "PATCH"]
+    client.batch(ops)
+    # a rota ausente é lembrada: o segundo batch não tenta /api/batch de novo
+    assert [c[1] for c in server.calls].count("/api/batch") == 1
+
+
+class _DroppedConn:
+    """Conexão reaproveitada que o servidor derruba depois de receber a requisição."""
+
+    sock = None
+
+    def __init__(self, sent):
+        self._sent = sent
+
+    def request(self, method, url, body=None, headers=None):
+        self._sent.append(method)
+
+    def getresponse(self):
+        raise http.client.RemoteDisconnected("Remote end closed connection without response")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("method,expected_sends,expected_status", [("GET", 2, 200), ("POST", 1, 0)])
+def test_dropped_connection_is_resent_only_for_idempotent_methods(server, monkeypatch, method, expected_sends, expected_status):
+    client = _client(server, retries=0)
+    sent = []
+    real_acquire = client._acquire
+    conns = [_DroppedConn(sent)]
+
+    def acquire(timeout):
+        if conns:
+            return conns.pop(), True
+        sent.append(method)
+        return real_acquire(timeout)
+
+    monkeypatch.setattr(client, "_acquire", acquire)
+    _data, status = client.request(method, "/api/projects/p1/dialogue", {"summary_human": "x"})
+    assert status == expected_status and len(sent) == expected_sends
+    assert len(server.calls) == expected_sends - 1
+
+
+def test_idle_connection_closed_by_server_is_discarded_before_send(server):
+    client = _client(server)
+    ours, theirs = socket.socketpair()
+    dead = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    dead.sock = ours
+    theirs.close()
+    assert api_client._closed_by_peer(dead)
+    client._idle.append(dead)
+    data, status = client.request("POST", "/api/projects/p1/dialogue", {"summary_human": "x"})
+    assert status == 200 and len(server.calls) == 1
+    assert dead.sock is None  # descartada sem envio
+    client.close()
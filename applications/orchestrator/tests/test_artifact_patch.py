@@ -0,0 +1,147 @@
+"""
+Testes dos artifacts patch do rework do Dev (artifact_patch.py): unified diff e SEARCH/REPLACE
+tolerantes a deslocamento de linha, fallback para arquivo inteiro e gravação em apps/.
+"""
+import json
+
+import pytest
+
+from orchestrator.artifact_patch import PatchError, apply_patch, resolve_patch_artifacts
+
+_FILE = "".join(f"linha {n}\n" for n in range(1, 31))
+
+
+def test_unified_diff_with_shifted_line_numbers_and_trailing_spaces():
+    patch = (
+        "--- a/apps/src/x.ts\n+++ b/apps/src/x.ts\n"
+        "@@ -2,3 +2,3 @@\n linha 4\n-linha 5\n+linha CINCO\n linha 6   \n"
+        "@@ -20,2 +20,3 @@\n linha 25\n+linha 25b\n linha 26\n"
+    )
+    out = apply_patch(_FILE, patch)
+    assert "linha CINCO\nlinha 6\n" in out and "linha 5\n" not in out
+    assert "linha 25\nlinha 25b\nlinha 26\n" in out
+    assert out.count("\n") == 31
+    assert apply_patch("", "@@ -0,0 +1,2 @@\n+a\n+b\n") == "a\nb\n"
+
+
+def test_search_replace_blocks_and_failures():
+    patch = "<<<<<<< SEARCH\nlinha 3\nlinha 4\n=======\nnova\n>>>>>>> REPLACE\n<<<<<<< SEARCH\nlinha 30\n=======\n>>>>>>> REPLACE\n"
+    out = apply_patch(_FILE, patch)
+    assert out.startswith("linha 1\nlinha 2\nnova\nlinha 5\n") and out.endswith("linha 29\n")
+    with pytest.raises(PatchError, match="SEARCH não encontrado"):
+        apply_patch(_FILE, "<<<<<<< SEARCH\nnão existe\n=======\nx\n>>>>>>> REPLACE")
+    with pytest.raises(PatchError, match="hunk 1"):
+        apply_patch(_FILE, "@@ -1,2 +1,2 @@\n linha 1\n-linha 99\n+x\n")
+    with pytest.raises(PatchError, match="não reconhecido"):
+        apply_patch(_FILE, "reescreva a linha 3")
+
+
+def test_resolve_patch_artifacts_replaces_with_full_file_or_reports_error():
+    arts = [
+        {"path": "apps/src/x.ts", "format": "patch", "patch": "@@ -1,1 +1,1 @@\n-linha 1\n+LINHA 1\n"},
+        {"path": "apps/src/y.ts", "format": "patch", "patch": "@@ -1,1 +1,1 @@\n-zzz\n+w\n"},
+        {"path": "apps/src/z.ts", "content": "inteiro", "patch": "ignorado"},
+        {"path": "docs/dev/a.md", "patch": "@@ -1 +1 @@\n-a\n+b\n"},
+    ]
+    resolved, errors = resolve_patch_artifacts(arts, lambda path: _FILE)
+    assert resolved[0] == {"path": "apps/src/x.ts", "content": "LINHA 1\n" + _FILE[len("linha 1\n"):], "patched": True}
+    assert resolved[1] is arts[1] and resolved[2] is arts[2]
+    assert errors[0].startswith("artifact 'apps/src/y.ts': patch não aplicado") and "COMPLETO" in errors[0]
+    assert errors[1] == "artifact 'docs/dev/a.md': formato patch só é aceito para arquivos em apps/"
+
+
+def test_patch_apps_artifact_writes_on_disk(tmp_path, monkeypatch):
+    from orchestrator import project_storage as storage
+
+    monkeypatch.setenv("PROJECT_FILES_ROOT", str(tmp_path))
+    storage.write_apps_artifact("p1", "src/x.ts", _FILE)
+    assert storage.patch_apps_artifact("p1", "src/x.ts", "@@ -30,1 +30,1 @@\n-linha 30\n+fim\n") is not None
+    assert storage.read_apps_artifact("p1", "src/x.ts").endswith("linha 29\nfim\n")
+    # hunk que não casa: arquivo intacto
+    assert storage.patch_apps_artifact("p1", "src/x.ts", "@@ -1 +1 @@\n-nada\n+x\n") is None
+    assert storage.read_apps_artifact("p1", "src/x.ts").startswith("linha 1\n")
+    assert storage.read_apps_artifact("p1", "../fora.ts") is None
+
+
+def test_dev_rework_patch_is_resolved_and_failed_hunk_falls_back_to_full_file(monkeypatch):
+    from orchestrator.agents import mock_llm, runtime
+
+    code = "".join(f"export const v{n} = {n};\n" for n in range(1, 40))
+    doc = "# Implementação TSK-1\n\nCorrigido o valor de v3 conforme apontado pelo QA no rework.\n"
+    sent = []
+
+    def _env(artifacts):
+        return "<response>" + json.dumps({
+            "status": "OK", "summary": "Rework aplicado.", "artifacts": artifacts,
+            "evidence": [{"type": "test", "ref": "npm test"}], "next_actions": {"owner": "QA"},
+        }) + "</response>"
+
+    responses = [
+        _env([
+            {"path": "apps/src/v.ts", "format": "patch",
+             "patch": "@@ -3,1 +3,1 @@\n-export const v3 = 3;\n+export const v3 = 33;\n"},
+            {"path": "apps/src/w.ts", "format": "patch", "patch": "@@ -1 +1 @@\n-inexistente\n+x\n"},
+            {"path": "docs/dev/dev_implementation_TSK-1.md", "content": doc},
+        ]),
+        _env([{"path": "apps/src/w.ts", "content": code.replace("v1 ", "w1 ")}]),
+    ]
+
+    class _Scripted(mock_llm.MockLLMClient):
+        def respond(self, create_kw):
+            sent.append(create_kw["messages"][0]["content"])
+            return responses[len(sent) - 1]
+
+    monkeypatch.setenv("GENESIS_LLM_PROVIDER", "mock")
+    monkeypatch.setattr(mock_llm, "MockLLMClient", _Scripted)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_LATENCY_MS", 0)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_TOKENS_PER_SEC", 0)
+    message = {
+        "request_id": "r1", "mode": "implement_task", "task_id": "TSK-1",
+        "inputs": {"rework_attempt": 1},
+        "existing_artifacts": [{"path": "apps/src/v.ts", "content": code}, {"path": "apps/src/w.ts", "content": code}],
+    }
+    out = runtime.run_agent("unused.md", message, role="DEV", system_prompt_override="Você é o Dev.")
+    assert "Formato patch (rework)" in sent[0]
+    assert out["validator_pass"] is True
+    arts = {a["path"]: a for a in out["artifacts"]}
+    assert arts["apps/src/v.ts"]["content"] == code.replace("v3 = 3;", "v3 = 33;") and arts["apps/src/v.ts"]["patched"]
+    assert "patch" not in arts["apps/src/v.ts"]
+    # hunk que falhou: repair direcionado pediu o arquivo inteiro
+    assert "Patch enviado (não aplicou)" in sent[1]
+    assert arts["apps/src/w.ts"]["content"].startswith("export const w1 = 1;")
+
+
+def test_openai_path_sends_failed_patch_back_to_repair(monkeypatch):
+    from types import SimpleNamespace
+
+    from orchestrator.agents import llm_clients, runtime
+
+    code = "".join(f"x{n}\n" for n in range(1, 20))
+    responses = [
+        json.dumps({"status": "OK", "summary": "Rework.", "evidence": [{"ref": "t"}], "artifacts": [
+            {"path": "apps/src/a.ts", "format": "patch", "patch": "@@ -1 +1 @@\n-x1\n+y1\n"},
+            {"path": "apps/src/b.ts", "format": "patch", "patch": "@@ -1 +1 @@\n-nada\n+y\n"},
+        ]}),
+        json.dumps({"status": "OK", "summary": "Arquivo inteiro.", "evidence": [{"ref": "t"}],
+                    "artifacts": [{"path": "apps/src/b.ts", "content": "z\n" + code}]}),
+    ]
+    sent = []
+
+    def _create(**kw):
+        sent.append(kw["messages"][1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=responses[len(sent) - 1]))],
+                               usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5))
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+    client.with_options = lambda **kw: client
+    monkeypatch.setattr(llm_clients, "get_openai_client", lambda *a, **kw: client)
+    monkeypatch.setattr(runtime, "_streaming_enabled", lambda: False)
+    message = {
+        "request_id": "r1", "mode": "implement_task", "inputs": {"rework_attempt": 1},
+        "existing_artifacts": [{"path": "apps/src/a.ts", "content": code}, {"path": "apps/src/b.ts", "content": code}],
+    }
+    out = runtime._run_agent_openai("unused.md", message, "DEV", "k", "gpt-4o", 30, system_prompt_override="Dev")
+    assert len(sent) == 2 and "Patch enviado (não aplicou)" in sent[1]
+    arts = {a["path"]: a["content"] for a in out["artifacts"]}
+    assert arts["apps/src/a.ts"].startswith("y1\nx2\n") and arts["apps/src/b.ts"].startswith("z\nx1\n")
+    assert out["validator_pass"] is True and out["_output_tokens"] == 10
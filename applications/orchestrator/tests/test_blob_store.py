@@ -0,0 +1,65 @@
+"""
+Testes do blob store dos checkpoints e do BlobBackedMap (blob_store.py): residência limitada por LRU,
+spill para os arquivos do projeto (mmap) ou blobs, tamanhos sem carregar conteúdo.
+"""
+import os
+
+from orchestrator.blob_store import BlobBackedMap, BlobStore, content_digest
+
+
+def test_blob_store_put_is_idempotent(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    sha = store.put("conteúdo")
+    assert sha == content_digest("conteúdo")
+    assert store.put("conteúdo") == sha
+    assert store.written == 1
+    assert store.get(sha) == "conteúdo"
+    assert store.prune({sha}) == 0
+    assert store.prune(set()) == 1
+
+
+def test_map_bounds_resident_contents_and_reloads(tmp_path):
+    m = BlobBackedMap(max_resident=25)
+    for n in range(5):
+        m[f"apps/f{n}.ts"] = f"const v{n} = '{n:0>4}';"  # 18 chars
+    assert len(m) == 5
+    assert m.loaded == 1 and m.resident_size <= 25
+    assert m.total_size == 5 * 18 and m.size("apps/f0.ts") == 18
+    assert m["apps/f0.ts"] == "const v0 = '0000';"
+    assert m.loaded == 1  # f0 voltou, f4 saiu
+    assert dict(m) == {f"apps/f{n}.ts": f"const v{n} = '{n:0>4}';" for n in range(5)}
+
+
+def test_map_spills_to_identical_project_file(tmp_path):
+    (tmp_path / "apps").mkdir()
+    page = tmp_path / "apps" / "page.tsx"
+    page.write_text("export default function P(){}")
+    m = BlobBackedMap(max_resident=10, files_root=lambda: tmp_path)
+    m["apps/page.tsx"] = "export default function P(){}"
+    m["apps/other.ts"] = "x"
+    assert m.stats()["spilled_to_files"] == 1
+    assert m._store is None  # nada foi para blob
+    assert m["apps/page.tsx"] == "export default function P(){}"
+    # arquivo reescrito no projeto depois do spill: vale a versão atual
+    m["apps/other.ts"] = "y"
+    st = page.stat()
+    page.write_text("export default function P(){ return 1 }")
+    os.utime(page, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert m["apps/page.tsx"] == "export default function P(){ return 1 }"
+    assert m.digest("apps/page.tsx") is None
+
+
+def test_map_digests_migrate_spilled_values_to_checkpoint_store(tmp_path):
+    m = BlobBackedMap(max_resident=5)
+    m["a"] = "conteúdo a"
+    m["b"] = "conteúdo b"
+    spill_dir = m._spill_dir
+    assert spill_dir and os.path.isdir(spill_dir)
+    store = BlobStore(tmp_path / "blobs")
+    refs = m.digests(store)
+    assert refs == {"a": content_digest("conteúdo a"), "b": content_digest("conteúdo b")}
+    assert store.written == 2
+    assert not os.path.exists(spill_dir)
+    restored = BlobBackedMap(store=store, refs=refs, sizes=m.sizes())
+    assert restored.loaded == 0 and restored.size("a") == len("conteúdo a")
+    assert restored["a"] == "conteúdo a"
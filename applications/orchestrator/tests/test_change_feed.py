@@ -0,0 +1,77 @@
+"""
+Testes do canal de mudanças do Monitor Loop (change_feed.py) e do GET condicional
+(If-None-Match) usado por _get_tasks / _get_project_status.
+"""
+import threading
+import time
+
+from orchestrator.change_feed import ProjectChangeFeed
+
+
+def test_local_notify_wakes_wait_early():
+    feed = ProjectChangeFeed("p1", request=None)
+    threading.Timer(0.05, feed.notify).start()
+    t0 = time.monotonic()
+    assert feed.wait(5) is True
+    assert time.monotonic() - t0 < 2
+    # evento consumido: próxima espera vai até o timeout
+    assert feed.wait(0.05) is False
+
+
+def test_notify_after_dispatch_skips_long_poll():
+    """Handoff Dev→QA síncrono: notify() + wait() volta na hora, sem ir à API."""
+    calls = []
+    feed = ProjectChangeFeed("p1", request=lambda path, timeout: (calls.append(path), ({}, 200))[1], long_poll=True)
+    feed.notify()
+    t0 = time.monotonic()
+    assert feed.wait(30) is True
+    assert time.monotonic() - t0 < 0.5 and calls == []
+
+
+def test_long_poll_primes_cursor_then_waits_with_since():
+    calls = []
+
+    def _request(path, timeout):
+        calls.append(path)
+        if "since=" not in path:
+            return {"version": "v1", "changed": False}, 200
+        return {"version": "v2", "changed": True}, 200
+
+    feed = ProjectChangeFeed("p1", request=_request, long_poll=True)
+    assert feed.wait(20) is True
+    assert calls == ["/api/projects/p1/changes", "/api/projects/p1/changes?since=v1&timeout=20"]
+    assert feed.version == "v2"
+
+
+def test_missing_endpoint_falls_back_to_interval():
+    calls = []
+
+    def _request(path, timeout):
+        calls.append(path)
+        return {"code": "NOT_FOUND"}, 404
+
+    feed = ProjectChangeFeed("p1", request=_request, long_poll=True)
+    assert feed.wait(0.05) is False
+    assert feed.wait(0.05) is False
+    assert len(calls) == 1  # não insiste após 404
+
+
+def test_conditional_get_reuses_cached_body(monkeypatch):
+    from orchestrator import runner
+
+    sent = []
+
+    def _fake_request(method, path, body=None, timeout=15, extra_headers=None, response_headers=None):
+        sent.append(dict(extra_headers or {}))
+        if extra_headers and extra_headers.get("If-None-Match") == 'W/"tasks-1-10"':
+            return None, 304
+        response_headers["etag"] = 'W/"tasks-1-10"'
+        return [{"taskId": "TSK-1", "status": "ASSIGNED"}], 200
+
+    monkeypatch.setattr(runner, "_api_request", _fake_request)
+    monkeypatch.setattr(runner, "_etag_cache", {})
+    first = runner._get_tasks("p1")
+    first[0]["status"] = "MUTATED"
+    second = runner._get_tasks("p1")
+    assert second == [{"taskId": "TSK-1", "status": "ASSIGNED"}]
+    assert sent[1] == {"If-None-Match": 'W/"tasks-1-10"'}
@@ -109,3 +109,138 @@ def test_singleton_loader(monkeypatch):
     a = cl.get_context_loader()
     b = cl.get_context_loader()
     assert a is b
+
+
+def _counting_loader(monkeypatch, **env):
+    """context_loader recarregado com as consultas ao PG trocadas por contadores."""
+    monkeypatch.setenv("CAG_ENABLED", "live")
+    monkeypatch.setenv("DATABASE_URL", "")
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    cl = _reload_loader_with_env()
+    calls = {"cache": 0, "bump": 0}
+
+    def _query(role, stack_key, project_id):
+        calls["cache"] += 1
+        return [{
+            "cache_key": f"cag:{role}:{stack_key}:checklist-bugs",
+            "category": "checklist",
+            "payload": {"bugChecklists": [{"slug": "b.1", "title": "Bug 1"}]},
+            "payload_tokens": 10,
+        }]
+
+    def _bump(keys, lesson_slugs=None):
+        calls["bump"] += 1
+
+    monkeypatch.setattr(cl, "_query_context_cache", _query)
+    monkeypatch.setattr(cl, "_bump_hits", _bump)
+    return cl, calls
+
+
+def test_package_cache_serves_repeated_loads(monkeypatch):
+    cl, calls = _counting_loader(monkeypatch)
+    loader = cl.ContextLoader()
+    first = loader.load(role="dev", stack_key="python-fastapi", project_id="p1")
+    second = loader.load(role="dev", stack_key="python-fastapi", project_id="p1")
+    assert calls["cache"] == 1
+    assert calls["bump"] == 2  # hits continuam contados
+    assert second.to_prompt_prefix() == first.to_prompt_prefix()
+    assert cl.context_cache_stats()["hits"] == 1
+    loader.load(role="dev", stack_key="python-fastapi", project_id="p2")
+    assert calls["cache"] == 2
+
+
+def test_package_cache_ttl_and_lru_eviction(monkeypatch):
+    cl, calls = _counting_loader(monkeypatch, CAG_CACHE_MAX_ENTRIES="2")
+    loader = cl.ContextLoader()
+    for role in ("dev", "qa", "pm"):
+        loader.load(role=role)
+    loader.load(role="dev")  # evictado (LRU com 2 entradas)
+    assert calls["cache"] == 4
+
+    cl._package_cache.ttl_sec = 0.0001
+    loader.load(role="cto")
+    import time
+    time.sleep(0.01)
+    loader.load(role="cto")  # expirado
+    assert calls["cache"] == 6
+
+
+def test_package_cache_disabled_with_zero_ttl(monkeypatch):
+    cl, calls = _counting_loader(monkeypatch, CAG_CACHE_TTL_SEC="0")
+    loader = cl.ContextLoader()
+    loader.load(role="dev")
+    loader.load(role="dev")
+    assert calls["cache"] == 2
+
+
+def test_invalidate_context_cache_filters(monkeypatch):
+    cl, calls = _counting_loader(monkeypatch)
+    loader = cl.ContextLoader()
+    loader.load(role="dev", stack_key="python-fastapi", project_id="p1")
+    loader.load(role="dev", stack_key="node-express", project_id="p2")
+    loader.load(role="qa", stack_key="python-fastapi", project_id="p1")
+    assert cl.invalidate_context_cache(role="dev", stack_key="node-express") == 1
+    assert cl.invalidate_context_cache(project_id="p1") == 2
+    assert cl.context_cache_stats()["size"] == 0
+    loader.load(role="qa", stack_key="python-fastapi", project_id="p1")
+    assert calls["cache"] == 4
+
+
+class _FakeCursor:
+    def __init__(self, log, fail=False):
+        self.log = log
+        self.fail = fail
+
+    def execute(self, sql, params=()):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.log.append((" ".join(sql.split()), list(params)))
+
+    def fetchone(self):
+        return (True,)
+
+
+def _hit_counter_env(monkeypatch, flush_sec="3600"):
+    monkeypatch.setenv("CAG_ENABLED", "live")
+    monkeypatch.setenv("DATABASE_URL", "postgresql://fake")
+    monkeypatch.setenv("CAG_HITS_FLUSH_SEC", flush_sec)
+    cl = _reload_loader_with_env()
+    log: list = []
+    state = {"fail": False}
+    monkeypatch.setattr(cl, "_pg_run", lambda work, default: work(_FakeCursor(log, state["fail"])))
+    return cl, log, state
+
+
+def test_hit_counter_aggregates_and_flushes_in_one_statement(monkeypatch):
+    cl, log, _ = _hit_counter_env(monkeypatch)
+    cl._bump_hits(["k1", "k2"], ["lesson-a"])
+    cl._bump_hits(["k1"], ["lesson-a", "lesson-b"])
+    assert log == []  # nada gravado no caminho do prompt
+    assert cl._hit_counter.pending() == ({"k1": 2, "k2": 1}, {"lesson-a": 2, "lesson-b": 1})
+    assert cl.flush_hits() is True
+    cache_sql, cache_params = log[0]
+    assert cache_sql.startswith("UPDATE context_cache AS c SET hits = c.hits + v.delta")
+    assert "FROM (VALUES (%s, %s::int), (%s, %s::int))" in cache_sql
+    assert cache_params == ["k1", 2, "k2", 1]
+    assert log[-1][0].startswith("UPDATE lessons_corpus AS l SET hit_count = l.hit_count + v.delta")
+    assert log[-1][1] == ["lesson-a", 2, "lesson-b", 1]
+    assert cl._hit_counter.pending() == ({}, {})
+
+
+def test_hit_counter_keeps_deltas_when_flush_fails(monkeypatch):
+    cl, log, state = _hit_counter_env(monkeypatch)
+    cl._bump_hits(["k1"])
+    state["fail"] = True
+    assert cl.flush_hits() is False
+    cl._bump_hits(["k1"])
+    assert cl._hit_counter.pending()[0] == {"k1": 2}
+    state["fail"] = False
+    assert cl.flush_hits() is True
+    assert log[0][1] == ["k1", 2]
+
+
+def test_hit_counter_zero_interval_writes_immediately(monkeypatch):
+    cl, log, _ = _hit_counter_env(monkeypatch, flush_sec="0")
+    cl._bump_hits(["k1"])
+    assert log and log[0][1] == ["k1", 1]
@@ -0,0 +1,87 @@
+"""
+Testes do parser tolerante de ResponseEnvelope em passada única (envelope_parser.py): aspas e
+quebras de linha cruas em content, backticks, truncamento e emissão de artifacts em stream.
+"""
+import json
+
+from orchestrator.envelope_parser import find_json_start, parse_envelope_text
+
+
+def _envelope(content_raw: str, extra: str = "") -> str:
+    return (
+        '<thinking>ok</thinking>\n<response>\n{"status": "OK", "summary": "s", "artifacts": ['
+        '{"path": "apps/src/a.ts", "content": "' + content_raw + '", "format": "ts"}' + extra +
+        '], "evidence": [{"type": "log", "ref": "x"}], "next_actions": {"owner": "QA"}}\n</response>'
+    )
+
+
+def test_valid_json_with_raw_newlines_uses_fast_path():
+    res = parse_envelope_text(_envelope("linha 1\nlinha 2\t\\\"q\\\""))
+    assert not res.tolerant and res.data["artifacts"][0]["content"] == 'linha 1\nlinha 2\t"q"'
+
+
+def test_unescaped_quotes_and_code_braces_in_content():
+    content = 'const o = { a: "x" },\n  b = "y";\nconsole.log(`${o.a}`, "fim")'
+    res = parse_envelope_text(_envelope(content, ', {"path": "docs/b.md", "content": "B \\"ok\\""}'))
+    assert res.tolerant and not res.truncated
+    arts = res.data["artifacts"]
+    assert [a["path"] for a in arts] == ["apps/src/a.ts", "docs/b.md"]
+    assert arts[0]["content"] == content and arts[0]["format"] == "ts"
+    assert arts[1]["content"] == 'B "ok"'
+    assert res.data["next_actions"] == {"owner": "QA"}
+
+
+def test_backtick_values_trailing_commas_and_escapes():
+    raw = '{"status": "OK", "summary": `feito "já"`, "artifacts": [{"path": "docs/a.md", "content": "\\ud83d\\ude00 \\d+",},],}'
+    res = parse_envelope_text(raw)
+    assert res.data["summary"] == 'feito "já"'
+    assert res.data["artifacts"][0]["content"] == "\U0001F600 \\d+"
+
+
+def test_truncated_output_keeps_partial_content_and_drops_partial_path():
+    raw = _envelope("x", ', {"path": "docs/b.md", "content": "parcial \\')
+    raw = raw[: raw.index("parcial") + len("parcial \\")]
+    res = parse_envelope_text(raw)
+    assert res.truncated
+    assert res.data["artifacts"][1] == {"path": "docs/b.md", "content": "parcial "}
+    cut = parse_envelope_text('{"status": "OK", "artifacts": [{"content": "abc", "path": "docs/b')
+    assert cut.data["artifacts"] == [{"content": "abc"}]
+
+
+def test_artifacts_are_streamed_in_order_once():
+    seen = []
+    content = 'x = "a", "b": 1'  # parece nova chave: força recomeço do scanner
+    res = parse_envelope_text(_envelope("primeiro") .replace('"format": "ts"}', '"format": "ts"}, {"path": "docs/c.md", "content": "' + content + '"}'), seen.append)
+    assert [a["path"] for a in seen] == ["apps/src/a.ts", "docs/c.md"]
+    assert res.data["artifacts"][1]["content"] == content
+
+
+def test_unrecoverable_and_missing_json():
+    assert parse_envelope_text('{"status": "OK", "artifacts": [{"content": invalid}]}').data is None
+    res = parse_envelope_text("sem json aqui")
+    assert res.data is None and res.start == -1
+    assert find_json_start('texto\n```json\n{"a": 1}\n```') == len("texto\n```json\n")
+    assert json.loads('{"a": 1}') == parse_envelope_text('```\n{"a": 1}\n```').data
+
+
+def test_raw_json_file_in_content_is_not_split_into_artifact_keys():
+    """package.json com aspas cruas: '"app",\n  "version":' não fecha content (regressão)."""
+    from orchestrator.envelope import TOLERANT_PARSE_WARNING, parse_response_envelope, validate_response_envelope_for_mode
+
+    pkg = '{\n  "name": "app",\n  "version": "1.0.0",\n  "type": "module",\n  "path": "dist"\n}'
+    doc = "# Implementação TSK-1\n\nCriado o package.json do app conforme a task."
+    raw = (
+        '<response>{"status": "OK", "summary": "Implementado.", "artifacts": ['
+        '{"path": "apps/package.json", "content": "' + pkg + '", "format": "json"}, '
+        '{"path": "docs/dev/dev_implementation_TSK-1.md", "content": ' + json.dumps(doc) + '}], '
+        '"evidence": [{"type": "test", "ref": "npm test"}], "next_actions": {"owner": "QA"}}</response>'
+    )
+    res = parse_envelope_text(raw)
+    assert res.tolerant
+    assert res.data["artifacts"][0] == {"path": "apps/package.json", "content": pkg, "format": "json"}
+    assert res.data["artifacts"][1]["content"] == doc
+
+    data, errors = parse_response_envelope(raw, "r1", require_artifacts=True, require_evidence_when_ok=True)
+    assert data["artifacts"][0]["content"] == pkg
+    assert errors == [TOLERANT_PARSE_WARNING]  # recuperado, mas segue para o repair (LEI 5)
+    assert validate_response_envelope_for_mode(data, "DEV", "implement_task", "TSK-1") == (True, [])
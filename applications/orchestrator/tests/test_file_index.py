@@ -0,0 +1,124 @@
+"""
+Testes do índice incremental de arquivos do projeto (file_index.py): refresh por stat-diff,
+hash sob demanda persistido, cache de conteúdo, glob e changed_since(snapshot).
+"""
+import os
+
+import pytest
+
+from orchestrator.file_index import INDEX_FILENAME, ProjectFileIndex, detect_language, get_file_index, reset_file_indexes
+
+
+@pytest.fixture(autouse=True)
+def _fresh_indexes():
+    reset_file_indexes()
+    yield
+    reset_file_indexes()
+
+
+def _tree(root):
+    (root / "apps" / "src" / "app" / "dashboard").mkdir(parents=True)
+    (root / "apps" / "src" / "app" / "page.tsx").write_text("export default function P(){}")
+    (root / "apps" / "src" / "app" / "dashboard" / "page.tsx").write_text("export default function D(){}")
+    (root / "apps" / "node_modules" / "x").mkdir(parents=True)
+    (root / "apps" / "node_modules" / "x" / "index.js").write_text("module.exports = 1")
+    (root / "docs").mkdir()
+    (root / "docs" / "qa_report_T1.md").write_text("QA_PASS")
+    (root / ".tasks-state.json").write_text("{}")
+
+
+def _touch(path, text):
+    """Reescreve com mtime garantidamente diferente (filesystems com resolução grossa)."""
+    st = path.stat()
+    path.write_text(text)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_refresh_indexes_tree_skipping_deps_and_state(tmp_path):
+    _tree(tmp_path)
+    idx = get_file_index(tmp_path)
+    assert idx.files() == [
+        "apps/src/app/dashboard/page.tsx",
+        "apps/src/app/page.tsx",
+        "docs/qa_report_T1.md",
+    ]
+    assert idx.entry("apps/src/app/page.tsx")["lang"] == "typescript"
+    assert (tmp_path / INDEX_FILENAME).exists()
+    # o próprio índice não se indexa
+    assert get_file_index(tmp_path).files() == idx.files()
+
+
+def test_glob_supports_recursive_and_flat_patterns(tmp_path):
+    _tree(tmp_path)
+    idx = get_file_index(tmp_path)
+    assert idx.glob("apps/src/**/app/**/page.tsx") == ["apps/src/app/dashboard/page.tsx", "apps/src/app/page.tsx"]
+    assert idx.glob("apps/src/**/dashboard/*.tsx") == ["apps/src/app/dashboard/page.tsx"]
+    assert idx.glob("docs/qa_report*.md") == ["docs/qa_report_T1.md"]
+    assert idx.glob("qa_report*.md") == []
+
+
+def test_unchanged_tree_is_not_reread(tmp_path):
+    _tree(tmp_path)
+    idx = get_file_index(tmp_path)
+    first = idx.read_text("apps/src/app/page.tsx")
+    hashed = idx.hashed
+    assert get_file_index(tmp_path).refresh() == 0
+    assert idx.read_text("apps/src/app/page.tsx") == first
+    assert idx.hashed == hashed  # veio do cache de conteúdo
+
+
+def test_modified_file_is_rehashed_and_reread(tmp_path):
+    _tree(tmp_path)
+    page = tmp_path / "apps" / "src" / "app" / "page.tsx"
+    idx = get_file_index(tmp_path)
+    idx.read_text("apps/src/app/page.tsx")
+    _touch(page, "export default function P(){ return 1 }")
+    assert idx.refresh() == 1
+    assert idx.read_text("apps/src/app/page.tsx").endswith("return 1 }")
+
+
+def test_hashes_persist_across_processes(tmp_path):
+    _tree(tmp_path)
+    idx = get_file_index(tmp_path)
+    snap = idx.snapshot("apps/src/")
+    # "outro processo": índice novo lido do disco não relê nada para o mesmo snapshot
+    other = ProjectFileIndex(tmp_path)
+    other.refresh()
+    assert other.snapshot("apps/src/") == snap
+    assert other.hashed == 0
+
+
+def test_changed_since_snapshot(tmp_path):
+    _tree(tmp_path)
+    src = tmp_path / "apps" / "src"
+    idx = get_file_index(tmp_path)
+    before = idx.snapshot("apps/src/")
+    idx.save_snapshot("pre-cyborg", "apps/src/")
+    _touch(src / "app" / "page.tsx", "export default function P(){ return 2 }")
+    # só o mtime muda: não é modificação
+    _touch(src / "app" / "dashboard" / "page.tsx", (src / "app" / "dashboard" / "page.tsx").read_text())
+    (src / "lib").mkdir()
+    (src / "lib" / "api.ts").write_text("export const api = 1;")
+    idx.refresh()
+    expected = {"added": ["lib/api.ts"], "removed": [], "modified": ["app/page.tsx"]}
+    assert idx.changed_since(before, "apps/src/") == expected
+    other = ProjectFileIndex(tmp_path)
+    other.refresh()
+    assert other.changed_since("pre-cyborg", "apps/src/") == expected
+
+
+def test_removed_file_leaves_index(tmp_path):
+    _tree(tmp_path)
+    idx = get_file_index(tmp_path)
+    (tmp_path / "docs" / "qa_report_T1.md").unlink()
+    assert idx.refresh() == 1
+    assert idx.glob("docs/*.md") == []
+    with pytest.raises(OSError):
+        idx.read_text("docs/qa_report_T1.md")
+
+
+def test_detect_language():
+    assert detect_language("apps/src/x.tsx") == "typescript"
+    assert detect_language("apps/Dockerfile") == "dockerfile"
+    assert detect_language("apps/.env.example") == "dotenv"
+    assert detect_language("README") is None
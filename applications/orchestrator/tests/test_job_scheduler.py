@@ -0,0 +1,266 @@
+"""
+Testes do scheduler de jobs pesados do full-test-server (scripts/job_scheduler.py) com um
+HostProbe falso: ordem da fila (prioridade, FIFO), tetos de slots/classe e memória,
+cancelamento na fila (assíncrono e slot síncrono), status/snapshot e a ordem ponta a ponta com
+as prioridades que os chamadores reais enviam (payload do api-node, header do Cyborg).
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+
+from job_scheduler import JobCancelled, JobScheduler  # noqa: E402
+
+
+class _FakeProbe:
+    def __init__(self, mem_mb=None, load=None):
+        self.mem_mb = mem_mb
+        self.load = load
+
+    def mem_available_mb(self):
+        return self.mem_mb
+
+    def load_per_cpu(self):
+        return self.load
+
+
+def _scheduler(probe=None, **kw):
+    kw.setdefault("max_running", 1)
+    kw.setdefault("class_caps", {})
+    kw.setdefault("costs_mb", {"s3-deploy": 1000, "backend-deploy": 2000, "cyborg-build": 500})
+    return JobScheduler(probe=probe or _FakeProbe(), mem_reserve_mb=0, tick_sec=0.02, **kw)
+
+
+def _wait(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condição não atingida"
+        time.sleep(0.01)
+
+
+def _blocking(order, release):
+    def fn(job):
+        order.append(job.job_id)
+        release.wait(5)
+    return fn
+
+
+def test_queue_order_priority_then_fifo():
+    sched = _scheduler()
+    order, release = [], threading.Event()
+    sched.submit("s3-deploy", _blocking(order, release), job_id="a")
+    _wait(lambda: order == ["a"])
+    for job_id, prio in (("b", "normal"), ("c", "unblock"), ("d", "normal"), ("e", "speculative")):
+        sched.submit("s3-deploy", _blocking(order, release), job_id=job_id, priority=prio)
+    queued = sched.snapshot()["queued"]
+    assert [j["job_id"] for j in queued] == ["c", "b", "d", "e"]
+    assert [j["position"] for j in queued] == [1, 2, 3, 4]
+    assert all(j["blocked_by"] == "slots" for j in queued)
+    release.set()
+    _wait(lambda: len(order) == 5)
+    assert order == ["a", "c", "b", "d", "e"]
+
+
+def test_class_cap_does_not_hold_other_classes():
+    sched = _scheduler(max_running=3, class_caps={"backend": 1, "heavy": 2})
+    order, release = [], threading.Event()
+    sched.submit("backend-deploy", _blocking(order, release), job_id="b1")
+    sched.submit("backend-deploy", _blocking(order, release), job_id="b2")
+    sched.submit("s3-deploy", _blocking(order, release), job_id="s1")
+    _wait(lambda: sorted(order) == ["b1", "s1"])
+    assert sched.status("b2")["blocked_by"] == "cap:backend"
+    release.set()
+    _wait(lambda: len(order) == 3)
+
+
+def test_memory_blocks_head_and_holds_jobs_behind_it():
+    probe = _FakeProbe(mem_mb=1500)
+    sched = _scheduler(probe, max_running=4, warmup_sec=0)
+    order, release = [], threading.Event()
+    sched.submit("cyborg-build", _blocking(order, release), job_id="first")  # host ocioso: entra sempre
+    _wait(lambda: order == ["first"])
+    sched.submit("backend-deploy", _blocking(order, release), job_id="big")   # 2000MB > 1500MB livres
+    sched.submit("cyborg-build", _blocking(order, release), job_id="small")  # cabe, mas fica atrás
+    assert sched.status("big")["blocked_by"].startswith("mem:")
+    assert sched.status("small")["blocked_by"] == "behind:big"
+    probe.mem_mb = 8000
+    _wait(lambda: len(order) == 3)  # big e small entram no mesmo pump
+    assert set(order) == {"first", "big", "small"}
+    release.set()
+
+
+def test_cpu_load_blocks_admission():
+    probe = _FakeProbe(mem_mb=8000, load=3.0)
+    sched = _scheduler(probe, max_running=2, load_max=1.5)
+    order, release = [], threading.Event()
+    sched.submit("s3-deploy", _blocking(order, release), job_id="a")
+    sched.submit("s3-deploy", _blocking(order, release), job_id="b")
+    _wait(lambda: order == ["a"])
+    assert sched.status("b")["blocked_by"] == "cpu:3.00"
+    probe.load = 0.5
+    _wait(lambda: order == ["a", "b"])
+    release.set()
+
+
+def test_cancel_while_queued():
+    sched = _scheduler()
+    order, release = [], threading.Event()
+    sched.submit("s3-deploy", _blocking(order, release), job_id="a")
+    queued = sched.submit("s3-deploy", _blocking(order, release), job_id="b")
+    _wait(lambda: order == ["a"])
+    with pytest.raises(PermissionError):
+        sched.cancel("b", "token-errado")
+    st = sched.cancel("b", queued.cancel_token)
+    assert st["state"] == "cancelled" and st["cancel_requested"]
+    assert sched.cancel("zzz", "x") is None
+    release.set()
+    _wait(lambda: sched.status("a")["state"] == "done")
+    time.sleep(0.05)
+    assert order == ["a"] and sched.status("b")["state"] == "cancelled"
+
+
+def test_running_job_gets_cancel_event():
+    sched = _scheduler()
+    seen = threading.Event()
+
+    def fn(job):
+        seen.set()
+        job.cancel_event.wait(5)
+
+    job = sched.submit("s3-deploy", fn, job_id="a")
+    seen.wait(2)
+    st = sched.cancel("a", job.cancel_token)
+    assert st["state"] == "running" and st["cancel_requested"] and st["cancellable"]
+    _wait(lambda: sched.status("a")["state"] == "done")
+
+
+def test_sync_slot_cancelled_in_queue_raises_and_running_slot_is_not_cancellable():
+    sched = _scheduler()
+    errors, slot_jobs = [], {}
+    with sched.slot("cyborg-build", job_id="s1") as running:
+        assert sched.cancel("s1", running.cancel_token)["cancellable"] is False
+        assert not running.cancel_event.is_set()
+
+        def _waiter():
+            try:
+                with sched.slot("cyborg-build", job_id="s2", wait_timeout=5):
+                    pass
+            except JobCancelled as e:
+                errors.append(e)
+
+        t = threading.Thread(target=_waiter)
+        t.start()
+        _wait(lambda: (sched.status("s2") or {}).get("state") == "queued")
+        slot_jobs["s2"] = next(j for j in sched._queue if j.job_id == "s2")
+        sched.cancel("s2", slot_jobs["s2"].cancel_token)
+        t.join(2)
+    assert len(errors) == 1 and "s2" in str(errors[0])
+
+
+def test_status_and_snapshot():
+    probe = _FakeProbe(mem_mb=4096, load=0.2)
+    sched = _scheduler(probe)
+    order, release = [], threading.Event()
+    sched.submit("s3-deploy", _blocking(order, release), job_id="a")
+    sched.submit("backend-deploy", _blocking(order, release), job_id="b")
+    _wait(lambda: order == ["a"])
+    running, queued = sched.status("a"), sched.status("b")
+    assert running["state"] == "running" and running["expected_sec"] > 0
+    assert queued["position"] == 1 and queued["eta_sec"] > 0
+    assert sched.status("nope") is None
+    snap = sched.snapshot()
+    assert [j["job_id"] for j in snap["running"]] == ["a"]
+    assert snap["host"]["mem_available_mb"] == 4096 and snap["host"]["load_per_cpu"] == 0.2
+    assert snap["limits"]["max_running"] == 1
+    release.set()
+    _wait(lambda: [j["job_id"] for j in sched.snapshot()["recent"]] == ["a", "b"])
+    assert all(j["state"] == "done" for j in sched.snapshot()["recent"])
+
+
+def test_s3_deploy_stops_between_steps_when_cancelled(monkeypatch, tmp_path):
+    import s3_deploy_runner as runner
+
+    callbacks, cancel = [], threading.Event()
+
+    def _clone(url, token, branch, dst, deployment_id):
+        dst.mkdir(parents=True)
+        cancel.set()  # cancelamento chega durante o clone
+
+    monkeypatch.setattr(runner.tempfile, "gettempdir", lambda: str(tmp_path))
+    monkeypatch.setattr(runner, "_git_clone", _clone)
+    monkeypatch.setattr(runner, "_callback", lambda *a: callbacks.append(a[-1]))
+    monkeypatch.setattr(runner, "_run", lambda *a, **kw: pytest.fail("não deveria instalar depois do cancel"))
+    out = runner.run_s3_deploy({
+        "deployment_id": "d1", "project_dir": "", "bucket_name": "b", "deployment_type": "vite",
+        "genesis_api_url": "http://api", "genesis_token": "t", "aws_s3_access_key_id": "k",
+        "aws_s3_secret_access_key": "s", "project_id": "p1", "git_clone_url": "https://x/r.git",
+        "git_installation_token": "gt",
+    }, cancel_event=cancel)
+    assert out["ok"] is False and out["code"] == "CANCELLED"
+    assert callbacks[-1]["status"] == "failed" and callbacks[-1]["error_code"] == "CANCELLED"
+    assert not (tmp_path / "build-d1").exists()
+
+
+def test_callers_priorities_order_the_full_test_server_queue(monkeypatch):
+    """Ponta a ponta: payloads de deploy (priority do api-node) e header do Cyborg na fila real do servidor."""
+    import importlib.util
+    import json
+    import urllib.request
+
+    import s3_deploy_runner
+    from orchestrator import cyborg_v3
+
+    spec = importlib.util.spec_from_file_location(
+        "full_test_server", Path(__file__).resolve().parents[3] / "scripts" / "full-test-server.py")
+    fts = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(fts)
+
+    order, release = [], threading.Event()
+
+    def _deploy(payload, cancel_event=None):
+        order.append(payload["deployment_id"][:8])
+        release.wait(5)
+
+    def _build(handler):
+        order.append("build")
+        handler._json(200, {"build_output": "", "build_rc": 0})
+
+    monkeypatch.setattr(fts, "SCHEDULER", _scheduler())
+    monkeypatch.setattr(s3_deploy_runner, "run_s3_deploy", _deploy)
+    monkeypatch.setattr(fts.Handler, "_handle_cyborg_build", _build)
+    server = fts.ThreadedHTTPServer(("127.0.0.1", 0), fts.Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def _launch(deployment_id, priority):
+        payload = {
+            "project_id": "p1", "project_dir": "/tmp/p1", "deployment_id": deployment_id, "bucket_name": "b",
+            "deployment_type": "vite", "genesis_api_url": "http://api", "genesis_token": "t",
+            "aws_s3_access_key_id": "k", "aws_s3_secret_access_key": "s", "priority": priority,
+        }
+        req = urllib.request.Request(f"{url}/launch-s3-deploy", data=json.dumps(payload).encode(), method="POST")
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            assert resp.status == 202
+
+    try:
+        _launch("running0-x", "normal")
+        _wait(lambda: order == ["running0"])
+        _launch("cyborg00-x", "normal")  # deploy disparado pelo Cyborg
+        _launch("portal00-x", "high")    # deploy pedido no portal (s3DeployPriority)
+        build = threading.Thread(target=cyborg_v3._http, args=("POST", f"{url}/cyborg-build", {"project_id": "p1"}),
+                                 kwargs={"extra_headers": {"X-Job-Priority": cyborg_v3.FTS_BUILD_PRIORITY}})
+        build.start()
+        _wait(lambda: len(fts.SCHEDULER.snapshot()["queued"]) == 3)
+        assert [j["job_id"] for j in fts.SCHEDULER.snapshot()["queued"]][0] == "portal00"
+        release.set()
+        build.join(5)
+        _wait(lambda: len(order) == 4)
+        assert order == ["running0", "portal00", "build", "cyborg00"]
+    finally:
+        release.set()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,93 @@
+"""
+Testes do registry de clientes LLM (agents/llm_clients): reuso por chave, isolamento por
+credencial/tenant, limite LRU e expiração por ociosidade.
+"""
+
+
+def _registry(**kw):
+    from orchestrator.agents.llm_clients import LLMClientRegistry
+    return LLMClientRegistry(**kw)
+
+
+def test_same_key_reuses_client():
+    reg = _registry(max_size=4)
+    calls = []
+    factory = lambda: calls.append(1) or object()
+    a = reg.get_or_create(("bedrock", "us-east-1", "fp", "", ""), factory)
+    b = reg.get_or_create(("bedrock", "us-east-1", "fp", "", ""), factory)
+    assert a is b
+    assert len(calls) == 1
+    assert reg.stats()["hits"] == 1 and reg.stats()["misses"] == 1
+
+
+def test_distinct_credentials_and_tenants_are_isolated():
+    from orchestrator.agents.llm_clients import _fingerprint
+    reg = _registry(max_size=8)
+    k1 = ("bedrock", "us-east-1", _fingerprint("AK1", "SK1"), "", "")
+    k2 = ("bedrock", "us-east-1", _fingerprint("AK2", "SK2"), "", "")
+    k3 = ("bedrock", "us-east-1", _fingerprint("AK1", "SK1"), "", "tenant-b")
+    clients = {reg.get_or_create(k, object) for k in (k1, k2, k3)}
+    assert len(clients) == 3
+
+
+def test_fingerprint_never_contains_secret():
+    from orchestrator.agents.llm_clients import _fingerprint
+    fp = _fingerprint("AKIAEXAMPLE", "super-secret")
+    assert "super-secret" not in fp and "AKIA" not in fp
+    assert len(fp) == 16
+    assert _fingerprint("", None) == ""
+
+
+def test_lru_bound_evicts_oldest():
+    reg = _registry(max_size=2)
+    a = reg.get_or_create(("anthropic", "", "", "a", ""), object)
+    reg.get_or_create(("anthropic", "", "", "b", ""), object)
+    reg.get_or_create(("anthropic", "", "", "a", ""), object)  # a vira o mais recente
+    reg.get_or_create(("anthropic", "", "", "c", ""), object)  # despeja b
+    assert reg.stats()["size"] == 2
+    assert reg.get_or_create(("anthropic", "", "", "a", ""), object) is a
+    assert reg.stats()["evictions"] == 1
+
+
+def test_idle_entries_expire():
+    now = [1000.0]
+    reg = _registry(max_size=4, idle_ttl_sec=60, clock=lambda: now[0])
+    first = reg.get_or_create(("openai", "", "", "k", ""), object)
+    now[0] += 61
+    second = reg.get_or_create(("openai", "", "", "k", ""), object)
+    assert first is not second
+    assert reg.stats()["evictions"] == 1
+
+
+def test_tenant_scope_from_llm_config():
+    from orchestrator.agents.llm_clients import tenant_scope
+    assert tenant_scope(None) == ""
+    assert tenant_scope({"tenant_id": " t-1 "}) == "t-1"
+    assert tenant_scope({"tenantId": "t-2"}) == "t-2"
+
+
+def test_runner_envelope_scopes_clients_per_tenant(monkeypatch):
+    """Mesmas credenciais AWS, tenants diferentes: o envelope do runner leva o tenant e o agents isola."""
+    from orchestrator.agents import llm_clients
+    from orchestrator.runner import _build_message_envelope
+
+    monkeypatch.setattr(llm_clients, "_registry", _registry(max_size=8))
+    monkeypatch.setenv("GENESIS_LLM_PROVIDER", "bedrock")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AK1")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "SK1")
+    monkeypatch.setenv("PROJECT_ID", "proj-1")
+
+    clients = {}
+    for tenant in ("tenant-a", "tenant-b", "tenant-a"):
+        monkeypatch.setenv("GENESIS_TENANT_ID", tenant)
+        cfg = _build_message_envelope("r1", "Dev", "", "implement_task", "t1", "x", {})["llm_config"]
+        assert cfg["tenant_id"] == tenant
+        scope = llm_clients.tenant_scope(cfg)
+        clients.setdefault(tenant, []).append(llm_clients.get_bedrock_client(
+            cfg["aws_region"], cfg["aws_access_key_id"], cfg["aws_secret_access_key"], scope=scope))
+    assert clients["tenant-a"][0] is clients["tenant-a"][1]
+    assert clients["tenant-a"][0] is not clients["tenant-b"][0]
+
+    monkeypatch.delenv("GENESIS_TENANT_ID")
+    cfg = _build_message_envelope("r2", "Dev", "", "implement_task", "t1", "x", {})["llm_config"]
+    assert cfg["tenant_id"] == "proj-1"  # sem tenant resolvido: isola pelo projeto
@@ -0,0 +1,170 @@
+"""
+Testes do pool PostgreSQL compartilhado (pg_pool.py) com um driver falso no formato psycopg2:
+reuso de conexão, descarte + retry em erro de conexão, health check e statements preparados.
+"""
+import types
+
+import pytest
+
+from orchestrator.pg_pool import PgPool, PgUnavailable, execute_prepared, pg_run
+
+
+class _OperationalError(Exception):
+    pass
+
+
+class _InterfaceError(Exception):
+    pass
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=()):
+        if self.connection.fail_next:
+            self.connection.fail_next -= 1
+            self.connection.closed = 1
+            raise _OperationalError("server closed the connection unexpectedly")
+        self.connection.log.append((" ".join(sql.split()), tuple(params)))
+
+    def fetchall(self):
+        return [("row",)]
+
+    def fetchone(self):
+        return (1,)
+
+
+class _FakeConn:
+    def __init__(self, driver):
+        self.closed = 0
+        self.fail_next = driver.fail_next_conn
+        driver.fail_next_conn = 0
+        self.log = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        if self.closed:
+            raise _InterfaceError("connection already closed")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+def _driver():
+    drv = types.SimpleNamespace(
+        __name__="psycopg2",
+        OperationalError=_OperationalError,
+        InterfaceError=_InterfaceError,
+        conns=[],
+        fail_next_conn=0,
+    )
+
+    def connect(dsn, **kw):
+        conn = _FakeConn(drv)
+        drv.conns.append(conn)
+        return conn
+
+    drv.connect = connect
+    return drv
+
+
+def _select(cur):
+    cur.execute("SELECT 1")
+    return cur.fetchall()
+
+
+def test_run_reuses_pooled_connection():
+    drv = _driver()
+    pool = PgPool("postgresql://x", driver=drv, healthcheck_sec=0)
+    for _ in range(3):
+        assert pool.run(_select) == [("row",)]
+    assert len(drv.conns) == 1
+    assert drv.conns[0].commits == 3
+
+
+def test_sql_error_rolls_back_and_keeps_connection():
+    drv = _driver()
+    pool = PgPool("postgresql://x", driver=drv, healthcheck_sec=0)
+
+    def _bad(cur):
+        raise ValueError("syntax error")
+
+    with pytest.raises(ValueError):
+        pool.run(_bad)
+    assert drv.conns[0].rollbacks == 1
+    pool.run(_select)
+    assert len(drv.conns) == 1
+
+
+def test_connection_error_discards_and_retries_on_new_connection():
+    drv = _driver()
+    pool = PgPool("postgresql://x", driver=drv, healthcheck_sec=0)
+    drv.fail_next_conn = 1
+    assert pool.run(_select, retries=1) == [("row",)]
+    assert len(drv.conns) == 2
+    assert drv.conns[0].closed
+
+
+def test_connection_error_without_retries_raises_unavailable():
+    drv = _driver()
+    pool = PgPool("postgresql://x", driver=drv, healthcheck_sec=0)
+    drv.fail_next_conn = 1
+    with pytest.raises(PgUnavailable):
+        pool.run(_select, retries=0)
+
+
+def test_stale_idle_connection_is_health_checked():
+    drv = _driver()
+    pool = PgPool("postgresql://x", driver=drv, healthcheck_sec=0.0001)
+    pool.run(_select)
+    drv.conns[0].fail_next = 1  # o SELECT 1 do health check falha
+    import time
+    time.sleep(0.01)
+    pool.run(_select)
+    assert len(drv.conns) == 2
+
+
+def test_execute_prepared_prepares_once_per_connection():
+    drv = _driver()
+    pool = PgPool("postgresql://x", driver=drv, healthcheck_sec=0)
+    sql = "SELECT a FROM t WHERE role = %s AND project_id = %s::uuid LIMIT %s"
+
+    def _work(cur):
+        execute_prepared(cur, "q_test", sql, ("dev", "p1", 5))
+        return cur.fetchall()
+
+    pool.run(_work)
+    pool.run(_work)
+    log = drv.conns[0].log
+    assert log[0] == ("PREPARE q_test AS SELECT a FROM t WHERE role = $1 AND project_id = $2::uuid LIMIT $3", ())
+    assert log[1:] == [("EXECUTE q_test (%s, %s, %s)", ("dev", "p1", 5))] * 2
+
+
+def test_pg_run_returns_default_without_dsn(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "")
+    assert pg_run(_select, default=[]) == []
+
+
+def test_pg_run_returns_default_when_driver_missing(monkeypatch):
+    import orchestrator.pg_pool as pg_pool
+    monkeypatch.setattr(pg_pool, "_load_driver", lambda: None)
+    pg_pool.reset_pg_pools()
+    try:
+        assert pg_run(_select, default="fallback", dsn="postgresql://nodriver") == "fallback"
+    finally:
+        pg_pool.reset_pg_pools()
@@ -118,3 +118,62 @@ def test_pipeline_context_lei11_save_and_load_checkpoint(tmp_path):
 def test_pipeline_context_lei11_load_checkpoint_missing_returns_none(tmp_path):
     from orchestrator.pipeline_context import PipelineContext
     assert PipelineContext.load_checkpoint(tmp_path, "nonexistent-project") is None
+
+
+def test_pipeline_context_lei11_checkpoint_writes_only_delta(tmp_path, monkeypatch):
+    """Checkpoint content-addressed: metadados pequenos e só blobs novos a cada save."""
+    import json
+    from orchestrator import blob_store
+    from orchestrator.pipeline_context import PipelineContext
+    written = []
+    real_put = blob_store.BlobStore.put
+    monkeypatch.setattr(blob_store.BlobStore, "put", lambda self, content, sha=None: (written.append(content), real_put(self, content, sha))[1])
+    ctx = PipelineContext("proj-delta")
+    ctx.set_charter("charter")
+    for n in range(5):
+        ctx.add_artifact(f"apps/f{n}.ts", f"export const v{n} = {n};")
+    ctx.save_checkpoint(tmp_path)
+    assert len(written) == 6
+    meta = json.loads((tmp_path / "proj-delta" / "checkpoint.json").read_text())
+    assert "export const" not in json.dumps(meta)
+    written.clear()
+    ctx.save_checkpoint(tmp_path)
+    assert written == []
+    ctx.add_artifact("apps/f1.ts", "export const v1 = 100;")
+    ctx.register_connect_artifact("project/connect/x.json", "{}")
+    ctx.save_checkpoint(tmp_path)
+    # connect artifact também entra em artifacts: mesmo conteúdo → mesmo sha (um put por mapa, um blob)
+    assert sorted(written) == ["export const v1 = 100;", "{}", "{}"]
+
+
+def test_pipeline_context_lei11_load_checkpoint_is_lazy(tmp_path):
+    from orchestrator.pipeline_context import PipelineContext
+    ctx = PipelineContext("proj-lazy")
+    ctx.add_artifact("apps/a.ts", "code a")
+    ctx.add_artifact("apps/b.ts", "code b")
+    ctx.save_checkpoint(tmp_path)
+    ctx.add_artifact("apps/a.ts", "code a v2")
+    ctx.save_checkpoint(tmp_path)
+    loaded = PipelineContext.load_checkpoint(tmp_path, "proj-lazy")
+    assert "apps/b.ts" in loaded.artifacts and loaded.artifacts.loaded == 0
+    assert loaded.get_dependency_code(["apps/a.ts"]) == {"apps/a.ts": "code a v2"}
+    assert loaded.artifacts.loaded == 1
+    # blob da versão antiga de a.ts foi podado no load
+    blobs = [p for p in (tmp_path / "proj-lazy" / "blobs").rglob("*.z")]
+    assert len(blobs) == 2
+
+
+def test_pipeline_context_lei11_loads_legacy_inline_checkpoint(tmp_path):
+    import json
+    from orchestrator.pipeline_context import PipelineContext
+    (tmp_path / "proj-old").mkdir()
+    (tmp_path / "proj-old" / "checkpoint.json").write_text(json.dumps({
+        "project_id": "proj-old", "charter": "old charter", "current_step": 3,
+        "artifacts": {"apps/a.ts": "code a"}, "completed_tasks": ["T1"],
+    }))
+    loaded = PipelineContext.load_checkpoint(tmp_path, "proj-old")
+    assert loaded.charter == "old charter"
+    assert loaded.artifacts["apps/a.ts"] == "code a"
+    loaded.save_checkpoint(tmp_path)
+    again = PipelineContext.load_checkpoint(tmp_path, "proj-old")
+    assert again.charter == "old charter" and again.artifacts["apps/a.ts"] == "code a"
@@ -55,3 +55,59 @@ def test_write_apps_artifact_success(storage_root):
     out = write_apps_artifact("p2", "src/index.js", "console.log('hi');")
     assert out is not None
     assert (get_apps_dir("p2") / "src" / "index.js").read_text() == "console.log('hi');"
+
+
+def test_manifest_appends_to_log_and_reads_merged(storage_root):
+    import json
+    from orchestrator.project_storage import MANIFEST_LOG_FILENAME, get_docs_dir, read_manifest, write_doc
+    write_doc("p3", "cto", "charter", "# Charter", title="Project Charter")
+    write_doc("p3", "pm", "backlog", "# Backlog")
+    log = (get_docs_dir("p3") / MANIFEST_LOG_FILENAME).read_text().splitlines()
+    assert [json.loads(line)["creator"] for line in log] == ["cto", "pm"]
+    entries = read_manifest("p3")
+    assert [e["title"] for e in entries] == ["Project Charter", "backlog"]
+
+
+def test_manifest_batch_writes_single_append(storage_root, monkeypatch):
+    from orchestrator import project_storage as storage
+    calls = []
+    real = storage._append_manifest_log
+    monkeypatch.setattr(storage, "_append_manifest_log", lambda d, entries: (calls.append(len(entries)), real(d, entries)))
+    with storage.manifest_batch("p4"):
+        storage.write_doc("p4", "dev", "implementation", "impl")
+        with storage.manifest_batch("p4"):  # reentrante: só o bloco externo grava
+            storage.write_doc_by_path("p4", "dev", "api/contract.md", "# API")
+        assert calls == []
+    assert calls == [2]
+    assert [e["filename"] for e in storage.read_manifest("p4")] == ["dev_implementation.md", "docs/api/contract.md"]
+
+
+def test_manifest_compaction_keeps_entries_and_dedupes(storage_root, monkeypatch):
+    import json
+    from orchestrator import project_storage as storage
+    monkeypatch.setattr(storage, "MANIFEST_COMPACT_BYTES", 400)
+    for n in range(6):
+        storage.write_doc("p5", "qa", f"report_{n}", "ok")
+    docs = storage.get_docs_dir("p5")
+    snapshot = json.loads((docs / storage.MANIFEST_FILENAME).read_text())
+    assert snapshot  # compactou pelo menos uma vez
+    assert [e["filename"] for e in storage.read_manifest("p5")] == [f"qa_report_{n}.md" for n in range(6)]
+    # compactação interrompida antes de truncar o log: entradas repetidas não duplicam
+    with open(docs / storage.MANIFEST_LOG_FILENAME, "a") as f:
+        f.write(json.dumps(snapshot[0]) + "\n" + '{"filename": "trunc')
+    assert len(storage.read_manifest("p5")) == 6
+
+
+def test_manifest_keeps_every_append_across_compaction(storage_root, monkeypatch):
+    from orchestrator import project_storage as storage
+    monkeypatch.setattr(storage, "MANIFEST_COMPACT_BYTES", 300)
+    storage.write_doc_by_path("p6", "dev", "api/contract.md", "v1", title="Contrato v1")
+    storage.write_doc_by_path("p6", "qa", "api/contract.md", "revisão", title="Contrato (QA)")
+    storage.write_doc_by_path("p6", "dev", "api/contract.md", "v2", title="Contrato v2")  # mesmo path e papel
+    assert (storage.get_docs_dir("p6") / storage.MANIFEST_FILENAME).exists()  # compactou no meio
+    entries = storage.read_manifest("p6")
+    assert [(e["filename"], e["creator"], e["title"]) for e in entries] == [
+        ("docs/api/contract.md", "dev", "Contrato v1"),
+        ("docs/api/contract.md", "qa", "Contrato (QA)"),
+        ("docs/api/contract.md", "dev", "Contrato v2"),
+    ]
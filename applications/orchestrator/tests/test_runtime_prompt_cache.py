@@ -0,0 +1,55 @@
+"""
+Testes do system prompt segmentado para prompt caching (cache_control) e da
+contabilização de tokens de cache.
+"""
+from orchestrator.agents import runtime
+
+
+def _no_lei2(monkeypatch):
+    monkeypatch.setattr(runtime, "_load_critical_rules_lei2", lambda: "")
+
+
+def test_compose_orders_segments_by_stability(monkeypatch):
+    monkeypatch.setattr(runtime, "_load_critical_rules_lei2", lambda: "REGRA")
+    sp = runtime.compose_system_prompt("corpo do role\n", context="## CONTEXTO INJETADO (CAG)\nx", body_key="abc123")
+    names = [seg[0] for seg in sp.segments]
+    assert names == ["lei2_opening", "skill_bundle", "context", "lei2_closing"]
+    assert sp.segments[1][3] == "abc123"
+    # Texto continua sendo o prompt completo, com LEI 2 no início e no fim
+    assert sp.startswith("## INÍCIO — Regras críticas (LEI 2)")
+    assert sp.rstrip().endswith("REGRA")
+    assert sp.index("corpo do role") < sp.index("CONTEXTO INJETADO") < sp.index("LEMBRETES FINAIS")
+
+
+def test_system_blocks_mark_cacheable_segments(monkeypatch):
+    monkeypatch.setattr(runtime, "_load_critical_rules_lei2", lambda: "REGRA")
+    monkeypatch.setattr(runtime, "CLAUDE_PROMPT_CACHE", True)
+    monkeypatch.setattr(runtime, "CLAUDE_PROMPT_CACHE_TTL", "")
+    sp = runtime.compose_system_prompt("corpo", context="ctx")
+    blocks = runtime.system_blocks_for_api(sp)
+    assert "".join(b["text"] for b in blocks) == str(sp)
+    cached = [b for b in blocks if "cache_control" in b]
+    assert [b["text"].strip(" \n-") for b in cached] == ["corpo", "ctx"]
+    assert cached[0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in blocks[-1]
+
+
+def test_system_blocks_plain_text_or_disabled(monkeypatch):
+    _no_lei2(monkeypatch)
+    assert runtime.system_blocks_for_api("texto simples") == "texto simples"
+    monkeypatch.setattr(runtime, "CLAUDE_PROMPT_CACHE", False)
+    sp = runtime.compose_system_prompt("corpo")
+    out = runtime.system_blocks_for_api(sp)
+    assert out == "corpo" and type(out) is str
+
+
+def test_log_agent_call_reports_cache_tokens(caplog):
+    import json
+    import logging
+    with caplog.at_level(logging.INFO, logger=runtime.logger.name):
+        runtime.log_agent_call(
+            "Dev", "implement_task", {"input_total": 10},
+            {"status": "OK", "_cache_read_tokens": 900, "_cache_write_tokens": 0}, 12.0,
+        )
+    entry = json.loads([r.getMessage() for r in caplog.records if "agent_call" in r.getMessage()][-1])
+    assert entry["input"]["cache_read_tokens"] == 900
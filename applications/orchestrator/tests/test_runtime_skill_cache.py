@@ -0,0 +1,108 @@
+"""
+Testes do cache local de bundles do skill store (_skill_store_assemble): hit sem round-trip,
+revalidação condicional em background, bundle antigo servido com a API fora do ar, tier em disco e
+um GET condicional por task (telemetria skill_bundle) mesmo com a revalidação compartilhada.
+"""
+import pytest
+
+from orchestrator.agents import runtime
+
+
+class _FakeThread:
+    """Executa a revalidação de forma síncrona em start() (determinístico nos testes)."""
+
+    def __init__(self, target, args, **kw):
+        self._target, self._args = target, args
+
+    def start(self):
+        self._target(*self._args)
+
+
+@pytest.fixture
+def skill_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(runtime, "_GENESIS_API_TOKEN", "t")
+    monkeypatch.setattr(runtime, "SKILL_BUNDLE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(runtime, "_skill_bundle_cache", {})
+    monkeypatch.setattr(runtime, "_skill_bundle_revalidating", {})
+    monkeypatch.setattr(runtime._threading, "Thread", _FakeThread)
+    calls = []
+    replies = []
+
+    def fetch(role, stack_key, project_id, task_id, bundle_hash=None):
+        calls.append(bundle_hash)
+        return replies.pop(0)
+
+    monkeypatch.setattr(runtime, "_skill_store_fetch", fetch)
+    return calls, replies
+
+
+def test_hit_is_served_from_cache_and_revalidated(skill_cache):
+    calls, replies = skill_cache
+    replies.append((("prompt v1", "h1"), 200))
+    assert runtime._skill_store_assemble("dev", "node", "p1", "T1") == ("prompt v1", "h1")
+    replies.append((None, 304))
+    assert runtime._skill_store_assemble("dev", "node", "p1", "T2") == ("prompt v1", "h1")
+    assert calls == [None, "h1"]  # 2ª chamada: condicional
+    # bundle mudou na API: próxima chamada já usa o novo
+    replies.append((("prompt v2", "h2"), 200))
+    assert runtime._skill_store_assemble("dev", "node", "p1") == ("prompt v1", "h1")
+    replies.append((None, 304))
+    assert runtime._skill_store_assemble("dev", "node", "p1") == ("prompt v2", "h2")
+
+
+def test_stale_bundle_served_when_api_is_down(skill_cache):
+    calls, replies = skill_cache
+    replies.append((("prompt v1", "h1"), 200))
+    runtime._skill_store_assemble("qa", "node", "p1")
+    replies.extend([(None, 0), (None, 503)])
+    assert runtime._skill_store_assemble("qa", "node", "p1") == ("prompt v1", "h1")
+    assert runtime._skill_store_assemble("qa", "node", "p1") == ("prompt v1", "h1")
+    # sem cobertura (200 sem prompt): bundle sai do cache
+    replies.append((None, 200))
+    runtime._skill_store_assemble("qa", "node", "p1")
+    replies.append((None, 0))
+    assert runtime._skill_store_assemble("qa", "node", "p1") is None
+
+
+def test_disk_tier_survives_process_restart(skill_cache, monkeypatch):
+    calls, replies = skill_cache
+    replies.append((("prompt v1", "h1"), 200))
+    runtime._skill_store_assemble("dev", "python", "p2")
+    monkeypatch.setattr(runtime, "_skill_bundle_cache", {})  # "novo processo"
+    replies.append((None, 0))
+    assert runtime._skill_store_assemble("dev", "python", "p2") == ("prompt v1", "h1")
+    assert calls == [None, "h1"]
+
+
+def test_tasks_arriving_during_revalidation_each_get_their_request(skill_cache, monkeypatch):
+    calls, replies = skill_cache
+    replies.append((("prompt v1", "h1"), 200))
+    runtime._skill_store_assemble("dev", "node", "p1", "T1")
+    threads = []
+
+    class _Deferred(_FakeThread):
+        def start(self):
+            threads.append(self)
+
+    monkeypatch.setattr(runtime._threading, "Thread", _Deferred)
+    tasks = []
+    fetch = runtime._skill_store_fetch
+
+    def tracking(role, stack_key, project_id, task_id, bundle_hash=None):
+        tasks.append(task_id)
+        return fetch(role, stack_key, project_id, task_id, bundle_hash)
+
+    monkeypatch.setattr(runtime, "_skill_store_fetch", tracking)
+    for task in ("T2", "T3", "T3", "T4"):
+        assert runtime._skill_store_assemble("dev", "node", "p1", task) == ("prompt v1", "h1")
+    assert len(threads) == 1  # revalidação continua única por chave
+    replies.extend([(None, 304), (("prompt v2", "h2"), 200), (None, 304)])
+    _FakeThread.start(threads[0])
+    assert tasks == ["T2", "T3", "T4"] and calls[1:] == ["h1", "h1", "h2"]
+    assert runtime._skill_bundle_revalidating == {}
+    assert runtime._skill_store_assemble("dev", "node", "p1", "T5") == ("prompt v2", "h2")
+    # API fora do ar: pendentes descartadas, próxima chamada volta a agendar
+    runtime._skill_store_assemble("dev", "node", "p1", "T6")
+    replies.append((None, 0))
+    _FakeThread.start(threads[1])
+    assert tasks[-1] == "T5" and runtime._skill_bundle_revalidating == {}
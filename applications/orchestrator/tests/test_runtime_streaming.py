@@ -0,0 +1,141 @@
+"""
+Testes do modo streaming do runtime (CLAUDE_STREAMING): artifacts entregues durante o stream,
+detecção de truncamento via message_delta e stage dos artifacts até a validação (tentativa
+rejeitada não chega ao callback).
+"""
+import json
+from types import SimpleNamespace
+
+
+class _FakeStream:
+    def __init__(self, events, final):
+        self._events = events
+        self._final = final
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def get_final_message(self):
+        return self._final
+
+
+def _text_events(raw: str, size: int = 9) -> list:
+    return [
+        SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text=raw[i:i + size]))
+        for i in range(0, len(raw), size)
+    ]
+
+
+def test_stream_anthropic_message_calls_on_artifact_before_final_message():
+    from orchestrator.agents.runtime import _stream_anthropic_message
+    raw = "<response>" + json.dumps({
+        "status": "OK", "summary": "x",
+        "artifacts": [{"path": "apps/a.ts", "content": "a"}, {"path": "apps/b.ts", "content": "b"}],
+    }) + "</response>"
+    final = SimpleNamespace(content=[SimpleNamespace(text=raw)], stop_reason="end_turn")
+    events = _text_events(raw) + [SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason="end_turn"))]
+    seen_kw = {}
+
+    def _stream(**kw):
+        seen_kw.update(kw)
+        return _FakeStream(events, final)
+
+    client = SimpleNamespace(messages=SimpleNamespace(stream=_stream))
+    got = []
+    out = _stream_anthropic_message(client, {"model": "m", "max_tokens": 10}, "Dev", got.append)
+    assert out is final
+    assert [a["path"] for a in got] == ["apps/a.ts", "apps/b.ts"]
+    assert seen_kw["model"] == "m"
+
+
+def test_stream_anthropic_message_callback_errors_do_not_abort(caplog):
+    from orchestrator.agents.runtime import _stream_anthropic_message
+    raw = '<response>{"artifacts":[{"path":"docs/a.md","content":"a"}]'
+    final = SimpleNamespace(content=[SimpleNamespace(text=raw)], stop_reason="max_tokens")
+    events = _text_events(raw) + [SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason="max_tokens"))]
+    client = SimpleNamespace(messages=SimpleNamespace(stream=lambda **kw: _FakeStream(events, final)))
+
+    def _boom(_art):
+        raise OSError("disk full")
+
+    with caplog.at_level("WARNING"):
+        out = _stream_anthropic_message(client, {}, "CTO", _boom)
+    assert out is final
+    assert any("truncamento detectado" in r.getMessage() for r in caplog.records)
+    assert any("callback de artifact falhou" in r.getMessage() for r in caplog.records)
+
+
+def test_dev_stream_writer_follows_runtime_streaming_flag(monkeypatch):
+    from orchestrator import runner
+    from orchestrator.agents import runtime
+
+    class _Storage:
+        written = []
+
+        def is_enabled(self):
+            return True
+
+        def write_apps_artifact(self, pid, rel, content):
+            self.written.append((pid, rel, content))
+
+    monkeypatch.setattr(runner, "_project_storage", lambda: _Storage())
+    monkeypatch.setattr(runtime, "_streaming_enabled", lambda: False)
+    assert runner._dev_stream_artifact_writer("p1") is None
+    monkeypatch.setattr(runtime, "_streaming_enabled", lambda: True)
+    runner._dev_stream_artifact_writer("p1")({"path": "apps/src/a.ts", "content": "x"})
+    assert _Storage.written == [("p1", "src/a.ts", "x")]
+
+
+def _run_dev_with_recording(tmp_path, monkeypatch, recorded: dict, max_repairs: int | None = None):
+    """run_agent(DEV) no provider mock: 1ª tentativa vem da gravação, o repair usa o envelope sintético."""
+    from orchestrator.agents import mock_llm, runtime
+
+    (tmp_path / "rec" / "dev").mkdir(parents=True)
+    (tmp_path / "rec" / "dev" / "raw_response_r-stream.txt").write_text(json.dumps(recorded), encoding="utf-8")
+    (tmp_path / "tmp").mkdir()
+    monkeypatch.setenv("GENESIS_LLM_PROVIDER", "mock")
+    monkeypatch.setenv("CLAUDE_STREAMING", "true")
+    monkeypatch.setenv("MOCK_LLM_RECORDINGS", str(tmp_path / "rec"))
+    monkeypatch.delenv("PROJECT_FILES_ROOT", raising=False)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path / "tmp"))
+    if max_repairs is not None:
+        monkeypatch.setattr(runtime, "MAX_REPAIRS", max_repairs)
+    mock_llm.reset_recordings()
+    got = []
+    try:
+        out = runtime.run_agent(
+            "unused.md", {"request_id": "r-stream", "mode": "implement_task", "task_id": "TSK-001", "inputs": {}},
+            role="DEV", system_prompt_override="sys", on_artifact=got.append,
+        )
+    finally:
+        mock_llm.reset_recordings()
+    return out, got
+
+
+_REJECTED_DEV_ENVELOPE = {
+    "status": "OK", "summary": "sem o doc de implementação: reprovado no gate do modo",
+    "artifacts": [{"path": "apps/src/rejeitado.ts", "content": "export const rejeitado = true;\n" * 3}],
+    "evidence": [{"type": "test", "ref": "npm test"}], "next_actions": {"owner": "QA"},
+}
+
+
+def test_rejected_stream_attempt_never_reaches_callback(tmp_path, monkeypatch):
+    out, got = _run_dev_with_recording(tmp_path, monkeypatch, _REJECTED_DEV_ENVELOPE)
+    assert out["validator_pass"] is True
+    paths = [a["path"] for a in got]
+    assert "apps/src/rejeitado.ts" not in paths
+    assert paths and set(paths) <= {a["path"] for a in out["artifacts"]}
+    assert not list((tmp_path / "tmp").rglob("*.json"))
+
+
+def test_blocked_stream_discards_stage(tmp_path, monkeypatch):
+    out, got = _run_dev_with_recording(tmp_path, monkeypatch, _REJECTED_DEV_ENVELOPE, max_repairs=0)
+    assert out["status"] == "BLOCKED" and out["validator_pass"] is False
+    assert got == []
+    assert not list((tmp_path / "tmp").rglob("*.json"))
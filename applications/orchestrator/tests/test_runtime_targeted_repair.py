@@ -0,0 +1,102 @@
+"""
+Testes do repair direcionado (LEI 5): artifacts válidos são mantidos, o retry pede só o artifact/
+campo com erro e a correção é mesclada no envelope; métricas do repair em log_agent_call.
+"""
+import json
+import logging
+
+from orchestrator.agents import mock_llm, runtime
+
+_CODE = "export function soma(a: number, b: number): number {\n  return a + b;\n}\n"
+_DOC = "# Implementação TSK-1\n\nImplementada a função soma com testes unitários cobrindo os casos.\n"
+
+
+def _envelope(artifacts, **extra) -> str:
+    env = {"status": "OK", "summary": "Implementação da task concluída.", "artifacts": artifacts,
+           "evidence": [{"type": "test", "ref": "npm test"}], "next_actions": {"owner": "QA", "items": []}}
+    env.update(extra)
+    return "<response>" + json.dumps(env, ensure_ascii=False) + "</response>"
+
+
+def _run(monkeypatch, responses):
+    sent = []
+
+    class _Scripted(mock_llm.MockLLMClient):
+        def respond(self, create_kw):
+            sent.append(create_kw["messages"][0]["content"])
+            return responses[len(sent) - 1]
+
+    monkeypatch.setenv("GENESIS_LLM_PROVIDER", "mock")
+    monkeypatch.setattr(mock_llm, "MockLLMClient", _Scripted)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_LATENCY_MS", 0)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_TOKENS_PER_SEC", 0)
+    message = {"request_id": "r1", "mode": "implement_task", "task_id": "TSK-1", "inputs": {"spec": "x" * 200}}
+    out = runtime.run_agent("unused.md", message, role="DEV", system_prompt_override="Você é o Dev.")
+    return out, sent
+
+
+def _repair_entry(caplog):
+    entries = [json.loads(r.getMessage()) for r in caplog.records if '"agent_call"' in r.getMessage()]
+    return entries[-1].get("repair")
+
+
+def test_targeted_repair_keeps_valid_artifacts_and_merges_fix(monkeypatch, caplog):
+    first = _envelope([
+        {"path": "apps/src/soma.ts", "content": _CODE},
+        {"path": "apps/src/sub.ts", "content": _CODE.replace("a + b", "a - b") + "// TODO validar\n"},
+        {"path": "docs/dev/dev_implementation_TSK-1.md", "content": _DOC},
+    ])
+    fixed = _CODE.replace("soma", "sub").replace("a + b", "a - b")
+    patch = _envelope([{"path": "apps/src/sub.ts", "content": fixed}], summary="Removido o TODO de sub.ts.")
+    with caplog.at_level(logging.INFO, logger=runtime.logger.name):
+        out, sent = _run(monkeypatch, [first, patch])
+    assert out["validator_pass"] is True
+    assert [a["path"] for a in out["artifacts"]] == [
+        "apps/src/soma.ts", "docs/dev/dev_implementation_TSK-1.md", "apps/src/sub.ts",
+    ]
+    assert out["artifacts"][2]["content"] == fixed and out["summary"] == "Removido o TODO de sub.ts."
+    # retry leva só o artifact com erro; os válidos vão apenas por path
+    assert "CORREÇÃO DIRECIONADA" in sent[1] and "// TODO validar" in sent[1]
+    assert "`apps/src/soma.ts`" in sent[1] and "return a + b" not in sent[1]
+    repair = _repair_entry(caplog)
+    assert repair["targeted"] == 1 and repair["full"] == 0
+    assert repair["kept_artifacts"] == 2 and repair["repaired_paths"] == ["apps/src/sub.ts"]
+    assert repair["output_tokens"] > 0
+    assert out["_output_tokens"] > repair["output_tokens"]
+
+
+def test_unattributable_errors_and_unreadable_patch_fall_back_to_full_repair(monkeypatch):
+    good = _envelope([
+        {"path": "apps/src/soma.ts", "content": _CODE},
+        {"path": "docs/dev/dev_implementation_TSK-1.md", "content": _DOC},
+    ])
+    first = _envelope([
+        {"path": "apps/src/soma.ts", "content": _CODE},
+        {"path": "docs/dev/dev_implementation_TSK-1.md", "content": _DOC},
+        {"path": "apps/src/x.ts", "content": "short"},
+    ])
+    # 1º: artifact curto → direcionado; 2º: patch ilegível → repair completo (prompt original + feedback)
+    out, sent = _run(monkeypatch, [first, "sem json", good])
+    assert out["validator_pass"] is True and len(sent) == 3
+    assert "CORREÇÃO DIRECIONADA" in sent[1]
+    assert sent[2].startswith(sent[0]) and "CORREÇÃO NECESSÁRIA" in sent[2]
+
+
+def test_plan_and_merge():
+    out = {"status": "OK", "artifacts": [
+        {"path": "apps/a.ts", "content": "a"}, {"path": "apps/b.ts", "content": "b"}, "x",
+    ]}
+    errors = ["artifact 'apps/b.ts' contém // TODO", "artifacts[2] deve ser objeto", "status=OK exige evidence não vazio"]
+    plan = runtime.plan_targeted_repair(out, errors)
+    assert [a["path"] for a in plan["keep"]] == ["apps/a.ts"]
+    assert [errs for _art, errs in plan["failing"]] == [[errors[0]], [errors[1]]]
+    assert plan["envelope_errors"] == [errors[2]]
+    merged = runtime.merge_targeted_repair(out, plan, {
+        "artifacts": [{"path": "apps/a.ts", "content": "sobrescrita"}, {"path": "apps/b.ts", "content": "B"}],
+        "evidence": [{"type": "log", "ref": "ok"}], "summary": "",
+    })
+    assert merged["artifacts"] == [{"path": "apps/a.ts", "content": "a"}, {"path": "apps/b.ts", "content": "B"}]
+    assert merged["evidence"] == [{"type": "log", "ref": "ok"}] and "summary" not in merged
+    # erro sem dono (JSON/estrutura) ou nenhum artifact aproveitável → repair completo
+    assert runtime.plan_targeted_repair(out, ["JSON inválido"]) is None
+    assert runtime.plan_targeted_repair({"status": "OK", "artifacts": [{"path": "apps/b.ts"}]}, errors[:1]) is None
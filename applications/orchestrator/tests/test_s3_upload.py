@@ -0,0 +1,164 @@
+"""
+Testes do upload do output estático do deploy S3 (scripts/s3_deploy_runner.py) com cliente S3
+falso: plano (Cache-Control e filtros), objetos inalterados pulados por ETag, ETag multipart
+sempre reenviado, erro propagado e credenciais temporárias no cliente boto3.
+"""
+import hashlib
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+
+import s3_deploy_runner as runner  # noqa: E402
+
+
+class _FakeS3:
+    def __init__(self, objects=None, fail_key=None, list_error=None):
+        self.objects = dict(objects or {})
+        self.fail_key = fail_key
+        self.list_error = list_error
+        self.puts = []
+        self._lock = threading.Lock()
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        fake = self
+
+        class _Paginator:
+            def paginate(self, Bucket):
+                if fake.list_error:
+                    raise fake.list_error
+                yield {"Contents": [{"Key": k, "ETag": f'"{v}"'} for k, v in fake.objects.items()]}
+
+        return _Paginator()
+
+    def put_object(self, Bucket, Key, Body, ContentType, CacheControl, **extra):
+        if Key == self.fail_key:
+            raise RuntimeError(f"AccessDenied: {Key}")
+        with self._lock:
+            self.puts.append({"Key": Key, "ContentType": ContentType, "CacheControl": CacheControl, **extra})
+
+
+def _output(tmp_path):
+    out = tmp_path / "dist"
+    files = {
+        "index.html": "<html>" + "x" * 2000 + "</html>",
+        "assets/app.abc123.js": "console.log(1);" * 200,
+        "assets/app.abc123.js.map": "{}",
+        "manifest.json": "{}",
+        ".env.production": "SECRET=1",
+    }
+    for rel, body in files.items():
+        (out / rel).parent.mkdir(parents=True, exist_ok=True)
+        (out / rel).write_text(body)
+    return out
+
+
+def _md5(path):
+    return hashlib.md5(path.read_bytes()).hexdigest()
+
+
+@pytest.fixture
+def fake_s3(monkeypatch):
+    holder = {}
+
+    def _client(aws_env, pool_size):
+        return holder["client"]
+
+    monkeypatch.setattr(runner, "_s3_client", _client)
+    monkeypatch.setattr(runner, "_run_aws", lambda *a, **kw: pytest.fail("não deveria chamar o AWS CLI"))
+    for var in ("S3_UPLOAD_NATIVE", "S3_UPLOAD_SKIP_UNCHANGED", "S3_UPLOAD_PRECOMPRESS"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("S3_UPLOAD_WORKERS", "4")
+    return holder
+
+
+def test_upload_plan_cache_control_and_filters(tmp_path):
+    plan = {key: cache for key, _path, cache in runner._upload_plan(_output(tmp_path))}
+    assert plan == {
+        "index.html": runner.CACHE_CONTROL_HTML,
+        "assets/app.abc123.js": runner.CACHE_CONTROL_IMMUTABLE,
+        "manifest.json": "no-cache",
+    }
+    assert runner._upload_plan(_output(tmp_path))[0][0] == "index.html"
+
+
+def test_full_upload_then_unchanged_objects_are_skipped(tmp_path, fake_s3):
+    out = _output(tmp_path)
+    fake_s3["client"] = client = _FakeS3()
+    stats = runner.upload_output_to_s3(out, "bucket", {})
+    assert stats["uploaded"] == 3 and stats["skipped"] == 0
+    puts = {p["Key"]: p for p in client.puts}
+    assert puts["index.html"]["ContentType"].startswith("text/html")
+    assert puts["assets/app.abc123.js"]["CacheControl"] == runner.CACHE_CONTROL_IMMUTABLE
+
+    # redeploy: só o JS mudou; o resto tem ETag = MD5 local
+    (out / "assets/app.abc123.js").write_text("console.log(2);")
+    remote = {rel: _md5(out / rel) for rel in ("index.html", "manifest.json")}
+    remote["assets/app.abc123.js"] = "0" * 32
+    fake_s3["client"] = client = _FakeS3(remote)
+    stats = runner.upload_output_to_s3(out, "bucket", {})
+    assert stats["uploaded"] == 1 and stats["skipped"] == 2
+    assert [p["Key"] for p in client.puts] == ["assets/app.abc123.js"]
+
+
+def test_multipart_etag_is_never_treated_as_unchanged(tmp_path, fake_s3):
+    out = _output(tmp_path)
+    # ETag de upload multipart ("<md5 das partes>-N") nunca bate com o MD5 do arquivo: reenvia
+    remote = {"index.html": _md5(out / "index.html") + "-2", "manifest.json": _md5(out / "manifest.json")}
+    fake_s3["client"] = client = _FakeS3(remote)
+    stats = runner.upload_output_to_s3(out, "bucket", {})
+    assert sorted(p["Key"] for p in client.puts) == ["assets/app.abc123.js", "index.html"]
+    assert stats["skipped"] == 1
+
+
+def test_listing_failure_falls_back_to_full_upload_and_put_error_propagates(tmp_path, fake_s3):
+    out = _output(tmp_path)
+    fake_s3["client"] = client = _FakeS3({"index.html": _md5(out / "index.html")}, list_error=RuntimeError("ListBucket negado"))
+    assert runner.upload_output_to_s3(out, "bucket", {})["uploaded"] == 3
+    assert len(client.puts) == 3
+
+    fake_s3["client"] = _FakeS3(fail_key="manifest.json")
+    with pytest.raises(RuntimeError, match="AccessDenied: manifest.json"):
+        runner.upload_output_to_s3(out, "bucket", {})
+
+
+def test_precompressed_variants_carry_content_encoding(tmp_path, fake_s3, monkeypatch):
+    monkeypatch.setenv("S3_UPLOAD_PRECOMPRESS", "gzip")
+    out = _output(tmp_path)
+    fake_s3["client"] = client = _FakeS3()
+    stats = runner.upload_output_to_s3(out, "bucket", {})
+    gz = {p["Key"]: p for p in client.puts if p.get("ContentEncoding") == "gzip"}
+    assert set(gz) == {"index.html.gz", "assets/app.abc123.js.gz"}  # manifest.json < 1KB
+    assert gz["index.html.gz"]["ContentType"].startswith("text/html") and stats["variants"] == 2
+
+
+def test_s3_client_passes_session_token(monkeypatch):
+    seen = {}
+
+    class _Session:
+        def __init__(self, **kw):
+            seen.update(kw)
+
+        def client(self, name, config=None):
+            return ("client", name)
+
+    boto3 = types.ModuleType("boto3")
+    boto3.session = types.SimpleNamespace(Session=_Session)
+    botocore_config = types.ModuleType("botocore.config")
+    botocore_config.Config = lambda **kw: kw
+    monkeypatch.setitem(sys.modules, "boto3", boto3)
+    monkeypatch.setitem(sys.modules, "botocore", types.ModuleType("botocore"))
+    monkeypatch.setitem(sys.modules, "botocore.config", botocore_config)
+
+    env = {"AWS_ACCESS_KEY_ID": "ASIA1", "AWS_SECRET_ACCESS_KEY": "s", "AWS_SESSION_TOKEN": "tok", "AWS_DEFAULT_REGION": "sa-east-1"}
+    assert runner._s3_client(env, 8) == ("client", "s3")
+    assert seen == {"aws_access_key_id": "ASIA1", "aws_secret_access_key": "s",
+                    "aws_session_token": "tok", "region_name": "sa-east-1"}
+    env.pop("AWS_SESSION_TOKEN")
+    runner._s3_client(env, 8)
+    assert seen["aws_session_token"] is None
@@ -0,0 +1,73 @@
+"""
+Testes do registry de schemas (schema_registry.py): validador compilado com as mensagens do
+validador anterior de connect_contracts, parse memoizado invalidado por mtime e raiz resolvida.
+"""
+import json
+import os
+
+from orchestrator.schema_registry import SchemaRegistry, compile_schema
+
+_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["schemaVersion", "services"],
+    "properties": {
+        "schemaVersion": {"type": "string"},
+        "kind": {"type": "string", "enum": ["api", "worker"]},
+        "services": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["id"],
+                "properties": {"id": {"type": "string"}, "port": {"type": "integer"}},
+            },
+        },
+        "free": {},
+    },
+}
+
+
+def test_compiled_validator_reports_errors():
+    validate = compile_schema(_SCHEMA)
+    assert validate({"schemaVersion": "1", "services": [{"id": "a", "port": 80}], "free": 1}) == []
+    errors = validate({"kind": "cron", "services": [{"port": True}, "x"], "extra": 1, "schemaVersion": 2})
+    assert errors == [
+        "$.extra: propriedade não permitida",
+        "$.kind: valor 'cron' fora do enum ['api', 'worker']",
+        "$.services[0].id: campo obrigatório ausente",
+        "$.services[0].port: esperado integer, recebido bool",
+        "$.services[1]: esperado object, recebido str",
+        "$.schemaVersion: esperado string, recebido int",
+    ]
+    assert validate({"schemaVersion": "1", "services": []}) == ["$.services: esperado pelo menos 1 item(ns)"]
+    assert validate([]) == ["$: esperado object, recebido list"]
+    assert compile_schema({})({"anything": 1}) == []
+
+
+def test_registry_reloads_schema_when_file_changes(tmp_path):
+    path = tmp_path / "s.schema.json"
+    path.write_text(json.dumps({"type": "object", "required": ["a"]}))
+    registry = SchemaRegistry()
+    first = registry.validator(path)
+    assert first({}) == ["$.a: campo obrigatório ausente"]
+    assert registry.validator(path) is first
+    path.write_text(json.dumps({"type": "object", "required": ["b"]}))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert registry.validator(path)({}) == ["$.b: campo obrigatório ausente"]
+    assert registry.load(tmp_path / "missing.json") is None
+    assert registry.validator(None)({"x": 1}) == []
+
+
+def test_resolve_memoizes_root(tmp_path):
+    (tmp_path / "b" / "m").mkdir(parents=True)
+    (tmp_path / "b" / "m" / "x.json").write_text("{}")
+    registry = SchemaRegistry()
+    roots = [tmp_path / "a", tmp_path / "b"]
+    assert registry.resolve("m/x.json", roots) == tmp_path / "b" / "m" / "x.json"
+    (tmp_path / "a" / "m").mkdir(parents=True)
+    (tmp_path / "a" / "m" / "x.json").write_text("{}")
+    # raiz já resolvida continua valendo enquanto o arquivo existir
+    assert registry.resolve("m/x.json", roots) == tmp_path / "b" / "m" / "x.json"
+    assert registry.resolve("m/none.json", roots) is None
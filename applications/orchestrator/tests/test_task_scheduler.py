@@ -0,0 +1,65 @@
+"""
+Testes do agendador DAG da fase Dev (task_scheduler.py): grafo por depends_on_files /
+ordem do backlog, largura, conflitos de arquivo e fallback anti-deadlock.
+"""
+from orchestrator.task_scheduler import DevScheduler, build_task_graph, critical_path_length
+
+
+def _t(tid, status="ASSIGNED", produces=(), depends=()):
+    return {"taskId": tid, "status": status, "estimated_files": list(produces), "depends_on_files": list(depends)}
+
+
+BACKLOG = [
+    _t("TSK-1", produces=["apps/src/db/schema.ts"]),
+    _t("TSK-2", produces=["apps/src/http/app.ts"]),
+    _t("TSK-3", produces=["apps/src/domain/user.ts"], depends=["apps/src/db/schema.ts"]),
+    _t("TSK-4", depends=["src/domain/user.ts", "src/http/app.ts"]),
+    _t("TSK-5", depends=["apps/src/unknown.ts"]),
+]
+
+
+def test_graph_from_depends_on_files_and_backlog_order():
+    graph = build_task_graph(BACKLOG)
+    assert graph["TSK-1"] == set() and graph["TSK-2"] == set()
+    assert graph["TSK-3"] == {"TSK-1"}
+    assert graph["TSK-4"] == {"TSK-3", "TSK-2"}
+    # dependência sem produtor declarado → task anterior no backlog
+    assert graph["TSK-5"] == {"TSK-4"}
+    assert critical_path_length(graph) == 4
+
+
+def test_ready_dispatches_independent_tasks_up_to_width():
+    sched = DevScheduler(width=2)
+    ready = [t["taskId"] for t in sched.ready(BACKLOG)]
+    assert ready == ["TSK-1", "TSK-2"]
+    for t in BACKLOG[:2]:
+        sched.start(t)
+    assert sched.ready(BACKLOG) == []
+
+
+def test_dependents_become_ready_only_after_qa_pass():
+    tasks = [dict(t) for t in BACKLOG]
+    sched = DevScheduler(width=4)
+    tasks[0]["status"] = "WAITING_REVIEW"
+    sched.start(tasks[0], files=())  # QA da TSK-1 em execução
+    assert [t["taskId"] for t in sched.ready(tasks)] == ["TSK-2"]
+    tasks[0]["status"] = "QA_FAIL"   # volta ao Dev: o dependente segue esperando
+    sched.finish("TSK-1")
+    assert [t["taskId"] for t in sched.ready(tasks)] == ["TSK-1", "TSK-2"]
+    tasks[0]["status"] = "QA_PASS"
+    assert [t["taskId"] for t in sched.ready(tasks)] == ["TSK-2", "TSK-3"]
+
+
+def test_file_conflicts_are_detected():
+    tasks = [_t("A", produces=["apps/src/app.ts"]), _t("B", produces=["src/app.ts"])]
+    sched = DevScheduler(width=4)
+    assert [t["taskId"] for t in sched.ready(tasks)] == ["A"]
+    sched.start(tasks[0])
+    sched.start(_t("C"))
+    assert sched.record_written("C", ["apps/src/app.ts"]) == {"A": ["src/app.ts"]}
+
+
+def test_fallback_when_dependency_is_stuck():
+    tasks = [_t("A", status="NEW", produces=["x.ts"]), _t("B", depends=["x.ts"])]
+    sched = DevScheduler(width=3)
+    assert [t["taskId"] for t in sched.ready(tasks)] == ["B"]
@@ -0,0 +1,156 @@
+"""
+Testes do sink assíncrono de telemetria (telemetry.py): envio em lote fora da thread do
+pipeline, coalescência, spill em disco com API fora do ar, spill por projeto/processo com
+adoção dos órfãos e flush no shutdown.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from orchestrator import telemetry
+from orchestrator.telemetry import TelemetrySink
+
+
+class _FakeApi:
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.batches: list[list[dict]] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, ops):
+        time.sleep(self.delay)
+        with self.lock:
+            self.batches.append(list(ops))
+        return [({}, self.status)] * len(ops)
+
+    @property
+    def ops(self):
+        return [op for batch in self.batches for op in batch]
+
+
+def _sink(tmp_path, api, **kw):
+    kw.setdefault("flush_sec", 0.05)
+    return TelemetrySink(sender=api, spill_path=tmp_path / "spill.jsonl", **kw)
+
+
+def test_emit_does_not_wait_on_slow_api(tmp_path):
+    api = _FakeApi(delay=0.5)
+    sink = _sink(tmp_path, api)
+    t0 = time.monotonic()
+    for i in range(10):
+        sink.emit("POST", "/api/projects/p1/dialogue", {"summary_human": f"passo {i}"})
+    assert time.monotonic() - t0 < 0.2
+    assert sink.flush(5) is True
+    assert [op["body"]["summary_human"] for op in api.ops] == [f"passo {i}" for i in range(10)]
+    assert len(api.batches) <= 2
+
+
+def test_coalesces_pending_events_with_same_key(tmp_path):
+    api = _FakeApi()
+    sink = _sink(tmp_path, api, flush_sec=60)
+    sink.emit("POST", "/d", {"m": "dev trabalhando T1"}, coalesce_key=("p1", "agent_working", "dev"))
+    sink.emit("POST", "/d", {"m": "qa revisando"}, coalesce_key=("p1", "agent_working", "qa"))
+    sink.emit("POST", "/d", {"m": "dev trabalhando T2"}, coalesce_key=("p1", "agent_working", "dev"))
+    sink.emit("POST", "/m", {"tokens": 1})
+    sink.flush(5)
+    assert [op["body"] for op in api.ops] == [{"m": "dev trabalhando T2"}, {"m": "qa revisando"}, {"tokens": 1}]
+
+
+def test_spills_when_api_down_and_replays_in_order(tmp_path):
+    api = _FakeApi(status=0)
+    sink = _sink(tmp_path, api)
+    sink.emit("POST", "/d", {"n": 1})
+    sink.emit("POST", "/d", {"n": 2})
+    sink.flush(5)
+    spilled = [json.loads(line) for line in (tmp_path / "spill.jsonl").read_text().splitlines()]
+    assert [op["body"]["n"] for op in spilled] == [1, 2]
+
+    api.status = 200
+    api.batches.clear()
+    sink.emit("POST", "/d", {"n": 3})
+    sink.flush(5)
+    assert [op["body"]["n"] for op in api.ops] == [1, 2, 3]
+    assert not (tmp_path / "spill.jsonl").exists()
+
+
+def test_client_errors_are_dropped_not_spilled(tmp_path):
+    api = _FakeApi(status=400)
+    sink = _sink(tmp_path, api)
+    sink.emit("POST", "/d", {"n": 1})
+    sink.flush(5)
+    assert len(api.ops) == 1
+    assert not (tmp_path / "spill.jsonl").exists()
+
+
+def test_queue_overflow_goes_to_spill(tmp_path):
+    api = _FakeApi()
+    sink = _sink(tmp_path, api, max_queue=2, flush_sec=60)
+    for n in range(4):
+        sink.emit("POST", "/d", {"n": n})
+    spilled = [json.loads(line)["body"]["n"] for line in (tmp_path / "spill.jsonl").read_text().splitlines()]
+    assert spilled == [0, 1]
+    sink.flush(5)
+    # spill primeiro: a ordem original é preservada
+    assert [op["body"]["n"] for op in api.ops] == [0, 1, 2, 3]
+
+
+def test_shutdown_flushes_queue_and_spills_late_events(tmp_path):
+    api = _FakeApi()
+    sink = _sink(tmp_path, api, flush_sec=60)
+    sink.emit("POST", "/d", {"n": 1})
+    sink.shutdown(timeout=5)
+    assert [op["body"]["n"] for op in api.ops] == [1]
+    sink.emit("POST", "/d", {"n": 2})
+    spilled = [json.loads(line)["body"]["n"] for line in (tmp_path / "spill.jsonl").read_text().splitlines()]
+    assert spilled == [2]
+    # um novo sink (runner reiniciado) reenvia o spill
+    api2 = _FakeApi()
+    restarted = _sink(tmp_path, api2)
+    restarted.emit("POST", "/d", {"n": 3})
+    restarted.flush(5)
+    assert [op["body"]["n"] for op in api2.ops] == [2, 3]
+
+
+def test_default_spill_path_is_per_project_or_process(monkeypatch, tmp_path):
+    monkeypatch.setenv("TELEMETRY_SPILL_PATH", "")
+    monkeypatch.setenv("PROJECT_FILES_ROOT", str(tmp_path))
+    monkeypatch.setenv("PROJECT_ID", "proj/1")
+    assert telemetry._default_spill_path() == tmp_path / ".telemetry" / "spill.proj_1.jsonl"
+    monkeypatch.delenv("PROJECT_ID")
+    assert telemetry._default_spill_path().name == f"spill.pid{os.getpid()}.jsonl"
+
+
+def test_orphan_spills_of_dead_runners_are_adopted_and_replayed(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    line = lambda n: json.dumps({"method": "POST", "path": "/d", "body": {"n": n}}) + "\n"  # noqa: E731
+    (tmp_path / f"spill.pid{dead.pid}.jsonl").write_text(line(1))
+    orphan_replay = tmp_path / f"spill.p9.jsonl.replay.{dead.pid}.ab12"
+    orphan_replay.write_text(line(2) + '{"trunc')
+    os.utime(orphan_replay, (time.time() + 1, time.time() + 1))  # mais recente: vai depois
+    live = tmp_path / f"spill.pid{os.getpid()}.jsonl.replay.{os.getpid()}.cd34"
+    live.write_text(line(99))  # replay de um processo vivo: intocado
+    api = _FakeApi()
+    sink = _sink(tmp_path, api)
+    sink.emit("POST", "/d", {"n": 3})
+    sink.flush(5)
+    assert [op["body"]["n"] for op in api.ops] == [1, 2, 3]
+    assert live.exists() and sorted(p.name for p in tmp_path.iterdir()) == [live.name]
+
+
+def test_replay_does_not_overwrite_other_replay_files(tmp_path):
+    api = _FakeApi(status=0)
+    sink = _sink(tmp_path, api)
+    sink.emit("POST", "/d", {"n": 1})
+    sink.flush(5)
+    other = tmp_path / "spill.jsonl.replay"
+    other.write_text("de outro runner\n")
+    api.status = 200
+    sink.emit("POST", "/d", {"n": 2})
+    sink.flush(5)
+    assert [op["body"]["n"] for op in api.ops][-2:] == [1, 2]
+    assert other.read_text() == "de outro runner\n"
@@ -267,6 +267,18 @@ def test_responsive_fail_when_no_breakpoints(tmp_path):
     assert fp["pass"] is False
 
 
+def test_responsive_markers_keep_leading_space(tmp_path):
+    """' xs=' exige o espaço: 'maxs=' / 'props.xs=' não são marcadores responsivos."""
+    from orchestrator.type_fingerprint import check_responsive
+
+    apps = tmp_path / "apps" / "src" / "app"
+    apps.mkdir(parents=True)
+    (apps / "page.tsx").write_text("const maxs=1; props.xs=2;\nexport default function P(){ return null; }")
+    assert check_responsive(tmp_path)["pass"] is False
+    (apps / "page.tsx").write_text("export default function P(){ return <Grid xs={12} />; }")
+    assert check_responsive(tmp_path)["pass"] is True
+
+
 def test_responsive_na_for_backend(tmp_path):
     """Backend (sem apps/src/app) não é penalizado — N/A."""
     from orchestrator.type_fingerprint import check_responsive
@@ -294,3 +306,69 @@ def test_responsive_via_appshell_shared_layout(tmp_path):
     r = check_responsive(tmp_path)
     assert r["applicable"] is True
     assert r["pass"] is True  # AppShell responsivo cobre o app
+
+
+def test_fingerprint_reports_hit_locations(tmp_path):
+    """Cada token achado traz o primeiro local (arquivo:linha, ou só o path quando casou no nome)."""
+    from orchestrator.type_fingerprint import check_fingerprint
+
+    apps = tmp_path / "apps"
+    apps.mkdir()
+    (apps / "app.ts").write_text('// server\nimport Fastify from "fastify";\n')
+    (apps / "drizzle.config.ts").write_text("export default {};")
+    policy = {"fingerprint": {"required_tokens": {"strong": ["fastify", "drizzle"]}, "forbidden_tokens": []}}
+    r = check_fingerprint(tmp_path, policy)
+    assert r["pass"] is True
+    locs = r["details"]["hit_locations"]
+    # paths relativos à raiz varrida (apps/)
+    assert locs["strong:fastify"] == "app.ts:2"
+    assert locs["strong:drizzle"] == "drizzle.config.ts"
+
+
+def test_fingerprint_stops_early_when_all_required_found(tmp_path):
+    """Sem forbidden pendente, a varredura para assim que todos os tokens foram achados."""
+    from orchestrator.type_fingerprint import check_fingerprint
+
+    apps = tmp_path / "apps"
+    apps.mkdir()
+    for i in range(20):
+        (apps / f"mod{i:02d}.ts").write_text("export const fastify = 1;\n")
+    policy = {"fingerprint": {"required_tokens": {"strong": ["fastify"]}, "forbidden_tokens": []}}
+    r = check_fingerprint(tmp_path, policy)
+    assert r["pass"] is True
+    assert r["details"]["early_stop"] is True
+    assert r["details"]["files_scanned"] < 20
+
+
+def test_fingerprint_forbidden_keeps_scanning_whole_tree(tmp_path):
+    """Forbidden pendente impede o early stop: o proibido é achado mesmo com os required já satisfeitos."""
+    from orchestrator.type_fingerprint import check_fingerprint
+
+    apps = tmp_path / "apps"
+    apps.mkdir()
+    for i in range(5):
+        (apps / f"mod{i}.ts").write_text("export const fastify = 1;\n")
+    (apps / "zz.ts").write_text("import express from 'express';\n")
+    policy = {"fingerprint": {"required_tokens": {"strong": ["fastify"]}, "forbidden_tokens": ["express"]}}
+    r = check_fingerprint(tmp_path, policy)
+    assert r["forbidden_found"] == ["express"]
+    assert r["missing_strong"] == []
+
+
+def test_fingerprint_overlapping_tokens_and_shared_variants(tmp_path):
+    """Token contido em outro e variante compartilhada entre strong/soft casam independentemente."""
+    from orchestrator.type_fingerprint import check_fingerprint
+
+    apps = tmp_path / "apps"
+    apps.mkdir()
+    (apps / "a.ts").write_text("const dashboardpanel = 1; // api\n")
+    policy = {
+        "fingerprint": {
+            "required_tokens": {"strong": ["dashboard", "api"], "soft": ["board", "api"]},
+            "forbidden_tokens": ["apix"],
+        }
+    }
+    r = check_fingerprint(tmp_path, policy)
+    assert r["missing_strong"] == []
+    assert r["missing_soft"] == []
+    assert r["forbidden_found"] == []
@@ -12,53 +12,143 @@ Retorna {pass, missing_strong, missing_soft, forbidden_found, details} onde:
 
 Grep é OR de tokens EN + synonyms_pt_br para evitar falso positivo em
 produtos PT-BR (ex: 'dashboard' também bate com 'painel', 'gerenciador').
+
+Varredura em passada única (_TokenScanner): os arquivos são lidos um a um e todos os
+tokens pendentes são testados no mesmo arquivo — palavras curtas numa única regex
+combinada (\b(?:a|b|...)\b), literais via busca de substring em C. Token achado sai do
+conjunto pendente; sem nada pendente a varredura para (early stop). Cada token achado
+guarda o primeiro local (arquivo:linha) como diagnóstico.
+
+Listagem e leitura passam pelo índice incremental do projeto (file_index): passadas
+repetidas sobre uma árvore inalterada só fazem stat e leem o conteúdo do cache.
 """
 from __future__ import annotations
 
 import re
-from pathlib import Path
-from typing import Iterable
+from pathlib import Path, PurePosixPath
+from typing import Callable, Hashable, Iterable
 
-_SKIP_DIRS = {"node_modules", ".next", "dist", ".git", "__pycache__", ".venv", "venv", "coverage", "build"}
 _TEXT_EXTS = {".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".py", ".json", ".md", ".yaml", ".yml", ".toml", ".env", ".env.example", ".sh", ".sql", ".html", ".css"}
 _MAX_FILE_BYTES = 500_000  # skip arquivos > 500KB (bundles, minified)
 
 
-def _iter_code_files(root: Path) -> Iterable[Path]:
-    """Itera sobre arquivos de código dentro de root, respeitando skip_dirs e extensões."""
-    if not root.exists():
-        return
-    for p in root.rglob("*"):
-        if not p.is_file():
-            continue
-        if any(part in _SKIP_DIRS for part in p.parts):
-            continue
-        if p.suffix.lower() not in _TEXT_EXTS:
+def _project_index(root: Path):
+    from orchestrator.file_index import get_file_index
+    return get_file_index(root)
+
+
+def _scan_prefix(root: Path, scan_root: Path) -> str:
+    """Prefixo posix ('apps/' ou '') de scan_root dentro do índice de root."""
+    return "" if scan_root == root else scan_root.relative_to(root).as_posix() + "/"
+
+
+def _iter_code_files(idx, prefix: str = "") -> Iterable[str]:
+    """Paths (relativos à raiz do índice) de arquivos de código sob prefix — skip_dirs já aplicado pelo índice."""
+    for rel in idx.files(prefix):
+        if PurePosixPath(rel).suffix.lower() not in _TEXT_EXTS:
             continue
-        try:
-            if p.stat().st_size > _MAX_FILE_BYTES:
-                continue
-        except OSError:
+        if idx.entry(rel)["size"] > _MAX_FILE_BYTES:
             continue
-        yield p
+        yield rel
+
+
+def _is_short_word(v: str) -> bool:
+    """Tokens curtos (<5) puramente alfanuméricos casam por word boundary."""
+    return len(v) < 5 and re.fullmatch(r"[a-z0-9]+", v) is not None
 
 
-def _read_all_code(root: Path) -> str:
+class _TokenScanner:
+    """
+    Busca simultânea de vários grupos de tokens (label → variantes), arquivo a arquivo.
+
+    Regras de match para reduzir falso positivo:
+    - Tokens curtos (<5 chars) que são pura palavra alfanumérica → word boundary
+      (ex.: 'bot' NÃO bate com 'bottom', 'about', 'robot')
+    - Tokens com caractere não-alfanumérico (/, ., -, @, #) OU longos (≥5) → substring
+      (ex.: '/health' e 'AppShell' e 'fastify' batem por substring)
+    exact=True: variantes usadas como estão (sem strip nem word boundary) — marcadores com
+    espaço significativo, ex. ' xs=' não pode casar 'maxs=' / 'props.xs='.
+    Um label é satisfeito pela primeira variante encontrada; labels sem variantes válidas
+    nunca são satisfeitos (como no grep original).
     """
-    Concatena todo o código relevante em uma string lower-case para grep case-insensitive.
-    Inclui também os PATHS dos arquivos — muitos tokens são nomes de arquivo/dir
-    (ex.: 'drizzle.config.ts', 'AppShell.tsx', 'middleware.ts') que não aparecem
-    literalmente no conteúdo mas são evidência estrutural forte.
+
+    def __init__(self, groups: dict[Hashable, list[str]], exact: bool = False):
+        self._exact = exact
+        self._owners: dict[str, set[Hashable]] = {}
+        for label, variants in groups.items():
+            for v in variants:
+                v = (v or "").lower() if exact else (v or "").strip().lower()
+                if v:
+                    self._owners.setdefault(v, set()).add(label)
+        self.pending: set[Hashable] = set().union(*self._owners.values()) if self._owners else set()
+        self.found: dict[Hashable, str] = {}
+        self._refresh()
+
+    @property
+    def done(self) -> bool:
+        return not self.pending
+
+    def _refresh(self) -> None:
+        live = [v for v, owners in self._owners.items() if owners & self.pending]
+        self._literals = [v for v in live if self._exact or not _is_short_word(v)]
+        self._words = {v for v in live if not self._exact and _is_short_word(v)}
+        self._word_rx = (
+            re.compile(r"\b(?:" + "|".join(re.escape(w) for w in sorted(self._words)) + r")\b")
+            if self._words else None
+        )
+
+    def _hit(self, variant: str, where: str) -> bool:
+        labels = self._owners[variant] & self.pending
+        for label in labels:
+            self.found[label] = where
+        self.pending -= labels
+        return bool(labels)
+
+    def scan(self, text: str, where: Callable[[int], str]) -> None:
+        """text já em lower-case; where(offset) → descrição do local para o diagnóstico."""
+        changed = False
+        for v in self._literals:
+            idx = text.find(v)
+            if idx >= 0:
+                changed |= self._hit(v, where(idx))
+        if self._word_rx is not None:
+            remaining = set(self._words)
+            for m in self._word_rx.finditer(text):
+                w = m.group(0)
+                if w in remaining:
+                    remaining.discard(w)
+                    changed |= self._hit(w, where(m.start()))
+                    if not remaining:
+                        break
+        if changed:
+            self._refresh()
+
+
+def _scan_tree(idx, prefix: str, scanner: _TokenScanner) -> dict:
     """
-    chunks: list[str] = []
-    for p in _iter_code_files(root):
+    Passa cada arquivo de código sob prefix pelo scanner (path relativo + conteúdo lower-case),
+    parando quando não há mais tokens pendentes. O path entra porque muitos tokens são nomes
+    de arquivo/dir (ex.: 'drizzle.config.ts', 'AppShell.tsx', 'middleware.ts') que não
+    aparecem literalmente no conteúdo mas são evidência estrutural forte.
+    """
+    files = 0
+    chars = 0
+    early_stop = False
+    for path in _iter_code_files(idx, prefix):
+        if scanner.done:
+            early_stop = True
+            break
         try:
-            # Path relativo entra no haystack (garante detectar arquivos-marcadores)
-            chunks.append(str(p.relative_to(root)))
-            chunks.append(p.read_text(encoding="utf-8", errors="replace"))
-        except (OSError, ValueError):
+            text = idx.read_text(path).lower()
+        except OSError:
             continue
-    return "\n".join(chunks).lower()
+        rel = path[len(prefix):]
+        files += 1
+        chars += len(rel) + len(text)
+        scanner.scan(rel.lower(), lambda _i, rel=rel: rel)
+        if not scanner.done:
+            scanner.scan(text, lambda i, rel=rel, text=text: f"{rel}:{text.count(chr(10), 0, i) + 1}")
+    return {"files_scanned": files, "chars_scanned": chars, "early_stop": early_stop}
 
 
 def _tokens_for_search(token: str, synonyms_pt_br: dict) -> list[str]:
@@ -75,31 +165,6 @@ def _tokens_for_search(token: str, synonyms_pt_br: dict) -> list[str]:
     return variants
 
 
-def _has_any_token(haystack: str, variants: list[str]) -> bool:
-    """
-    True se qualquer variante aparece no haystack.
-
-    Regras de match para reduzir falso positivo:
-    - Tokens curtos (<5 chars) que são pura palavra alfabética → word boundary
-      (ex.: 'bot' NÃO bate com 'bottom', 'about', 'robot')
-    - Tokens com caractere não-alfanumérico (/, ., -, @, #) OU longos (≥5) → substring
-      (ex.: '/health' e 'AppShell' e 'fastify' batem por substring)
-    """
-    for v in variants:
-        v = v.strip()
-        if not v:
-            continue
-        v_lower = v.lower()
-        is_short_word = len(v_lower) < 5 and re.fullmatch(r"[a-z0-9]+", v_lower) is not None
-        if is_short_word:
-            if re.search(rf"\b{re.escape(v_lower)}\b", haystack):
-                return True
-        else:
-            if v_lower in haystack:
-                return True
-    return False
-
-
 def check_stub_pages(project_root: Path | str) -> dict:
     """
     L-DEV-2/4 (V12 OrienteMe): detecta páginas entregues como stub
@@ -123,25 +188,25 @@ def check_stub_pages(project_root: Path | str) -> dict:
     ]
     stubs: list[str] = []
     if scan_root.exists():
-        for p in scan_root.rglob("page.tsx"):
-            if any(part in _SKIP_DIRS for part in p.parts):
-                continue
+        idx = _project_index(root)
+        prefix = _scan_prefix(root, scan_root)
+        for path in idx.glob(prefix + "**/page.tsx"):
             try:
-                txt = p.read_text(encoding="utf-8", errors="replace").lower()
+                txt = idx.read_text(path).lower()
             except OSError:
                 continue
             # Não flaga páginas institucionais curtas (sobre/privacidade/termos são simples por design)
-            rel = str(p.relative_to(scan_root)).lower()
+            rel = path[len(prefix):].lower()
             is_institutional = any(x in rel for x in ("sobre", "privacidade", "termos", "login"))
             hit = any(m in txt for m in STUB_MARKERS)
             if hit and not is_institutional:
-                stubs.append(str(p.relative_to(root)))
+                stubs.append(path)
     return {"stubs_found": stubs, "pass": len(stubs) == 0}
 
 
 # Marcadores de responsividade (mobile-first) — MUI. OR: qualquer um satisfaz.
 # Escolhidos com ≥5 chars ou caractere não-alfanumérico ('{ ', ':') para casar
-# como substring (ver _has_any_token). Cobre breakpoint object, hook e theme.
+# como substring (_TokenScanner com exact=True). Cobre breakpoint object, hook e theme.
 _RESPONSIVE_MARKERS = [
     "usemediaquery",      # useMediaQuery hook
     "theme.breakpoints",  # theme.breakpoints.up/down/between
@@ -175,29 +240,27 @@ def check_responsive(project_root: Path | str) -> dict:
         return {"applicable": False, "pages_scanned": 0, "has_responsive": True,
                 "pages_without_breakpoint": [], "pass": True}
 
-    pages: list[Path] = []
-    for p in app_dir.rglob("page.tsx"):
-        if any(part in _SKIP_DIRS for part in p.parts):
-            continue
-        pages.append(p)
+    idx = _project_index(root)
+    pages = idx.glob(_scan_prefix(root, app_dir) + "**/page.tsx")
     if not pages:
         return {"applicable": False, "pages_scanned": 0, "has_responsive": True,
                 "pages_without_breakpoint": [], "pass": True}
 
     # Haystack de TODO o app/ (page.tsx + componentes) — responsividade pode estar
     # concentrada em AppShell/layout compartilhado, então avaliamos o conjunto.
-    haystack = _read_all_code(scan_root)
-    has_responsive = any(m in haystack for m in _RESPONSIVE_MARKERS)
+    scanner = _TokenScanner({"responsive": _RESPONSIVE_MARKERS}, exact=True)
+    _scan_tree(idx, _scan_prefix(root, scan_root), scanner)
+    has_responsive = scanner.done
 
     # Diagnóstico por página (informativo): páginas sem nenhum marcador local.
     without: list[str] = []
-    for p in pages:
+    for path in pages:
         try:
-            txt = p.read_text(encoding="utf-8", errors="replace").lower()
+            txt = idx.read_text(path).lower()
         except OSError:
             continue
         if not any(m in txt for m in _RESPONSIVE_MARKERS):
-            without.append(str(p.relative_to(root)))
+            without.append(path)
 
     # FAIL só quando o app inteiro não tem NENHUM sinal de responsividade —
     # evita falso positivo em página simples que herda layout responsivo do AppShell.
@@ -225,8 +288,10 @@ def check_fingerprint(project_root: Path | str, policy: dict) -> dict:
           "missing_soft":   [str],         # tokens soft ausentes (WARN)
           "forbidden_found": [str],        # tokens proibidos encontrados (FAIL)
           "details": {                     # info diagnóstica
-            "files_scanned": int,
+            "files_scanned": int,          # arquivos lidos (menos que o total se houve early stop)
             "haystack_chars": int,
+            "early_stop": bool,
+            "hit_locations": {"strong:<token>": "arquivo:linha", ...},
             "policy_present": bool,
           }
         }
@@ -242,27 +307,20 @@ def check_fingerprint(project_root: Path | str, policy: dict) -> dict:
     forbidden = fp.get("forbidden_tokens", []) or []
     synonyms = fp.get("synonyms_pt_br", {}) or {}
 
-    haystack = _read_all_code(scan_root)
-    files_scanned = sum(1 for _ in _iter_code_files(scan_root))
-
-    missing_strong: list[str] = []
-    missing_soft: list[str] = []
-    forbidden_found: list[str] = []
-
+    groups: dict[tuple[str, str], list[str]] = {}
     for token in strong:
-        variants = _tokens_for_search(token, synonyms)
-        if not _has_any_token(haystack, variants):
-            missing_strong.append(token)
-
+        groups[("strong", token)] = _tokens_for_search(token, synonyms)
     for token in soft:
-        variants = _tokens_for_search(token, synonyms)
-        if not _has_any_token(haystack, variants):
-            missing_soft.append(token)
-
+        groups[("soft", token)] = _tokens_for_search(token, synonyms)
     for token in forbidden:
-        # Forbidden não usa synonyms — match exato lowercase (substring)
-        if _has_any_token(haystack, [token]):
-            forbidden_found.append(token)
+        # Forbidden não usa synonyms — match exato lowercase
+        groups[("forbidden", token)] = [token]
+    scanner = _TokenScanner(groups)
+    scan_stats = _scan_tree(_project_index(root), _scan_prefix(root, scan_root), scanner)
+
+    missing_strong = [t for t in strong if ("strong", t) not in scanner.found]
+    missing_soft = [t for t in soft if ("soft", t) not in scanner.found]
+    forbidden_found = [t for t in forbidden if ("forbidden", t) in scanner.found]
 
     # L-DEV-2/4: páginas stub ("em desenvolvimento") são FAIL — rota existir != FR implementado
     stub_result = check_stub_pages(root)
@@ -283,8 +341,10 @@ def check_fingerprint(project_root: Path | str, policy: dict) -> dict:
         "responsive_missing": responsive_missing,
         "responsive": resp_result,
         "details": {
-            "files_scanned": files_scanned,
-            "haystack_chars": len(haystack),
+            "files_scanned": scan_stats["files_scanned"],
+            "haystack_chars": scan_stats["chars_scanned"],
+            "early_stop": scan_stats["early_stop"],
+            "hit_locations": {f"{kind}:{token}": where for (kind, token), where in scanner.found.items()},
             "policy_present": bool(policy),
         },
     }
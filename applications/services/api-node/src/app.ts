@@ -22,6 +22,7 @@ import { runtimeConfigRoutes } from "./routes/runtimeConfig.js";
 import { skillsRoutes } from "./routes/skills.js";
 import { reportsRoutes } from "./routes/reports.js";
 import { deploymentRoutes } from "./routes/deployments.js";
+import { batchRoutes } from "./routes/batch.js";
 
 export async function buildApp(opts?: { logger?: boolean }): Promise<FastifyInstance> {
   const app = Fastify({ logger: opts?.logger ?? true });
@@ -76,6 +77,7 @@ export async function buildApp(opts?: { logger?: boolean }): Promise<FastifyInst
   await app.register(skillsRoutes);
   await app.register(reportsRoutes);
   await app.register(deploymentRoutes);
+  await app.register(batchRoutes);
 
   return app;
 }
@@ -0,0 +1,31 @@
+-- Migration 037: fila durável de invocações de agentes (POST /invoke/{role}/async)
+-- Substitui o dict em memória _async_jobs do serviço de agentes: um restart do
+-- container não perde jobs. Workers fazem claim com lease + heartbeat; job cujo
+-- lease expira (worker morreu) volta a ser elegível até max attempts.
+
+CREATE TABLE IF NOT EXISTS agent_jobs (
+  job_id            TEXT         PRIMARY KEY,
+  role              TEXT         NOT NULL,
+  -- engineer | cto | pm | dev | qa | monitor | devops
+
+  status            TEXT         NOT NULL DEFAULT 'queued'
+                    CHECK (status IN ('queued', 'running', 'done', 'error')),
+
+  body              JSONB        NOT NULL,
+  -- message_envelope recebido no submit
+
+  result            JSONB,
+  -- response_envelope quando status = done
+
+  error             TEXT,
+  attempts          INT          NOT NULL DEFAULT 0,
+  worker_id         TEXT,
+  lease_expires_at  TIMESTAMPTZ,
+  -- heartbeat estende o lease; lease vencido com status running = worker perdido
+
+  created_at        TIMESTAMPTZ  NOT NULL DEFAULT NOW(),
+  updated_at        TIMESTAMPTZ  NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_agent_jobs_claim   ON agent_jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_agent_jobs_updated ON agent_jobs(updated_at);
@@ -0,0 +1,6 @@
+-- Migration 038: tokens de prompt caching por chamada de agente
+-- O runtime marca blocos estáveis do system prompt com cache_control (Anthropic/Bedrock);
+-- a usage devolve cache_read_input_tokens / cache_creation_input_tokens separados de input_tokens.
+
+ALTER TABLE project_agent_metrics ADD COLUMN IF NOT EXISTS cache_read_tokens  INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE project_agent_metrics ADD COLUMN IF NOT EXISTS cache_write_tokens INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,66 @@
+/**
+ * POST /api/batch — várias chamadas da API em uma única requisição HTTP.
+ *
+ * Usado pelo runner (orchestrator/api_client.py) para agrupar PATCHes de tasks, posts de
+ * diálogo etc. Cada operação é despachada internamente (app.inject) pela rota normal, com o
+ * mesmo Authorization da requisição de batch — autenticação, validação e notificações de
+ * mudança são exatamente as da chamada individual. Operações rodam em sequência, na ordem
+ * enviada; a falha de uma não interrompe as demais.
+ *
+ * Body:     { requests: [{ method, path, body? }] }
+ * Resposta: { responses: [{ status, body }] }  (mesma ordem)
+ */
+
+import type { FastifyInstance } from "fastify";
+import { authMiddleware } from "../middleware/auth.js";
+
+const MAX_BATCH_OPS = Number(process.env.API_BATCH_MAX_OPS ?? 50);
+const ALLOWED_METHODS = new Set(["GET", "POST", "PUT", "PATCH", "DELETE"]);
+
+type BatchOp = { method?: string; path?: string; body?: unknown };
+
+export async function batchRoutes(app: FastifyInstance) {
+  app.post<{ Body: { requests?: BatchOp[] } }>(
+    "/api/batch",
+    { preHandler: authMiddleware },
+    async (request, reply) => {
+      const ops = request.body?.requests;
+      if (!Array.isArray(ops) || ops.length === 0) {
+        return reply.status(400).send({ code: "VALIDATION_ERROR", message: "requests deve ser um array não vazio" });
+      }
+      if (ops.length > MAX_BATCH_OPS) {
+        return reply.status(400).send({ code: "VALIDATION_ERROR", message: `Máximo de ${MAX_BATCH_OPS} operações por batch` });
+      }
+      const authorization = request.headers.authorization as string;
+      const responses: { status: number; body: unknown }[] = [];
+      for (const op of ops) {
+        const method = String(op?.method ?? "").toUpperCase();
+        const path = String(op?.path ?? "");
+        if (!ALLOWED_METHODS.has(method) || !path.startsWith("/api/") || path.startsWith("/api/batch")) {
+          responses.push({ status: 400, body: { code: "VALIDATION_ERROR", message: "Operação inválida" } });
+          continue;
+        }
+        const res = await app.inject({
+          method: method as "GET" | "POST" | "PUT" | "PATCH" | "DELETE",
+          url: path,
+          headers: {
+            authorization,
+            ...(op.body !== undefined ? { "content-type": "application/json" } : {}),
+            ...(request.headers["x-request-id"] ? { "x-request-id": String(request.headers["x-request-id"]) } : {}),
+          },
+          ...(op.body !== undefined ? { payload: JSON.stringify(op.body) } : {}),
+        });
+        let body: unknown = null;
+        if (res.body) {
+          try {
+            body = JSON.parse(res.body);
+          } catch {
+            body = res.body;
+          }
+        }
+        responses.push({ status: res.statusCode, body });
+      }
+      return reply.send({ responses });
+    }
+  );
+}
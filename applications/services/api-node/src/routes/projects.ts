@@ -13,6 +13,16 @@ import { handleBackendCallback } from "../services/provision/backendCallback.js"
 import { pool } from "../db/client.js";
 import { authMiddleware, type AuthUser } from "../middleware/auth.js";
 import { notifyTelegramTenant } from "./telegram.js";
+import {
+  CHANGES_MAX_WAIT_SEC,
+  CHANGES_POLL_MS,
+  ifNoneMatch,
+  notifyProjectChange,
+  projectChangeVersion,
+  projectEtag,
+  tasksEtag,
+  waitForProjectChange,
+} from "../services/projectChanges.js";
 
 function getUser(request: FastifyRequest): AuthUser {
   return (request as unknown as { user: AuthUser }).user;
@@ -203,6 +213,10 @@ export async function projectRoutes(app: FastifyInstance) {
       if (user.role !== "zentriz_admin" && row.tenant_id !== user.tenantId && row.created_by !== user.id) {
         return reply.status(403).send({ code: "FORBIDDEN", message: "Sem permissão" });
       }
+      // GET condicional (Monitor Loop): projeto e fontes ligadas (tasks, diálogo, spec) inalterados → 304
+      const etag = await projectEtag(client, row);
+      reply.header("ETag", etag);
+      if (ifNoneMatch(request.headers["if-none-match"], etag)) return reply.status(304).send();
       return reply.send({
         id: row.id,
         tenantId: row.tenant_id,
@@ -302,6 +316,7 @@ export async function projectRoutes(app: FastifyInstance) {
           `UPDATE projects SET ${updates.join(", ")} WHERE id = $${i}`,
           values
         );
+        notifyProjectChange(id);
 
         // Disparar gatilhos se status mudou para completed
         if (status === "completed") {
@@ -343,6 +358,10 @@ export async function projectRoutes(app: FastifyInstance) {
     try {
       const allowed = await checkProjectAccess(client, id, user);
       if (!allowed) return reply.status(404).send({ code: "NOT_FOUND", message: "Projeto não encontrado" });
+      // GET condicional (Monitor Loop): tasks inalteradas → 304 sem reler as linhas
+      const etag = await tasksEtag(client, id);
+      reply.header("ETag", etag);
+      if (ifNoneMatch(request.headers["if-none-match"], etag)) return reply.status(304).send();
       const result = await client.query(
         `SELECT id, project_id, task_id, module, owner_role, requirements, status, artifacts_ref, evidence, created_at, updated_at,
                 monitor_attempted
@@ -378,6 +397,45 @@ export async function projectRoutes(app: FastifyInstance) {
     }
   });
 
+  // GET /api/projects/:id/changes?since=<version>&timeout=<s> — long-poll do Monitor Loop.
+  // Responde assim que a versão do projeto (status + tasks) difere de `since`, ou no timeout
+  // com changed=false. Sem `since`, responde na hora com a versão atual (cursor inicial).
+  app.get<{
+    Params: { id: string };
+    Querystring: { since?: string; timeout?: string };
+  }>("/api/projects/:id/changes", async (request, reply) => {
+    const user = getUser(request);
+    const { id } = request.params;
+    const since = request.query.since || undefined;
+    const waitSec = Math.min(Math.max(Number(request.query.timeout ?? 25) || 0, 0), CHANGES_MAX_WAIT_SEC);
+    const readVersion = async (): Promise<string | null> => {
+      const client = await pool.connect();
+      try {
+        return await projectChangeVersion(client, id);
+      } finally {
+        client.release();
+      }
+    };
+    {
+      const client = await pool.connect();
+      try {
+        const allowed = await checkProjectAccess(client, id, user);
+        if (!allowed) return reply.status(404).send({ code: "NOT_FOUND", message: "Projeto não encontrado" });
+      } finally {
+        client.release();
+      }
+    }
+    const deadline = Date.now() + waitSec * 1000;
+    // Conexão do pool só durante cada leitura da versão — nunca presa durante a espera
+    let version = await readVersion();
+    while (since !== undefined && version === since && Date.now() < deadline) {
+      await waitForProjectChange(id, Math.min(CHANGES_POLL_MS, deadline - Date.now()));
+      version = await readVersion();
+    }
+    if (version === null) return reply.status(404).send({ code: "NOT_FOUND", message: "Projeto não encontrado" });
+    return reply.send({ version, changed: since !== undefined && version !== since });
+  });
+
   // POST /api/projects/:id/tasks — seed ou upsert tarefas (runner / Monitor Loop)
   app.post<{
     Params: { id: string };
@@ -419,6 +477,7 @@ export async function projectRoutes(app: FastifyInstance) {
         );
         created.push({ taskId, module, ownerRole, status });
       }
+      notifyProjectChange(id);
       return reply.status(201).send({ ok: true, tasks: created });
     } finally {
       client.release();
@@ -490,6 +549,7 @@ export async function projectRoutes(app: FastifyInstance) {
         values
       );
       if (result.rowCount === 0) return reply.status(404).send({ code: "NOT_FOUND", message: "Tarefa não encontrada" });
+      notifyProjectChange(id);
       return reply.send({ ok: true });
     } finally {
       client.release();
@@ -870,7 +930,7 @@ export async function projectRoutes(app: FastifyInstance) {
     }
   });
 
-  // Lista documentos/artefatos do projeto (PROJECT_FILES_ROOT/<id>/docs/manifest.json)
+  // Lista documentos/artefatos do projeto (PROJECT_FILES_ROOT/<id>/docs/manifest.json + manifest.log.jsonl)
   app.get<{ Params: { id: string } }>("/api/projects/:id/artifacts", async (request, reply) => {
     const user = getUser(request);
     const { id } = request.params;
@@ -893,7 +953,16 @@ export async function projectRoutes(app: FastifyInstance) {
       const docsDir = path.join(root, id, "docs");
       const projectDir = path.join(root, id, "project");
       const manifestPath = path.join(docsDir, "manifest.json");
-      let docs: Array<{ filename: string; creator: string; title?: string; created_at?: string }> = [];
+      const manifestLogPath = path.join(docsDir, "manifest.log.jsonl");
+      type ManifestEntry = { filename: string; creator: string; title?: string; created_at?: string };
+      let docs: ManifestEntry[] = [];
+      // Log append-only lido ANTES do snapshot: uma compactação no meio não esconde entradas
+      let logRaw = "";
+      try {
+        logRaw = await readFile(manifestLogPath, "utf-8");
+      } catch {
+        // sem log (nada escrito desde a última compactação)
+      }
       try {
         const raw = await readFile(manifestPath, "utf-8");
         const parsed = JSON.parse(raw);
@@ -901,6 +970,28 @@ export async function projectRoutes(app: FastifyInstance) {
       } catch {
         // manifest não existe ou inválido
       }
+      // Toda entrada appendada aparece, na ordem; só a mesma entrada repetida (compactação
+      // interrompida antes de truncar o log) é ignorada — mesma chave de _manifest_entry_key
+      // em applications/orchestrator/project_storage.py
+      const entryKey = (e: ManifestEntry) => `${e.filename}\u0000${e.creator}\u0000${e.title ?? ""}\u0000${e.created_at ?? ""}`;
+      const seen = new Set<string>();
+      const merged: ManifestEntry[] = [];
+      const keep = (e: ManifestEntry) => {
+        if (e && typeof e === "object" && !seen.has(entryKey(e))) {
+          seen.add(entryKey(e));
+          merged.push(e);
+        }
+      };
+      docs.forEach(keep);
+      for (const line of logRaw.split("\n")) {
+        if (!line.trim()) continue;
+        try {
+          keep(JSON.parse(line) as ManifestEntry);
+        } catch {
+          // linha truncada
+        }
+      }
+      docs = merged;
       return reply.send({
         docs,
         projectDocsRoot: docsDir,
@@ -1233,7 +1324,7 @@ export async function projectRoutes(app: FastifyInstance) {
   // POST /api/projects/:id/agent-metrics — registra métricas de tokens/custo por chamada de agente
   app.post<{
     Params: { id: string };
-    Body: { agent: string; taskId?: string; round?: number; inputTokens: number; outputTokens: number; model?: string; durationMs?: number; status?: string };
+    Body: { agent: string; taskId?: string; round?: number; inputTokens: number; outputTokens: number; cacheReadTokens?: number; cacheWriteTokens?: number; model?: string; durationMs?: number; status?: string };
   }>("/api/projects/:id/agent-metrics", async (request, reply) => {
     const user = getUser(request);
     const { id } = request.params;
@@ -1249,8 +1340,9 @@ export async function projectRoutes(app: FastifyInstance) {
       }
       await client.query(
         `INSERT INTO project_agent_metrics
-           (project_id, agent, task_id, round, input_tokens, output_tokens, model, duration_ms, status)
-         VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)`,
+           (project_id, agent, task_id, round, input_tokens, output_tokens, model, duration_ms, status,
+            cache_read_tokens, cache_write_tokens)
+         VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)`,
         [
           id,
           String(body.agent ?? "unknown"),
@@ -1261,6 +1353,8 @@ export async function projectRoutes(app: FastifyInstance) {
           body.model ? String(body.model) : null,
           body.durationMs ? Number(body.durationMs) : null,
           body.status ? String(body.status) : null,
+          Number(body.cacheReadTokens ?? 0),
+          Number(body.cacheWriteTokens ?? 0),
         ]
       );
       return reply.status(201).send({ ok: true });
@@ -14,6 +14,7 @@ import type { FastifyInstance, FastifyRequest } from "fastify";
 import { pool } from "../db/client.js";
 import { authMiddleware, type AuthUser } from "../middleware/auth.js";
 import { createHash } from "crypto";
+import { ifNoneMatch } from "../services/projectChanges.js";
 
 function getUser(r: FastifyRequest): AuthUser {
   return (r as unknown as { user: AuthUser }).user;
@@ -170,6 +171,12 @@ export async function skillsRoutes(app: FastifyInstance): Promise<void> {
       }
     }
 
+    // GET condicional (cache de bundles do runner): bundle inalterado → 304 sem corpo.
+    // O uso (skill_bundle / use_count) já foi registrado acima, como numa resposta completa.
+    const etag = `"${bundleHash}"`;
+    reply.header("ETag", etag);
+    if (ifNoneMatch(request.headers["if-none-match"], etag)) return reply.status(304).send();
+
     return reply.send({
       data: {
         role,
@@ -0,0 +1,21 @@
+/**
+ * Prioridade dos payloads de deploy enviados ao full-test-server (fila do job_scheduler).
+ */
+import { describe, it, expect } from "vitest";
+
+import { backendDeployPriority, s3DeployPriority } from "./jobPriority.js";
+
+describe("s3DeployPriority", () => {
+  it("usuário do portal passa na frente do Cyborg", () => {
+    expect(s3DeployPriority("2f1c7a4e-8b3d-4c1a-9e2f-0a1b2c3d4e5f")).toBe("high");
+    expect(s3DeployPriority("runner-service")).toBe("normal");
+    expect(s3DeployPriority("")).toBe("normal");
+  });
+});
+
+describe("backendDeployPriority", () => {
+  it("demo fica atrás do durável", () => {
+    expect(backendDeployPriority("durable")).toBe("normal");
+    expect(backendDeployPriority("demo")).toBe("low");
+  });
+});
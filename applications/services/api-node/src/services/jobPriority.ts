@@ -0,0 +1,19 @@
+/**
+ * Prioridade dos jobs disparados no full-test-server (campo `priority` do payload de
+ * /launch-s3-deploy e /launch-backend-deploy; valores de PRIORITIES em scripts/job_scheduler.py).
+ * Menor = antes na fila; FIFO dentro da mesma prioridade.
+ */
+
+export type JobPriority = "unblock" | "high" | "normal" | "low" | "speculative";
+
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+/** Deploy S3 pedido por um usuário no portal (consentedBy = UUID) passa na frente do disparado pelo Cyborg. */
+export function s3DeployPriority(consentedByUserId: string): JobPriority {
+  return UUID_RE.test(consentedByUserId) ? "high" : "normal";
+}
+
+/** Backend demo (DB sidecar efêmero) fica atrás do provisionamento durável. */
+export function backendDeployPriority(klass: "durable" | "demo"): JobPriority {
+  return klass === "demo" ? "low" : "normal";
+}
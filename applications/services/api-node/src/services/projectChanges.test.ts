@@ -0,0 +1,55 @@
+/**
+ * ETags do Monitor Loop: o ETag do projeto muda com colunas que não tocam updated_at e com as
+ * fontes ligadas (tasks, diálogo, spec), não só com status/updated_at.
+ */
+import { describe, it, expect } from "vitest";
+
+import { ifNoneMatch, projectEtag } from "./projectChanges.js";
+
+function client(joined: Record<string, unknown>) {
+  return { query: async () => ({ rows: [joined] }) };
+}
+
+const row = {
+  id: "p1",
+  status: "dev_qa",
+  updated_at: new Date("2026-01-01T00:00:00Z"),
+  cyborg_attempts: 0,
+  extra: { project_type: "web" },
+};
+const joined = {
+  task_count: "3",
+  tasks_updated_at: new Date("2026-01-01T00:01:00Z"),
+  dialogue_count: "5",
+  dialogue_at: new Date("2026-01-01T00:02:00Z"),
+  spec_count: "1",
+  spec_at: new Date("2026-01-01T00:00:00Z"),
+};
+
+describe("projectEtag", () => {
+  it("estável quando nada muda", async () => {
+    const etag = await projectEtag(client(joined), row);
+    expect(etag).toMatch(/^W\/"project-[0-9a-f]{16}"$/);
+    expect(await projectEtag(client({ ...joined }), { ...row })).toBe(etag);
+    expect(ifNoneMatch(etag, etag)).toBe(true);
+  });
+
+  it("muda com tasks/diálogo/spec mesmo com o projeto intocado", async () => {
+    const base = await projectEtag(client(joined), row);
+    const changes = [
+      { tasks_updated_at: new Date("2026-01-01T00:05:00Z") },
+      { task_count: "4" },
+      { dialogue_count: "6" },
+      { spec_count: "2" },
+    ];
+    for (const change of changes) {
+      expect(await projectEtag(client({ ...joined, ...change }), row)).not.toBe(base);
+    }
+  });
+
+  it("muda com colunas atualizadas sem tocar updated_at", async () => {
+    const base = await projectEtag(client(joined), row);
+    expect(await projectEtag(client(joined), { ...row, cyborg_attempts: 1 })).not.toBe(base);
+    expect(await projectEtag(client(joined), { ...row, extra: { project_type: "api" } })).not.toBe(base);
+  });
+});
@@ -0,0 +1,105 @@
+/**
+ * projectChanges.ts — canal de mudanças por projeto para o Monitor Loop do runner.
+ *
+ * Versão do projeto = status + updated_at do projeto + (count, max(updated_at)) das tasks.
+ * Serve de cursor para o long-poll GET /api/projects/:id/changes?since=<version>; os GETs
+ * condicionais (If-None-Match → 304) usam projectEtag/tasksEtag.
+ *
+ * Rotas que alteram tasks/projeto chamam notifyProjectChange(id) e acordam os long-polls
+ * deste processo na hora. Mudanças feitas por outra instância da API (ou direto no banco)
+ * são vistas pela re-leitura periódica da versão (CHANGES_POLL_MS) durante a espera.
+ */
+
+import { EventEmitter } from "events";
+import { createHash } from "crypto";
+
+type Queryable = { query: (q: string, p?: unknown[]) => Promise<{ rows: Record<string, unknown>[] }> };
+
+const emitter = new EventEmitter();
+emitter.setMaxListeners(0); // um listener por long-poll ativo
+
+export const CHANGES_POLL_MS = Number(process.env.PROJECT_CHANGES_POLL_MS ?? 1000);
+export const CHANGES_MAX_WAIT_SEC = Number(process.env.PROJECT_CHANGES_MAX_WAIT_SEC ?? 55);
+
+export function notifyProjectChange(projectId: string): void {
+  emitter.emit(projectId);
+}
+
+/** Versão opaca do projeto; null se o projeto não existe. */
+export async function projectChangeVersion(client: Queryable, projectId: string): Promise<string | null> {
+  const r = await client.query(
+    `SELECT p.status,
+            p.updated_at,
+            (SELECT COUNT(*) FROM project_tasks t WHERE t.project_id = p.id)            AS task_count,
+            (SELECT MAX(t.updated_at) FROM project_tasks t WHERE t.project_id = p.id)   AS tasks_updated_at
+       FROM projects p WHERE p.id = $1`,
+    [projectId]
+  );
+  const row = r.rows[0];
+  if (!row) return null;
+  const ms = (v: unknown) => (v instanceof Date ? v.getTime() : v ? new Date(String(v)).getTime() : 0);
+  return createHash("sha1")
+    .update(`${row.status}|${ms(row.updated_at)}|${row.task_count}|${ms(row.tasks_updated_at)}`)
+    .digest("hex")
+    .slice(0, 16);
+}
+
+/**
+ * ETag fraco do GET /api/projects/:id: conteúdo da linha do projeto (extra, cyborg_attempts etc.
+ * mudam sem tocar updated_at) + count/max das fontes ligadas ao projeto — tasks (artifacts_ref e
+ * evidence vivem nelas), diálogo e arquivos de spec. Qualquer escrita nessas tabelas muda o ETag.
+ */
+export async function projectEtag(client: Queryable, row: Record<string, unknown>): Promise<string> {
+  const r = await client.query(
+    `SELECT (SELECT COUNT(*) FROM project_tasks t WHERE t.project_id = $1)              AS task_count,
+            (SELECT MAX(t.updated_at) FROM project_tasks t WHERE t.project_id = $1)     AS tasks_updated_at,
+            (SELECT COUNT(*) FROM project_dialogue d WHERE d.project_id = $1)           AS dialogue_count,
+            (SELECT MAX(d.created_at) FROM project_dialogue d WHERE d.project_id = $1)  AS dialogue_at,
+            (SELECT COUNT(*) FROM project_spec_files f WHERE f.project_id = $1)         AS spec_count,
+            (SELECT MAX(f.created_at) FROM project_spec_files f WHERE f.project_id = $1) AS spec_at`,
+    [row.id]
+  );
+  const j = r.rows[0] ?? {};
+  const ms = (v: unknown) => (v instanceof Date ? v.getTime() : v ? new Date(String(v)).getTime() : 0);
+  const digest = createHash("sha1")
+    .update(JSON.stringify(row))
+    .update(
+      `|${j.task_count ?? 0}|${ms(j.tasks_updated_at)}|${j.dialogue_count ?? 0}|${ms(j.dialogue_at)}` +
+        `|${j.spec_count ?? 0}|${ms(j.spec_at)}`
+    )
+    .digest("hex")
+    .slice(0, 16);
+  return `W/"project-${digest}"`;
+}
+
+/** ETag fraco das tasks do projeto (count + max(updated_at)) — barato, sem ler as linhas. */
+export async function tasksEtag(client: Queryable, projectId: string): Promise<string> {
+  const r = await client.query(
+    "SELECT COUNT(*) AS n, MAX(updated_at) AS ts FROM project_tasks WHERE project_id = $1",
+    [projectId]
+  );
+  const row = r.rows[0] ?? {};
+  const ts = row.ts instanceof Date ? row.ts.getTime() : row.ts ? new Date(String(row.ts)).getTime() : 0;
+  return `W/"tasks-${row.n ?? 0}-${ts}"`;
+}
+
+/** Espera até notifyProjectChange(projectId) ou ms; resolve true se foi notificado. */
+export function waitForProjectChange(projectId: string, ms: number): Promise<boolean> {
+  return new Promise((resolve) => {
+    const onChange = () => {
+      clearTimeout(timer);
+      resolve(true);
+    };
+    const timer = setTimeout(() => {
+      emitter.off(projectId, onChange);
+      resolve(false);
+    }, Math.max(0, ms));
+    emitter.once(projectId, onChange);
+  });
+}
+
+export function ifNoneMatch(header: string | string[] | undefined, etag: string): boolean {
+  if (!header) return false;
+  const values = (Array.isArray(header) ? header.join(",") : header).split(",").map((v) => v.trim());
+  return values.includes(etag) || values.includes("*");
+}
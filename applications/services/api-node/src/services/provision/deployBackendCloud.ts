@@ -17,6 +17,7 @@ import { signDeployCallbackToken } from "../../auth.js";
 import { resolveAwsCredentials } from "./awsCredentials.js";
 import { validateDeployMatrix } from "./deployMatrix.js";
 import { createOrGetActiveDeployment, setStatus, patchDeployment } from "./backendState.js";
+import { backendDeployPriority } from "../jobPriority.js";
 
 export interface BackendDeployResult {
   deploymentId: string;
@@ -144,6 +145,8 @@ export async function deployBackendCloud(req: BackendDeployRequest): Promise<Bac
     aws_region: creds.region,
     // Repassa o profile p/ o runner usar a cadeia default quando não há chave explícita.
     aws_profile: process.env.GENESIS_PROVISION_PROFILE ?? process.env.AWS_PROFILE ?? "",
+    // Fila do job_scheduler: demo efêmero atrás do durável
+    priority: backendDeployPriority(klass),
   };
 
   try {
@@ -11,6 +11,7 @@ import { pool } from "../db/client.js";
 import { detectStaticProject, type DetectionResult } from "./staticDetector.js";
 import { generateBucketName, isS3Configured } from "./s3.js";
 import { getInstallationTokenForClone } from "./github.js";
+import { s3DeployPriority } from "./jobPriority.js";
 import { join } from "node:path";
 
 export interface S3StaticDeployResult {
@@ -240,6 +241,8 @@ export async function deployS3Static(req: DeployRequest): Promise<S3StaticDeploy
     aws_s3_access_key_id: process.env.AWS_S3_DEPLOY_ACCESS_KEY_ID ?? "",
     aws_s3_secret_access_key: process.env.AWS_S3_DEPLOY_SECRET_ACCESS_KEY ?? "",
     aws_s3_region: process.env.AWS_S3_DEPLOY_REGION ?? "us-east-1",
+    // Fila do job_scheduler: pedido do portal antes do disparo autônomo (Cyborg)
+    priority: s3DeployPriority(req.consentedByUserId),
   };
 
   try {
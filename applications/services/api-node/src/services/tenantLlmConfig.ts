@@ -34,6 +34,7 @@ export interface ResolvedLlmConfig {
   awsSecretAccessKey?: string;
   isDefault:           boolean;
   priority:            number;
+  tenantId?:           string;   // escopo de isolamento dos clientes LLM no agents (FT-13)
 }
 
 const SYSTEM_DEFAULT: TenantLlmConfig = {
@@ -136,6 +137,7 @@ export async function resolveProjectLlmConfig(projectId: string): Promise<Resolv
           awsSecretAccessKey: creds.aws_secret_access_key,
           isDefault:          false,
           priority:           0,
+          tenantId:           tenantId || undefined,
         };
       }
     } catch { /* fall through */ }
@@ -147,6 +149,7 @@ export async function resolveProjectLlmConfig(projectId: string): Promise<Resolv
       awsRegion: process.env.GENESIS_AWS_REGION,
       isDefault: true,
       priority:  -1,
+      tenantId:  tenantId || undefined,
     };
   }
 
@@ -165,6 +168,7 @@ export async function resolveProjectLlmConfig(projectId: string): Promise<Resolv
           awsSecretAccessKey: cfg.credentials.aws_secret_access_key,
           isDefault:          false,
           priority:           cfg.priority,
+          tenantId,
         };
       }
     }
@@ -19,13 +19,16 @@ Fluxo (única etapa docker do provisionamento backend):
   11. Callback progress='pushed' + image_uri  → API (o orquestrador SDK segue daqui)
   12. finally: shutil.rmtree(/tmp/backend-build-<did>)
 
+cancel_event (job.cancel_event do JobScheduler): checado entre as etapas; cancelado → callback
+status='failed' com error_code CANCELLED (o comando em andamento não é interrompido).
+
 NÃO cria ECS/RDS/ALB: isso é o control-plane SDK in-process (deployBackendCloud, G1-T12).
 Este runner faz SÓ a etapa docker+push, que precisa do host.
 
 Usa credenciais AWS passadas no payload (não herda do host). GATE 1 = conta Zentriz.
 """
 from __future__ import annotations
-import json, os, shutil, subprocess, tempfile, time, logging
+import json, os, shutil, subprocess, tempfile, threading, time, logging
 from pathlib import Path
 from typing import Optional
 import urllib.request, urllib.error
@@ -41,7 +44,12 @@ class BackendDeployError(Exception):
         self.details = details or {}
 
 
-def run_backend_deploy(payload: dict) -> dict:
+def _check_cancel(cancel_event: Optional[threading.Event], step: str) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise BackendDeployError("CANCELLED", f"Deploy cancelado antes de '{step}'.", {"step": step})
+
+
+def run_backend_deploy(payload: dict, cancel_event: Optional[threading.Event] = None) -> dict:
     """Ponto de entrada — orquestra clone+build+push ECR. Retorna dict para logging."""
     deployment_id = payload["deployment_id"]
     project_id = payload["project_id"]
@@ -134,6 +142,7 @@ def run_backend_deploy(payload: dict) -> dict:
         image_uri = f"{ecr_uri}:{image_tag}"
 
         # 4. Build da imagem (amd64 — obrigatório p/ ECS Fargate na conta Zentriz).
+        _check_cancel(cancel_event, "build")
         _callback(api_url, api_token, project_id, deployment_id, {"progress": "building"})
         log.info(f"[backend-deploy] {deployment_id}: docker build {image_uri}")
         _run(
@@ -143,10 +152,12 @@ def run_backend_deploy(payload: dict) -> dict:
         )  # -f explícito + context svc_dir: Dockerfile já garantido dentro do context acima
 
         # 5. Cria o repositório ECR — IDEMPOTENTE (captura RepositoryAlreadyExistsException).
+        _check_cancel(cancel_event, "ecr")
         _ensure_ecr_repo(ecr_repo_name, project_id, tenant_id, deployment_id, aws_env)
 
         # 6. Login no registry ECR e push.
         _ecr_login(ecr_registry, aws_env, deployment_id)
+        _check_cancel(cancel_event, "push")
         _callback(api_url, api_token, project_id, deployment_id, {"progress": "pushing"})
         log.info(f"[backend-deploy] {deployment_id}: docker push {image_uri}")
         _run(["docker", "push", image_uri], timeout=600, deployment_id=deployment_id, phase="push")
@@ -9,6 +9,10 @@ Endpoints:
   POST /run-full-test   — TSK-FULL-TEST interno (pipeline Genesis)
   POST /launch-cyborg   — Cyborg externo: valida, corrige e aceita/rejeita projeto
   GET  /health          — healthcheck
+  GET  /jobs            — fila do scheduler de jobs pesados (rodando, na fila com posição/ETA, host)
+  GET  /jobs/<id>       — estado / posição / ETA de um job
+  POST /jobs/<id>/cancel — {"cancel_token"} devolvido no launch; na fila sai da fila, deploy
+                           em execução (S3 / backend) para antes da próxima etapa
 """
 import http.server, json, subprocess, os, logging, threading, time, uuid
 from pathlib import Path
@@ -25,54 +29,21 @@ CLAUDE_BIN   = os.environ.get("CLAUDE_BIN", str(Path.home() / ".local/bin/claude
 PORT         = int(os.environ.get("FULL_TEST_PORT", "7878"))
 CYBORG_DIR   = Path(__file__).parent.parent / "project" / "cyborg"
 
-# T09/FT-17: Semaphore global compartilhado entre Cyborg e S3 static deploy.
-# Limita concorrência total no host (2 vCPU no EC2 t3.large). Sem isso, um Cyborg
-# de 60min + build de Vite paralelos causam OOM kill. Ajustar via env HEAVY_JOBS_MAX.
-HEAVY_JOBS_MAX = int(os.environ.get("HEAVY_JOBS_MAX", "2"))
-HEAVY_SEM = threading.BoundedSemaphore(HEAVY_JOBS_MAX)
+# T09/FT-17 + G1-T11: jobs pesados (Cyborg, S3 static deploy, build backend) passam pelo
+# JobScheduler: fila com prioridade + admissão por memória livre medida e carga de CPU, com os
+# tetos antigos por classe (HEAVY_JOBS_MAX para Cyborg/S3, BACKEND_BUILD_MAX para build backend).
+# Sem isso, um Cyborg longo + builds de Vite paralelos causam OOM kill (2 vCPU no EC2 t3.large).
+from job_scheduler import JobCancelled, JobScheduler  # noqa: E402  (scripts/ é sys.path[0])
 
-# G1-T11: semáforo SEPARADO para o build backend (clone+docker build+push ECR).
-# Fica FORA do HEAVY_SEM de propósito: um build de imagem grande não pode serializar
-# com Cyborg/S3 (e vice-versa). Limita só a concorrência de builds backend entre si
-# (docker build é I/O+CPU pesado). Ajustar via env BACKEND_BUILD_MAX.
-BACKEND_BUILD_MAX = int(os.environ.get("BACKEND_BUILD_MAX", "2"))
-BACKEND_SEM = threading.BoundedSemaphore(BACKEND_BUILD_MAX)
+SCHEDULER = JobScheduler()
 
-
-def acquire_heavy_slot(kind: str, job_id: str) -> None:
-    """Bloqueia até slot livre. Loga espera para debug."""
-    if HEAVY_SEM.acquire(blocking=False):
-        log.info(f"[SEM] acquired kind={kind} job={job_id} (immediate)")
-        return
-    log.warning(f"[SEM] waiting kind={kind} job={job_id} — outros jobs em execução")
-    HEAVY_SEM.acquire(blocking=True)
-    log.info(f"[SEM] acquired kind={kind} job={job_id} (after wait)")
-
-
-def acquire_backend_slot(job_id: str) -> None:
-    """Slot do build backend (semáforo próprio, independente do HEAVY_SEM)."""
-    if BACKEND_SEM.acquire(blocking=False):
-        log.info(f"[BSEM] acquired backend job={job_id} (immediate)")
-        return
-    log.warning(f"[BSEM] waiting backend job={job_id} — outros builds backend em execução")
-    BACKEND_SEM.acquire(blocking=True)
-    log.info(f"[BSEM] acquired backend job={job_id} (after wait)")
-
-
-def release_backend_slot(job_id: str) -> None:
-    try:
-        BACKEND_SEM.release()
-        log.info(f"[BSEM] released backend job={job_id}")
-    except ValueError:
-        pass
-
-
-def release_heavy_slot(kind: str, job_id: str) -> None:
-    try:
-        HEAVY_SEM.release()
-        log.info(f"[SEM] released kind={kind} job={job_id}")
-    except ValueError:
-        log.error(f"[SEM] release without acquire kind={kind} job={job_id}")
+# Endpoints síncronos pesados (o Cyborg V3 espera a resposta) → tipo de job no scheduler
+SYNC_JOB_KINDS = {
+    "/cyborg-claude-code": "cyborg-claude-code",
+    "/cyborg-playwright":  "cyborg-playwright",
+    "/cyborg-build":       "cyborg-build",
+    "/cyborg-engineer":    "cyborg-engineer",
+}
 
 # Mapeamento group → RUNBOOK file (derivado do prefixo do project_type)
 RUNBOOK_MAP = {
@@ -175,10 +146,43 @@ class Handler(http.server.BaseHTTPRequestHandler):
     def do_GET(self):
         if self.path == "/health":
             self._json(200, {"status": "ok", "claude": CLAUDE_BIN, "port": PORT})
+        elif self.path == "/jobs":
+            self._json(200, SCHEDULER.snapshot())
+        elif self.path.startswith("/jobs/"):
+            st = SCHEDULER.status(self.path[len("/jobs/"):].strip("/"))
+            self._json(200, st) if st else self._json(404, {"error": "job not found"})
         else:
             self._json(404, {"error": "not found"})
 
     def do_POST(self):
+        kind = SYNC_JOB_KINDS.get(self.path)
+        if kind:
+            # Fila do scheduler; prioridade opcional via header (ex.: unblock | normal | speculative)
+            try:
+                with SCHEDULER.slot(kind, priority=self.headers.get("X-Job-Priority", "normal")):
+                    self._dispatch_post()
+            except JobCancelled as e:
+                self._json(409, {"error": str(e)})
+            return
+        if self.path.startswith("/jobs/") and self.path.endswith("/cancel"):
+            self._handle_cancel_job()
+            return
+        self._dispatch_post()
+
+    def _handle_cancel_job(self):
+        job_id = self.path[len("/jobs/"):-len("/cancel")].strip("/")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length).decode()) if length else {}
+        except Exception as e:
+            self._json(400, {"error": f"bad request: {e}"}); return
+        try:
+            st = SCHEDULER.cancel(job_id, str(body.get("cancel_token", "")))
+        except PermissionError as e:
+            self._json(403, {"error": str(e)}); return
+        self._json(200, st) if st else self._json(404, {"error": "job not found"})
+
+    def _dispatch_post(self):
         if self.path == "/run-full-test":
             self._handle_run_full_test()
         elif self.path == "/launch-cyborg":
@@ -480,11 +484,26 @@ class Handler(http.server.BaseHTTPRequestHandler):
         # FT-18 F8: snapshot antes das mudanças — usado depois para detectar refator suspeito.
         # Estratégia sem git: hash + tamanho de cada arquivo dentro de apps/src/. Se após execução
         # mais de N arquivos mudaram, marca refactor suspect (mesmo que verify_command passe).
+        # Via índice do projeto (orchestrator.file_index): valor = sha256, então arquivo só "tocado"
+        # (mtime novo, mesmo conteúdo) não conta como modificado; arquivos inalterados não são relidos.
         def _snapshot_apps(d: str) -> dict:
             snap = {}
             root = Path(d) / "apps" / "src"
             if not root.exists():
                 return snap
+            try:
+                import sys as _sys
+                _apps_path = str(Path(__file__).resolve().parent.parent / "applications")
+                if _apps_path not in _sys.path:
+                    _sys.path.insert(0, _apps_path)
+                from orchestrator.file_index import get_file_index
+                _idx = get_file_index(d)
+                return {
+                    k: sha for k, sha in _idx.snapshot("apps/src/").items()
+                    if _idx.entry("apps/src/" + k)["size"] < 500_000  # ignora binários grandes
+                }
+            except ImportError:
+                pass
             for p in root.rglob("*"):
                 if p.is_file() and p.stat().st_size < 500_000:  # ignora binários grandes
                     try:
@@ -680,25 +699,18 @@ print(json.dumps({{"results": results, "console_errors": console_errors[-30:]}})
         deployment_id = payload["deployment_id"]
         job_id = deployment_id[:8]
 
-        # Roda em thread (com semáforo)
-        def _worker():
-            acquire_heavy_slot("s3-deploy", job_id)
-            try:
-                # Import lazy — evita carregar módulo se rota nunca é chamada
-                from pathlib import Path as _P
-                import sys as _sys
-                _sys.path.insert(0, str(_P(__file__).parent))
-                from s3_deploy_runner import run_s3_deploy
-                run_s3_deploy(payload)
-            except Exception as e:
-                log.exception(f"[s3-deploy] {job_id} crashed: {e}")
-            finally:
-                release_heavy_slot("s3-deploy", job_id)
-
-        t = threading.Thread(target=_worker, name=f"s3-deploy-{job_id}", daemon=True)
-        t.start()
+        # Roda em thread quando o scheduler admitir (classe heavy)
+        def _worker(job):
+            # Import lazy — evita carregar módulo se rota nunca é chamada
+            from pathlib import Path as _P
+            import sys as _sys
+            _sys.path.insert(0, str(_P(__file__).parent))
+            from s3_deploy_runner import run_s3_deploy
+            run_s3_deploy(payload, cancel_event=job.cancel_event)  # POST /jobs/<id>/cancel → para entre etapas
 
-        self._json(202, {"ok": True, "job_id": job_id, "deployment_id": deployment_id})
+        job = SCHEDULER.submit("s3-deploy", _worker, job_id=job_id, priority=payload.get("priority", "normal"))
+        self._json(202, {"ok": True, "job_id": job_id, "deployment_id": deployment_id,
+                         "queue": SCHEDULER.status(job_id), "cancel_token": job.cancel_token})
 
     # ── /launch-backend-deploy (G1-T11) ───────────────────────────────────────
     def _handle_launch_backend_deploy(self):
@@ -720,24 +732,18 @@ print(json.dumps({{"results": results, "console_errors": console_errors[-30:]}})
         deployment_id = payload["deployment_id"]
         job_id = deployment_id[:8]
 
-        # Thread com semáforo PRÓPRIO (BACKEND_SEM) — não serializa com Cyborg/S3.
-        def _worker():
-            acquire_backend_slot(job_id)
-            try:
-                from pathlib import Path as _P
-                import sys as _sys
-                _sys.path.insert(0, str(_P(__file__).parent))
-                from backend_deploy_runner import run_backend_deploy
-                run_backend_deploy(payload)
-            except Exception as e:
-                log.exception(f"[backend-deploy] {job_id} crashed: {e}")
-            finally:
-                release_backend_slot(job_id)
-
-        t = threading.Thread(target=_worker, name=f"backend-deploy-{job_id}", daemon=True)
-        t.start()
-
-        self._json(202, {"ok": True, "job_id": job_id, "deployment_id": deployment_id})
+        # Classe PRÓPRIA no scheduler (teto BACKEND_BUILD_MAX) — não serializa com Cyborg/S3,
+        # mas divide a mesma admissão por memória/CPU do host.
+        def _worker(job):
+            from pathlib import Path as _P
+            import sys as _sys
+            _sys.path.insert(0, str(_P(__file__).parent))
+            from backend_deploy_runner import run_backend_deploy
+            run_backend_deploy(payload, cancel_event=job.cancel_event)
+
+        job = SCHEDULER.submit("backend-deploy", _worker, job_id=job_id, priority=payload.get("priority", "normal"))
+        self._json(202, {"ok": True, "job_id": job_id, "deployment_id": deployment_id,
+                         "queue": SCHEDULER.status(job_id), "cancel_token": job.cancel_token})
 
     # ── /run-full-test (pipeline interno) ─────────────────────────────────────
 
@@ -0,0 +1,399 @@
+"""
+job_scheduler.py — Fila de jobs pesados do full-test-server com admissão por recursos.
+
+Substitui os BoundedSemaphore fixos (HEAVY_SEM / BACKEND_SEM): além dos tetos por classe
+(HEAVY_JOBS_MAX para Cyborg/S3, BACKEND_BUILD_MAX para build backend), um job só começa
+quando a memória disponível medida (/proc/meminfo MemAvailable) comporta o custo estimado
+do tipo e a carga de CPU (loadavg / núcleos) está abaixo de FTS_LOAD_MAX.
+
+  - fila com prioridade (menor = antes; ex.: desbloquear task BLOCKED antes de re-auditoria
+    especulativa), FIFO dentro da mesma prioridade; o job da frente que não cabe em memória
+    segura os de trás (sem starvation de jobs grandes);
+  - job recém-iniciado ainda não alocou tudo: durante FTS_JOB_WARMUP_SEC o custo dele é
+    descontado da memória medida;
+  - sem nenhum job rodando o primeiro da fila sempre entra (estimativa > RAM não trava a fila);
+  - posição / ETA por job (duração média por tipo, aprendida com os jobs concluídos);
+  - cancel_token por job: cancela enquanto está na fila; rodando, sinaliza job.cancel_event, que
+    os runners de deploy (S3 / backend) checam entre as etapas. Slot síncrono já rodando não é
+    cancelável (cancellable=false no status); cancelado ainda na fila, slot() levanta JobCancelled.
+
+Uso:
+    job = SCHEDULER.submit("s3-deploy", lambda job: run_s3_deploy(payload), priority="normal")
+    with SCHEDULER.slot("cyborg-build", wait_timeout=60):   # endpoints síncronos
+        ...
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+log = logging.getLogger("full-test")
+
+HEAVY_JOBS_MAX = int(os.environ.get("HEAVY_JOBS_MAX", "2"))
+BACKEND_BUILD_MAX = int(os.environ.get("BACKEND_BUILD_MAX", "2"))
+FTS_JOBS_MAX = int(os.environ.get("FTS_JOBS_MAX", str(HEAVY_JOBS_MAX + BACKEND_BUILD_MAX)))
+FTS_MEM_RESERVE_MB = int(os.environ.get("FTS_MEM_RESERVE_MB", "768"))
+FTS_LOAD_MAX = float(os.environ.get("FTS_LOAD_MAX", "1.5") or 0)  # loadavg(1m) por núcleo; 0 = ignora
+FTS_JOB_WARMUP_SEC = float(os.environ.get("FTS_JOB_WARMUP_SEC", "90"))
+FTS_SYNC_QUEUE_WAIT_SEC = float(os.environ.get("FTS_SYNC_QUEUE_WAIT_SEC", "60"))
+
+PRIORITIES = {"unblock": 0, "high": 2, "normal": 5, "low": 7, "speculative": 9}
+
+# Pico de memória (MB) estimado por tipo — next/vite build e docker build dominam
+DEFAULT_COSTS_MB = {
+    "s3-deploy": 1500,
+    "backend-deploy": 2000,
+    "cyborg-build": 1500,
+    "cyborg-claude-code": 800,
+    "cyborg-engineer": 800,
+    "cyborg-playwright": 600,
+}
+# Duração típica (s) até haver histórico do tipo
+DEFAULT_DURATIONS_SEC = {
+    "s3-deploy": 300,
+    "backend-deploy": 600,
+    "cyborg-build": 240,
+    "cyborg-claude-code": 600,
+    "cyborg-engineer": 900,
+    "cyborg-playwright": 120,
+}
+# Classe → teto de concorrência (os antigos semáforos)
+KIND_CLASS = {"backend-deploy": "backend"}
+CLASS_CAPS = {"heavy": HEAVY_JOBS_MAX, "backend": BACKEND_BUILD_MAX}
+
+
+class JobCancelled(RuntimeError):
+    """Job cancelado enquanto esperava na fila (slot síncrono)."""
+
+
+def _env_costs() -> dict[str, int]:
+    """FTS_JOB_COSTS_MB='{"s3-deploy": 2500}' sobrescreve as estimativas."""
+    costs = dict(DEFAULT_COSTS_MB)
+    raw = os.environ.get("FTS_JOB_COSTS_MB", "").strip()
+    if raw:
+        try:
+            costs.update({str(k): int(v) for k, v in json.loads(raw).items()})
+        except (ValueError, TypeError, AttributeError) as e:
+            log.warning(f"[SCHED] FTS_JOB_COSTS_MB inválido ({e}) — usando defaults")
+    return costs
+
+
+def parse_priority(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip():
+        v = value.strip().lower()
+        if v in PRIORITIES:
+            return PRIORITIES[v]
+        try:
+            return int(v)
+        except ValueError:
+            pass
+    return PRIORITIES["normal"]
+
+
+class HostProbe:
+    """Memória disponível e carga de CPU do host. None = métrica indisponível (ex.: macOS sem /proc)."""
+
+    def mem_available_mb(self) -> Optional[float]:
+        try:
+            with open("/proc/meminfo", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def load_per_cpu(self) -> Optional[float]:
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (OSError, AttributeError):
+            return None
+
+
+class Job:
+    def __init__(self, kind: str, priority: int, cost_mb: int, job_id: str, sync: bool):
+        self.kind = kind
+        self.priority = priority
+        self.cost_mb = cost_mb
+        self.job_id = job_id
+        self.sync = sync
+        self.cancel_token = uuid.uuid4().hex
+        self.cancel_event = threading.Event()
+        self.admitted = threading.Event()
+        self.state = "queued"  # queued | running | done | failed | cancelled
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.blocked_by = ""
+        self.seq = 0
+
+    def public(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "state": self.state,
+            "cost_mb": self.cost_mb,
+            "enqueued_at": self.enqueued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "blocked_by": self.blocked_by or None,
+            "cancel_requested": self.cancel_event.is_set(),
+            "cancellable": self.cancellable,
+        }
+
+    @property
+    def cancellable(self) -> bool:
+        # jobs assíncronos recebem cancel_event; o request síncrono já em execução não tem como parar
+        return self.state == "queued" or (self.state == "running" and not self.sync)
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        max_running: int = FTS_JOBS_MAX,
+        class_caps: Optional[dict[str, int]] = None,
+        costs_mb: Optional[dict[str, int]] = None,
+        mem_reserve_mb: int = FTS_MEM_RESERVE_MB,
+        load_max: float = FTS_LOAD_MAX,
+        warmup_sec: float = FTS_JOB_WARMUP_SEC,
+        probe: Optional[HostProbe] = None,
+        tick_sec: float = 2.0,
+        history: int = 50,
+    ):
+        self.max_running = max(1, max_running)
+        self.class_caps = dict(CLASS_CAPS if class_caps is None else class_caps)
+        self.costs_mb = _env_costs() if costs_mb is None else dict(costs_mb)
+        self.mem_reserve_mb = mem_reserve_mb
+        self.load_max = load_max
+        self.warmup_sec = warmup_sec
+        self.probe = probe or HostProbe()
+        self.tick_sec = tick_sec
+        self._cv = threading.Condition()
+        self._queue: list[Job] = []
+        self._running: list[Job] = []
+        self._finished: dict[str, Job] = {}
+        self._history = history
+        self._durations = dict(DEFAULT_DURATIONS_SEC)
+        self._seq = 0
+
+    # ── admissão ────────────────────────────────────────────────────────────────
+
+    def _class(self, kind: str) -> str:
+        return KIND_CLASS.get(kind, "heavy")
+
+    def _blocked_reason(self, job: Job) -> str:
+        if len(self._running) >= self.max_running:
+            return "slots"
+        cls = self._class(job.kind)
+        cap = self.class_caps.get(cls)
+        if cap is not None and sum(1 for j in self._running if self._class(j.kind) == cls) >= cap:
+            return f"cap:{cls}"
+        if not self._running:
+            return ""
+        load = self.probe.load_per_cpu() if self.load_max else None
+        if load is not None and load > self.load_max:
+            return f"cpu:{load:.2f}"
+        avail = self.probe.mem_available_mb()
+        if avail is not None:
+            now = time.time()
+            ramping = sum(j.cost_mb for j in self._running if now - (j.started_at or now) < self.warmup_sec)
+            free = avail - ramping - self.mem_reserve_mb
+            if free < job.cost_mb:
+                return f"mem:{free:.0f}MB<{job.cost_mb}MB"
+        return ""
+
+    def _pump(self) -> None:
+        """Admite da fila o que couber (chamado com o lock)."""
+        self._queue.sort(key=lambda j: (j.priority, j.seq))
+        head_blocked = ""
+        for job in list(self._queue):
+            if head_blocked:
+                # memória/CPU: ninguém de trás passa na frente do job que está esperando recurso
+                job.blocked_by = head_blocked
+                continue
+            reason = self._blocked_reason(job)
+            if reason:
+                job.blocked_by = reason
+                if reason == "slots":
+                    head_blocked = reason  # sem slot livre ninguém entra; a fila toda mostra o motivo
+                    continue
+                if not reason.startswith("cap:"):  # teto da classe não segura as outras classes
+                    head_blocked = f"behind:{job.job_id}"
+                continue
+            self._queue.remove(job)
+            job.state = "running"
+            job.started_at = time.time()
+            job.blocked_by = ""
+            self._running.append(job)
+            job.admitted.set()
+            waited = job.started_at - job.enqueued_at
+            log.info(f"[SCHED] start kind={job.kind} job={job.job_id} prio={job.priority} "
+                     f"waited={waited:.0f}s running={len(self._running)} queued={len(self._queue)}")
+
+    def _enqueue(self, kind: str, priority: Any, job_id: Optional[str], sync: bool) -> Job:
+        job = Job(kind, parse_priority(priority), self.costs_mb.get(kind, 1000),
+                  job_id or uuid.uuid4().hex[:8], sync)
+        with self._cv:
+            self._seq += 1
+            job.seq = self._seq
+            self._queue.append(job)
+            self._pump()
+            if job.state == "queued":
+                log.warning(f"[SCHED] queued kind={job.kind} job={job.job_id} prio={job.priority} "
+                            f"blocked_by={job.blocked_by} position={self._position(job)}")
+        return job
+
+    def _wait_admitted(self, job: Job, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cv:
+            while job.state == "queued":
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # reavalia periodicamente: memória/carga mudam sem nenhum job terminar
+                self._cv.wait(self.tick_sec if remaining is None else min(self.tick_sec, remaining))
+                if job.state == "queued":
+                    self._pump()
+            return job.state == "running"
+
+    def _finish(self, job: Job, state: str) -> None:
+        with self._cv:
+            if job in self._running:
+                self._running.remove(job)
+            job.state = state
+            job.finished_at = time.time()
+            if job.started_at and state == "done":
+                took = job.finished_at - job.started_at
+                prev = self._durations.get(job.kind, took)
+                self._durations[job.kind] = 0.7 * prev + 0.3 * took
+            self._finished[job.job_id] = job
+            while len(self._finished) > self._history:
+                self._finished.pop(next(iter(self._finished)))
+            self._pump()
+            self._cv.notify_all()
+        log.info(f"[SCHED] {state} kind={job.kind} job={job.job_id}")
+
+    # ── API ─────────────────────────────────────────────────────────────────────
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], job_id: Optional[str] = None,
+               priority: Any = "normal") -> Job:
+        """Enfileira um job assíncrono; fn(job) roda em thread própria quando admitido."""
+        job = self._enqueue(kind, priority, job_id, sync=False)
+
+        def _worker():
+            if not self._wait_admitted(job):
+                return  # cancelado na fila
+            state = "done"
+            try:
+                fn(job)
+            except Exception as e:
+                state = "failed"
+                log.exception(f"[SCHED] job {job.job_id} ({job.kind}) crashed: {e}")
+            finally:
+                self._finish(job, state)
+
+        threading.Thread(target=_worker, name=f"{kind}-{job.job_id}", daemon=True).start()
+        return job
+
+    @contextmanager
+    def slot(self, kind: str, priority: Any = "normal", job_id: Optional[str] = None,
+             wait_timeout: Optional[float] = FTS_SYNC_QUEUE_WAIT_SEC) -> Iterator[Job]:
+        """
+        Slot para trabalho síncrono (o request HTTP espera a resposta). Depois de wait_timeout
+        o job roda mesmo sem admissão (o chamador tem timeout próprio) — logado como overcommit.
+        """
+        job = self._enqueue(kind, priority, job_id, sync=True)
+        if not self._wait_admitted(job, wait_timeout):
+            with self._cv:
+                if job.state == "queued":
+                    self._queue.remove(job)
+                    job.state = "running"
+                    job.started_at = time.time()
+                    self._running.append(job)
+                    log.warning(f"[SCHED] overcommit kind={kind} job={job.job_id} — "
+                                f"{wait_timeout:.0f}s na fila (blocked_by={job.blocked_by})")
+        if job.state == "cancelled":
+            raise JobCancelled(f"job {job.job_id} cancelado na fila")
+        state = "done"
+        try:
+            yield job
+        except Exception:
+            state = "failed"
+            raise
+        finally:
+            self._finish(job, state)
+
+    def cancel(self, job_id: str, token: str) -> Optional[dict]:
+        """Cancela (na fila) ou sinaliza cancelamento (rodando). None = job desconhecido; PermissionError = token errado."""
+        with self._cv:
+            job = next((j for j in self._queue + self._running if j.job_id == job_id), None)
+            if job is None:
+                job = self._finished.get(job_id)
+                return job.public() if job else None
+            if token != job.cancel_token:
+                raise PermissionError("cancel_token inválido")
+            if not job.cancellable:
+                log.info(f"[SCHED] cancel ignorado job={job.job_id}: síncrono em execução")
+                return job.public()
+            job.cancel_event.set()
+            if job.state == "queued":
+                self._queue.remove(job)
+                job.state = "cancelled"
+                job.finished_at = time.time()
+                self._finished[job.job_id] = job
+                self._cv.notify_all()
+            log.info(f"[SCHED] cancel job={job.job_id} state={job.state}")
+            return job.public()
+
+    def _position(self, job: Job) -> int:
+        ordered = sorted(self._queue, key=lambda j: (j.priority, j.seq))
+        return ordered.index(job) + 1 if job in ordered else 0
+
+    def _eta_sec(self, job: Job) -> float:
+        """Estimativa grosseira: trabalho restante à frente dividido pelos slots."""
+        now = time.time()
+        ahead = sorted(self._queue, key=lambda j: (j.priority, j.seq))
+        ahead = ahead[:ahead.index(job)] if job in ahead else []
+        remaining = sum(max(0.0, self._durations.get(j.kind, 300) - (now - (j.started_at or now)))
+                        for j in self._running)
+        remaining += sum(self._durations.get(j.kind, 300) for j in ahead)
+        return round(remaining / self.max_running, 1)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self._cv:
+            job = next((j for j in self._queue + self._running if j.job_id == job_id), None)
+            if job is None:
+                job = self._finished.get(job_id)
+                return job.public() if job else None
+            out = job.public()
+            if job.state == "queued":
+                out["position"] = self._position(job)
+                out["eta_sec"] = self._eta_sec(job)
+            else:
+                out["expected_sec"] = round(self._durations.get(job.kind, 300), 1)
+            return out
+
+    def snapshot(self) -> dict:
+        with self._cv:
+            queued = sorted(self._queue, key=lambda j: (j.priority, j.seq))
+            return {
+                "running": [j.public() for j in self._running],
+                "queued": [dict(j.public(), position=i + 1, eta_sec=self._eta_sec(j)) for i, j in enumerate(queued)],
+                "recent": [j.public() for j in list(self._finished.values())[-10:]],
+                "host": {
+                    "mem_available_mb": self.probe.mem_available_mb(),
+                    "load_per_cpu": self.probe.load_per_cpu(),
+                    "mem_reserve_mb": self.mem_reserve_mb,
+                    "load_max": self.load_max,
+                },
+                "limits": {"max_running": self.max_running, "class_caps": self.class_caps, "costs_mb": self.costs_mb},
+            }
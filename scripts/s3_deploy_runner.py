@@ -14,15 +14,18 @@ Fluxo:
   9. Size check (max S3_STATIC_MAX_SIZE_MB) → reject se excede
   10. Callback progress='uploading' → API
   11. Provisão S3 (create bucket + policy + website + lifecycle + tags) via AWS CLI
-  12. Upload em passadas separadas por Content-Type + exclude sensitive
+  12. Upload paralelo e incremental (pula objetos com ETag = MD5 local) + exclude sensitive
   13. Playwright screenshot para health-check (T12 — próxima task)
   14. Callback status='running' + app_url + screenshot_url
   15. finally: shutil.rmtree(/tmp/build-<did>) + restore middleware
 
+cancel_event (job.cancel_event do JobScheduler): checado entre as etapas; cancelado → callback
+status='failed' com error_code CANCELLED (o comando em andamento não é interrompido).
+
 Usa credenciais AWS_S3_DEPLOY_* passadas no payload (não herda do host).
 """
 from __future__ import annotations
-import json, os, shutil, subprocess, tempfile, time, logging, re
+import json, os, shutil, subprocess, tempfile, threading, time, logging, re
 from pathlib import Path
 from typing import Optional
 import urllib.request, urllib.error
@@ -72,7 +75,12 @@ class S3DeployError(Exception):
         self.details = details or {}
 
 
-def run_s3_deploy(payload: dict) -> dict:
+def _check_cancel(cancel_event: Optional[threading.Event], deployment_id: str, step: str) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise S3DeployError("CANCELLED", f"Deploy cancelado antes de '{step}'.", {"step": step})
+
+
+def run_s3_deploy(payload: dict, cancel_event: Optional[threading.Event] = None) -> dict:
     """Ponto de entrada — orquestra tudo. Retorna dict para logging."""
     deployment_id = payload["deployment_id"]
     project_dir_host = payload["project_dir"]
@@ -115,6 +123,7 @@ def run_s3_deploy(payload: dict) -> dict:
         build_dir.mkdir(parents=True, exist_ok=True)
         clone_dir = build_dir / "repo"
         _git_clone(git_clone_url, git_token, git_branch, clone_dir, deployment_id)
+        _check_cancel(cancel_event, deployment_id, "install")
 
         # Detecta onde está o app buildável. Convenção: apps/ (usada pelo Genesis) OU raiz.
         candidates = [clone_dir / "apps", clone_dir]
@@ -167,6 +176,7 @@ def run_s3_deploy(payload: dict) -> dict:
                  env={"NODE_OPTIONS": "--max-old-space-size=4096"})
 
         # 6. Build
+        _check_cancel(cancel_event, deployment_id, "build")
         log.info(f"[s3-deploy] {deployment_id}: pnpm build")
         try:
             _run(["pnpm", "build"], cwd=build_apps, timeout=600,
@@ -202,9 +212,11 @@ def run_s3_deploy(payload: dict) -> dict:
         })
 
         # 9. Provisão S3 (delegada ao módulo separado)
+        _check_cancel(cancel_event, deployment_id, "provision")
         _provision_s3(bucket_name, project_id, tenant_id, deployment_id, ttl_days, aws_env)
 
         # 10. Upload (T11 completa)
+        _check_cancel(cancel_event, deployment_id, "upload")
         upload_output_to_s3(output_dir, bucket_name, aws_env)
 
         # 11. Copia 404.html = index.html se não existe (SPA fallback opcional)
@@ -501,52 +513,174 @@ def _provision_s3(bucket: str, project_id: str, tenant_id: str, deployment_id: s
               "--lifecycle-configuration", lifecycle], aws_env)
 
 
-def upload_output_to_s3(output_dir: Path, bucket: str, aws_env: dict) -> None:
-    """T11: upload em passadas por Content-Type + exclude sensitive."""
-    # Passada 1: index.html + 404.html com no-cache
-    for name in ("index.html", "404.html"):
-        p = output_dir / name
-        if p.exists():
-            _s3_put_file(p, bucket, name, aws_env, cache=CACHE_CONTROL_HTML)
+# Extensões com hash no nome (Next/Vite) — immutable
+HASHED_EXTS = {".js", ".mjs", ".cjs", ".css", ".woff", ".woff2", ".ttf", ".otf",
+               ".eot", ".wasm", ".png", ".jpg", ".jpeg", ".webp", ".avif",
+               ".gif", ".svg", ".ico"}
+# Tipos textuais que ganham variantes pré-comprimidas (<key>.gz / <key>.br) com S3_UPLOAD_PRECOMPRESS
+COMPRESSIBLE_EXTS = {".html", ".htm", ".js", ".mjs", ".cjs", ".css", ".json", ".svg", ".xml", ".txt", ".wasm"}
+_PRECOMPRESS_MIN_BYTES = 1024
 
-    # Passada 2: outros HTMLs (páginas Next.js exportadas)
-    for p in output_dir.rglob("*.html"):
-        rel = p.relative_to(output_dir).as_posix()
-        if rel in ("index.html", "404.html"):
-            continue
-        _s3_put_file(p, bucket, rel, aws_env, cache=CACHE_CONTROL_HTML)
-
-    # Passada 3: assets estáticos (JS/CSS/imgs/fonts/wasm) — immutable
-    hashed_exts = {".js", ".mjs", ".cjs", ".css", ".woff", ".woff2", ".ttf", ".otf",
-                   ".eot", ".wasm", ".png", ".jpg", ".jpeg", ".webp", ".avif",
-                   ".gif", ".svg", ".ico"}
-    for p in output_dir.rglob("*"):
-        if not p.is_file():
-            continue
-        if p.suffix.lower() not in hashed_exts:
-            continue
-        # Exclude sensitive
-        if _is_sensitive(p.relative_to(output_dir).as_posix()):
-            continue
-        rel = p.relative_to(output_dir).as_posix()
-        _s3_put_file(p, bucket, rel, aws_env, cache=CACHE_CONTROL_IMMUTABLE)
 
-    # Passada 4: JSON, XML, TXT
-    for ext in (".json", ".xml", ".txt"):
-        for p in output_dir.rglob(f"*{ext}"):
-            if _is_sensitive(p.relative_to(output_dir).as_posix()):
-                continue
+def _upload_settings() -> dict:
+    precompress = {
+        v.strip().lower() for v in os.environ.get("S3_UPLOAD_PRECOMPRESS", "").split(",") if v.strip()
+    }
+    return {
+        "workers": max(1, int(os.environ.get("S3_UPLOAD_WORKERS", "16") or 16)),
+        "native": os.environ.get("S3_UPLOAD_NATIVE", "true").strip().lower() in ("1", "true", "yes"),
+        "skip_unchanged": os.environ.get("S3_UPLOAD_SKIP_UNCHANGED", "true").strip().lower() in ("1", "true", "yes"),
+        "precompress": precompress & {"gzip", "br"},
+    }
+
+
+def _upload_plan(output_dir: Path) -> list[tuple[str, Path, str]]:
+    """
+    (key, arquivo local, Cache-Control) de tudo que sobe, numa única varredura.
+    Mesmas regras das antigas passadas por tipo: HTML no-cache, assets com hash immutable,
+    JSON/XML/TXT no-cache, sensíveis e demais extensões (.map etc.) ficam de fora.
+    """
+    plan: list[tuple[str, Path, str]] = []
+    for dirpath, _dirs, files in os.walk(output_dir):
+        for name in files:
+            p = Path(dirpath) / name
             rel = p.relative_to(output_dir).as_posix()
-            _s3_put_file(p, bucket, rel, aws_env, cache="no-cache")
+            ext = p.suffix.lower()
+            if ext == ".html":
+                plan.append((rel, p, CACHE_CONTROL_HTML))
+            elif ext in HASHED_EXTS and not _is_sensitive(rel):
+                plan.append((rel, p, CACHE_CONTROL_IMMUTABLE))
+            elif ext in (".json", ".xml", ".txt") and not _is_sensitive(rel):
+                plan.append((rel, p, "no-cache"))
+    # index.html / 404.html primeiro (mesma ordem das passadas antigas)
+    plan.sort(key=lambda item: (item[0] not in ("index.html", "404.html"), item[0]))
+    return plan
+
+
+def _s3_client(aws_env: dict, pool_size: int):
+    """Cliente boto3 único (pool de conexões HTTP keep-alive para os workers); None sem boto3."""
+    try:
+        import boto3  # type: ignore
+        from botocore.config import Config  # type: ignore
+    except ImportError:
+        return None
+    return boto3.session.Session(
+        aws_access_key_id=aws_env.get("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=aws_env.get("AWS_SECRET_ACCESS_KEY"),
+        aws_session_token=aws_env.get("AWS_SESSION_TOKEN") or None,  # credenciais temporárias (STS)
+        region_name=aws_env.get("AWS_DEFAULT_REGION", "us-east-1"),
+    ).client("s3", config=Config(max_pool_connections=pool_size, retries={"max_attempts": 5, "mode": "standard"}))
+
+
+def _remote_etags(bucket: str, aws_env: dict, client=None) -> dict[str, str]:
+    """key → ETag (MD5 hex em objetos de put simples) do que já está no bucket. {} se não der para listar."""
+    etags: dict[str, str] = {}
+    try:
+        if client is not None:
+            for page in client.get_paginator("list_objects_v2").paginate(Bucket=bucket):
+                for obj in page.get("Contents", []) or []:
+                    etags[obj["Key"]] = obj.get("ETag", "").strip('"')
+        else:
+            r = _run_aws(["s3api", "list-objects-v2", "--bucket", bucket, "--output", "json"], aws_env, timeout=120)
+            for obj in (json.loads(r.stdout) if r.stdout.strip() else {}).get("Contents", []) or []:
+                etags[obj["Key"]] = obj.get("ETag", "").strip('"')
+    except Exception as e:
+        log.warning(f"[s3-deploy] listagem do bucket {bucket} falhou ({e}) — upload completo")
+        return {}
+    return etags
+
+
+def _compress(body: bytes, encoding: str) -> bytes | None:
+    if encoding == "gzip":
+        import gzip
+        return gzip.compress(body, compresslevel=9, mtime=0)  # mtime=0: bytes determinísticos → ETag estável
+    try:
+        import brotli  # type: ignore
+    except ImportError:
+        return None
+    return brotli.compress(body)
+
+
+def upload_output_to_s3(output_dir: Path, bucket: str, aws_env: dict) -> dict:
+    """
+    T11: upload do output estático com pool de workers sobre um único cliente S3.
+
+    Incremental: objeto cujo ETag remoto já bate com o MD5 local não é reenviado.
+    Sem boto3 (ou S3_UPLOAD_NATIVE=false) usa o AWS CLI, também em paralelo.
+    Retorna {uploaded, skipped, bytes, variants}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import hashlib
+    import threading
+
+    settings = _upload_settings()
+    client = _s3_client(aws_env, settings["workers"]) if settings["native"] else None
+    remote = _remote_etags(bucket, aws_env, client) if settings["skip_unchanged"] else {}
+    plan = _upload_plan(output_dir)
+    stats = {"uploaded": 0, "skipped": 0, "bytes": 0, "variants": 0}
+    lock = threading.Lock()
+    missing_br = []
+
+    def _put(key: str, body: bytes, ct: str, cache: str, local: Path, encoding: str | None = None) -> None:
+        if remote.get(key) == hashlib.md5(body).hexdigest():
+            with lock:
+                stats["skipped"] += 1
+            return
+        if client is not None:
+            extra = {"ContentEncoding": encoding} if encoding else {}
+            client.put_object(Bucket=bucket, Key=key, Body=body, ContentType=ct, CacheControl=cache, **extra)
+        elif encoding:
+            with tempfile.NamedTemporaryFile(suffix=f".{encoding}") as tmp:
+                tmp.write(body)
+                tmp.flush()
+                _s3_put_file(Path(tmp.name), bucket, key, aws_env, cache=cache, content_type=ct, content_encoding=encoding)
+        else:
+            _s3_put_file(local, bucket, key, aws_env, cache=cache)
+        with lock:
+            stats["uploaded"] += 1
+            stats["bytes"] += len(body)
+            if encoding:
+                stats["variants"] += 1
+
+    def _upload(item: tuple[str, Path, str]) -> None:
+        key, local, cache = item
+        body = local.read_bytes()
+        ct = CONTENT_TYPE_MAP.get(local.suffix.lower(), "application/octet-stream")
+        _put(key, body, ct, cache, local)
+        if local.suffix.lower() not in COMPRESSIBLE_EXTS or len(body) < _PRECOMPRESS_MIN_BYTES:
+            return
+        for encoding in sorted(settings["precompress"]):
+            packed = _compress(body, encoding)
+            if packed is None:
+                missing_br.append(key)
+                continue
+            if len(packed) < len(body):
+                _put(f"{key}.{'gz' if encoding == 'gzip' else 'br'}", packed, ct, cache, local, encoding)
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=settings["workers"], thread_name_prefix="s3-upload") as pool:
+        # list() propaga a primeira exceção (S3DeployError do CLI / ClientError do boto3)
+        list(pool.map(_upload, plan))
+    if missing_br:
+        log.warning("[s3-deploy] S3_UPLOAD_PRECOMPRESS=br sem o módulo brotli — variantes .br ignoradas")
+    log.info(
+        f"[s3-deploy] upload {bucket}: {stats['uploaded']} enviados, {stats['skipped']} inalterados "
+        f"({stats['bytes'] / 1024:.0f}KB, {stats['variants']} variantes comprimidas) em {time.time() - t0:.1f}s "
+        f"via {'boto3' if client is not None else 'aws cli'} x{settings['workers']}"
+    )
+    return stats
 
 
 def _s3_put_file(local: Path, bucket: str, key: str, aws_env: dict,
-                 cache: str = "public, max-age=3600") -> None:
-    ct = CONTENT_TYPE_MAP.get(local.suffix.lower(), "application/octet-stream")
+                 cache: str = "public, max-age=3600", content_type: str | None = None,
+                 content_encoding: str | None = None) -> None:
+    ct = content_type or CONTENT_TYPE_MAP.get(local.suffix.lower(), "application/octet-stream")
     args = ["s3api", "put-object", "--bucket", bucket, "--key", key,
             "--body", str(local),
             "--content-type", ct,
             "--cache-control", cache]
+    if content_encoding:
+        args += ["--content-encoding", content_encoding]
     _run_aws(args, aws_env)
 
 
@@ -0,0 +1,202 @@
+"""
+Benchmark do parse de ResponseEnvelope: parser tolerante em passada única (envelope_parser) contra
+a cascata anterior de resilient_json_parse (ENVELOPE_PARSER=legacy).
+
+Corpus: respostas brutas persistidas (raw_response_*.txt em docs/<role>/ dos projetos) e/ou um
+corpus sintético com as quebras típicas da LLM — quebras de linha e aspas cruas em content,
+template literals com backticks e saída truncada (max_tokens). Mede tempo por resposta, taxa de
+recuperação (envelope sem erro de parse) e artifacts recuperados.
+
+Fica em tests/e2e/ junto com bench_pipeline.py; roda em processo, sem agentes nem CLAUDE_API_KEY.
+
+Uso (a partir da raiz do repositório):
+    python tests/e2e/bench_envelope_parser.py --corpus ~/zentriz-files
+    python tests/e2e/bench_envelope_parser.py --synthetic 200 --out parser.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Pacote orchestrator (envelope, envelope_parser, agents.mock_llm) importado de applications/
+_APPLICATIONS_ROOT = Path(__file__).resolve().parents[2] / "applications"
+if str(_APPLICATIONS_ROOT) not in sys.path:
+    sys.path.insert(0, str(_APPLICATIONS_ROOT))
+
+_QUOTED_SNIPPETS = (
+    'const saudacao = "Olá, " + nome + "!";\n',
+    'const o = { a: "x" },\n  b = "y";\n',
+    'Clique em "Salvar", depois em "Publicar".\n',
+    "const css = `calc(100vh - ${HEADER}px)`;\n",
+    'logger.info("status": "ok");\n',
+)
+
+
+def load_recorded(roots: list[str]) -> list[tuple[str, str]]:
+    """(nome, texto) de cada raw_response_*.txt sob as raízes."""
+    samples = []
+    for root in roots:
+        base = Path(root).expanduser()
+        if not base.is_dir():
+            continue
+        for path in sorted(base.rglob("raw_response_*.txt")):
+            try:
+                samples.append((str(path.relative_to(base)), path.read_text(encoding="utf-8", errors="replace")))
+            except OSError as e:
+                logger.warning("[BenchParser] %s ilegível: %s", path, e)
+    return samples
+
+
+def _render(envelope: dict, raw_contents: bool) -> str:
+    """Envelope em texto de resposta; raw_contents=True grava content sem escapar (como a LLM às vezes faz)."""
+    if not raw_contents:
+        return "<response>\n" + json.dumps(envelope, ensure_ascii=False, indent=2) + "\n</response>"
+    contents = [a["content"] for a in envelope["artifacts"]]
+    marked = dict(envelope, artifacts=[dict(a, content=f"@@C{i}@@") for i, a in enumerate(envelope["artifacts"])])
+    text = json.dumps(marked, ensure_ascii=False, indent=2)
+    for i, content in enumerate(contents):
+        text = text.replace(f'"@@C{i}@@"', '"' + content + '"', 1)
+    return "<response>\n" + text + "\n</response>"
+
+
+def synthetic_corpus(count: int, seed: int = 7, artifact_chars: int = 6000) -> list[tuple[str, str, dict | None]]:
+    """(nome, texto, envelope esperado | None se truncado) com as quebras típicas."""
+    from orchestrator.agents import mock_llm
+
+    rng = random.Random(seed)
+    roles = [("CTO", "charter_and_proposal"), ("ENGINEER", "generate_engineering_docs"),
+             ("PM", "generate_backlog"), ("DEV", "implement_task"), ("QA", "validate_task")]
+    kinds = ("valid", "raw_newlines", "raw_quotes", "truncated", "truncated_raw")
+    previous = mock_llm.MOCK_LLM_ARTIFACT_CHARS
+    mock_llm.MOCK_LLM_ARTIFACT_CHARS = artifact_chars
+    try:
+        samples = []
+        for n in range(count):
+            role, mode = roles[n % len(roles)]
+            kind = kinds[(n // len(roles)) % len(kinds)]
+            envelope = json.loads(mock_llm.synthesize_envelope(role, {"request_id": f"r{n}", "mode": mode, "task_id": f"TSK-{n:03d}"}))
+            if kind in ("raw_quotes", "truncated_raw"):
+                for art in envelope["artifacts"]:
+                    lines = art["content"].splitlines(keepends=True)
+                    for _ in range(3):
+                        lines.insert(rng.randrange(len(lines) + 1), rng.choice(_QUOTED_SNIPPETS))
+                    art["content"] = "".join(lines)
+            text = _render(envelope, raw_contents=kind != "valid")
+            expected = envelope
+            if kind.startswith("truncated"):
+                text = text[: rng.randrange(len(text) * 6 // 10, len(text) * 95 // 100)]
+                expected = None
+            samples.append((f"synthetic/{kind}/{role.lower()}-{n}", text, expected))
+        return samples
+    finally:
+        mock_llm.MOCK_LLM_ARTIFACT_CHARS = previous
+
+
+def _time_parse(fn, text: str, repeat: int) -> tuple[dict, list[str], float]:
+    best = float("inf")
+    data, errors = {}, []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        data, errors = fn(text, "bench")
+        best = min(best, time.perf_counter() - t0)
+    return data, errors, best * 1000.0
+
+
+def run(samples: list[tuple[str, str, dict | None]], repeat: int = 3) -> dict:
+    from orchestrator import envelope as env
+
+    parsers = {"legacy": env._legacy_resilient_json_parse, "tolerant": env._tolerant_json_parse}
+    env_logger = logging.getLogger("orchestrator.envelope")
+    level = env_logger.level
+    env_logger.setLevel(logging.CRITICAL)  # a cascata loga erro a cada resposta irrecuperável
+    try:
+        return _run(samples, parsers, repeat)
+    finally:
+        env_logger.setLevel(level)
+
+
+def _run(samples: list[tuple[str, str, dict | None]], parsers: dict, repeat: int) -> dict:
+    from orchestrator.envelope import TOLERANT_PARSE_WARNING, TRUNCATED_PARSE_WARNING
+
+    warnings = (TOLERANT_PARSE_WARNING, TRUNCATED_PARSE_WARNING)
+    stats = {name: {"times_ms": [], "recovered": 0, "artifacts": 0, "exact": 0} for name in parsers}
+    disagreements = []
+    expected_total = 0
+    for name, text, expected in samples:
+        results = {}
+        for parser, fn in parsers.items():
+            data, errors, ms = _time_parse(fn, text, repeat)
+            st = stats[parser]
+            st["times_ms"].append(ms)
+            # aviso do parse tolerante = envelope recuperado (o runtime ainda manda para repair)
+            ok = not [e for e in errors if e not in warnings] and data.get("status") != "FAIL"
+            arts = [a for a in data.get("artifacts") or [] if isinstance(a, dict)]
+            st["recovered"] += ok
+            st["artifacts"] += len(arts)
+            if expected is not None and ok and [(a.get("path"), a.get("content")) for a in arts] == [
+                (a["path"], a["content"]) for a in expected["artifacts"]
+            ]:
+                st["exact"] += 1
+            results[parser] = (ok, [(a.get("path"), a.get("content")) for a in arts])
+        expected_total += expected is not None
+        if results["legacy"][0] and results["tolerant"][0] and results["legacy"][1] != results["tolerant"][1]:
+            disagreements.append(name)
+    report = {"samples": len(samples), "with_expected": expected_total, "parsers": {}}
+    for parser, st in stats.items():
+        times = sorted(st["times_ms"]) or [0.0]
+        report["parsers"][parser] = {
+            "total_ms": round(sum(times), 3),
+            "mean_ms": round(statistics.fmean(times), 4),
+            "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+            "max_ms": round(times[-1], 4),
+            "recovered": st["recovered"],
+            "recovery_rate": round(st["recovered"] / max(1, len(samples)), 4),
+            "artifacts": st["artifacts"],
+            "exact": st["exact"],
+        }
+    legacy_total = report["parsers"]["legacy"]["total_ms"]
+    report["speedup"] = round(legacy_total / max(report["parsers"]["tolerant"]["total_ms"], 1e-9), 2)
+    report["disagreements"] = disagreements[:50]
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do parse de ResponseEnvelope (tolerante vs cascata)")
+    parser.add_argument("--corpus", action="append", default=[],
+                        help="Diretório com raw_response_*.txt (recursivo; repetível). Padrão: PROJECT_FILES_ROOT")
+    parser.add_argument("--synthetic", type=int, default=None,
+                        help="Respostas sintéticas a gerar (padrão: 100 se não houver gravações)")
+    parser.add_argument("--artifact-chars", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por resposta (vale a melhor)")
+    parser.add_argument("--out", help="Grava o relatório JSON neste arquivo")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    roots = args.corpus or [os.environ.get("PROJECT_FILES_ROOT", "").strip() or str(Path.home() / "zentriz-files")]
+    samples: list[tuple[str, str, dict | None]] = [(n, t, None) for n, t in load_recorded(roots)]
+    synthetic = args.synthetic if args.synthetic is not None else (0 if samples else 100)
+    if synthetic:
+        samples += synthetic_corpus(synthetic, artifact_chars=args.artifact_chars)
+    if not samples:
+        logger.error("[BenchParser] Corpus vazio (sem raw_response_*.txt em %s)", roots)
+        return 1
+    logger.info("[BenchParser] %d respostas (%d sintéticas)", len(samples), synthetic)
+    report = run(samples, repeat=max(1, args.repeat))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
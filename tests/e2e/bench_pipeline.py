@@ -0,0 +1,337 @@
+"""
+Benchmark offline do pipeline (CTO → Engineer → PM → Monitor Loop) sem custo de LLM.
+
+Roda o runner real como subprocesso com GENESIS_LLM_PROVIDER=mock (agents/mock_llm.py) contra um
+stand-in local da api-node (projeto + tasks em memória, /api/batch, long-poll /changes) e mede:
+wall time, latência por fase (agent:mode, a partir dos logs agent_call — LEI 10), chamadas HTTP
+por rota e pico de memória (ru_maxrss) do runner.
+
+Fica em tests/e2e/ com os demais fluxos ponta a ponta; diferente deles, não precisa dos agentes
+no ar nem de CLAUDE_API_KEY.
+
+Uso (a partir da raiz do repositório):
+    python tests/e2e/bench_pipeline.py --out bench.json
+    # respostas gravadas (raw_response_*.txt) em vez de envelopes sintéticos
+    python tests/e2e/bench_pipeline.py --recordings ~/zentriz-files/<project_id>/docs
+    # gate de regressão: falha (exit 2) se piorar mais que 10% em relação ao baseline
+    python tests/e2e/bench_pipeline.py --baseline bench.json --max-regression 0.10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+_APPLICATIONS_ROOT = Path(__file__).resolve().parents[2] / "applications"
+
+DEFAULT_SPEC = """# Produto: Lista de Tarefas (benchmark)
+
+## Visão
+Aplicação web simples para cadastrar, listar e concluir tarefas pessoais.
+
+## Requisitos funcionais
+- FR-01: Usuário cadastra tarefa com título e descrição.
+- FR-02: Usuário lista tarefas pendentes e concluídas.
+- FR-03: Usuário marca tarefa como concluída.
+
+## Requisitos não funcionais
+- NFR-01: Interface responsiva.
+- NFR-02: Tempo de resposta abaixo de 300 ms.
+"""
+
+# Métricas comparadas no gate de regressão (menor é melhor)
+REGRESSION_METRICS = ("wall_time_sec", "http_calls_total", "peak_rss_mb", "orchestration_overhead_sec")
+
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-f]{8}-[0-9a-f-]{27}|TSK-[\w-]+|\d+)$", re.IGNORECASE)
+
+
+def _route(path: str) -> str:
+    """Path → rota sem ids (/api/projects/{id}/tasks/{id}) para agrupar contagens."""
+    return "/".join("{id}" if _ID_SEGMENT.match(seg) else seg for seg in urlsplit(path).path.split("/"))
+
+
+class ApiStandIn:
+    """api-node mínima em memória: o suficiente para o runner percorrer o pipeline inteiro."""
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.project: dict = {"id": project_id, "status": "running", "title": "Benchmark", "extra": {}}
+        self.tasks: dict[str, dict] = {}
+        self.calls: Counter = Counter()
+        self.version = 1
+        self._cond = threading.Condition()
+        self._server: ThreadingHTTPServer | None = None
+
+    # ── estado ───────────────────────────────────────────────────────────────
+
+    def _changed(self) -> None:
+        with self._cond:
+            self.version += 1
+            self._cond.notify_all()
+
+    def handle(self, method: str, path: str, body) -> tuple[int, object]:
+        self.calls[f"{method} {_route(path)}"] += 1
+        parts = urlsplit(path)
+        segs = [s for s in parts.path.split("/") if s]
+        if parts.path == "/api/batch" and method == "POST":
+            responses = []
+            for op in (body or {}).get("requests") or []:
+                status, data = self.handle(str(op.get("method", "GET")).upper(), op.get("path", ""), op.get("body"))
+                responses.append({"status": status, "body": data})
+            return 200, {"responses": responses}
+        if segs[:2] != ["api", "projects"] or len(segs) < 3:
+            return 200, {"ok": True}
+        rest = segs[3:]
+        if not rest:
+            if method == "GET":
+                return 200, dict(self.project)
+            if method in ("PATCH", "PUT") and isinstance(body, dict):
+                self.project.update(body)
+                self._changed()
+            return 200, dict(self.project)
+        if rest == ["changes"]:
+            qs = parse_qs(parts.query)
+            since = (qs.get("since") or [None])[0]
+            if since is not None:
+                timeout = float((qs.get("timeout") or ["1"])[0])
+                with self._cond:
+                    self._cond.wait_for(lambda: str(self.version) != since, timeout=timeout)
+            return 200, {"version": str(self.version), "changed": since is not None and str(self.version) != since}
+        if rest[0] == "tasks":
+            if len(rest) == 1:
+                if method == "GET":
+                    return 200, list(self.tasks.values())
+                if method == "POST":
+                    for task in (body or {}).get("tasks") or []:
+                        tid = task.get("task_id")
+                        if tid:
+                            self.tasks[tid] = {**self.tasks.get(tid, {}), **task}
+                    self._changed()
+                    return 201, {"ok": True, "count": len(self.tasks)}
+            elif method in ("PATCH", "PUT"):
+                task = self.tasks.setdefault(rest[1], {"task_id": rest[1]})
+                task.update(body or {})
+                self._changed()
+                return 200, task
+            return 200, {"ok": True}
+        if method == "GET":
+            if rest[0] in ("spec-files", "links", "dialogue"):
+                return 200, []
+            if rest[0] == "cost":
+                return 200, {"total_usd": 0.0}
+            return 200, {}
+        return 200, {"ok": True}
+
+    # ── servidor ─────────────────────────────────────────────────────────────
+
+    def start(self) -> str:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como a api-node
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                status, data = stand_in.handle(self.command, self.path, body)
+                payload = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _serve
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="bench-api", daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _phase_stats(log_lines: list[str]) -> tuple[dict, float]:
+    """Agrupa os logs agent_call (LEI 10) por agent:mode → (stats, soma das durações em s)."""
+    phases: dict[str, dict] = defaultdict(lambda: {"calls": 0, "total_ms": 0, "max_ms": 0})
+    total_ms = 0
+    for line in log_lines:
+        start = line.find('{"event": "agent_call"')
+        if start < 0:
+            continue
+        try:
+            entry = json.loads(line[start:])
+        except ValueError:
+            continue
+        key = f"{entry.get('agent')}:{entry.get('mode')}"
+        ms = int(entry.get("duration_ms") or 0)
+        phase = phases[key]
+        phase["calls"] += 1
+        phase["total_ms"] += ms
+        phase["max_ms"] = max(phase["max_ms"], ms)
+        total_ms += ms
+    return dict(phases), total_ms / 1000.0
+
+
+def run_benchmark(
+    spec_path: Path | None = None,
+    recordings: str | None = None,
+    timeout: float = 900,
+    extra_env: dict | None = None,
+    keep_files: bool = False,
+) -> dict:
+    """Executa um pipeline completo com o provider mock e devolve o relatório."""
+    project_id = str(uuid.uuid4())
+    work = Path(tempfile.mkdtemp(prefix="genesis-bench-"))
+    if spec_path is None:
+        spec_path = work / "PRODUCT_SPEC.md"
+        spec_path.write_text(DEFAULT_SPEC, encoding="utf-8")
+    stand_in = ApiStandIn(project_id)
+    base_url = stand_in.start()
+    env = {k: v for k, v in os.environ.items() if k not in ("API_AGENTS_URL", "DATABASE_URL")}
+    env.update({
+        "GENESIS_LLM_PROVIDER": "mock",
+        "API_BASE_URL": base_url,
+        "GENESIS_API_TOKEN": "bench",
+        "PROJECT_ID": project_id,
+        "PROJECT_FILES_ROOT": str(work / "files"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    if recordings:
+        env["MOCK_LLM_RECORDINGS"] = recordings
+    env.update(extra_env or {})
+    cmd = [sys.executable, "-m", "orchestrator.runner", "--spec-file", str(spec_path)]
+    log_lines: list[str] = []
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(  # noqa: S603
+        cmd, cwd=str(_APPLICATIONS_ROOT), env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace",
+    )
+    reader = threading.Thread(target=lambda: log_lines.extend(proc.stdout), daemon=True)
+    reader.start()
+    timed_out = False
+    rusage = None
+    while True:
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            break
+        if time.perf_counter() - t0 > timeout:
+            timed_out = True
+            proc.kill()
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            break
+        time.sleep(0.05)
+    wall = time.perf_counter() - t0
+    reader.join(timeout=5)
+    stand_in.stop()
+    phases, agent_sec = _phase_stats(log_lines)
+    report = {
+        "project_id": project_id,
+        "exit_code": proc.returncode,
+        "timed_out": timed_out,
+        "wall_time_sec": round(wall, 3),
+        "agent_time_sec": round(agent_sec, 3),
+        # dev paralelo pode somar mais que o wall: overhead nunca negativo
+        "orchestration_overhead_sec": round(max(0.0, wall - agent_sec), 3),
+        "peak_rss_mb": round(rusage.ru_maxrss / 1024.0, 1) if rusage else None,
+        "http_calls_total": sum(stand_in.calls.values()),
+        "http_calls": dict(stand_in.calls.most_common()),
+        "phases": phases,
+        "project_status": stand_in.project.get("status"),
+        "tasks": {tid: t.get("status") for tid, t in stand_in.tasks.items()},
+        "work_dir": str(work) if keep_files else None,
+    }
+    if not keep_files:
+        import shutil
+        shutil.rmtree(work, ignore_errors=True)
+        # checkpoints do PipelineContext (runner.STATE_DIR/<project_id>) do projeto descartável
+        shutil.rmtree(_APPLICATIONS_ROOT / "orchestrator" / "state" / project_id, ignore_errors=True)
+    else:
+        (work / "runner.log").write_text("".join(log_lines), encoding="utf-8")
+    return report
+
+
+def compare_to_baseline(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Métricas que pioraram mais que max_regression (fração) em relação ao baseline."""
+    regressions = []
+    for metric in REGRESSION_METRICS:
+        old, new = baseline.get(metric), report.get(metric)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old <= 0:
+            continue
+        if new > old * (1 + max_regression):
+            regressions.append(f"{metric}: {old} → {new} (+{(new / old - 1) * 100:.1f}%)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline com provider LLM mock")
+    parser.add_argument("--spec-file", default=None, help="Spec a usar (default: spec pequena embutida)")
+    parser.add_argument("--recordings", default=None, help="Diretório(s) com raw_response_*.txt para replay (separados por os.pathsep)")
+    parser.add_argument("--latency-ms", type=float, default=None, help="MOCK_LLM_LATENCY_MS")
+    parser.add_argument("--tokens-per-sec", type=float, default=None, help="MOCK_LLM_TOKENS_PER_SEC")
+    parser.add_argument("--timeout", type=float, default=900, help="Tempo máximo do runner (s)")
+    parser.add_argument("--runs", type=int, default=1, help="Execuções; o relatório usa a mediana do wall time")
+    parser.add_argument("--out", default=None, help="Grava o relatório JSON neste arquivo")
+    parser.add_argument("--baseline", default=None, help="Relatório anterior para o gate de regressão")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Piora máxima tolerada (fração)")
+    parser.add_argument("--keep-files", action="store_true", help="Mantém diretório de trabalho e runner.log")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    extra_env = {}
+    if args.latency_ms is not None:
+        extra_env["MOCK_LLM_LATENCY_MS"] = str(args.latency_ms)
+    if args.tokens_per_sec is not None:
+        extra_env["MOCK_LLM_TOKENS_PER_SEC"] = str(args.tokens_per_sec)
+    spec = Path(args.spec_file).resolve() if args.spec_file else None
+    reports = [
+        run_benchmark(spec, args.recordings, args.timeout, extra_env, args.keep_files)
+        for _ in range(max(1, args.runs))
+    ]
+    reports.sort(key=lambda r: r["wall_time_sec"])
+    report = reports[len(reports) // 2]
+    if len(reports) > 1:
+        report["runs_wall_time_sec"] = [r["wall_time_sec"] for r in reports]
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if report["timed_out"] or report["exit_code"] != 0:
+        logger.error("[Bench] Runner não terminou normalmente (exit=%s, timeout=%s)", report["exit_code"], report["timed_out"])
+        return 1
+    if args.baseline:
+        regressions = compare_to_baseline(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.max_regression)
+        if regressions:
+            logger.error("[Bench] Regressão acima de %.0f%%:\n  %s", args.max_regression * 100, "\n  ".join(regressions))
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
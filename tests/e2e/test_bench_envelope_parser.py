@@ -0,0 +1,13 @@
+"""
+Corpus sintético do benchmark de parse (bench_envelope_parser.py): o parser tolerante recupera
+tudo que a cascata anterior recuperava, com os artifacts exatos. Roda em processo, sem agentes.
+"""
+from bench_envelope_parser import run, synthetic_corpus
+
+
+def test_benchmark_corpus_tolerant_recovers_at_least_legacy():
+    report = run(synthetic_corpus(25, artifact_chars=800), repeat=1)
+    legacy, tolerant = report["parsers"]["legacy"], report["parsers"]["tolerant"]
+    assert tolerant["recovered"] == report["samples"]
+    assert tolerant["recovered"] >= legacy["recovered"]
+    assert tolerant["exact"] == report["with_expected"]
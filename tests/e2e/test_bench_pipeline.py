@@ -0,0 +1,18 @@
+"""
+Stand-in da api-node e gate de regressão do benchmark offline (bench_pipeline.py).
+Não sobe agentes nem runner: roda sem CLAUDE_API_KEY.
+"""
+from bench_pipeline import ApiStandIn, compare_to_baseline
+
+
+def test_stand_in_batch_and_regression_gate():
+    api = ApiStandIn("p1")
+    status, body = api.handle("POST", "/api/projects/p1/tasks", {"taskId": "TSK-001", "status": "ASSIGNED"})
+    assert status in (200, 201)
+    status, body = api.handle("PATCH", "/api/projects/p1", {"status": "completed"})
+    assert api.project["status"] == "completed"
+    assert sum(api.calls.values()) == 2
+
+    base = {"wall_time_sec": 10.0, "peak_rss_mb": 100.0, "http_calls_total": 50}
+    assert compare_to_baseline(dict(base, wall_time_sec=10.5), base, 0.10) == []
+    assert compare_to_baseline(dict(base, wall_time_sec=12.0), base, 0.10)